@@ -0,0 +1,112 @@
+# bench_core.py
+# 核心数据函数的 pytest-benchmark 套件：在 1 / 5 / 20 年的合成日记上分别计时
+# 覆盖日记读写、周记读写、周 / 月聚合、Markdown 生成、报告数据收集，以及往年数据冻结前后的读取
+#
+# 用法（在项目根目录执行，需要 pip install pytest-benchmark）：
+#   python -m pytest benchmarks --benchmark-json benchmarks/results/current.json
+#   JOURNAL_BENCH_YEARS=1,5 python -m pytest benchmarks -k load      # 缩小规模 / 只跑部分用例
+#   python benchmarks/compare.py benchmarks/results/baseline.json benchmarks/results/current.json
+
+import os
+import pytest
+from datetime import timedelta
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import reference_date  # noqa: E402
+
+# 会写文件的函数只跑固定轮数，避免校准阶段反复写盘拖长整个套件
+WRITE_ROUNDS = 5
+
+
+# ==========================================
+# 1. 日记
+# ==========================================
+
+def bench_load_data_for_date(benchmark, journal):
+    from core.data_manager import load_data_for_date
+    summary, tasks, time_df = benchmark(load_data_for_date, reference_date())
+    assert len(time_df) == 48
+
+
+def bench_save_all_data(benchmark, journal):
+    from core.data_manager import load_data_for_date, save_all_data
+    day = reference_date()
+    summary, tasks, time_df = load_data_for_date(day)
+
+    def save():
+        save_all_data(day, dict(summary), tasks.copy(), time_df.copy())
+
+    benchmark.pedantic(save, rounds=WRITE_ROUNDS, iterations=1)
+
+
+def bench_generate_markdown(benchmark, journal):
+    from core.data_manager import load_data_for_date, generate_markdown
+    day = reference_date()
+    summary, tasks, time_df = load_data_for_date(day)
+    path = os.path.join(journal, "bench_diary.md")
+    benchmark(generate_markdown, day, summary, tasks, time_df, path)
+
+
+# ==========================================
+# 2. 周记 / 月记
+# ==========================================
+
+def bench_load_weekly_data(benchmark, journal):
+    from core.weekly_data_manager import get_week_info, load_weekly_data
+    week_key, iso_year, *_ = get_week_info(reference_date())
+    benchmark(load_weekly_data, week_key, iso_year)
+
+
+def bench_save_weekly_data(benchmark, journal):
+    from core.weekly_data_manager import get_week_info, load_weekly_data, save_weekly_data
+    week_key, iso_year, iso_week, monday, sunday = get_week_info(reference_date())
+    summary, habits, tasks = load_weekly_data(week_key, iso_year)
+
+    def save():
+        save_weekly_data(week_key, iso_year, iso_week, monday, sunday,
+                         dict(summary), habits.copy(), tasks.copy())
+
+    benchmark.pedantic(save, rounds=WRITE_ROUNDS, iterations=1)
+
+
+def bench_aggregate_daily_data(benchmark, journal):
+    from core.weekly_data_manager import get_week_info, aggregate_daily_data
+    monday = get_week_info(reference_date())[3]
+    result = benchmark(aggregate_daily_data, monday)
+    assert result["Avg_Mood"] is not None
+
+
+def bench_aggregate_monthly_data(benchmark, journal):
+    from core.monthly_data_manager import aggregate_monthly_data
+    day = reference_date()
+    result = benchmark(aggregate_monthly_data, day.year, day.month)
+    assert result["Avg_Mood"] is not None
+
+
+# ==========================================
+# 3. 报告数据收集
+# ==========================================
+
+def bench_collect_all_data(benchmark, journal):
+    from core.report_data_collector import collect_all_data
+    data = benchmark(collect_all_data)
+    assert data["daily_summary"]
+
+
+# ==========================================
+# 4. 往年数据（原始 CSV / 冻结后）
+# ==========================================
+
+def bench_history_week_range(benchmark, history_journal):
+    """去年某一周的时间轴：冻结后借助索引只解析这一周的行"""
+    from core.journal_store import iter_rows
+    day = reference_date().replace(year=reference_date().year - 1)
+    start, end = day.isoformat(), (day + timedelta(days=6)).isoformat()
+    benchmark(lambda: list(iter_rows("time", start, end)))
+
+
+def bench_history_full_scan(benchmark, history_journal):
+    """全部历史的每日概览：冻结后读取的字节数少得多，但要解压"""
+    from core.journal_store import iter_chunks
+    benchmark(lambda: sum(len(c) for c in iter_chunks("summary")))
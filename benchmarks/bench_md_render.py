@@ -0,0 +1,103 @@
+# bench_md_render.py
+# Markdown → HTML 渲染基准：新渲染器（core.md_render）对比原先的正则链实现
+# 报告样本由标题、段落、列表、表格、代码块混合拼成，可按节数放大
+# 注意：旧实现只做 7 次 C 层面的整篇替换、输出的列表 / 表格标记是错的，在 CPython 下仍比新渲染器快约 3~4 倍；
+# ratio（新 / 旧）衡量的是生成正确标记的代价，不是加速比。用它盯住 md_render 自身的回归
+#
+# 用法（在项目根目录执行）：
+#   python benchmarks/bench_md_render.py                      # 200 节（约 10 万字）
+#   python benchmarks/bench_md_render.py --sections 2000 --repeat 5 --json md_render.json
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def legacy_markdown_to_simple_html(md_text):
+    """原 report_service._markdown_to_simple_html 的副本（多次全文正则替换 + 逐行 <br>）"""
+    html = md_text
+    html = re.sub(r'^### (.+)$', r'<h3>\1</h3>', html, flags=re.MULTILINE)
+    html = re.sub(r'^## (.+)$', r'<h2>\1</h2>', html, flags=re.MULTILINE)
+    html = re.sub(r'^# (.+)$', r'<h1>\1</h1>', html, flags=re.MULTILINE)
+    html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html)
+    html = re.sub(r'^- (.+)$', r'<li>\1</li>', html, flags=re.MULTILINE)
+    html = re.sub(r'^---+$', r'<hr>', html, flags=re.MULTILINE)
+    html = html.replace('\n', '<br>\n')
+    return (
+        '<html><head><meta charset="utf-8"></head>'
+        f'<body style="font-family: sans-serif; line-height: 1.6;">{html}</body></html>'
+    )
+
+
+SECTION = """### {n}. 第 {n} 周数据总结
+本周平均睡眠 **7.{d} 小时**，心情评分稳定在 `3.{d}` 左右。
+专注时长比上周增加了 {n} 个番茄钟，*运动*仍然不足。
+
+- 睡眠：入睡时间集中在 23:{d}0 前后
+  - 周末明显推迟
+- 任务：完成率 8{d}%，未完成项集中在「阅读」
+1. 建议固定起床时间
+2. 建议把阅读安排在午饭后
+
+| 指标 | 本周 | 上周 |
+|:--|--:|--:|
+| 睡眠 | 7.{d} | 6.9 |
+| 心情 | 3.{d} | 3.1 |
+| 番茄钟 | {n} | 12 |
+
+> 小结：**保持节奏**，下周重点在运动。
+
+---
+"""
+
+
+def build_report(sections):
+    return "# 行为建议报告\n\n" + "\n".join(SECTION.format(n=i + 1, d=i % 10) for i in range(sections))
+
+
+def _time(func, text, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Markdown 渲染基准")
+    parser.add_argument("--sections", type=int, default=200, help="报告样本的节数")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args(argv)
+
+    from core.md_render import render_document
+
+    text = build_report(args.sections)
+    result = {"chars": len(text), "lines": text.count("\n") + 1, "params": vars(args)}
+    for name, func in (("legacy", legacy_markdown_to_simple_html), ("md_render", render_document)):
+        func(text)  # 预热（编译正则）
+        samples = _time(func, text, args.repeat)
+        result[name] = {
+            "median_ms": round(statistics.median(samples) * 1000, 2),
+            "min_ms": round(min(samples) * 1000, 2),
+            "output_chars": len(func(text)),
+        }
+    result["ratio"] = round(result["md_render"]["median_ms"] / result["legacy"]["median_ms"], 2)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return result
+
+
+if __name__ == "__main__":
+    main()
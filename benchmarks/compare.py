@@ -0,0 +1,69 @@
+# compare.py
+# 对比两份 pytest-benchmark JSON（--benchmark-json 的输出），超过阈值的变慢项视为回归
+#
+# 用法（在项目根目录执行）：
+#   python benchmarks/compare.py baseline.json current.json                 # 默认按中位数，阈值 10%
+#   python benchmarks/compare.py baseline.json current.json --stat min --threshold 20
+# 有回归时退出码为 1，便于在脚本 / CI 中直接判断
+
+import argparse
+import json
+import sys
+
+
+def load_stats(path, stat):
+    """JSON → {用例全名: 指定统计量（秒）}"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {b["fullname"]: b["stats"][stat] for b in data.get("benchmarks", [])}
+
+
+def compare(baseline, current, threshold):
+    """
+    返回 [(用例, 基线, 当前, 变化比例, 状态)]，状态为 regression / improved / ok / new / missing。
+    threshold: 允许的变慢比例（0.1 表示 10%）；变快超过同一比例记为 improved。
+    """
+    rows = []
+    for name in sorted(set(baseline) | set(current)):
+        old, new = baseline.get(name), current.get(name)
+        if old is None:
+            rows.append((name, None, new, None, "new"))
+            continue
+        if new is None:
+            rows.append((name, old, None, None, "missing"))
+            continue
+        change = (new - old) / old if old else 0.0
+        status = "regression" if change > threshold else ("improved" if change < -threshold else "ok")
+        rows.append((name, old, new, change, status))
+    return rows
+
+
+def _fmt_ms(value):
+    return "-" if value is None else f"{value * 1000:.2f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="对比两次基准测试结果，标记回归")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--stat", default="median", choices=["min", "max", "mean", "median"])
+    parser.add_argument("--threshold", type=float, default=10.0, help="允许的变慢百分比")
+    args = parser.parse_args(argv)
+
+    rows = compare(load_stats(args.baseline, args.stat), load_stats(args.current, args.stat),
+                   args.threshold / 100)
+    width = max((len(r[0]) for r in rows), default=10)
+    print(f"{'benchmark':<{width}}  {'base ms':>10}  {'now ms':>10}  {'change':>8}  status")
+    for name, old, new, change, status in rows:
+        change_text = "-" if change is None else f"{change:+.1%}"
+        print(f"{name:<{width}}  {_fmt_ms(old):>10}  {_fmt_ms(new):>10}  {change_text:>8}  {status}")
+
+    regressions = [r for r in rows if r[4] == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} 项变慢超过 {args.threshold:g}%（{args.stat}）")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
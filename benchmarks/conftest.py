@@ -0,0 +1,94 @@
+"""基准测试公共夹具：按年数生成合成日记数据，并把 core.config 的数据目录指向它"""
+import os
+import shutil
+import sys
+from contextlib import ExitStack, contextmanager
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 数据集规模（年），可用 JOURNAL_BENCH_YEARS=1,5 缩小
+BENCH_YEARS = [int(y) for y in os.environ.get("JOURNAL_BENCH_YEARS", "1,5,20").split(",") if y.strip()]
+BENCH_SEED = 0
+
+DATA_PATHS = [
+    "PATH_SUMMARY", "PATH_TASKS", "PATH_TIME",
+    "PATH_WEEKLY_SUMMARY", "PATH_WEEKLY_HABITS", "PATH_WEEKLY_TASKS",
+    "PATH_MONTHLY_SUMMARY", "PATH_MONTHLY_TASKS",
+]
+
+
+def reference_date():
+    """基准操作的目标日期：30 天前（保证当年 / 上一年的数据文件都有内容）"""
+    return date.today() - timedelta(days=30)
+
+
+@pytest.fixture(scope="session")
+def _datasets(tmp_path_factory):
+    """每种规模只生成一次：{年数: (base_dir, 生成结果)}"""
+    from core.synthetic_data import generate
+    cache = {}
+
+    def get(years):
+        if years not in cache:
+            base_dir = str(tmp_path_factory.mktemp(f"journal_{years}y"))
+            cache[years] = (base_dir, generate(base_dir=base_dir, years=years, seed=BENCH_SEED))
+        return cache[years]
+
+    return get
+
+
+@contextmanager
+def _use_dataset(base_dir):
+    """core.config 的各数据目录在期间指向 base_dir"""
+    from core import config as cfg
+    targets = {attr: os.path.join(base_dir, os.path.relpath(getattr(cfg, attr), cfg.BASE_DIR))
+               for attr in DATA_PATHS}
+    with ExitStack() as stack:
+        stack.enter_context(patch("core.config.BASE_DIR", base_dir))
+        for attr, path in targets.items():
+            stack.enter_context(patch(f"core.config.{attr}", path))
+        yield base_dir
+
+
+@pytest.fixture(params=BENCH_YEARS, ids=lambda y: f"{y}y")
+def journal(request, _datasets, benchmark):
+    """当前用例的数据集：core.config 的各数据目录在用例期间指向它"""
+    base_dir, result = _datasets(request.param)
+    benchmark.extra_info.update({"years": request.param, "days": result["days"],
+                                 "time_rows": result["time_rows"]})
+    with _use_dataset(base_dir):
+        yield base_dir
+
+
+@pytest.fixture(scope="session")
+def _frozen_datasets(_datasets, tmp_path_factory):
+    """同一份数据的副本，往年文件已冻结（core.freeze）：{年数: base_dir}"""
+    from core.freeze import freeze_closed
+    cache = {}
+
+    def get(years):
+        if years not in cache:
+            base_dir = str(tmp_path_factory.mktemp(f"journal_{years}y_frozen"))
+            shutil.copytree(_datasets(years)[0], base_dir, dirs_exist_ok=True)
+            with _use_dataset(base_dir):
+                freeze_closed()
+            cache[years] = base_dir
+        return cache[years]
+
+    return get
+
+
+@pytest.fixture(params=[(y, s) for y in BENCH_YEARS for s in ("plain", "frozen")],
+                ids=lambda p: f"{p[0]}y-{p[1]}")
+def history_journal(request, _datasets, _frozen_datasets, benchmark):
+    """往年数据读取：同一数据集的原始 CSV 与冻结后两种形态"""
+    years, storage = request.param
+    base_dir = _frozen_datasets(years) if storage == "frozen" else _datasets(years)[0]
+    benchmark.extra_info.update({"years": years, "storage": storage})
+    with _use_dataset(base_dir):
+        yield base_dir
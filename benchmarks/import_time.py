@@ -0,0 +1,127 @@
+# import_time.py
+# 冷启动耗时基准：每个模块/页面都在全新的 Python 子进程中导入，取多次中位数
+#
+# 用法（在项目根目录执行）：
+#   python benchmarks/import_time.py                 # core 模块 + 三个页面
+#   python benchmarks/import_time.py --repeat 10 --json import_time.json
+#   python benchmarks/import_time.py --top 15        # 额外打印 -X importtime 最慢的导入项
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 单独测量的 core 模块（各自在干净的解释器中导入）
+CORE_MODULES = [
+    "core.config",
+    "core.texts",
+    "core.data_manager",
+    "core.weekly_data_manager",
+    "core.monthly_data_manager",
+    "core.draft_store",
+    "core.report_data_collector",
+    "core.report_service",
+    "core.cli",
+]
+
+# 页面：用 streamlit 的 AppTest 在子进程里完整跑一次脚本
+PAGE_SNIPPET = (
+    "from streamlit.testing.v1 import AppTest\n"
+    "at = AppTest.from_file({path!r}, default_timeout=60)\n"
+    "at.run()\n"
+)
+
+
+def _run_once(code, env):
+    """启动一个全新的解释器执行 code，返回墙钟耗时（毫秒）"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(code, repeat, env):
+    """重复 repeat 次，返回 {median, min, max}（毫秒）"""
+    samples = [_run_once(code, env) for _ in range(repeat)]
+    return {
+        "median_ms": round(statistics.median(samples), 1),
+        "min_ms": round(min(samples), 1),
+        "max_ms": round(max(samples), 1),
+    }
+
+
+def importtime_top(module, top, env):
+    """用 -X importtime 找出某个模块最慢的 N 个导入项（累计耗时，微秒）"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # 格式："import time:  self_us | cumulative_us | module"
+        parts = line[len("import time:"):].split("|")
+        rows.append((int(parts[1]), parts[2].strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量 core 模块与 Streamlit 页面的冷启动耗时")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数（默认 5）")
+    parser.add_argument("--json", help="把结果写入 JSON 文件，便于跨版本对比")
+    parser.add_argument("--top", type=int, default=0, help="额外列出每个 core 模块最慢的 N 个导入项")
+    parser.add_argument("--skip-pages", action="store_true", help="只测 core 模块")
+    args = parser.parse_args(argv)
+
+    # 使用临时数据目录，避免基准测试污染真实日记
+    env = dict(os.environ)
+    env.setdefault("JOURNAL_BASE_DIR", tempfile.mkdtemp(prefix="journal_bench_"))
+
+    results = {"python": sys.version.split()[0], "repeat": args.repeat,
+               "baseline": {}, "modules": {}, "pages": {}}
+
+    # 基线：空解释器启动
+    results["baseline"]["python -c pass"] = measure("pass", args.repeat, env)
+
+    for module in CORE_MODULES:
+        results["modules"][module] = measure(f"import {module}", args.repeat, env)
+
+    if not args.skip_pages:
+        pages = [os.path.join(ROOT, "diary.py")] + sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")))
+        for path in pages:
+            name = os.path.relpath(path, ROOT)
+            try:
+                results["pages"][name] = measure(PAGE_SNIPPET.format(path=path), args.repeat, env)
+            except subprocess.CalledProcessError:
+                results["pages"][name] = {"error": "页面运行失败（是否已安装 streamlit？）"}
+
+    # 打印结果表
+    print(f"{'项目':<40}{'中位数(ms)':>12}{'最小(ms)':>12}{'最大(ms)':>12}")
+    for group in ("baseline", "modules", "pages"):
+        for name, r in results[group].items():
+            if "error" in r:
+                print(f"{name:<40}{r['error']:>36}")
+            else:
+                print(f"{name:<40}{r['median_ms']:>12}{r['min_ms']:>12}{r['max_ms']:>12}")
+
+    if args.top:
+        for module in CORE_MODULES:
+            print(f"\n[{module}] 最慢的 {args.top} 个导入项（累计 μs）")
+            for cumulative, name in importtime_top(module, args.top, env):
+                print(f"  {cumulative:>10}  {name}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
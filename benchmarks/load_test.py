@@ -0,0 +1,162 @@
+# load_test.py
+# 报告管线离线压测：收集 → 生成（本地 LLM 替身，流式）→ 发送（本地 SMTP 替身）
+# 无需网络，用来观察首字延迟、端到端耗时分布和重试对吞吐量的影响
+#
+# 用法（在项目根目录执行）：
+#   python benchmarks/load_test.py                               # 20 次，并发 4
+#   python benchmarks/load_test.py --runs 50 --concurrency 8 --fail-rate 0.2
+#   python benchmarks/load_test.py --base-dir /path/to/journal   # 用真实数据收集提示词
+#   python benchmarks/load_test.py --url http://127.0.0.1:8765   # 压测已启动的替身/兼容服务
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class SMTPStandIn:
+    """
+    替代 smtplib.SMTP_SSL 的本地替身：不建立网络连接，只模拟握手与发送耗时。
+    压测关心的是管线编排开销，真实 SMTP 往返可以用 --smtp-delay 近似。
+    """
+
+    delay = 0.05
+    sent = 0
+
+    def __init__(self, host, port, *args, **kwargs):
+        time.sleep(self.delay)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def login(self, user, password):
+        pass
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        time.sleep(self.delay)
+        SMTPStandIn.sent += 1
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_pipeline(url, timeout, retries):
+    """跑一次完整管线，返回各阶段耗时（秒）"""
+    from core.llm_backends import HTTPBackend
+    from core.report_service import generate_report_stream, send_email
+
+    backend = HTTPBackend(url=url, timeout=timeout, retries=retries)
+    stats = {}
+    result = {"ok": False}
+    start = time.perf_counter()
+    try:
+        parts = []
+        for chunk in generate_report_stream(stats=stats, force=True, backend=backend):
+            if not parts:
+                result["first_chunk_s"] = time.perf_counter() - start
+            parts.append(chunk)
+        result["generate_s"] = time.perf_counter() - start
+        send_email("".join(parts))
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = str(e)
+    result["total_s"] = time.perf_counter() - start
+    result["attempts"] = backend.attempts
+    return result
+
+
+def summarize(results, wall_s):
+    ok = [r for r in results if r["ok"]]
+    summary = {
+        "runs": len(results),
+        "ok": len(ok),
+        "failed": len(results) - len(ok),
+        "attempts": sum(r["attempts"] for r in results),
+        "wall_s": round(wall_s, 2),
+        "throughput_per_min": round(len(ok) / wall_s * 60, 1) if wall_s else None,
+    }
+    for key in ("first_chunk_s", "generate_s", "total_s"):
+        samples = [r[key] for r in ok if key in r]
+        if samples:
+            summary[key] = {
+                "p50": round(statistics.median(samples), 3),
+                "p95": round(_percentile(samples, 95), 3),
+                "max": round(max(samples), 3),
+            }
+    errors = {}
+    for r in results:
+        if not r["ok"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    summary["errors"] = errors
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="报告管线离线压测")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--url", help="已启动的替身服务地址；不指定时自动在随机端口启动一个")
+    parser.add_argument("--latency", type=float, default=0.5, help="替身首字延迟（秒）")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="替身每块间隔（秒）")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="替身返回 503 的概率")
+    parser.add_argument("--smtp-delay", type=float, default=0.05, help="SMTP 替身每步耗时（秒）")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--base-dir", help="日记数据目录（默认使用空的临时目录）")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args(argv)
+
+    # 必须在导入 core 之前设置数据目录
+    os.environ["JOURNAL_BASE_DIR"] = args.base_dir or tempfile.mkdtemp(prefix="journal_load_")
+    os.environ.setdefault("JOURNAL_SMTP_USER", "bench@example.com")
+    os.environ.setdefault("JOURNAL_SMTP_PASSWORD", "bench")
+    os.environ.setdefault("JOURNAL_EMAIL_TO", "bench@example.com")
+    # 重试退避按压测规模缩短
+    os.environ.setdefault("JOURNAL_LLM_BACKOFF_BASE", "0.1")
+    os.environ.setdefault("JOURNAL_LLM_BACKOFF_MAX", "1")
+
+    import smtplib
+    from core.llm_stub_server import start_stub_server
+
+    SMTPStandIn.delay = args.smtp_delay
+    smtplib.SMTP_SSL = SMTPStandIn
+
+    server = None
+    url = args.url
+    if url is None:
+        server = start_stub_server(latency=args.latency, chunk_delay=args.chunk_delay,
+                                   fail_rate=args.fail_rate, seed=0)
+        url = server.url
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda _: run_pipeline(url, args.timeout, args.retries),
+                                range(args.runs)))
+    wall_s = time.perf_counter() - start
+    if server is not None:
+        server.shutdown()
+
+    summary = summarize(results, wall_s)
+    summary["params"] = vars(args)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# api_server.py
+# 本地 HTTP JSON API：供脚本批量读写日记数据（日 / 周 / 月各表），只依赖标准库
+# 读写经 journal_store：区间读取按年分块流式输出 NDJSON；批量写入每个年度文件只读写一次
+#
+# 用法：
+#   python -m core.api_server --port 8766
+#   curl 'http://127.0.0.1:8766/api/summary?from=2026-01-01&to=2026-03-31'      # NDJSON，一行一条
+#   curl 'http://127.0.0.1:8766/api/summary/2026-10-17'                         # {"rows": [...]}
+#   curl -X PUT  -d '{"Focus_Count": 6}' 'http://127.0.0.1:8766/api/summary/2026-10-17'
+#   curl -X POST -d '[{"Date": "2026-10-17", "Mood": 4}, ...]' 'http://127.0.0.1:8766/api/summary'
+#
+# 多日记时用请求头 X-Journal-Profile 指定日记；设置 JOURNAL_API_TOKEN 后须带 Authorization: Bearer <token>
+# 注意：API 只写 CSV，不重新生成 Markdown 成品；写入与页面保存共用 csv_io.file_lock，
+# 但线程锁不跨进程——单独运行 API 服务时，避免与打开的页面同时修改同一天 / 周 / 月
+
+import argparse
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from . import config as cfg
+from . import journal_store as store
+
+PROFILE_HEADER = "X-Journal-Profile"
+
+
+class ApiError(Exception):
+    """带 HTTP 状态码的请求错误"""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+# ==========================================
+# 1. 请求处理
+# ==========================================
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health                       探活
+    GET  /api/tables                   各表及其键列
+    GET  /api/{table}?from=&to=        区间读取（NDJSON 流，from / to 都可省略）
+    GET  /api/{table}/{key}            单个键的全部行
+    PUT  /api/{table}/{key}            单个键 Upsert（body 为对象，多行表为对象列表）
+    POST /api/{table}                  批量 Upsert（body 为对象列表，每条带键列）
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._dispatch(self._get)
+
+    def do_PUT(self):
+        self._dispatch(self._put)
+
+    def do_POST(self):
+        self._dispatch(self._post)
+
+    def _dispatch(self, handler):
+        """鉴权、切换日记、把异常映射成状态码；每个请求结束后恢复原来的日记"""
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        token = None
+        try:
+            if parts != ["health"]:
+                self._check_auth()
+            profile = self._profile()
+            if profile:
+                token = cfg.use_profile(profile)
+            handler(parts, parse_qs(url.query))
+        except ApiError as e:
+            self._send_json(e.code, {"error": str(e)})
+        except KeyError as e:
+            self._send_json(404, {"error": e.args[0] if e.args else "not found"})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except RuntimeError as e:  # 写入已冻结的往年文件
+            self._send_json(409, {"error": str(e)})
+        finally:
+            if token is not None:
+                cfg.reset_profile(token)
+
+    def _profile(self):
+        """请求头按 latin-1 解码；日记名可能是中文，按客户端发送的 UTF-8 字节还原"""
+        raw = self.headers.get(PROFILE_HEADER)
+        if not raw:
+            return None
+        try:
+            return raw.encode("latin-1").decode("utf-8")
+        except UnicodeError:
+            return raw
+
+    def _check_auth(self):
+        expected = self.server.token
+        if not expected:
+            return
+        given = self.headers.get("Authorization", "")
+        if not hmac.compare_digest(given.encode("utf-8"), f"Bearer {expected}".encode("utf-8")):
+            raise ApiError(401, "unauthorized")
+
+    # --- 路由 ---
+
+    def _get(self, parts, query):
+        if parts == ["health"]:
+            self._send_json(200, {"ok": True, "profile": cfg.current_profile()})
+        elif parts == ["api", "tables"]:
+            self._send_json(200, {"tables": {t: store.key_column(t) for t in store.TABLES}})
+        elif len(parts) == 2 and parts[0] == "api":
+            start = query.get("from", [None])[0]
+            end = query.get("to", [None])[0]
+            chunks = store.iter_chunks(parts[1], start, end)
+            first = next(chunks, None)  # 先取第一块：参数错误能在写响应头之前变成 400
+            self._stream_rows(first, chunks)
+        elif len(parts) == 3 and parts[0] == "api":
+            rows = store.get_rows(parts[1], parts[2])
+            if not rows:
+                raise ApiError(404, f"{parts[1]} 中没有 {parts[2]}")
+            self._send_json(200, {"rows": rows})
+        else:
+            raise ApiError(404, "not found")
+
+    def _put(self, parts, query):
+        if len(parts) != 3 or parts[0] != "api":
+            raise ApiError(404, "not found")
+        table, key = parts[1], parts[2]
+        column = store.key_column(table)
+        body = self._read_json()
+        records = body if isinstance(body, list) else [body]
+        if not records or not all(isinstance(r, dict) for r in records):
+            raise ValueError("PUT 的请求体应为对象（多行表可为对象列表）")
+        records = [{**r, column: key} for r in records]
+        self._send_json(200, store.upsert(table, records))
+
+    def _post(self, parts, query):
+        if len(parts) != 2 or parts[0] != "api":
+            raise ApiError(404, "not found")
+        body = self._read_json()
+        if not isinstance(body, list):
+            raise ValueError("POST 的请求体应为对象列表")
+        self._send_json(200, store.upsert(parts[1], body))
+
+    # --- 读写辅助 ---
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length > self.server.max_body:
+            self.close_connection = True  # 不读请求体，直接断开
+            raise ApiError(413, f"请求体超过 {self.server.max_body} 字节")
+        try:
+            return json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError:
+            raise ApiError(400, "invalid json")
+
+    def _stream_rows(self, first, chunks):
+        """
+        chunked 编码逐块写出 NDJSON：每个 DataFrame 块一次写出，内存与区间大小无关。
+        响应头发出后再出错（读到损坏的年度文件等）已无法改成错误响应：不写结束块、直接断开连接，
+        客户端会看到不完整的响应，而不是把错误 JSON 当成数据行
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        chunk = first
+        try:
+            while chunk is not None:
+                data = "".join(json.dumps(row, ensure_ascii=False) + "\n"
+                               for row in chunk.to_dict("records")).encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                chunk = next(chunks, None)
+        except Exception as e:
+            self.close_connection = True
+            self.log_error("NDJSON 输出中断: %r", e)
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_json(self, code, obj):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# ==========================================
+# 2. 服务
+# ==========================================
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, token=None, max_body=None, quiet=True):
+        super().__init__(address, ApiHandler)
+        self.token = cfg.API_TOKEN if token is None else token
+        self.max_body = cfg.API_MAX_BODY if max_body is None else max_body
+        self.quiet = quiet
+
+    def handle_error(self, request, client_address):
+        """客户端中途断开（读流时 Ctrl+C）属于正常情况，不打印堆栈"""
+        import sys
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_api_server(host="127.0.0.1", port=0, **options):
+    """
+    在后台线程启动 API 服务并返回 server（port=0 时自动分配端口，见 server.url）。
+    用完调用 server.shutdown()。
+    """
+    server = ApiServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="journal-api", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="日记数据的本地 HTTP JSON API")
+    parser.add_argument("--host", default=cfg.API_HOST)
+    parser.add_argument("--port", type=int, default=cfg.API_PORT)
+    parser.add_argument("--verbose", action="store_true", help="打印每个请求")
+    args = parser.parse_args(argv)
+
+    if args.host not in ("127.0.0.1", "localhost", "::1") and not cfg.API_TOKEN:
+        raise ValueError("监听非本机地址时必须设置 JOURNAL_API_TOKEN")
+    server = ApiServer((args.host, args.port), quiet=not args.verbose)
+    print(f"日记 API 已启动：{server.url}（Ctrl+C 退出）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
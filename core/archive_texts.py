@@ -0,0 +1,26 @@
+# archive_texts.py
+# 报告归档页面的文案配置库
+
+# ==================== 页面基础 ====================
+PAGE_TITLE = "报告归档"
+PAGE_ICON = "🗂️"
+SIDEBAR_TITLE = "🗂️ 报告归档"
+
+# ==================== 检索与分页 ====================
+SEARCH_LABEL = "🔍 搜索报告"
+SEARCH_PLACEHOLDER = "标题、模式、模型、日期或正文关键词"
+PER_PAGE_OPTIONS = [5, 10, 20, 50]
+PER_PAGE_LABEL = "每页条数"
+
+# ==================== 元数据标签 ====================
+MODE_LABELS = {
+    "features": "特征摘要",
+    "raw": "原始数据",
+    "delta": "增量",
+    "mapreduce": "分层汇总",
+}
+EMPTY_ARCHIVE = "还没有归档的报告。在日记页侧边栏点击「📊 发送行为建议报告」后，报告会自动保存到这里。"
+NO_MATCH = "没有匹配的报告，换个关键词试试。"
+MISSING_REPORT = "报告文件已不存在（可能被手动删除），可在侧边栏重建索引。"
+REBUILD_BUTTON = "🔄 重建索引"
+DOWNLOAD_HTML = "⬇️ 下载 HTML"
@@ -0,0 +1,283 @@
+# cli.py
+# 命令行：不启动 Streamlit 的快速录入与查询，直接调用 core（经 journal_store 读写 CSV）
+# 各子命令用到时才导入 pandas 等重模块，`--help` 与参数错误几乎零开销；全程不导入 streamlit
+#
+# 用法（在项目根目录执行，python journal.py 与 python -m core.cli 等价）：
+#   python journal.py set 2026-10-17 Focus_Count 6 Mood 4     # 同一天的多个字段一次保存
+#   python journal.py set - < updates.txt                     # 每行 "键 字段 值"，每个文件只保存一次
+#   python journal.py show week                               # 本周周记；show day / month，可跟键或 last
+#   python journal.py stats --from 2026-10-01 --to 2026-10-15
+#   python journal.py export time --from 2020-01-01 -o time.parquet     # 流式导出，见 exporter.py
+#
+# 写入只更新 CSV，不重新生成 Markdown（在页面里再保存一次即可）
+
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+from . import config as cfg
+
+# 键 → 概览表：按键的格式推断写到日 / 周 / 月哪张表
+SUMMARY_BY_COLUMN = {"Date": "summary", "Week": "weekly_summary", "Month": "monthly_summary"}
+
+DAY_SECTIONS = [("日概览", "summary"), ("任务", "tasks"), ("时间轴", "time")]
+
+STATS_COLUMNS = ["field", "count", "mean", "min", "max", "sum"]
+
+
+# ==========================================
+# 1. 键解析
+# ==========================================
+
+def resolve_key(text, today=None):
+    """today / yesterday → 日期键；其余原样返回（格式由 journal_store 校验）"""
+    today = today or date.today()
+    aliases = {"today": today, "yesterday": today - timedelta(days=1)}
+    if text in aliases:
+        return aliases[text].isoformat()
+    return text
+
+
+def summary_table(key):
+    """按键的格式找到对应的概览表；都不匹配时抛 ValueError"""
+    from . import journal_store as store
+    for column, table in SUMMARY_BY_COLUMN.items():
+        pattern, _ = store.KEY_FORMATS[column]
+        if pattern.match(key):
+            return table
+    raise ValueError(f"无法识别的键 {key!r}：应为 YYYY-MM-DD、YYYY-Www 或 YYYY-MM")
+
+
+def period_key(period, text=None, today=None):
+    """show 的键：省略为本期，last 为上一期，其余原样（today / yesterday 也可用于 day）"""
+    from .weekly_data_manager import get_week_info
+    from .monthly_data_manager import get_month_info
+    today = today or date.today()
+    if text not in (None, "last"):
+        return resolve_key(text, today)
+    if period == "day":
+        return (today - timedelta(days=1 if text == "last" else 0)).isoformat()
+    if period == "week":
+        return get_week_info(today - timedelta(days=7 if text == "last" else 0))[0]
+    first = today.replace(day=1)
+    return get_month_info(first - timedelta(days=1) if text == "last" else first)[0]
+
+
+# ==========================================
+# 2. 子命令
+# ==========================================
+
+def parse_updates(args, lines=None):
+    """
+    set 的参数 → [(键, 字段, 值)]。
+    命令行形式：键 字段 值 [字段 值 ...]；args 为 ["-"] 时从 lines 读取，每行 "键 字段 值"（值可含空格）
+    """
+    if args == ["-"]:
+        updates = []
+        for number, line in enumerate(lines or [], 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(None, 2)
+            if len(parts) != 3:
+                raise ValueError(f"第 {number} 行应为 \"键 字段 值\"：{line!r}")
+            updates.append(tuple(parts))
+        return updates
+    if len(args) < 3 or len(args) % 2 == 0:
+        raise ValueError("用法：set 键 字段 值 [字段 值 ...]")
+    key = args[0]
+    return [(key, field, value) for field, value in zip(args[1::2], args[2::2])]
+
+
+def apply_updates(updates, allow_new_fields=False, today=None):
+    """
+    把 (键, 字段, 值) 合并成每个键一条记录，按表批量 Upsert（每个年度文件只读写一次）。
+    字段不在该年度文件已有的列中时报错（防止拼错字段名悄悄新增一列），allow_new_fields 时放行。
+    返回 {表: upsert 统计}
+    """
+    from . import journal_store as store
+    records = {}
+    for key, field, value in updates:
+        key = resolve_key(key, today)
+        table = summary_table(key)
+        column = store.key_column(table)
+        if field == column:
+            raise ValueError(f"不能修改键列 {column}")
+        records.setdefault(table, {}).setdefault(key, {column: key})[field] = value
+
+    if not allow_new_fields:
+        for table, by_key in records.items():
+            known = {}
+            for key, record in by_key.items():
+                year = key[:4]
+                if year not in known:
+                    known[year] = set(store.columns(table, year))
+                unknown = [f for f in record if known[year] and f not in known[year]]
+                if unknown:
+                    raise ValueError(f"{table}（{year}）中没有字段 {', '.join(unknown)}（确需新增请加 --new-field）")
+
+    return {table: store.upsert(table, list(by_key.values())) for table, by_key in records.items()}
+
+
+def format_rows(rows, columns=None):
+    """纯文本对齐表格"""
+    if not rows:
+        return "（无）"
+    columns = columns or list(rows[0])
+    cells = [[str(row.get(c, "")) for c in columns] for row in rows]
+    widths = [max([len(c)] + [len(r[i]) for r in cells]) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths))]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(r, widths)) for r in cells]
+    return "\n".join(lines)
+
+
+def format_record(row, key_column):
+    """概览表的一行：每个非空字段一行 "字段: 值" """
+    fields = [(k, v) for k, v in row.items() if k != key_column and str(v).strip() != ""]
+    if not fields:
+        return "（无）"
+    width = max(len(k) for k, _ in fields)
+    return "\n".join(f"{k.ljust(width)}  {v}" for k, v in fields)
+
+
+def show(period, key):
+    """某一天 / 周 / 月的全部表，返回文本"""
+    from . import journal_store as store
+    from .report_data_collector import MONTHLY_SECTIONS, WEEKLY_SECTIONS
+    sections = {"day": DAY_SECTIONS, "week": WEEKLY_SECTIONS, "month": MONTHLY_SECTIONS}[period]
+    blocks = [f"# {key}"]
+    for title, table in sections:
+        column = store.key_column(table)
+        rows = store.get_rows(table, key)
+        if table in store.SINGLE_ROW_TABLES:
+            body = format_record(rows[0], column) if rows else "（无）"
+        else:
+            body = format_rows([{k: v for k, v in r.items() if k != column} for r in rows])
+        blocks.append(f"## {title}\n{body}")
+    return "\n\n".join(blocks)
+
+
+def stats(table, start, end, fields=None):
+    """
+    区间内各数值字段的 count / mean / min / max / sum（逐块累加，内存与区间大小无关）。
+    没有任何数值的列（时间、文本）不列出。
+    """
+    import pandas as pd
+    from . import journal_store as store
+    column = store.key_column(table)
+    totals = {}
+    for chunk in store.iter_chunks(table, start, end):
+        names = fields or [c for c in chunk.columns if c != column]
+        for name in names:
+            if name not in chunk.columns:
+                continue
+            values = pd.to_numeric(chunk[name], errors="coerce").dropna()
+            if values.empty:
+                continue
+            t = totals.setdefault(name, {"count": 0, "sum": 0.0, "min": None, "max": None})
+            t["count"] += len(values)
+            t["sum"] += float(values.sum())
+            t["min"] = values.min() if t["min"] is None else min(t["min"], values.min())
+            t["max"] = values.max() if t["max"] is None else max(t["max"], values.max())
+    order = fields or list(totals)
+    return [
+        {"field": name, "count": totals[name]["count"],
+         "mean": round(totals[name]["sum"] / totals[name]["count"], 2),
+         "min": _number(totals[name]["min"]), "max": _number(totals[name]["max"]),
+         "sum": _number(round(totals[name]["sum"], 2))}
+        for name in order if name in totals
+    ]
+
+
+def _number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+# ==========================================
+# 3. 入口
+# ==========================================
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="journal", description="日记命令行：快速录入与查询（不启动 Streamlit）")
+    parser.add_argument("--profile", help=f"操作哪份日记（JOURNAL_PROFILES 中的名称，默认 {next(iter(cfg.PROFILES))}）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("set", help="写入概览字段：set 键 字段 值 [字段 值 ...]；键为日期 / 周 / 月")
+    p.add_argument("items", nargs="+", metavar="ARG", help="键 字段 值 [字段 值 ...]，或 - 从标准输入读取")
+    p.add_argument("--new-field", action="store_true", help="允许写入文件中还没有的字段")
+
+    p = sub.add_parser("show", help="显示某一天 / 周 / 月")
+    p.add_argument("period", choices=["day", "week", "month"])
+    p.add_argument("key", nargs="?", help="日期 / 周 / 月键，或 today、yesterday、last；默认本期")
+
+    p = sub.add_parser("stats", help="区间内数值字段的统计")
+    p.add_argument("--from", dest="start", help="起始键（含），默认 7 天前")
+    p.add_argument("--to", dest="end", help="结束键（含），默认今天")
+    p.add_argument("--table", default="summary", help="统计哪张表（默认 summary）")
+    p.add_argument("--fields", nargs="+", help="只统计这些字段")
+    p.add_argument("--json", action="store_true", help="输出 JSON")
+
+    p = sub.add_parser("export", help="流式导出一张表的区间数据（JSONL / CSV / Parquet）")
+    p.add_argument("table")
+    p.add_argument("--from", dest="start", help="起始日期或键（含），默认最早；周表 / 月表的日期换算成所在周 / 月")
+    p.add_argument("--to", dest="end", help="结束日期或键（含），默认最晚")
+    p.add_argument("--format", choices=["jsonl", "csv", "parquet"],
+                   help="默认按输出文件扩展名推断，否则 jsonl；parquet 需要 pyarrow")
+    p.add_argument("-o", "--output", help="输出文件（默认标准输出；Parquet 必须指定）")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.profile:
+        try:
+            cfg.use_profile(args.profile)
+        except ValueError as e:
+            parser.error(str(e))
+
+    try:
+        if args.command == "set":
+            lines = sys.stdin if args.items == ["-"] else None
+            result = apply_updates(parse_updates(args.items, lines), allow_new_fields=args.new_field)
+            for table, counts in result.items():
+                print(f"{table}: {counts['keys']} 条，写入 {counts['files']} 个文件")
+        elif args.command == "show":
+            print(show(args.period, period_key(args.period, args.key)))
+        elif args.command == "stats":
+            from .exporter import key_bound
+            today = date.today()
+            # 默认区间是日期；周表 / 月表换算成所在的周 / 月
+            end = key_bound(args.table, resolve_key(args.end or "today", today))
+            start = key_bound(args.table, resolve_key(args.start or (today - timedelta(days=6)).isoformat(), today))
+            rows = stats(args.table, start, end, args.fields)
+            if args.json:
+                print(json.dumps(rows, ensure_ascii=False, indent=2))
+            else:
+                print(f"{args.table} {start} ~ {end}\n{format_rows(rows, STATS_COLUMNS)}")
+        elif args.command == "export":
+            from . import exporter
+            fmt = args.format or exporter.format_from_path(args.output)
+            if fmt == "parquet" and not args.output:
+                parser.error("导出 Parquet 时必须用 -o 指定输出文件")
+            start = resolve_key(args.start) if args.start else None
+            end = resolve_key(args.end) if args.end else None
+            count = exporter.export(args.table, args.output or sys.stdout, start, end, fmt)
+            if args.output:
+                print(f"导出 {count} 行 → {args.output}", file=sys.stderr)
+        sys.stdout.flush()  # 缓冲区里剩下的输出在这里写出，管道已关闭时也在这里捕获
+    except (KeyError, ValueError, RuntimeError) as e:
+        parser.exit(2, f"journal: 错误: {e.args[0] if isinstance(e, KeyError) else e}\n")
+    except BrokenPipeError:
+        # 下游提前关闭管道（journal export ... | head）：把标准输出指向 devnull，
+        # 避免解释器退出时再次刷新缓冲区报错，然后安静退出
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,205 @@
 # config.py
+# 数据目录与各项开关。数据目录按会话所选的日记（profile）解析：
+# BASE_DIR 与各 PATH_* 不是固定的模块常量，而是由模块级 __getattr__ 在每次访问时按当前日记算出，
+# 调用方照旧写 cfg.PATH_TASKS；测试里 patch("core.config.BASE_DIR"/"PATH_*") 依然有效
+import contextvars
+import functools
+import json
 import os
+import tempfile
+import threading
 
 # --- 根目录：从环境变量读取，未设置时使用 D 盘的实际数据目录 ---
-BASE_DIR = os.environ.get(
+DEFAULT_BASE_DIR = os.environ.get(
     "JOURNAL_BASE_DIR",
     r"D:\2026年规划及文件留存"
 )
 
-# --- 年度 CSV 数据存放位置 (这些路径是固定的，一年一份) ---
-PATH_TASKS = os.path.join(BASE_DIR, "data", "tasks")
-PATH_TIME = os.path.join(BASE_DIR, "data", "time")
-PATH_SUMMARY = os.path.join(BASE_DIR, "data", "summary")
+# --- 多日记（profile）：一个进程服务多份日记，每个会话各自选择 ---
+# JOURNAL_PROFILES="张三=D:\journals\zhangsan;李四=D:\journals\lisi"
+# 未设置时只有一份名为 default 的日记，根目录即 JOURNAL_BASE_DIR；设置后第一项为默认日记
+DEFAULT_PROFILE = "default"
 
-# --- 周记 CSV 数据存放位置 ---
-PATH_WEEKLY_SUMMARY = os.path.join(BASE_DIR, "data", "weekly_summary")
-PATH_WEEKLY_HABITS = os.path.join(BASE_DIR, "data", "weekly_habits")
-PATH_WEEKLY_TASKS = os.path.join(BASE_DIR, "data", "weekly_tasks")
 
-# --- 月记 CSV 数据存放位置 ---
-PATH_MONTHLY_SUMMARY = os.path.join(BASE_DIR, "data", "monthly_summary")
-PATH_MONTHLY_TASKS = os.path.join(BASE_DIR, "data", "monthly_tasks")
+def parse_profiles(spec):
+    """"名称=路径;名称=路径" → {名称: 路径}（保持顺序）；格式错误抛 ValueError"""
+    profiles = {}
+    for item in filter(None, (part.strip() for part in spec.split(";"))):
+        name, sep, path = item.partition("=")
+        name, path = name.strip(), path.strip()
+        if not sep or not name or not path:
+            raise ValueError(f"JOURNAL_PROFILES 格式错误: {item!r}（应为 名称=路径）")
+        if name in profiles:
+            raise ValueError(f"JOURNAL_PROFILES 中日记名称重复: {name}")
+        profiles[name] = path
+    return profiles
 
-# --- 自动创建年度数据文件夹 ---
+
+PROFILES = parse_profiles(os.environ.get("JOURNAL_PROFILES", "")) or {DEFAULT_PROFILE: DEFAULT_BASE_DIR}
+
+# 当前上下文（Streamlit 的一次页面运行 / 一个后台线程）所用的日记；None 表示默认日记
+_active_profile = contextvars.ContextVar("journal_profile", default=None)
+
+
+def current_profile():
+    name = _active_profile.get()
+    return name if name is not None else next(iter(PROFILES))
+
+
+def use_profile(name):
+    """切换当前上下文的日记，返回可交给 reset_profile 的 token；未知名称抛 ValueError"""
+    if name not in PROFILES:
+        raise ValueError(f"未知的日记: {name}（可选 {', '.join(PROFILES)}）")
+    return _active_profile.set(name)
+
+
+def reset_profile(token):
+    _active_profile.reset(token)
+
+
+def bind(func):
+    """
+    把当前日记带进其他线程：返回一个包装函数，在任何线程中调用时都使用调用 bind 时的日记。
+    threading.Thread / Timer / 线程池都不会继承 contextvars，后台任务的目标函数需经 bind 包装。
+    """
+    name = _active_profile.get()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _active_profile.set(name)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _active_profile.reset(token)
+
+    return wrapper
+
+
+def _base_dir():
+    """测试 patch 了 BASE_DIR 时以其为准，否则取当前日记的根目录"""
+    patched = globals().get("BASE_DIR")
+    return patched if patched is not None else PROFILES[current_profile()]
+
+
+_profile_locks = {}
+_profile_locks_guard = threading.Lock()
+
+
+def profile_lock(name):
+    """按（日记根目录, 名称）区分的锁：同一份日记内互斥，不同日记之间互不阻塞"""
+    key = (_base_dir(), name)
+    with _profile_locks_guard:
+        lock = _profile_locks.get(key)
+        if lock is None:
+            lock = _profile_locks[key] = threading.Lock()
+        return lock
+
+
+# --- 各数据目录（相对当前日记根目录的 data/ 子目录），通过 cfg.PATH_* 访问 ---
+_DATA_DIRS = {
+    # 年度 CSV 数据存放位置 (这些路径是固定的，一年一份)
+    "PATH_TASKS": "tasks",
+    "PATH_TIME": "time",
+    "PATH_SUMMARY": "summary",
+    # 周记 CSV 数据存放位置
+    "PATH_WEEKLY_SUMMARY": "weekly_summary",
+    "PATH_WEEKLY_HABITS": "weekly_habits",
+    "PATH_WEEKLY_TASKS": "weekly_tasks",
+    # 月记 CSV 数据存放位置
+    "PATH_MONTHLY_SUMMARY": "monthly_summary",
+    "PATH_MONTHLY_TASKS": "monthly_tasks",
+    # 日记草稿暂存位置（按天一个 JSONL，首次写入时创建）
+    "PATH_DRAFTS": "drafts",
+    # 行为建议报告缓存（按提示词内容哈希命中，避免重复调用 Gemini）
+    "PATH_REPORT_CACHE": "report_cache",
+    # 报告归档（每份生成的报告及其覆盖的数据水位，增量报告以最近一份为基准）
+    "PATH_REPORT_ARCHIVE": "report_archive",
+    # 分层报告的月度摘要缓存（按月份 + 该月数据哈希命中，不过期）
+    "PATH_MONTH_SUMMARIES": "month_summaries",
+    # 后台报告任务状态（每个任务一个 JSON，页面刷新后仍可查看结果）
+    "PATH_REPORT_JOBS": "report_jobs",
+    # 报告邮件发件箱（待发送的邮件，发送成功后删除，失败的留待下次重试）
+    "PATH_OUTBOX": "outbox",
+    # 定时报告的状态与运行日志（python -m core.report_scheduler）
+    "PATH_REPORT_SCHEDULER": "report_scheduler",
+    # 文件 I/O 操作日志（python -m core.io_log 汇总）
+    "PATH_IO_LOG": "io_log",
+    # 内存诊断报告
+    "PATH_MEMPROF": "memprof",
+}
+
+
+def __getattr__(name):
+    """cfg.BASE_DIR / cfg.PATH_* 按当前日记解析（模块中没有同名全局变量时才会走到这里）"""
+    if name == "BASE_DIR":
+        return _base_dir()
+    if name in _DATA_DIRS:
+        return os.path.join(_base_dir(), "data", _DATA_DIRS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# --- 文件 I/O 操作日志（JOURNAL_IO_LOG=1 时逐条记录 CSV / Markdown 读写，按大小滚动） ---
+IO_LOG_ENABLED = os.environ.get("JOURNAL_IO_LOG", "").lower() in ("1", "true", "yes")
+# 单个日志文件的大小上限（字节）与保留的滚动份数
+IO_LOG_MAX_BYTES = int(os.environ.get("JOURNAL_IO_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+IO_LOG_BACKUPS = int(os.environ.get("JOURNAL_IO_LOG_BACKUPS", "5"))
+
+# --- 性能剖析：JOURNAL_PERF=1 时侧边栏显示每次重跑的分段耗时与读写字节数 ---
+PERF_ENABLED = os.environ.get("JOURNAL_PERF", "").lower() in ("1", "true", "yes")
+# 面板保留最近多少次重跑的汇总
+PERF_HISTORY = int(os.environ.get("JOURNAL_PERF_HISTORY", "20"))
+
+# --- 内存诊断：JOURNAL_MEMPROF=1 时在加载 / 保存 / 报告生成前后做 tracemalloc 快照，报告写到 data/memprof ---
+MEMPROF_ENABLED = os.environ.get("JOURNAL_MEMPROF", "").lower() in ("1", "true", "yes")
+# 报告中列出的分配位置条数；每笔分配保留的调用栈深度（用于归因到 core 模块）
+MEMPROF_TOP = int(os.environ.get("JOURNAL_MEMPROF_TOP", "15"))
+MEMPROF_FRAMES = int(os.environ.get("JOURNAL_MEMPROF_FRAMES", "25"))
+
+# --- 本地 HTTP JSON API（python -m core.api_server）：默认只监听本机 ---
+API_HOST = os.environ.get("JOURNAL_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("JOURNAL_API_PORT", "8766"))
+# 设置后每个请求须带 Authorization: Bearer <token>（监听非本机地址时务必设置）
+API_TOKEN = os.environ.get("JOURNAL_API_TOKEN", "")
+# 单个请求体的大小上限（字节），批量写入超出时返回 413
+API_MAX_BODY = int(os.environ.get("JOURNAL_API_MAX_BODY", str(16 * 1024 * 1024)))
+
+# --- 数据文件夹按需创建 ---
+# 导入时不再建目录（避免任何只 import core 的工具都付出 I/O 代价），
+# 由各保存函数在首次写入前调用 ensure_dirs。
 # 注意：Markdown 文件夹会根据日期在 data_manager.py 中动态创建
-for path in [PATH_TASKS, PATH_TIME, PATH_SUMMARY,
-             PATH_WEEKLY_SUMMARY, PATH_WEEKLY_HABITS, PATH_WEEKLY_TASKS,
-             PATH_MONTHLY_SUMMARY, PATH_MONTHLY_TASKS]:
-    os.makedirs(path, exist_ok=True)
+_created_dirs = set()
+
+
+def ensure_dirs(file_paths):
+    """确保这些文件的父目录存在；同一进程内每个目录只检查一次"""
+    for file_path in file_paths:
+        folder = os.path.dirname(file_path)
+        if folder and folder not in _created_dirs:
+            os.makedirs(folder, exist_ok=True)
+            _created_dirs.add(folder)
+
+
+# --- 原子写入：先写同目录下唯一命名的临时文件，再 os.replace 替换 ---
+# 临时文件名由 mkstemp 生成，多个线程 / 进程同时写同一个目标也不会互相覆盖临时文件；
+# 读取方只会看到完整的旧内容或新内容（最后一次替换生效）
+
+def write_text_atomic(path, text):
+    ensure_dirs([path])
+    folder, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=folder or ".", prefix=f".{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """json.dump 的原子版本（默认 ensure_ascii=False）"""
+    dump_kwargs.setdefault("ensure_ascii", False)
+    write_text_atomic(path, json.dumps(data, **dump_kwargs))
@@ -0,0 +1,136 @@
+# csv_io.py
+# 数据文件的统一读写：年度 CSV（utf-8-sig、无索引）与 Markdown 成品
+# 每次读写计入性能剖析（perf），并在开启 I/O 日志时写一条事件（io_log）
+# 已冻结的往年文件（xxx_2025.csv → xxx_2025.csv.gz，见 freeze.py）在这里透明打开：
+# 调用方仍使用 .csv 路径，用 exists() 代替 os.path.exists() 判断文件是否存在；写入冻结文件会被拒绝
+
+import json
+import os
+import re
+import time
+import pandas as pd
+from . import config as cfg
+from . import io_log
+from . import perf
+
+FROZEN_SUFFIX = ".gz"
+INDEX_SUFFIX = ".idx.json"
+# 年度数据文件名（含冻结后的 .csv.gz），group(1) 为年份
+YEAR_FILE = re.compile(r"_(\d{4})\.csv(?:\.gz)?$")
+
+
+# ==========================================
+# 1. 冻结文件的透明解析
+# ==========================================
+
+def frozen_path(path):
+    return os.fspath(path) + FROZEN_SUFFIX
+
+
+def is_frozen(path):
+    return os.path.exists(frozen_path(path))
+
+
+def resolve(path):
+    """.csv 路径 → 实际要打开的文件（已冻结时为 .csv.gz）"""
+    return frozen_path(path) if is_frozen(path) else path
+
+
+def exists(path):
+    """数据文件是否存在（原始 CSV 或冻结后的归档）"""
+    return os.path.exists(path) or is_frozen(path)
+
+
+def index_path(path):
+    return os.fspath(path) + INDEX_SUFFIX
+
+
+def read_index(path):
+    """
+    冻结文件的键索引（未冻结时返回 None）：
+    {"column": 键列, "columns": [列名], "rows": 行数, "keys": {键: [首行号, 行数]}}，键升序、行号从 0 起（不含表头）
+    """
+    if not is_frozen(path):
+        return None
+    try:
+        with open(index_path(path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # 索引缺失或损坏时退回整文件读取
+
+
+# ==========================================
+# 2. 读写
+# ==========================================
+
+def read_csv(path, **kwargs):
+    """pd.read_csv 的薄封装，默认 utf-8-sig；已冻结的文件按 gzip 读取"""
+    kwargs.setdefault("encoding", "utf-8-sig")
+    path = resolve(path)
+    start = time.perf_counter()
+    df = pd.read_csv(path, **kwargs)
+    perf.record_read(path)
+    _log("read_csv", path, len(df), start)
+    return df
+
+
+def iter_csv(path, chunksize, **kwargs):
+    """分块读取：逐块产出 DataFrame，内存只与 chunksize 有关；读完后整体计一次 I/O"""
+    kwargs.setdefault("encoding", "utf-8-sig")
+    path = resolve(path)
+    start = time.perf_counter()
+    rows = 0
+    with pd.read_csv(path, chunksize=chunksize, **kwargs) as reader:
+        for chunk in reader:
+            rows += len(chunk)
+            yield chunk
+    perf.record_read(path)
+    _log("read_csv", path, rows, start)
+
+
+def write_csv(df, path, **kwargs):
+    """DataFrame.to_csv 的薄封装，默认 utf-8-sig、不写索引；已冻结的年度文件只读，抛 RuntimeError"""
+    if is_frozen(path):
+        raise RuntimeError(f"{os.path.basename(path)} 已冻结为只读归档，如需修改请先解冻（python -m core.freeze --thaw）")
+    kwargs.setdefault("encoding", "utf-8-sig")
+    kwargs.setdefault("index", False)
+    start = time.perf_counter()
+    df.to_csv(path, **kwargs)
+    perf.record_write(path)
+    _log("write_csv", path, len(df), start)
+
+
+def file_lock(path):
+    """
+    年度 CSV 的写锁：页面保存、journal_store.upsert、冻结 / 解冻的“读 → 改 → 写”都在锁内完成，
+    同一进程内的并发写入不会互相覆盖。线程锁不跨进程：单独运行的 API 服务与页面仍可能同时改写同一文件
+    """
+    return cfg.profile_lock(f"csv:{os.fspath(path)}")
+
+
+def replace_rows(path, column, key, rows):
+    """把年度 CSV 中 column == key 的行整组替换为 rows（DataFrame）；文件不存在时新建"""
+    with file_lock(path):
+        if exists(path):
+            df_old = read_csv(path)
+            df_old[column] = df_old[column].astype(str)
+            rows = pd.concat([df_old[df_old[column] != key], rows], ignore_index=True)
+        write_csv(rows, path)
+
+
+def write_markdown(path, content):
+    """写入 Markdown 成品（utf-8-sig）"""
+    start = time.perf_counter()
+    with open(path, "w", encoding="utf-8-sig") as f:
+        f.write(content)
+    perf.record_write(path)
+    _log("write_markdown", path, content.count("\n") + 1, start)
+
+
+# ==========================================
+# 3. 内部
+# ==========================================
+
+def _log(op, path, rows, start):
+    if cfg.IO_LOG_ENABLED:
+        io_log.log_event(op, path, rows, time.perf_counter() - start, io_log.caller())
@@ -6,6 +6,9 @@ from datetime import datetime
 from . import texts as t
 from . import template as tp
 from . import config as cfg
+from . import csv_io
+from . import memprof
+from . import perf
 
 
 def get_file_paths(date_obj):
@@ -79,6 +82,8 @@ def get_default_time_schedule(date_str):
             })
     return pd.DataFrame(data)
 
+@memprof.tracked
+@perf.timed
 def load_data_for_date(date_obj):
     """
     读取指定日期的所有数据。如果文件不存在，返回空模板。
@@ -88,8 +93,8 @@ def load_data_for_date(date_obj):
     
     # --- 1. 加载每日概览 (Summary) ---
     summary_data = {}
-    if os.path.exists(paths["summary"]):
-        df = pd.read_csv(paths["summary"], encoding='utf-8-sig')
+    if csv_io.exists(paths["summary"]):
+        df = csv_io.read_csv(paths["summary"])
         df["Date"] = df["Date"].astype(str)
         df = df[df["Date"] == date_str]
         if not df.empty:
@@ -98,8 +103,8 @@ def load_data_for_date(date_obj):
                            for k, v in df.iloc[0].to_dict().items()}
     
     # --- 2. 加载任务 (Tasks) ---
-    if os.path.exists(paths["tasks"]):
-        df_tasks = pd.read_csv(paths["tasks"], encoding='utf-8-sig')
+    if csv_io.exists(paths["tasks"]):
+        df_tasks = csv_io.read_csv(paths["tasks"])
         df_tasks["Date"] = df_tasks["Date"].astype(str)
         # 强制转为字符串，防止空值报错
         cols_to_str = [t.COL_TASK_NAME, t.COL_TASK_ACTUAL, t.COL_TASK_REASON, t.COL_TASK_STATUS]
@@ -115,8 +120,8 @@ def load_data_for_date(date_obj):
         current_tasks = pd.DataFrame(columns=["Date", t.COL_TASK_NAME, t.COL_TASK_ACTUAL, t.COL_TASK_STATUS, t.COL_TASK_REASON])
 
     # --- 3. 加载时间轴 (Time Log) ---
-    if os.path.exists(paths["time"]):
-        df_time = pd.read_csv(paths["time"], encoding='utf-8-sig')
+    if csv_io.exists(paths["time"]):
+        df_time = csv_io.read_csv(paths["time"])
         df_time["Date"] = df_time["Date"].astype(str)
         # 强制转为字符串
         cols_to_str_time = [t.COL_TIME_PLAN, t.COL_TIME_ACTUAL, t.COL_TIME_NOTE, t.COL_TIME_STATUS]
@@ -134,27 +139,21 @@ def load_data_for_date(date_obj):
 
     return summary_data, current_tasks, current_time
 
+@memprof.tracked
+@perf.timed
 def save_all_data(date_obj, summary_dict, tasks_df, time_df):
     """
     保存所有数据到对应的年份CSV文件中 (Upsert模式)
     """
     paths = get_file_paths(date_obj)
+    cfg.ensure_dirs(paths.values())  # 首次写入时才创建数据目录
     date_str = date_obj.strftime('%Y-%m-%d')
     
     # --- 1. 保存概览 (Summary) ---
     summary_dict["Date"] = date_str # 确保有日期
     new_row = pd.DataFrame([summary_dict])
     
-    if os.path.exists(paths["summary"]):
-        df_old = pd.read_csv(paths["summary"], encoding='utf-8-sig')
-        df_old["Date"] = df_old["Date"].astype(str)
-        # 删除旧的当日数据 (覆盖更新逻辑)
-        df_old = df_old[df_old["Date"] != date_str]
-        # 追加新的
-        df_final = pd.concat([df_old, new_row], ignore_index=True)
-    else:
-        df_final = new_row
-    df_final.to_csv(paths["summary"], index=False, encoding='utf-8-sig')
+    csv_io.replace_rows(paths["summary"], "Date", date_str, new_row)
     
     # --- 2. 保存任务 (Tasks) ---
     tasks_df = tasks_df.fillna("")  # 防止 NaN 写入 CSV
@@ -169,27 +168,13 @@ def save_all_data(date_obj, summary_dict, tasks_df, time_df):
         }])
     tasks_df["Date"] = date_str  # 确保所有行都有日期
 
-    if os.path.exists(paths["tasks"]):
-        df_old = pd.read_csv(paths["tasks"], encoding='utf-8-sig')
-        df_old["Date"] = df_old["Date"].astype(str)
-        df_old = df_old[df_old["Date"] != date_str]
-        df_final = pd.concat([df_old, tasks_df], ignore_index=True)
-    else:
-        df_final = tasks_df
-    df_final.to_csv(paths["tasks"], index=False, encoding='utf-8-sig')
+    csv_io.replace_rows(paths["tasks"], "Date", date_str, tasks_df)
 
     # --- 3. 保存时间轴 (Time) ---
     time_df = time_df.fillna("")  # 防止 NaN 写入 CSV
     time_df["Date"] = date_str
 
-    if os.path.exists(paths["time"]):
-        df_old = pd.read_csv(paths["time"], encoding='utf-8-sig')
-        df_old["Date"] = df_old["Date"].astype(str)
-        df_old = df_old[df_old["Date"] != date_str]
-        df_final = pd.concat([df_old, time_df], ignore_index=True)
-    else:
-        df_final = time_df
-    df_final.to_csv(paths["time"], index=False, encoding='utf-8-sig')
+    csv_io.replace_rows(paths["time"], "Date", date_str, time_df)
     
     # --- 4. 生成 Markdown 成品 ---
     generate_markdown(date_obj, summary_dict, tasks_df, time_df, paths["markdown"])
@@ -197,6 +182,7 @@ def save_all_data(date_obj, summary_dict, tasks_df, time_df):
 from . import md_template as mdt
 from datetime import datetime
 
+@perf.timed
 def generate_markdown(date_obj, summary, tasks_df, time_df, file_path):
     
     # --- 基础元数据 ---
@@ -260,5 +246,4 @@ def generate_markdown(date_obj, summary, tasks_df, time_df, file_path):
         reflect_deep         = summary.get("Reflect_Deep_Reflections", ""),
     )
     
-    with open(file_path, "w", encoding="utf-8-sig") as f:
-        f.write(content)
+    csv_io.write_markdown(file_path, content)
@@ -0,0 +1,148 @@
+# draft_store.py
+# 日记草稿暂存：按天追加写入 JSONL，浏览器崩溃后可恢复未保存的内容
+# 注意：草稿只是轻量快照，正式保存（CSV + Markdown）仍由 save_all_data 负责
+
+import json
+import os
+import threading
+import time
+from . import config as cfg
+from . import perf
+
+# 防抖间隔（秒）：最后一次修改后静默这么久才落盘，连续编辑合并为一行
+DEBOUNCE_SECONDS = float(os.environ.get("JOURNAL_DRAFT_DEBOUNCE", "3"))
+
+
+# ==========================================
+# 1. 草稿文件读写
+# ==========================================
+
+def get_draft_path(date_obj):
+    """草稿文件路径：data/drafts/draft_2026-03-15.jsonl"""
+    return os.path.join(cfg.PATH_DRAFTS, f"draft_{date_obj.strftime('%Y-%m-%d')}.jsonl")
+
+
+def append_draft(date_obj, changes):
+    """
+    追加一行变更记录，只包含本次改动的字段。
+    格式：{"ts": 时间戳, "values": {字段: 值}}
+    """
+    if not changes:
+        return
+    path = get_draft_path(date_obj)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    line = json.dumps({"ts": time.time(), "values": changes}, ensure_ascii=False)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+@perf.timed
+def load_draft(date_obj):
+    """
+    按顺序回放草稿文件，返回 (最新字段值 dict, 最后修改时间戳)。
+    无草稿时返回 ({}, None)；崩溃时写了一半的坏行直接跳过。
+    """
+    path = get_draft_path(date_obj)
+    if not os.path.exists(path):
+        return {}, None
+
+    values = {}
+    last_ts = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            values.update(record.get("values", {}))
+            last_ts = record.get("ts", last_ts)
+    return values, last_ts
+
+
+def clear_draft(date_obj):
+    """正式保存成功或用户放弃草稿后删除草稿文件"""
+    path = get_draft_path(date_obj)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+# ==========================================
+# 2. 防抖记录器
+# ==========================================
+
+class DraftRecorder:
+    """
+    记录某一天的控件取值变化，防抖后追加写入草稿文件。
+    - 第一次 record 只建立基线，不落盘（此时页面内容就是已加载的数据）
+    - 之后每次 record 只比较出变化的字段，放入待写缓冲区
+    - 最后一次变化后静默 debounce 秒，由后台定时器统一写入一行
+    """
+
+    def __init__(self, date_obj, debounce=None):
+        self.date_obj = date_obj
+        self.debounce = DEBOUNCE_SECONDS if debounce is None else debounce
+        self._snapshot = None   # 最近一次记录的完整取值（JSON 字符串形式，便于比较）
+        self._pending = {}
+        self._timer = None
+        self._lock = threading.Lock()
+        # 所属日记：定时器线程里落盘时不会继承页面会话的日记，写入前显式切回
+        self.profile = cfg.current_profile()
+
+    def record(self, values):
+        """传入当前全部控件取值，返回本次检测到的变化字段数"""
+        encoded = {k: json.dumps(v, ensure_ascii=False, sort_keys=True, default=str)
+                   for k, v in values.items()}
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = encoded
+                return 0
+            changed = {k: values[k] for k, v in encoded.items()
+                       if self._snapshot.get(k) != v}
+            if not changed:
+                return 0
+            self._snapshot.update(encoded)
+            self._pending.update(changed)
+            self._schedule()
+        return len(changed)
+
+    def _schedule(self):
+        """重置防抖定时器（调用方需持有锁）"""
+        if self._timer is not None:
+            self._timer.cancel()
+        if self.debounce <= 0:
+            self._timer = None
+            self._write_pending()
+            return
+        self._timer = threading.Timer(self.debounce, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _write_pending(self):
+        pending, self._pending = self._pending, {}
+        token = cfg.use_profile(self.profile)
+        try:
+            append_draft(self.date_obj, pending)
+        finally:
+            cfg.reset_profile(token)
+
+    def flush(self):
+        """立即写入缓冲区（切换日期前调用，避免丢失最后的修改）"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._write_pending()
+
+    def discard(self):
+        """丢弃缓冲区并删除草稿文件（正式保存成功后调用）"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = {}
+            self._snapshot = None
+            token = cfg.use_profile(self.profile)
+            try:
+                clear_draft(self.date_obj)
+            finally:
+                cfg.reset_profile(token)
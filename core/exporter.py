@@ -0,0 +1,122 @@
+# exporter.py
+# 流式区间导出：跨全部年度文件，把日 / 任务 / 时间轴 / 周 / 月各表导出为 JSONL、CSV 或 Parquet
+# 经 journal_store.iter_chunks 逐块读取、逐块写出，内存只与块大小有关，与区间长短无关
+# Parquet 需要 pyarrow（可选依赖，未安装时只影响 Parquet）
+#
+# 命令行入口见 cli.py：
+#   python journal.py export time --from 2020-01-01 --to 2026-12-31 -o time.jsonl
+#   python journal.py export weekly_habits --from 2026-03-01 -o habits.csv          # 日期会换算成周键
+#   python journal.py export summary -o summary.parquet                             # 全部历史
+
+import json
+import os
+import re
+from datetime import date
+import pandas as pd
+from . import journal_store as store
+
+FORMATS = ("jsonl", "csv", "parquet")
+
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+# ==========================================
+# 1. 区间与列
+# ==========================================
+
+def key_bound(table, text):
+    """
+    区间端点 → 该表的键。周表 / 月表也接受日期（换算为所在的 ISO 周 / 月），
+    因此同一个日期区间可以用于任何一张表。
+    """
+    if not text:
+        return None
+    column = store.key_column(table)
+    if column != "Date" and _DATE.match(text):
+        day = date.fromisoformat(text)
+        if column == "Week":
+            iso_year, iso_week, _ = day.isocalendar()
+            return f"{iso_year}-W{iso_week:02d}"
+        return f"{day.year}-{day.month:02d}"
+    return store.check_key(table, text)
+
+
+def export_columns(table, start=None, end=None):
+    """区间涉及的年度文件的列并集（按首次出现的顺序；只读表头），保证 CSV 表头 / Parquet schema 全程一致"""
+    columns = [store.key_column(table)]
+    for year in store.available_years(table):
+        if (start and year < int(start[:4])) or (end and year > int(end[:4])):
+            continue
+        columns += [c for c in store.columns(table, year) if c not in columns]
+    return columns
+
+
+# ==========================================
+# 2. 写出
+# ==========================================
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _write_jsonl(chunks, out):
+    for chunk in chunks:
+        out.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in chunk.to_dict("records")))
+        yield len(chunk)
+
+
+def _write_csv(chunks, out, columns):
+    header = True
+    for chunk in chunks:
+        chunk.to_csv(out, index=False, header=header, columns=columns)
+        header = False
+        yield len(chunk)
+    if header:  # 区间内没有数据也写出表头
+        pd.DataFrame(columns=columns).to_csv(out, index=False)
+
+
+def _write_parquet(chunks, out, columns):
+    """每块写成一个 row group；所有列按文本存储（与 CSV 读取方式一致）"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("导出 Parquet 需要 pyarrow 库。请运行: pip install pyarrow")
+    schema = pa.schema([(c, pa.string()) for c in columns])
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield len(chunk)
+
+
+def export(table, out, start=None, end=None, fmt="jsonl", chunksize=store.READ_CHUNKSIZE):
+    """
+    把 [start, end] 区间内的行写到 out，返回行数。
+    out 为路径或已打开的文件（jsonl / csv 为文本流，parquet 为二进制流）；
+    start / end 为该表的键或日期，都可省略（导出全部历史）。
+    """
+    start, end = key_bound(table, start), key_bound(table, end)
+    if fmt not in FORMATS:
+        raise ValueError(f"未知的导出格式: {fmt}（可选 {', '.join(FORMATS)}）")
+    columns = export_columns(table, start, end)
+    chunks = (c.reindex(columns=columns, fill_value="") for c in store.iter_chunks(table, start, end, chunksize))
+
+    if fmt == "parquet":
+        return sum(_write_parquet(chunks, out, columns))
+    if not isinstance(out, (str, os.PathLike)):
+        return sum(_write_jsonl(chunks, out) if fmt == "jsonl" else _write_csv(chunks, out, columns))
+    # CSV 文件带 BOM，与数据文件一致，Excel 打开中文不乱码
+    encoding = "utf-8-sig" if fmt == "csv" else "utf-8"
+    with open(out, "w", encoding=encoding, newline="") as f:
+        return export(table, f, start, end, fmt, chunksize)
+
+
+def format_from_path(path, default="jsonl"):
+    """按扩展名推断导出格式（.jsonl / .ndjson / .csv / .parquet）"""
+    ext = os.path.splitext(path or "")[1].lower()
+    return {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv", ".parquet": "parquet"}.get(ext, default)
+
@@ -0,0 +1,158 @@
+# freeze.py
+# 冻结往年数据：年度结束后不再变化的 CSV 压缩为 gzip 并按键排序、生成键索引，设为只读
+#   xxx_2025.csv → xxx_2025.csv.gz + xxx_2025.csv.idx.json
+# 所有读取经 csv_io 透明打开冻结文件（调用方仍用 .csv 路径）；区间读取借助索引只解析区间内的行，
+# 索引表明区间内没有数据时整个文件都不打开。写入冻结文件会被 csv_io 拒绝，需先解冻。
+#
+# 用法（在项目根目录执行）：
+#   python -m core.freeze --dry-run        # 列出可冻结的年度文件
+#   python -m core.freeze                  # 冻结全部已结束年份
+#   python -m core.freeze --thaw 2025      # 解冻 2025 年的全部表（恢复为可写的 CSV）
+
+import argparse
+import json
+import os
+import stat
+from datetime import date
+from . import config as cfg
+from . import csv_io
+from . import journal_store as store
+
+# 周表按 ISO 年分文件：ISO 年结束后才算关闭（12 月 29 日之后的几天可能属于下一年第 1 周）
+WEEK_TABLES = tuple(t for t in store.TABLES if store.key_column(t) == "Week")
+
+
+# ==========================================
+# 1. 冻结与解冻
+# ==========================================
+
+def closed_years(table, today=None):
+    """该表中已结束、尚未冻结的年份"""
+    today = today or date.today()
+    current = today.isocalendar()[0] if table in WEEK_TABLES else today.year
+    return [year for year in store.available_years(table)
+            if year < current and not csv_io.is_frozen(store.table_path(table, year))]
+
+
+def _read_only(path):
+    os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+
+def _writable(path):
+    os.chmod(path, stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH)
+
+
+def build_index(df, column):
+    """按键排好序的 DataFrame → 索引 dict（格式见 csv_io.read_index）"""
+    keys = {}
+    for row, key in enumerate(df[column]):
+        span = keys.get(key)
+        if span is None:
+            keys[key] = [row, 1]
+        else:
+            span[1] += 1
+    return {"column": column, "columns": list(df.columns), "rows": len(df), "keys": keys}
+
+
+def freeze(table, year):
+    """
+    冻结一个年度文件：按键稳定排序（同一键内保持原有行序）后写成 gzip 与索引，
+    读回校验一致后才删除原 CSV，并把归档与索引设为只读。
+    返回 {"table", "year", "rows", "bytes_before", "bytes_after"}
+    """
+    path = store.table_path(table, year)
+    column = store.key_column(table)
+    gz_path, idx_path = csv_io.frozen_path(path), csv_io.index_path(path)
+    with csv_io.file_lock(path):
+        if csv_io.is_frozen(path):
+            raise ValueError(f"{os.path.basename(path)} 已经冻结")
+        if not os.path.exists(path):
+            raise ValueError(f"没有 {os.path.basename(path)}")
+        df = csv_io.read_csv(path, **store.TEXT_READ)
+        if column not in df.columns:
+            raise ValueError(f"{os.path.basename(path)} 缺少键列 {column}")
+        df = df.sort_values(column, kind="stable").reset_index(drop=True)
+        try:
+            csv_io.write_csv(df, gz_path)
+            if not csv_io.read_csv(gz_path, **store.TEXT_READ).equals(df):
+                raise RuntimeError(f"{os.path.basename(gz_path)} 读回校验不一致，已放弃冻结")
+            with open(idx_path, "w", encoding="utf-8") as f:
+                json.dump(build_index(df, column), f, ensure_ascii=False)
+        except BaseException:
+            for leftover in (gz_path, idx_path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            raise
+        bytes_before = os.path.getsize(path)
+        os.remove(path)
+        _read_only(gz_path)
+        _read_only(idx_path)
+    return {"table": table, "year": year, "rows": len(df),
+            "bytes_before": bytes_before, "bytes_after": os.path.getsize(gz_path)}
+
+
+def thaw(table, year):
+    """解冻：恢复为普通 CSV（按键排好序的内容），删除归档与索引"""
+    path = store.table_path(table, year)
+    gz_path, idx_path = csv_io.frozen_path(path), csv_io.index_path(path)
+    with csv_io.file_lock(path):
+        if not csv_io.is_frozen(path):
+            raise ValueError(f"{os.path.basename(path)} 没有冻结")
+        df = csv_io.read_csv(gz_path, **store.TEXT_READ)
+        csv_io.write_csv(df, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        for frozen in (gz_path, idx_path):
+            if os.path.exists(frozen):
+                _writable(frozen)  # Windows 下只读文件不能删除
+                os.remove(frozen)
+    return {"table": table, "year": year, "rows": len(df)}
+
+
+def freeze_closed(tables=None, today=None):
+    """冻结所有表中已结束的年份，返回每个文件的结果列表"""
+    return [freeze(table, year) for table in (tables or store.TABLES) for year in closed_years(table, today)]
+
+
+def thaw_year(year, tables=None):
+    """解冻某一年的所有已冻结表"""
+    return [thaw(table, year) for table in (tables or store.TABLES)
+            if csv_io.is_frozen(store.table_path(table, year))]
+
+
+# ==========================================
+# 2. 命令行
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="冻结往年数据（gzip + 键索引，只读）")
+    parser.add_argument("--dry-run", action="store_true", help="只列出可冻结的文件")
+    parser.add_argument("--thaw", type=int, metavar="YEAR", help="解冻该年的全部表")
+    parser.add_argument("--table", action="append", choices=store.TABLES, help="只处理这些表（可重复）")
+    parser.add_argument("--profile", help=f"处理哪份日记（JOURNAL_PROFILES 中的名称，默认 {next(iter(cfg.PROFILES))}）")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        try:
+            cfg.use_profile(args.profile)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.thaw:
+        for result in thaw_year(args.thaw, args.table):
+            print(f"已解冻 {result['table']} {result['year']}（{result['rows']} 行）")
+        return
+    if args.dry_run:
+        for table in args.table or store.TABLES:
+            for year in closed_years(table):
+                print(f"{table} {year}: {store.table_path(table, year)}")
+        return
+    results = freeze_closed(args.table)
+    for r in results:
+        ratio = r["bytes_after"] / r["bytes_before"] if r["bytes_before"] else 0
+        print(f"已冻结 {r['table']} {r['year']}：{r['rows']} 行，{r['bytes_before']} → {r['bytes_after']} 字节（{ratio:.0%}）")
+    if not results:
+        print("没有需要冻结的年份")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# io_log.py
+# 文件 I/O 操作日志：csv_io 的每次 CSV 读写、Markdown 写入追加一行 JSON 事件到 io_log.jsonl，按大小滚动
+# 事件字段：ts, op, path, rows, bytes, ms, caller；JOURNAL_IO_LOG=1 时启用
+#
+# 汇总（在项目根目录执行）：
+#   python -m core.io_log                 # 全部日志：按文件 / 调用方 / 操作的热点表
+#   python -m core.io_log --days 7 --top 10
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from . import config as cfg
+
+LOG_NAME = "io_log.jsonl"
+
+
+# ==========================================
+# 1. 记录
+# ==========================================
+
+def log_path():
+    return os.path.join(cfg.PATH_IO_LOG, LOG_NAME)
+
+
+def _rotate(path):
+    """io_log.jsonl → .1 → .2 …，超出保留份数的最旧一份被覆盖掉"""
+    if cfg.IO_LOG_BACKUPS <= 0:
+        os.remove(path)
+        return
+    for i in range(cfg.IO_LOG_BACKUPS - 1, 0, -1):
+        src = f"{path}.{i}"
+        if os.path.exists(src):
+            os.replace(src, f"{path}.{i + 1}")
+    os.replace(path, path + ".1")
+
+
+def _relative(path):
+    """数据目录内的文件记相对路径，日志在不同机器间也能对比"""
+    path = os.fspath(path)
+    try:
+        rel = os.path.relpath(path, cfg.BASE_DIR)
+    except ValueError:  # Windows 下跨盘符
+        return path
+    return path if rel.startswith("..") else rel
+
+
+def caller():
+    """
+    发起读写的业务函数（"模块.函数"）：跳过 csv_io / io_log 自身，
+    再沿 core 内部的下划线辅助函数（如 _read_csv_safe）往上找到第一个公开函数。
+    """
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get("__name__") in (__name__, "core.csv_io"):
+        frame = frame.f_back
+    best = frame
+    while frame is not None and frame.f_globals.get("__name__", "").startswith("core."):
+        best = frame
+        if not frame.f_code.co_name.startswith("_"):
+            break
+        frame = frame.f_back
+    if best is None:
+        return None
+    module = best.f_globals.get("__name__", "?").rsplit(".", 1)[-1]
+    return f"{module}.{best.f_code.co_name}"
+
+
+def log_event(op, path, rows, seconds, caller_name=None):
+    """追加一条事件；文件超过 IO_LOG_MAX_BYTES 时先滚动"""
+    try:
+        nbytes = os.path.getsize(path)
+    except OSError:
+        nbytes = None
+    event = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "op": op,
+        "path": _relative(path),
+        "rows": rows,
+        "bytes": nbytes,
+        "ms": round(seconds * 1000, 3),
+        "caller": caller_name,
+    }
+    line = json.dumps(event, ensure_ascii=False) + "\n"
+    target = log_path()
+    with cfg.profile_lock("io_log"):
+        cfg.ensure_dirs([target])
+        if os.path.exists(target) and os.path.getsize(target) >= cfg.IO_LOG_MAX_BYTES:
+            _rotate(target)
+        with open(target, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+# ==========================================
+# 2. 读取与汇总
+# ==========================================
+
+def log_files():
+    """当前日志及滚动出的旧日志，按时间从旧到新"""
+    path = log_path()
+    files = [f"{path}.{i}" for i in range(cfg.IO_LOG_BACKUPS, 0, -1)] + [path]
+    return [f for f in files if os.path.exists(f)]
+
+
+def read_events(since=None):
+    """全部事件（从旧到新）；since 为 datetime 时只保留其后的事件，坏行跳过"""
+    events = []
+    for path in log_files():
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if since is None or datetime.fromisoformat(event["ts"]) >= since:
+                    events.append(event)
+    return events
+
+
+def aggregate(events, by):
+    """
+    按 by（字段名元组，如 ("path", "op")）分组的热点表，按总耗时降序。
+    每行：分组字段 + count, rows, bytes, total_ms, avg_ms, max_ms
+    """
+    groups = {}
+    for event in events:
+        key = tuple(event.get(k) for k in by)
+        g = groups.setdefault(key, {"count": 0, "rows": 0, "bytes": 0, "total_ms": 0.0, "max_ms": 0.0})
+        g["count"] += 1
+        g["rows"] += event.get("rows") or 0
+        g["bytes"] += event.get("bytes") or 0
+        g["total_ms"] += event["ms"]
+        g["max_ms"] = max(g["max_ms"], event["ms"])
+    table = []
+    for key, g in groups.items():
+        row = dict(zip(by, key))
+        row.update(g, total_ms=round(g["total_ms"], 1), avg_ms=round(g["total_ms"] / g["count"], 2))
+        table.append(row)
+    return sorted(table, key=lambda r: r["total_ms"], reverse=True)
+
+
+TABLES = (
+    ("按文件", ("path", "op")),
+    ("按调用方", ("caller", "op")),
+    ("按操作", ("op",)),
+)
+
+
+def format_table(rows, by, top=None):
+    """纯文本对齐表格（不依赖 pandas，分析大日志时启动更快）"""
+    columns = list(by) + ["count", "rows", "bytes", "total_ms", "avg_ms", "max_ms"]
+    rows = rows[:top] if top else rows
+    cells = [[str(r.get(c, "")) for c in columns] for r in rows]
+    widths = [max([len(c)] + [len(row[i]) for row in cells]) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths))]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(row, widths)) for row in cells]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="汇总文件 I/O 操作日志")
+    parser.add_argument("--days", type=float, help="只统计最近 N 天")
+    parser.add_argument("--top", type=int, default=20, help="每张表显示的行数")
+    parser.add_argument("--json", action="store_true", help="输出 JSON 而不是文本表格")
+    args = parser.parse_args(argv)
+
+    since = datetime.now() - timedelta(days=args.days) if args.days else None
+    events = read_events(since)
+    tables = {title: aggregate(events, by) for title, by in TABLES}
+    if args.json:
+        print(json.dumps({"events": len(events), **{t: rows[:args.top] for t, rows in tables.items()}},
+                         ensure_ascii=False, indent=2))
+        return tables
+    print(f"共 {len(events)} 条事件（{log_path()}）")
+    for title, by in TABLES:
+        print(f"\n## {title}\n{format_table(tables[title], by, args.top)}")
+    return tables
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# journal_store.py
+# 按表访问年度 CSV：区间读取（只读涉及的年份、分块流式产出）与批量 Upsert（每个年度文件只读写一次）
+# 表名与 report_data_collector.SOURCES 一致；本地 HTTP API、命令行、导出共用这一层
+# 注意：这里只维护 CSV，不重新生成 Markdown 成品（Markdown 仍由页面保存时生成）
+
+import os
+import re
+from datetime import date
+import pandas as pd
+from . import config as cfg
+from . import csv_io
+from .report_data_collector import SOURCES, SOURCE_KEYS
+
+TABLES = tuple(SOURCES)
+# 每个键只有一行的表（概览）；其余表每个键多行（任务、时间轴、习惯），Upsert 时整组替换
+SINGLE_ROW_TABLES = ("summary", "weekly_summary", "monthly_summary")
+
+# 记录键格式：前 4 位即所在年度文件的年份（周记为 ISO 年）
+KEY_FORMATS = {
+    "Date": (re.compile(r"^\d{4}-\d{2}-\d{2}$"), "YYYY-MM-DD"),
+    "Week": (re.compile(r"^\d{4}-W\d{2}$"), "YYYY-Www"),
+    "Month": (re.compile(r"^\d{4}-\d{2}$"), "YYYY-MM"),
+}
+
+READ_CHUNKSIZE = 5000
+# 全部列按文本读取：原样返回 / 写回，不做类型推断（'06' 不会变成 6，整数列不会变成 6.0）
+TEXT_READ = {"dtype": str, "keep_default_na": False}
+
+
+# ==========================================
+# 1. 表与键
+# ==========================================
+
+def check_table(table):
+    if table not in SOURCES:
+        raise KeyError(f"未知的表: {table}（可选 {', '.join(TABLES)}）")
+    return table
+
+
+def key_column(table):
+    return SOURCE_KEYS[check_table(table)]
+
+
+def check_key(table, key):
+    """校验记录键的格式与取值（2026-02-30、2026-W60、2026-13 都不合法），返回去掉首尾空白的键；不合法抛 ValueError"""
+    column = key_column(table)
+    pattern, hint = KEY_FORMATS[column]
+    key = str(key).strip()
+    if not pattern.match(key) or not _valid_key(column, key):
+        raise ValueError(f"{table} 的 {column} 应为有效的 {hint}，收到 {key!r}")
+    return key
+
+
+def _valid_key(column, key):
+    """格式已匹配的键是否对应真实的日期 / ISO 周 / 月份"""
+    try:
+        if column == "Date":
+            date.fromisoformat(key)
+        elif column == "Week":
+            date.fromisocalendar(int(key[:4]), int(key[6:]), 1)
+        elif not 1 <= int(key[5:]) <= 12:
+            return False
+    except ValueError:
+        return False
+    return True
+
+
+def table_path(table, year):
+    attr, pattern, _ = SOURCES[check_table(table)]
+    return os.path.join(getattr(cfg, attr), pattern.format(year=year))
+
+
+def available_years(table):
+    """该表已有数据文件的年份（升序）"""
+    folder = getattr(cfg, SOURCES[check_table(table)][0])
+    if not os.path.isdir(folder):
+        return []
+    years = set()
+    for name in os.listdir(folder):
+        match = csv_io.YEAR_FILE.search(name)
+        if match:
+            years.add(int(match.group(1)))
+    return sorted(years)
+
+
+def columns(table, year):
+    """某个年度文件的列名（只读表头）；文件不存在时返回空列表"""
+    path = table_path(table, year)
+    if not csv_io.exists(path):
+        return []
+    index = csv_io.read_index(path)
+    if index:
+        return index["columns"]  # 冻结文件：索引里记着列名，不用解压
+    return list(csv_io.read_csv(path, nrows=0, **TEXT_READ).columns)
+
+
+# ==========================================
+# 2. 区间读取
+# ==========================================
+
+def iter_chunks(table, start=None, end=None, chunksize=READ_CHUNKSIZE):
+    """
+    逐块产出 [start, end] 区间内的 DataFrame（键按字符串比较，两端都含）。
+    只打开区间涉及的年度文件，每个文件分块读取，内存占用与区间大小无关。
+    """
+    column = key_column(table)
+    start = check_key(table, start) if start else None
+    end = check_key(table, end) if end else None
+    for year in available_years(table):
+        if (start and year < int(start[:4])) or (end and year > int(end[:4])):
+            continue
+        path = table_path(table, year)
+        window = _index_window(path, start, end)
+        if window == {}:
+            continue  # 冻结文件的索引表明区间内没有数据，整个文件都不用打开
+        for chunk in csv_io.iter_csv(path, chunksize, **TEXT_READ, **(window or {})):
+            if column not in chunk.columns:
+                continue
+            keys = chunk[column]
+            mask = pd.Series(True, index=chunk.index)
+            if start:
+                mask &= keys >= start
+            if end:
+                mask &= keys <= end
+            if mask.any():
+                yield chunk[mask]
+
+
+def _index_window(path, start, end):
+    """
+    冻结文件（行已按键排序并带索引）只解析区间内的行：返回 read_csv 的 skiprows / nrows / names 参数；
+    区间内没有行时返回 {}；未冻结或无需裁剪时返回 None
+    """
+    index = csv_io.read_index(path)
+    if not index or not (start or end):
+        return None
+    spans = [span for key, span in index["keys"].items()
+             if (not start or key >= start) and (not end or key <= end)]
+    if not spans:
+        return {}
+    first = min(s[0] for s in spans)
+    last = max(s[0] + s[1] for s in spans)
+    # 跳过表头与区间之前的行；没有表头时由 names 指定列名
+    return {"skiprows": first + 1, "nrows": last - first, "header": None, "names": index["columns"]}
+
+
+def iter_rows(table, start=None, end=None, chunksize=READ_CHUNKSIZE):
+    """逐行产出 dict（区间语义同 iter_chunks）"""
+    for chunk in iter_chunks(table, start, end, chunksize):
+        yield from chunk.to_dict("records")
+
+
+def get_rows(table, key):
+    """某一个键的全部行（概览表至多一行）"""
+    key = check_key(table, key)
+    return list(iter_rows(table, key, key))
+
+
+# ==========================================
+# 3. 批量 Upsert
+# ==========================================
+
+def _cell(value):
+    """写入值统一转成文本（与读取一致），None 写成空单元格"""
+    return "" if value is None else str(value)
+
+
+def upsert(table, records):
+    """
+    批量写入记录（每条必须带键列），按年度文件分组，每个文件只读一次、写一次。
+    - 概览表：同键的已有行按字段合并（只更新传入的字段），没有则追加
+    - 多行表：传入记录中出现的每个键，其已有行整组替换为传入的行
+    返回 {"files", "keys", "rows"}；键格式错误抛 ValueError（此时不写任何文件）。
+    """
+    column = key_column(table)
+    by_year = {}
+    for record in records:
+        if not isinstance(record, dict) or column not in record:
+            raise ValueError(f"{table} 的每条记录都必须是包含 {column} 的对象")
+        key = check_key(table, record[column])
+        by_year.setdefault(key[:4], []).append({k: _cell(v) for k, v in record.items()} | {column: key})
+
+    keys = 0
+    for year, batch in by_year.items():
+        path = table_path(table, year)
+        cfg.ensure_dirs([path])
+        with csv_io.file_lock(path):
+            if csv_io.exists(path):
+                old = csv_io.read_csv(path, **TEXT_READ)
+            else:
+                old = pd.DataFrame(columns=[column])
+            columns = list(old.columns)
+            for record in batch:
+                columns += [c for c in record if c not in columns]
+            rows = old.to_dict("records")
+            if table in SINGLE_ROW_TABLES:
+                index = {row[column]: i for i, row in enumerate(rows)}
+                for record in batch:
+                    if record[column] in index:
+                        rows[index[record[column]]].update(record)
+                    else:
+                        index[record[column]] = len(rows)
+                        rows.append(record)
+                keys += len({r[column] for r in batch})
+            else:
+                replaced = {r[column] for r in batch}
+                rows = [row for row in rows if row[column] not in replaced] + batch
+                keys += len(replaced)
+            csv_io.write_csv(pd.DataFrame(rows, columns=columns).fillna(""), path)
+    return {"files": len(by_year), "keys": keys, "rows": sum(len(b) for b in by_year.values())}
@@ -0,0 +1,191 @@
+# llm_backends.py
+# 报告生成的 LLM 后端：统一 generate / stream 接口，Gemini 与本地 HTTP 替身两种实现
+# 超时与重试（指数退避 + 随机抖动）在这里统一处理，report_service 不关心具体后端
+
+import json
+import os
+import random
+import time
+from . import report_config as rc
+
+
+# ==========================================
+# 1. 重试策略
+# ==========================================
+
+class NonRetryableError(RuntimeError):
+    """不值得重试的错误（认证失败、请求格式错误等），直接抛给调用方"""
+
+
+def backoff_delay(attempt, base=None, cap=None, rng=random.random):
+    """
+    第 attempt 次重试前的等待秒数（attempt 从 0 开始）。
+    full jitter：在 [0, min(cap, base * 2^attempt)] 之间均匀取值，
+    多个客户端同时失败时不会在同一时刻一起重试。
+    """
+    base = rc.REPORT_LLM_BACKOFF_BASE if base is None else base
+    cap = rc.REPORT_LLM_BACKOFF_MAX if cap is None else cap
+    return rng() * min(cap, base * (2 ** attempt))
+
+
+def call_with_retries(func, retries=None, sleep=time.sleep, on_retry=None):
+    """
+    调用 func()，失败时按 backoff_delay 等待后重试，最多重试 retries 次。
+    ImportError / ValueError / NonRetryableError 属于配置或请求问题，不重试。
+    """
+    retries = rc.REPORT_LLM_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except (ImportError, ValueError, NonRetryableError):
+            raise
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            if on_retry:
+                on_retry(attempt + 1, delay, e)
+            sleep(delay)
+
+
+# ==========================================
+# 2. 后端实现
+# ==========================================
+
+class LLMBackend:
+    """
+    后端基类。子类实现 _generate / _stream，调用方使用 generate / stream。
+    - generate(system, user) -> 完整文本
+    - stream(system, user)   -> 逐块 yield 文本
+    流式请求只在收到第一块之前重试，已经输出的内容不会重复。
+    """
+
+    name = "base"
+    model = ""
+
+    def __init__(self, timeout=None, retries=None, sleep=time.sleep):
+        self.timeout = rc.REPORT_LLM_TIMEOUT if timeout is None else timeout
+        self.retries = rc.REPORT_LLM_RETRIES if retries is None else retries
+        self.sleep = sleep
+        self.attempts = 0  # 累计请求次数（含重试），供统计使用
+
+    def _counted(self, func):
+        def wrapper():
+            self.attempts += 1
+            return func()
+        return wrapper
+
+    def generate(self, system_prompt, user_prompt):
+        return call_with_retries(self._counted(lambda: self._generate(system_prompt, user_prompt)),
+                                 retries=self.retries, sleep=self.sleep)
+
+    def stream(self, system_prompt, user_prompt):
+        def first_chunk():
+            chunks = iter(self._stream(system_prompt, user_prompt))
+            return chunks, next(chunks, None)
+
+        chunks, first = call_with_retries(self._counted(first_chunk),
+                                          retries=self.retries, sleep=self.sleep)
+        if first is None:
+            return
+        yield first
+        yield from chunks
+
+    def _generate(self, system_prompt, user_prompt):
+        raise NotImplementedError
+
+    def _stream(self, system_prompt, user_prompt):
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """google-genai SDK；SDK 只在真正请求时导入"""
+
+    name = "gemini"
+
+    def __init__(self, api_key=None, model=None, **kwargs):
+        super().__init__(**kwargs)
+        self.api_key = api_key or os.environ.get("GEMINI_API_KEY", "")
+        if not self.api_key:
+            raise ValueError(
+                "未配置 GEMINI_API_KEY 环境变量。"
+                "请在系统环境变量中设置你的 Gemini API Key。"
+            )
+        self.model = model or rc.GEMINI_MODEL
+
+    def _request(self, system_prompt, user_prompt, stream):
+        from google import genai
+        client = genai.Client(api_key=self.api_key,
+                              http_options=genai.types.HttpOptions(timeout=int(self.timeout * 1000)))
+        call = client.models.generate_content_stream if stream else client.models.generate_content
+        return call(
+            model=self.model,
+            contents=user_prompt,
+            config=genai.types.GenerateContentConfig(system_instruction=system_prompt),
+        )
+
+    def _generate(self, system_prompt, user_prompt):
+        return self._request(system_prompt, user_prompt, stream=False).text
+
+    def _stream(self, system_prompt, user_prompt):
+        for chunk in self._request(system_prompt, user_prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+class HTTPBackend(LLMBackend):
+    """
+    本地 HTTP 替身（见 llm_stub_server.py）或任何兼容同一协议的服务：
+    POST {url}/generate，JSON {"model", "system", "user", "stream"}
+    - 非流式：返回 {"text": "..."}
+    - 流式：逐行返回 NDJSON {"text": "..."}
+    """
+
+    name = "http"
+
+    def __init__(self, url=None, model=None, **kwargs):
+        super().__init__(**kwargs)
+        self.url = (url or rc.REPORT_LLM_URL).rstrip("/")
+        self.model = model or "stub"
+
+    def _open(self, system_prompt, user_prompt, stream):
+        import urllib.error
+        import urllib.request
+        body = json.dumps({"model": self.model, "system": system_prompt,
+                           "user": user_prompt, "stream": stream}).encode("utf-8")
+        req = urllib.request.Request(f"{self.url}/generate", data=body,
+                                     headers={"Content-Type": "application/json"})
+        try:
+            return urllib.request.urlopen(req, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            # 429 / 5xx 属于临时故障，其余 4xx 重试也不会成功
+            if e.code == 429 or e.code >= 500:
+                raise RuntimeError(f"HTTP {e.code}: {e.reason}")
+            raise NonRetryableError(f"HTTP {e.code}: {e.reason}")
+
+    def _generate(self, system_prompt, user_prompt):
+        with self._open(system_prompt, user_prompt, stream=False) as resp:
+            return json.loads(resp.read().decode("utf-8")).get("text", "")
+
+    def _stream(self, system_prompt, user_prompt):
+        with self._open(system_prompt, user_prompt, stream=True) as resp:
+            for line in resp:
+                line = line.strip()
+                if line:
+                    text = json.loads(line.decode("utf-8")).get("text", "")
+                    if text:
+                        yield text
+
+
+BACKENDS = {
+    GeminiBackend.name: GeminiBackend,
+    HTTPBackend.name: HTTPBackend,
+}
+
+
+def get_backend(name=None, **kwargs):
+    """按名称创建后端，默认取 REPORT_LLM_BACKEND"""
+    name = name or rc.REPORT_LLM_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"未知的 LLM 后端: {name}（可选 {' / '.join(BACKENDS)}）")
+    return BACKENDS[name](**kwargs)
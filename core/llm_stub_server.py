@@ -0,0 +1,159 @@
+# llm_stub_server.py
+# 本地 LLM 替身服务：模拟首字延迟、分块流式输出和随机故障，供离线测试与压测使用
+# 协议见 llm_backends.HTTPBackend；只依赖标准库
+#
+# 用法：
+#   python -m core.llm_stub_server --port 8765 --latency 1.5 --chunk-delay 0.05 --fail-rate 0.1
+#   然后设置 JOURNAL_LLM_BACKEND=http 启动应用
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CHUNKS = 20
+
+
+def build_stub_report(user_prompt, chunks=DEFAULT_CHUNKS):
+    """根据提示词生成一份固定结构的假报告，切成 chunks 块"""
+    lines = [
+        "# 行为建议报告（本地替身）",
+        "",
+        f"收到提示词 {len(user_prompt)} 个字符。",
+        "",
+    ]
+    for i in range(1, chunks - len(lines) + 1):
+        lines.append(f"- 第 {i} 条建议：保持记录，关注睡眠与专注的关系。")
+    text = "\n".join(lines) + "\n"
+    size = max(1, len(text) // chunks)
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """POST /generate 返回报告；GET /health 用于探活"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"ok": True, "requests": self.server.request_count})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError:
+            self._send_json(400, {"error": "invalid json"})
+            return
+
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            fail = server.rng.random() < server.fail_rate
+        time.sleep(server.latency)
+        if fail:
+            self._send_json(503, {"error": "simulated overload"})
+            return
+
+        chunks = build_stub_report(payload.get("user", ""), server.chunks)
+        if not payload.get("stream"):
+            time.sleep(server.chunk_delay * len(chunks))
+            self._send_json(200, {"text": "".join(chunks)})
+            return
+
+        # 流式：chunked 编码逐行写出 NDJSON
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunks:
+            line = (json.dumps({"text": chunk}, ensure_ascii=False) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+            self.wfile.flush()
+            time.sleep(server.chunk_delay)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_json(self, code, obj):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=1.0, chunk_delay=0.05, chunks=DEFAULT_CHUNKS,
+                 fail_rate=0.0, seed=None, quiet=True):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunks = chunks
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.quiet = quiet
+        self.lock = threading.Lock()
+        self.request_count = 0
+
+    def handle_error(self, request, client_address):
+        """客户端超时断开后再写回响应会 BrokenPipe，属于正常情况，不打印堆栈"""
+        import sys
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub_server(host="127.0.0.1", port=0, **options):
+    """
+    在后台线程启动替身服务并返回 server（port=0 时自动分配端口，见 server.url）。
+    用完调用 server.shutdown()。
+    """
+    server = StubServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地 LLM 替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0, help="首字延迟（秒）")
+    parser.add_argument("--chunk-delay", type=float, default=0.05, help="每块之间的间隔（秒）")
+    parser.add_argument("--chunks", type=int, default=DEFAULT_CHUNKS, help="报告切分的块数")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="返回 503 的概率")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true", help="打印每个请求")
+    args = parser.parse_args(argv)
+
+    server = StubServer((args.host, args.port), latency=args.latency, chunk_delay=args.chunk_delay,
+                        chunks=args.chunks, fail_rate=args.fail_rate, seed=args.seed,
+                        quiet=not args.verbose)
+    print(f"LLM 替身服务已启动：{server.url}（Ctrl+C 退出）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
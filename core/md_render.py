@@ -0,0 +1,256 @@
+# md_render.py
+# Markdown → HTML 渲染器：块级用一条组合正则从头到尾切分（每个块一次匹配），行内格式用一条正则一次替换
+# 支持标题、段落、有序/无序（嵌套）列表、表格、代码块、引用、分隔线，行内加粗、斜体、行内代码、链接
+# 邮件正文与报告归档的静态 HTML 共用同一份输出
+
+import re
+from html import escape
+
+# ==========================================
+# 1. 行内格式
+# ==========================================
+# 整篇文本先一次性 HTML 转义，再对代码块以外的部分整体做一次行内替换（行内格式不跨行），
+# 之后切块、渲染处理的都是已完成行内格式的文本，不再逐行、逐单元格替换
+
+# 开头的前瞻只在 ` * [ 处才尝试各分支，其余字符一次判断就跳过（整篇替换快约一倍）
+_INLINE = re.compile(
+    r"(?=[`*\[])(?:"
+    r"`(?P<code>[^`\n]+)`"
+    r"|\*\*(?P<bold>[^\n]+?)\*\*"
+    r"|(?<![*\w])\*(?P<em>[^*\s](?:[^*\n]*[^*\s])?)\*(?!\*)"
+    r"|\[(?P<text>[^\]\n]+)\]\((?P<href>[^)\s]+)\))"
+)
+
+
+# 链接只保留 http / https / mailto 与相对地址；javascript:、data: 等其他协议只输出链接文字。
+# href 与正文一起经过 html.escape（含引号），不会跳出属性值；控制字符可被浏览器忽略后拼出协议名，一律拒绝
+_SAFE_SCHEMES = {"http", "https", "mailto"}
+_SCHEME = re.compile(r"([A-Za-z][A-Za-z0-9+.\-]*):")
+_CONTROL = re.compile(r"[\x00-\x1f\x7f]")
+
+
+def _safe_href(href):
+    if _CONTROL.search(href):
+        return False
+    scheme = _SCHEME.match(href)
+    return scheme is None or scheme.group(1).lower() in _SAFE_SCHEMES
+
+
+def _inline_sub(match):
+    kind = match.lastgroup
+    if kind == "code":
+        return f"<code>{match.group('code')}</code>"
+    if kind == "bold":
+        return f"<strong>{_inline(match.group('bold'))}</strong>"
+    if kind == "em":
+        return f"<em>{_inline(match.group('em'))}</em>"
+    text = _inline(match.group("text"))
+    href = match.group("href")
+    return f'<a href="{href}">{text}</a>' if _safe_href(href) else text
+
+
+def _inline(text):
+    """已转义文本中的行内格式 → HTML"""
+    return _INLINE.sub(_inline_sub, text)
+
+
+def render_inline(text):
+    """行内格式 → HTML；格式以外的文本全部转义"""
+    return _inline(escape(text))
+
+
+_FENCED = re.compile(r"^ {0,3}(`{3,}|~{3,})[^\n]*\n(?:[^\n]*\n)*?(?: {0,3}\1[^\n]*\n|\Z)", re.MULTILINE)
+
+
+def _inline_outside_fences(text):
+    """代码块原样保留，其余文本一次性做行内替换"""
+    if "```" not in text and "~~~" not in text:
+        return _inline(text)
+    parts, pos = [], 0
+    for match in _FENCED.finditer(text):
+        parts.append(_inline(text[pos:match.start()]))
+        parts.append(match.group(0))
+        pos = match.end()
+    parts.append(_inline(text[pos:]))
+    return "".join(parts)
+
+
+# ==========================================
+# 2. 块级切分
+# ==========================================
+# 每个分支匹配一个完整的块（含结尾换行），finditer 顺序扫描全文；
+# 段落分支用负向前瞻在下一个块的起始行处停止
+
+_ITEM = r"[ \t]*(?:[-*+]|\d{1,9}[.)])[ \t]+"
+_HR_LINE = r" {0,3}(?:(?:-[ \t]*){3,}|(?:\*[ \t]*){3,}|(?:_[ \t]*){3,})\n"
+_TABLE_SEP = r"[ \t]*\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*\n"
+_BLOCK_START = (
+    rf"#{{1,6}}[ \t]|{_HR_LINE}| {{0,3}}(?:`{{3,}}|~{{3,}})|{_ITEM}| {{0,3}}&gt;"
+    rf"|[^\n]*\|[^\n]*\n{_TABLE_SEP}"
+)
+
+_BLOCK = re.compile(
+    r"(?P<blank>(?:[ \t]*\n)+)"
+    r"|^ {0,3}(?P<fence>`{3,}|~{3,})[ \t]*(?P<lang>[\w+-]*)[^\n]*\n"
+    r"(?P<code>(?:[^\n]*\n)*?)(?: {0,3}(?P=fence)[^\n]*\n|\Z)"
+    r"|^(?P<hashes>#{1,6})[ \t]+(?P<heading>[^\n]*?)(?:[ \t]+#+)?[ \t]*\n"
+    rf"|^(?P<hr>{_HR_LINE})"
+    rf"|^(?P<table>[^\n]*\|[^\n]*\n{_TABLE_SEP}(?:[^\n]*\|[^\n]*\n)*)"
+    rf"|^(?P<list>{_ITEM}[^\n]*\n"
+    rf"(?:(?:[ \t]*\n)*(?!{_HR_LINE}){_ITEM}[^\n]*\n|[ \t]+\S[^\n]*\n)*)"
+    r"|^(?P<quote>(?: {0,3}&gt;[^\n]*\n)+)"
+    rf"|^(?P<para>[^\n]+\n(?:(?!{_BLOCK_START})[^\n]*\S[^\n]*\n)*)",
+    re.MULTILINE,
+)
+
+_LIST_ITEM = re.compile(r"^([ \t]*)([-*+]|\d{1,9}[.)])[ \t]+(.*)$")
+_QUOTE_PREFIX = re.compile(r"^ {0,3}&gt; ?", re.MULTILINE)
+_LINE_BREAK = re.compile(r"[ \t]*\n[ \t]*")
+# 行内代码里的 | 不分隔单元格（代码内容已转义，不含 <）
+_CELL_SPLIT = re.compile(r"[ \t]*(?<!\\)\|(?![^<]*</code>)[ \t]*")
+
+
+# ==========================================
+# 3. 块级渲染
+# ==========================================
+
+def _split_row(line):
+    """表格行 → 单元格文本（支持 \\| 转义）"""
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    if "\\" not in line and "<code>" not in line:
+        return [cell.strip() for cell in line.split("|")]  # 常见情况：没有转义与行内代码，直接按 | 切
+    return [cell.replace("\\|", "|") for cell in _CELL_SPLIT.split(line.strip())]
+
+
+def _align(cell):
+    if cell.startswith(":") and cell.endswith(":"):
+        return ' align="center"'
+    if cell.endswith(":"):
+        return ' align="right"'
+    if cell.startswith(":"):
+        return ' align="left"'
+    return ""
+
+
+def _render_table(block):
+    header, sep, *rows = block.rstrip("\n").split("\n")
+    aligns = [_align(c) for c in _split_row(sep)]
+    width = len(aligns)
+    # 每列的开标签只拼一次
+    th = [f"<th{a}>" for a in aligns]
+    td = [f"<td{a}>" for a in aligns]
+
+    def cells(line, opens, close):
+        values = _split_row(line)
+        if len(values) != width:
+            values = (values + [""] * width)[:width]
+        return "".join([o + v + close for o, v in zip(opens, values)])
+
+    body = "".join(["<tr>" + cells(row, td, "</td>") + "</tr>" for row in rows])
+    return f"<table><thead><tr>{cells(header, th, '</th>')}</tr></thead><tbody>{body}</tbody></table>"
+
+
+def _open_list(tag, marker):
+    if tag == "ol":
+        start = int(marker[:-1])
+        return "<ol>" if start == 1 else f'<ol start="{start}">'
+    return "<ul>"
+
+
+def _render_list(block):
+    """列表块 → HTML；按缩进维护嵌套栈，列表类型变化时另起一个列表"""
+    out, stack = [], []  # stack: [(缩进, 标签)]
+    for line in block.split("\n"):
+        match = _LIST_ITEM.match(line)
+        if match is None:
+            # 条目的缩进续行；空行（条目间空一行）忽略
+            if line.strip() and stack:
+                out.append("<br>" + line.strip())
+            continue
+        indent = len(match.group(1).expandtabs(4))
+        marker = match.group(2)
+        tag = "ul" if marker in "-*+" else "ol"
+        while stack and indent < stack[-1][0]:
+            out.append(f"</li></{stack.pop()[1]}>")
+        if stack and indent == stack[-1][0]:
+            if tag != stack[-1][1]:
+                out.append(f"</li></{stack.pop()[1]}>")
+                stack.append((indent, tag))
+                out.append(_open_list(tag, marker))
+            else:
+                out.append("</li>")
+        else:
+            stack.append((indent, tag))
+            out.append(_open_list(tag, marker))
+        out.append("<li>" + match.group(3).rstrip())
+    while stack:
+        out.append(f"</li></{stack.pop()[1]}>")
+    return "".join(out)
+
+
+def _render_blocks(text):
+    """已转义并完成行内格式、以换行结尾的文本 → HTML 块列表"""
+    out = []
+    for match in _BLOCK.finditer(text):
+        kind = match.lastgroup
+        if kind == "blank":
+            continue
+        if kind == "para":
+            # 段落：行内换行保留为 <br>
+            out.append("<p>" + _LINE_BREAK.sub("<br>\n", match.group("para").strip()) + "</p>")
+        elif kind == "heading":
+            level = len(match.group("hashes"))
+            out.append(f"<h{level}>{match.group('heading')}</h{level}>")
+        elif kind == "list":
+            out.append(_render_list(match.group("list")))
+        elif kind == "table":
+            out.append(_render_table(match.group("table")))
+        elif kind == "hr":
+            out.append("<hr>")
+        elif kind == "quote":
+            inner = _QUOTE_PREFIX.sub("", match.group("quote"))
+            out.append("<blockquote>" + "\n".join(_render_blocks(inner)) + "</blockquote>")
+        else:
+            lang = match.group("lang")
+            cls = f' class="language-{lang}"' if lang else ""
+            code = match.group("code").rstrip("\n")
+            out.append(f"<pre><code{cls}>{code}</code></pre>")
+    return out
+
+
+def render_markdown(md_text):
+    """Markdown → HTML 片段（不含 html/body 外壳）"""
+    text = escape((md_text or "").replace("\r\n", "\n").replace("\r", "\n"))
+    if not text.endswith("\n"):
+        text += "\n"
+    text = _inline_outside_fences(text)
+    return "\n".join(_render_blocks(text))
+
+
+# ==========================================
+# 4. 完整 HTML 文档
+# ==========================================
+
+DOCUMENT_STYLE = (
+    "body{font-family:sans-serif;line-height:1.6;color:#222;max-width:860px;margin:0 auto;padding:12px;}"
+    "table{border-collapse:collapse;margin:8px 0;}"
+    "th,td{border:1px solid #ccc;padding:4px 8px;}"
+    "th{background:#f5f5f5;}"
+    "code{background:#f3f3f3;padding:1px 4px;border-radius:3px;}"
+    "pre{background:#f3f3f3;padding:8px;overflow-x:auto;}"
+    "pre code{padding:0;}"
+    "blockquote{border-left:4px solid #ddd;margin:8px 0;padding:0 12px;color:#555;}"
+)
+
+
+def render_document(md_text, title=None):
+    """Markdown → 完整 HTML 文档（邮件正文、静态归档共用）"""
+    head = '<meta charset="utf-8">'
+    if title:
+        head += f"<title>{escape(title)}</title>"
+    return (f"<html><head>{head}<style>{DOCUMENT_STYLE}</style></head>"
+            f"<body>{render_markdown(md_text)}</body></html>")
@@ -0,0 +1,198 @@
+# memprof.py
+# 内存诊断模式：JOURNAL_MEMPROF=1 时用 tracemalloc 在数据加载 / 保存、报告生成前后各拍一张快照，
+# 把新增内存按 core 模块归因，并把峰值与 Top-N 分配位置写成文本报告（data/memprof/）
+# 未启用时 tracked 装饰的函数只多一次配置判断；tracemalloc 只在第一次测量时启动
+
+import contextvars
+import functools
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from . import config as cfg
+
+CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+OTHER = "(非 core)"
+
+# 嵌套的测量只算最外层（内层 reset_peak 会把外层的峰值清掉）
+_measuring = contextvars.ContextVar("journal_memprof_measuring", default=False)
+# tracemalloc 是进程级的：另一个线程的 start / reset_peak / stop 会打乱正在进行的测量，
+# 因此整个进程同一时间只允许一个测量（上面的 ContextVar 只能识别同一上下文内的嵌套）
+_process_lock = threading.Lock()
+BUSY_MESSAGE = "另一个线程正在进行内存测量（tracemalloc 是进程级的，同一时间只能测量一处）"
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+# ==========================================
+# 1. 测量
+# ==========================================
+
+class Measurement:
+    """一次测量：峰值 / 净增字节数，以及按 core 模块、按分配位置的新增内存"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = datetime.now()
+        self.seconds = None
+        self.peak = None       # 期间最高点相对开始时多占用的字节数
+        self.net = None        # 结束时相对开始时仍占用的字节数
+        self.by_module = []    # [(模块, 字节数, 块数)]，按字节数降序
+        self.top = []          # [(文件:行号, 字节数, 块数)]，按字节数降序
+        self.path = None       # 写出的报告文件
+
+
+def _module_of(filename):
+    """core 目录下的文件 → 模块名（core.data_manager）；其他返回 None"""
+    path = os.path.abspath(filename)
+    if os.path.dirname(path) != CORE_DIR:
+        return None
+    return "core." + os.path.splitext(os.path.basename(path))[0]
+
+
+def _attribute(stats, top_n):
+    """
+    StatisticDiff 列表 → (按模块, 按位置)。
+    每笔分配记到调用栈中离分配点最近的 core 帧（pandas 内部的分配归到发起读取的 core 函数上）
+    """
+    modules, locations = {}, {}
+    for stat in stats:
+        if stat.size_diff <= 0:
+            continue
+        owner = OTHER
+        for frame in reversed(stat.traceback):  # traceback 由远及近
+            module = _module_of(frame.filename)
+            if module:
+                owner = module
+                break
+        size, count = modules.get(owner, (0, 0))
+        modules[owner] = (size + stat.size_diff, count + stat.count_diff)
+        frame = stat.traceback[-1]
+        where = f"{frame.filename}:{frame.lineno}"
+        size, count = locations.get(where, (0, 0))
+        locations[where] = (size + stat.size_diff, count + stat.count_diff)
+
+    def ranked(totals):
+        return sorted(((k, s, c) for k, (s, c) in totals.items()), key=lambda x: x[1], reverse=True)
+
+    return ranked(modules), ranked(locations)[:top_n]
+
+
+@contextmanager
+def measure(name="", snapshots=True, top_n=None):
+    """
+    测量代码块的内存：始终测量（不看 JOURNAL_MEMPROF），用于诊断与测试。
+    snapshots=False 时只记峰值 / 净增，不做归因（快得多）。
+    同一上下文内嵌套时只有最外层测量；其他线程正在测量时抛 RuntimeError。
+    """
+    m = Measurement(name)
+    if _measuring.get():
+        yield m
+        return
+    if not _process_lock.acquire(blocking=False):
+        raise RuntimeError(BUSY_MESSAGE)
+    try:
+        yield from _measure(m, snapshots, top_n)
+    finally:
+        _process_lock.release()
+
+
+def _measure(m, snapshots, top_n):
+    """measure 的主体（调用方持有 _process_lock）"""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(cfg.MEMPROF_FRAMES)
+    token = _measuring.set(True)
+    before = tracemalloc.take_snapshot() if snapshots else None
+    base = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield m
+    finally:
+        m.seconds = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        m.peak, m.net = peak - base, current - base
+        if snapshots:
+            after = tracemalloc.take_snapshot()
+            stats = after.filter_traces(_SNAPSHOT_FILTERS).compare_to(
+                before.filter_traces(_SNAPSHOT_FILTERS), "traceback")
+            m.by_module, m.top = _attribute(stats, top_n or cfg.MEMPROF_TOP)
+        _measuring.reset(token)
+        if started:
+            tracemalloc.stop()
+
+
+# ==========================================
+# 2. 诊断模式：自动测量并写报告
+# ==========================================
+
+@contextmanager
+def track(name):
+    """
+    JOURNAL_MEMPROF=1 时测量代码块并写报告；否则什么都不做（产出 None）。
+    其他线程正在测量时（多个会话同时保存、线程池里的 tracked 函数）这次不测量，同样产出 None
+    """
+    if not cfg.MEMPROF_ENABLED or _measuring.get():
+        yield None
+        return
+    if not _process_lock.acquire(blocking=False):
+        yield None
+        return
+    m = Measurement(name)
+    try:
+        yield from _measure(m, True, None)
+    finally:
+        _process_lock.release()
+    write_report(m)
+
+
+def tracked(func):
+    """装饰器：诊断模式下每次调用都测量一次，报告以函数名命名"""
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not cfg.MEMPROF_ENABLED:
+            return func(*args, **kwargs)
+        with track(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _mib(n):
+    return f"{n / 1024 / 1024:.2f} MiB"
+
+
+def format_report(m):
+    lines = [
+        f"# {m.name}",
+        f"时间: {m.started_at.strftime('%Y-%m-%d %H:%M:%S')}    耗时: {m.seconds * 1000:.1f} ms",
+        f"峰值: {_mib(m.peak)}    净增: {_mib(m.net)}",
+        "",
+        "## 按 core 模块",
+    ]
+    lines += [f"{size / 1024:>12.1f} KiB  {count:>8} 块  {module}" for module, size, count in m.by_module]
+    lines += ["", f"## Top {len(m.top)} 分配位置"]
+    lines += [f"{size / 1024:>12.1f} KiB  {count:>8} 块  {where}" for where, size, count in m.top]
+    return "\n".join(lines) + "\n"
+
+
+def write_report(m):
+    """报告写到 data/memprof/{时间}_{名称}.txt，返回路径"""
+    stamp = m.started_at.strftime("%Y%m%d_%H%M%S_%f")
+    path = os.path.join(cfg.PATH_MEMPROF, f"{stamp}_{m.name}.txt")
+    cfg.ensure_dirs([path])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(format_report(m))
+    m.path = path
+    return path
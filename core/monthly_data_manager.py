@@ -7,6 +7,9 @@ import calendar
 from datetime import date, datetime
 from . import config as cfg
 from . import monthly_texts as mt
+from . import csv_io
+from . import memprof
+from . import perf
 
 
 # ==========================================
@@ -83,6 +86,8 @@ def get_default_monthly_tasks(month_key):
 # 4. 月数据聚合
 # ==========================================
 
+@memprof.tracked
+@perf.timed
 def aggregate_monthly_data(year, month):
     """
     从 daily_summary CSV 聚合该月所有天的统计数据。
@@ -105,10 +110,10 @@ def aggregate_monthly_data(year, month):
         "Worst_Mood_Day": "",
     }
 
-    if not os.path.exists(summary_path):
+    if not csv_io.exists(summary_path):
         return result
 
-    df = pd.read_csv(summary_path, encoding='utf-8-sig')
+    df = csv_io.read_csv(summary_path)
     if "Date" not in df.columns:
         return result
 
@@ -189,6 +194,8 @@ def get_weeks_in_month(year, month):
 # 6. 数据加载
 # ==========================================
 
+@memprof.tracked
+@perf.timed
 def load_monthly_data(month_key, year):
     """
     加载指定月的全部数据：概览 + 任务。
@@ -198,8 +205,8 @@ def load_monthly_data(month_key, year):
 
     # --- 1. 加载月概览 ---
     summary_data = {}
-    if os.path.exists(paths["summary"]):
-        df = pd.read_csv(paths["summary"], encoding='utf-8-sig')
+    if csv_io.exists(paths["summary"]):
+        df = csv_io.read_csv(paths["summary"])
         df["Month"] = df["Month"].astype(str)
         row = df[df["Month"] == month_key]
         if not row.empty:
@@ -207,8 +214,8 @@ def load_monthly_data(month_key, year):
                            for k, v in row.iloc[0].to_dict().items()}
 
     # --- 2. 加载任务 ---
-    if os.path.exists(paths["tasks"]):
-        df_tasks = pd.read_csv(paths["tasks"], encoding='utf-8-sig')
+    if csv_io.exists(paths["tasks"]):
+        df_tasks = csv_io.read_csv(paths["tasks"])
         df_tasks["Month"] = df_tasks["Month"].astype(str)
         str_cols = [mt.COL_MT_CATEGORY, mt.COL_MT_PLAN, mt.COL_MT_ACTUAL,
                     mt.COL_MT_STATUS, mt.COL_MT_REASON]
@@ -229,12 +236,15 @@ def load_monthly_data(month_key, year):
 # 7. 数据保存 (Upsert)
 # ==========================================
 
+@memprof.tracked
+@perf.timed
 def save_monthly_data(month_key, year, month, first_day, last_day,
                       summary_dict, tasks_df):
     """
     保存月记数据到 CSV (Upsert 模式) 并生成 Markdown。
     """
     paths = get_monthly_file_paths(year)
+    cfg.ensure_dirs(paths.values())  # 首次写入时才创建数据目录
 
     # --- 1. 保存月概览 ---
     summary_dict["Month"] = month_key
@@ -244,14 +254,7 @@ def save_monthly_data(month_key, year, month, first_day, last_day,
     summary_dict["Date_End"] = last_day.strftime("%Y-%m-%d")
     new_row = pd.DataFrame([summary_dict])
 
-    if os.path.exists(paths["summary"]):
-        df_old = pd.read_csv(paths["summary"], encoding='utf-8-sig')
-        df_old["Month"] = df_old["Month"].astype(str)
-        df_old = df_old[df_old["Month"] != month_key]
-        df_final = pd.concat([df_old, new_row], ignore_index=True)
-    else:
-        df_final = new_row
-    df_final.to_csv(paths["summary"], index=False, encoding='utf-8-sig')
+    csv_io.replace_rows(paths["summary"], "Month", month_key, new_row)
 
     # --- 2. 保存任务 ---
     tasks_df = tasks_df.fillna("")
@@ -259,14 +262,7 @@ def save_monthly_data(month_key, year, month, first_day, last_day,
     tasks_df = tasks_df[tasks_df[mt.COL_MT_PLAN].astype(str).str.strip() != ""]
     tasks_df["Month"] = month_key
 
-    if os.path.exists(paths["tasks"]):
-        df_old = pd.read_csv(paths["tasks"], encoding='utf-8-sig')
-        df_old["Month"] = df_old["Month"].astype(str)
-        df_old = df_old[df_old["Month"] != month_key]
-        df_final = pd.concat([df_old, tasks_df], ignore_index=True)
-    else:
-        df_final = tasks_df
-    df_final.to_csv(paths["tasks"], index=False, encoding='utf-8-sig')
+    csv_io.replace_rows(paths["tasks"], "Month", month_key, tasks_df)
 
     # --- 3. 生成 Markdown ---
     generate_monthly_markdown(month_key, year, month, first_day, last_day,
@@ -277,6 +273,7 @@ def save_monthly_data(month_key, year, month, first_day, last_day,
 # 8. Markdown 生成
 # ==========================================
 
+@perf.timed
 def generate_monthly_markdown(month_key, year, month, first_day, last_day,
                               summary_dict, tasks_df):
     """将数据填充到月记 Markdown 模板并写入文件"""
@@ -334,5 +331,4 @@ def generate_monthly_markdown(month_key, year, month, first_day, last_day,
     )
 
     md_path = get_monthly_md_path(year, month)
-    with open(md_path, "w", encoding="utf-8-sig") as f:
-        f.write(content)
+    csv_io.write_markdown(md_path, content)
@@ -0,0 +1,231 @@
+# perf.py
+# 页面性能剖析：按 Streamlit 的一次重跑（rerun）记录各页面区块、核心数据函数的耗时与 CSV 读写字节数
+# 只在 JOURNAL_PERF=1 时启用；未启用时 begin_run 直接返回，timed / section / record_* 只多一次空判断
+
+import contextvars
+import functools
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from . import config as cfg
+
+# 当前线程（即本次页面脚本）正在记录的重跑；未启用或不在页面内时为 None。
+# 注意：线程池中的子任务拿不到这个上下文，其 I/O 不计入（页面重跑里不走线程池）
+_current = contextvars.ContextVar("journal_perf_run", default=None)
+
+KIND_SECTION = "区块"
+KIND_FUNCTION = "函数"
+
+
+# ==========================================
+# 1. 一次重跑的记录
+# ==========================================
+
+class Run:
+    """一次重跑：按开始顺序记录的分段（区块 / 函数，可嵌套），以及整次的读写字节数"""
+
+    def __init__(self, page):
+        self.page = page
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.seconds = None
+        self.read = 0
+        self.written = 0
+        self.events = []  # [{"name", "kind", "depth", "seconds", "read", "written"}]
+        self._stack = []  # 尚未结束的分段（events 中的下标）
+
+    @property
+    def finished(self):
+        return self.seconds is not None
+
+    def open(self, name, kind):
+        self.events.append({"name": name, "kind": kind, "depth": len(self._stack),
+                            "seconds": None, "read": 0, "written": 0, "_start": time.perf_counter()})
+        self._stack.append(len(self.events) - 1)
+
+    def close(self):
+        event = self.events[self._stack.pop()]
+        event["seconds"] = time.perf_counter() - event.pop("_start")
+
+    def close_sections(self):
+        """结束最外层的区块（区块之间首尾相接，不嵌套）"""
+        while self._stack:
+            self.close()
+
+    def add_io(self, read=0, written=0):
+        """字节数计入整次重跑以及所有未结束的分段（外层分段包含内层的 I/O）"""
+        self.read += read
+        self.written += written
+        for index in self._stack:
+            self.events[index]["read"] += read
+            self.events[index]["written"] += written
+
+    def finish(self):
+        if not self.finished:
+            self.close_sections()
+            self.seconds = time.perf_counter() - self.start
+
+    def summary(self):
+        return {"time": self.started_at.strftime("%H:%M:%S"), "page": self.page,
+                "seconds": self.seconds, "read": self.read, "written": self.written,
+                "calls": sum(1 for e in self.events if e["kind"] == KIND_FUNCTION)}
+
+
+class History:
+    """一个会话内最近若干次重跑（存放在 st.session_state 中，跨页面共享）"""
+
+    def __init__(self, size=None):
+        self.runs = deque(maxlen=size or cfg.PERF_HISTORY)
+        self.open_run = None
+
+    def __len__(self):
+        return len(self.runs)
+
+
+# ==========================================
+# 2. 记录接口
+# ==========================================
+
+def begin_run(page, history):
+    """
+    页面脚本开头调用：开始记录本次重跑。
+    上一次重跑若因 st.stop / st.rerun 没走到 end_run，在这里补记为已结束。
+    """
+    if not cfg.PERF_ENABLED:
+        return None
+    if history.open_run is not None:
+        _finish(history)
+    run = Run(page)
+    history.open_run = run
+    _current.set(run)
+    return run
+
+
+def end_run(history):
+    """页面脚本末尾调用：结束本次重跑并写入历史"""
+    if history.open_run is None:
+        return None
+    run = history.open_run
+    _finish(history)
+    return run
+
+
+def _finish(history):
+    run = history.open_run
+    run.finish()
+    history.runs.append(run)
+    history.open_run = None
+    if _current.get() is run:
+        _current.set(None)
+
+
+def mark(name):
+    """
+    页面区块分界：结束上一个区块并开始名为 name 的区块。
+    放在页面各 `# ====` 小节开头，不需要把小节代码缩进进 with 块。
+    """
+    run = _current.get()
+    if run is not None:
+        run.close_sections()
+        run.open(name, KIND_SECTION)
+
+
+@contextmanager
+def section(name, kind=KIND_FUNCTION):
+    """把一段代码计为当前分段下的一个子分段"""
+    run = _current.get()
+    if run is None:
+        yield
+        return
+    run.open(name, kind)
+    try:
+        yield
+    finally:
+        run.close()
+
+
+def timed(func):
+    """装饰器：函数每次调用计为一个分段（未在记录时直接调用原函数）"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        run = _current.get()
+        if run is None:
+            return func(*args, **kwargs)
+        run.open(name, KIND_FUNCTION)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            run.close()
+
+    return wrapper
+
+
+def record_read(path):
+    """读完文件后调用：把文件大小计为读取字节数"""
+    run = _current.get()
+    if run is not None:
+        run.add_io(read=_size(path))
+
+
+def record_write(path):
+    """写完文件后调用：把文件大小计为写入字节数"""
+    run = _current.get()
+    if run is not None:
+        run.add_io(written=_size(path))
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError, ValueError):
+        return 0
+
+
+# ==========================================
+# 3. 侧边栏面板
+# ==========================================
+
+def _kb(n):
+    return round(n / 1024, 1)
+
+
+def breakdown_rows(run):
+    """本次重跑的逐段明细（函数按嵌套深度缩进）"""
+    return [{
+        "分段": "　" * e["depth"] + e["name"],
+        "类型": e["kind"],
+        "耗时(ms)": round((e["seconds"] or 0) * 1000, 1),
+        "读取(KB)": _kb(e["read"]),
+        "写入(KB)": _kb(e["written"]),
+    } for e in run.events]
+
+
+def history_rows(history):
+    """最近 N 次重跑的汇总（最新在前）"""
+    rows = []
+    for run in reversed(history.runs):
+        s = run.summary()
+        rows.append({"时间": s["time"], "页面": s["page"], "总耗时(ms)": round(s["seconds"] * 1000, 1),
+                     "读取(KB)": _kb(s["read"]), "写入(KB)": _kb(s["written"]), "函数调用": s["calls"]})
+    return rows
+
+
+def render_panel(container, history):
+    """
+    在 container（通常是 st.sidebar）中画一个可折叠面板：本次重跑明细 + 最近 N 次总计。
+    应在 end_run 之后调用；未启用时什么都不画。core 不直接依赖 streamlit，由页面传入容器。
+    """
+    if not cfg.PERF_ENABLED or not history.runs:
+        return
+    import pandas as pd
+
+    last = history.runs[-1]
+    panel = container.expander(f"⏱️ 性能剖析（本次 {last.seconds * 1000:.0f} ms）", expanded=False)
+    panel.caption(f"{last.page} · 读取 {_kb(last.read)} KB · 写入 {_kb(last.written)} KB")
+    panel.dataframe(pd.DataFrame(breakdown_rows(last)), hide_index=True, use_container_width=True)
+    panel.caption(f"最近 {len(history)} 次重跑")
+    panel.dataframe(pd.DataFrame(history_rows(history)), hide_index=True, use_container_width=True)
@@ -0,0 +1,73 @@
+# profiles.py
+# 多日记（profile）的会话管理：每个 Streamlit 会话各自选择日记，切换时清空上一份日记的会话状态
+# 数据目录的解析见 config.py；core 不依赖 streamlit，页面把 st.sidebar 与 st.session_state 传进来
+
+import functools
+from . import config as cfg
+from . import texts as t
+from .draft_store import DraftRecorder
+
+SESSION_KEY = "journal_profile"          # 本会话所选的日记
+WIDGET_KEY = "journal_profile_select"    # 侧边栏选择框
+# 切换日记时保留的会话状态；其余键（选中的日期、聚合缓存、控件取值、草稿记录器……）都属于上一份日记
+KEEP_KEYS = {SESSION_KEY, WIDGET_KEY, "perf_history"}
+
+
+def _session_profile(session_state):
+    name = session_state.get(SESSION_KEY)
+    if name not in cfg.PROFILES:
+        name = next(iter(cfg.PROFILES))
+        session_state[SESSION_KEY] = name
+    return name
+
+
+def activate(session_state):
+    """页面每次运行开头调用：把当前上下文切到本会话所选的日记，返回日记名"""
+    name = _session_profile(session_state)
+    cfg.use_profile(name)
+    return name
+
+
+def session_callback(session_state):
+    """
+    装饰读写数据的 Streamlit 回调（on_click / on_change、带 run_every 的 fragment）：
+    它们在页面脚本调用 render_selector 之前执行，当前上下文还没有切到本会话的日记。
+    被装饰的函数在本会话所选的日记下运行，结束后恢复原来的日记。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = cfg.use_profile(_session_profile(session_state))
+            try:
+                return func(*args, **kwargs)
+            finally:
+                cfg.reset_profile(token)
+        return wrapper
+    return decorator
+
+
+def switch_profile(session_state, name):
+    """切换本会话的日记：先把未落盘的草稿写回原日记，再清掉属于原日记的会话状态"""
+    if name not in cfg.PROFILES:
+        raise ValueError(f"未知的日记: {name}")
+    if session_state.get(SESSION_KEY) == name:
+        return
+    for value in list(session_state.values()):
+        if isinstance(value, DraftRecorder):
+            value.flush()
+    for key in list(session_state.keys()):
+        if key not in KEEP_KEYS:
+            del session_state[key]
+    session_state[SESSION_KEY] = name
+
+
+def render_selector(container, session_state):
+    """在 container（通常是 st.sidebar）中画日记选择框并激活所选日记；只有一份日记时不显示"""
+    current = activate(session_state)
+    names = list(cfg.PROFILES)
+    if len(names) > 1:
+        container.selectbox(
+            t.PROFILE_SELECT_LABEL, names, index=names.index(current), key=WIDGET_KEY,
+            on_change=lambda: switch_profile(session_state, session_state[WIDGET_KEY]),
+        )
+    return current
@@ -0,0 +1,158 @@
+# report_archive.py
+# 报告归档：每份生成的报告连同元数据（模式、模型、提示词哈希、数据水位）保存为一个 JSON
+# 另维护一份精简索引 index.json（不含正文与水位），供历史报告页面分页、检索
+# 每份报告同时渲染一份静态 HTML（report_<id>.html），可直接用浏览器打开
+# 增量报告以最近一份带水位的报告为基准
+
+import json
+import os
+import time
+import uuid
+from . import config as cfg
+from .md_render import render_document
+
+INDEX_FILE = "index.json"
+INDEX_FIELDS = ("id", "created_at", "mode", "level", "backend", "model", "prompt_hash")
+
+
+# ==========================================
+# 1. 单份报告
+# ==========================================
+
+def _entry_path(report_id):
+    return os.path.join(cfg.PATH_REPORT_ARCHIVE, f"report_{report_id}.json")
+
+
+def html_path(report_id):
+    """报告的静态 HTML 文件路径"""
+    return os.path.join(cfg.PATH_REPORT_ARCHIVE, f"report_{report_id}.html")
+
+
+def save_report(report, meta=None, now=None):
+    """保存报告并追加索引，返回报告 id（以创建时间开头，字典序即时间序）"""
+    now = time.time() if now is None else now
+    report_id = (f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}"
+                 f"{int(now * 1000) % 1000:03d}-{uuid.uuid4().hex[:6]}")
+    entry = {"id": report_id, "created_at": now, **(meta or {}), "report": report}
+    cfg.write_json_atomic(_entry_path(report_id), entry)
+    cfg.write_text_atomic(html_path(report_id), render_document(report, title=_report_title(report) or report_id))
+    with cfg.profile_lock("report_archive.index"):
+        index = _load_index()
+        # 索引缺失时 _load_index 会扫描重建，已包含刚写入的这份报告
+        if all(item["id"] != report_id for item in index):
+            index.insert(0, index_entry(entry))
+        _save_index(index)
+    return report_id
+
+
+def load_report(report_id):
+    """读取一份报告；不存在时返回 None"""
+    path = _entry_path(report_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _report_ids():
+    folder = cfg.PATH_REPORT_ARCHIVE
+    if not os.path.isdir(folder):
+        return []
+    return sorted((n[len("report_"):-len(".json")] for n in os.listdir(folder)
+                   if n.startswith("report_") and n.endswith(".json")), reverse=True)
+
+
+def latest_report(require_watermark=False):
+    """最近一份报告（require_watermark=True 时跳过没有数据水位的旧报告）"""
+    for report_id in _report_ids():
+        entry = load_report(report_id)
+        if entry and (not require_watermark or entry.get("watermark")):
+            return entry
+    return None
+
+
+# ==========================================
+# 2. 索引
+# ==========================================
+
+def _report_title(report):
+    """报告的第一个标题行（去掉 #），没有标题时取第一行非空文本"""
+    lines = [line.strip() for line in (report or "").splitlines() if line.strip()]
+    for line in lines:
+        if line.startswith("#"):
+            return line.lstrip("#").strip()
+    return lines[0][:40] if lines else ""
+
+
+def index_entry(entry):
+    """完整归档记录 → 索引条目（元数据 + 数据范围 + 标题与字数）"""
+    watermark = entry.get("watermark") or {}
+    item = {field: entry.get(field) for field in INDEX_FIELDS}
+    item.update({
+        "start": watermark.get("start"),
+        "end": watermark.get("end"),
+        "title": _report_title(entry.get("report")),
+        "chars": len(entry.get("report") or ""),
+    })
+    return item
+
+
+def _index_path():
+    return os.path.join(cfg.PATH_REPORT_ARCHIVE, INDEX_FILE)
+
+
+def _save_index(index):
+    cfg.write_json_atomic(_index_path(), index)
+
+
+def rebuild_index():
+    """扫描全部归档文件重建索引（索引缺失、损坏或与文件不一致时调用）"""
+    index = []
+    for report_id in _report_ids():
+        try:
+            entry = load_report(report_id)
+        except (OSError, ValueError):
+            continue
+        if entry:
+            index.append(index_entry(entry))
+    _save_index(index)
+    return index
+
+
+def _load_index():
+    """读取索引（按时间倒序）；缺失或损坏时重建"""
+    path = _index_path()
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if isinstance(index, list):
+                return index
+        except ValueError:
+            pass
+    if not os.path.isdir(cfg.PATH_REPORT_ARCHIVE):
+        return []
+    return rebuild_index()
+
+
+def _matches(item, query):
+    """关键词匹配索引字段；未命中时再检索正文"""
+    fields = " ".join(str(item.get(k) or "") for k in ("title", "mode", "level", "model", "start", "end"))
+    if query in fields.lower():
+        return True
+    entry = load_report(item["id"])
+    return bool(entry) and query in (entry.get("report") or "").lower()
+
+
+def list_reports(query=None, page=1, per_page=10):
+    """
+    分页列出归档报告（新的在前），返回 (本页索引条目, 匹配总数)。
+    query: 关键词（不区分大小写），先匹配索引字段，再匹配报告正文。
+    """
+    index = _load_index()
+    query = (query or "").strip().lower()
+    if query:
+        index = [item for item in index if _matches(item, query)]
+    total = len(index)
+    page = max(1, page)
+    return index[(page - 1) * per_page: page * per_page], total
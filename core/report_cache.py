@@ -0,0 +1,100 @@
+# report_cache.py
+# 报告磁盘缓存：以 (模型 + 系统提示词 + 用户提示词) 的哈希为 key，
+# 有效期内直接返回上次生成的报告，避免重复的付费 Gemini 调用
+
+import hashlib
+import json
+import os
+import time
+from . import config as cfg
+from . import report_config as rc
+
+
+def prompt_hash(model, system_prompt, user_prompt):
+    """对模型和完整提示词做 SHA-256，任一变化都会得到新的 key"""
+    h = hashlib.sha256()
+    for part in (model, system_prompt, user_prompt):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")  # 分隔符，避免拼接歧义
+    return h.hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(cfg.PATH_REPORT_CACHE, f"{key}.json")
+
+
+def _remove(path):
+    """删除缓存文件；已被其他线程 / 进程删除时忽略"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def get_cached_report(key, ttl_seconds=None, now=None):
+    """
+    命中且未过期时返回报告文本，否则返回 None。
+    过期条目顺手删除；命中时更新文件 mtime，淘汰时按最近使用排序。
+    """
+    ttl_seconds = rc.REPORT_CACHE_TTL_HOURS * 3600 if ttl_seconds is None else ttl_seconds
+    now = time.time() if now is None else now
+    path = _entry_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if now - entry.get("created_at", 0) > ttl_seconds:
+        _remove(path)
+        return None
+    try:
+        os.utime(path, (now, now))
+    except FileNotFoundError:  # 读完后被并发的 evict 删除，内容仍然有效
+        pass
+    return entry.get("report")
+
+
+def put_cached_report(key, report, meta=None, now=None):
+    """写入缓存（经 cfg.write_json_atomic，并发写同一 key 也不会读到半截 JSON），然后执行淘汰"""
+    now = time.time() if now is None else now
+    path = _entry_path(key)
+    entry = {"key": key, "created_at": now, "meta": meta or {}, "report": report}
+    cfg.write_json_atomic(path, entry)
+    try:
+        os.utime(path, (now, now))
+    except FileNotFoundError:  # 已被并发的 evict 淘汰
+        pass
+    evict()
+
+
+def evict(max_entries=None, max_bytes=None):
+    """按最近使用时间从旧到新淘汰，直到条目数和总字节数都不超过上限"""
+    max_entries = rc.REPORT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    max_bytes = rc.REPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    folder = cfg.PATH_REPORT_CACHE
+    if not os.path.isdir(folder):
+        return
+    entries = []
+    for name in os.listdir(folder):
+        if name.endswith(".json"):
+            try:
+                stat = os.stat(os.path.join(folder, name))
+            except FileNotFoundError:  # 列目录后被并发的 evict / 过期清理删除
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+    entries.sort()  # 最久未使用的在前
+    total_bytes = sum(size for _, size, _ in entries)
+    while entries and (len(entries) > max_entries or total_bytes > max_bytes):
+        _, size, name = entries.pop(0)
+        _remove(os.path.join(folder, name))
+        total_bytes -= size
+
+
+def clear_cache():
+    """清空全部缓存"""
+    folder = cfg.PATH_REPORT_CACHE
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            _remove(os.path.join(folder, name))
@@ -6,12 +6,69 @@ import os
 # ==================== Gemini API 配置 ====================
 GEMINI_MODEL = "gemini-3-flash-preview"
 
+# ==================== LLM 后端 ====================
+# gemini: google-genai SDK（默认）
+# http:   本地 HTTP 替身（python -m core.llm_stub_server），用于离线测试与压测
+REPORT_LLM_BACKEND = os.environ.get("JOURNAL_LLM_BACKEND", "gemini")
+REPORT_LLM_URL = os.environ.get("JOURNAL_LLM_URL", "http://127.0.0.1:8765")
+# 单次请求超时（秒）与失败重试次数（不含首次请求）
+REPORT_LLM_TIMEOUT = float(os.environ.get("JOURNAL_LLM_TIMEOUT", "120"))
+REPORT_LLM_RETRIES = int(os.environ.get("JOURNAL_LLM_RETRIES", "2"))
+# 指数退避：第 n 次重试前随机等待 [0, min(MAX, BASE * 2^n)] 秒
+REPORT_LLM_BACKOFF_BASE = float(os.environ.get("JOURNAL_LLM_BACKOFF_BASE", "1"))
+REPORT_LLM_BACKOFF_MAX = float(os.environ.get("JOURNAL_LLM_BACKOFF_MAX", "30"))
+
+# ==================== 报告数据模式 ====================
+# features: 发送预先计算的统计特征（默认，提示词小、分析更稳定）
+# raw:      发送原始数据表格（按 REPORT_CHAR_BUDGET 压缩），作为备用模式
+# delta:    只发送上次报告之后变化的记录 + 上次报告摘要（没有上次报告时退回 features）
+# mapreduce: 先并发为每个月生成摘要（按月缓存），再把各月摘要汇总成最终报告，适合多年数据
+REPORT_MODE = os.environ.get("JOURNAL_REPORT_MODE", "features")
+# delta 模式中上次报告摘要的字符上限
+REPORT_DELTA_DIGEST_CHARS = int(os.environ.get("JOURNAL_REPORT_DELTA_DIGEST_CHARS", "1500"))
+
+# mapreduce 模式：月度摘要的最大并发请求数
+REPORT_MAP_CONCURRENCY = int(os.environ.get("JOURNAL_REPORT_MAP_CONCURRENCY", "4"))
+
+# ==================== 提示词体积控制 ====================
+# 数据部分的预算，单位是字符而不是 token（0 表示不限制，按原样发送全年数据）
+REPORT_CHAR_BUDGET = int(os.environ.get("JOURNAL_REPORT_CHAR_BUDGET", "40000"))
+# 近 N 天的数据原样保留，更早的数据按周/月聚合压缩
+REPORT_RECENT_DAYS = int(os.environ.get("JOURNAL_REPORT_RECENT_DAYS", "14"))
+
+# ==================== 报告缓存 ====================
+# 同样的数据 + 模板 + 模型在有效期内直接复用上次的报告
+REPORT_CACHE_TTL_HOURS = float(os.environ.get("JOURNAL_REPORT_CACHE_TTL_HOURS", "24"))
+REPORT_CACHE_MAX_ENTRIES = int(os.environ.get("JOURNAL_REPORT_CACHE_MAX_ENTRIES", "20"))
+REPORT_CACHE_MAX_BYTES = int(os.environ.get("JOURNAL_REPORT_CACHE_MAX_BYTES", str(5 * 1024 * 1024)))
+
+# ==================== 定时报告 ====================
+# 五段式 cron（分 时 日 月 周，周日为 0）：默认每周日 21:00 周报，每月 1 日 09:00 月报
+REPORT_SCHEDULES = {
+    "weekly": os.environ.get("JOURNAL_SCHEDULE_WEEKLY", "0 21 * * 0"),
+    "monthly": os.environ.get("JOURNAL_SCHEDULE_MONTHLY", "0 9 1 * *"),
+}
+# 各计划的数据模式（取值见上方“报告数据模式”）：周报只分析上次报告之后变化的记录，
+# 月报先逐月摘要再汇总；未列出的计划使用 REPORT_MODE
+REPORT_SCHEDULE_MODES = {
+    "weekly": os.environ.get("JOURNAL_SCHEDULE_WEEKLY_MODE", "delta"),
+    "monthly": os.environ.get("JOURNAL_SCHEDULE_MONTHLY_MODE", "mapreduce"),
+}
+
 # ==================== 邮箱配置（从环境变量读取） ====================
 SMTP_SERVER = os.environ.get("JOURNAL_SMTP_SERVER", "smtp.163.com")
 SMTP_PORT = int(os.environ.get("JOURNAL_SMTP_PORT", "465"))
 SMTP_USER = os.environ.get("JOURNAL_SMTP_USER", "")
 SMTP_PASSWORD = os.environ.get("JOURNAL_SMTP_PASSWORD", "")  # 163 授权码
-EMAIL_RECIPIENT = os.environ.get("JOURNAL_EMAIL_TO", "")
+EMAIL_RECIPIENT = os.environ.get("JOURNAL_EMAIL_TO", "")  # 多个收件人用逗号分隔
+# 发件箱投递：连接超时（秒）、连接类故障的重试次数与退避（秒）
+SMTP_TIMEOUT = float(os.environ.get("JOURNAL_SMTP_TIMEOUT", "30"))
+SMTP_RETRIES = int(os.environ.get("JOURNAL_SMTP_RETRIES", "3"))
+SMTP_BACKOFF_BASE = float(os.environ.get("JOURNAL_SMTP_BACKOFF_BASE", "2"))
+SMTP_BACKOFF_MAX = float(os.environ.get("JOURNAL_SMTP_BACKOFF_MAX", "60"))
+# 一封邮件累计投递失败多少次后移入死信（不再自动重试）；投递中的认领超过多少秒视为进程已退出，放回发件箱
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("JOURNAL_OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_CLAIM_TIMEOUT = float(os.environ.get("JOURNAL_OUTBOX_CLAIM_TIMEOUT", "600"))
 
 # ==================== 提示词模板 ====================
 
@@ -27,6 +84,32 @@ REPORT_SYSTEM_PROMPT = """\
 5. 用中文回答
 """
 
+# 两种模式共用的分析维度要求
+REPORT_ANALYSIS_GUIDE = """
+---
+
+请从以下维度进行分析，生成一份结构化的行为建议报告：
+
+### 1. 核心数据总结
+- 心情趋势、睡眠质量趋势、专注力变化
+
+### 2. 行为模式洞察
+- 发现我的行为规律（好的和需要改进的）
+- 时间利用效率分析
+
+### 3. 目标达成评估
+- 任务完成率分析
+- 与周/月目标的对比
+
+### 4. 个性化建议
+- 基于数据的 3-5 条具体可行的改善建议
+- 值得保持的好习惯
+
+### 5. 下一步行动
+- 最优先改善的 1-2 个方面
+- 具体的行动计划
+"""
+
 REPORT_USER_PROMPT_TEMPLATE = """\
 请根据我的日记数据，帮助我分析行为模式并提供改善建议。
 
@@ -47,27 +130,91 @@ REPORT_USER_PROMPT_TEMPLATE = """\
 
 ## 反思记录
 {reflections_summary}
+""" + REPORT_ANALYSIS_GUIDE
 
----
+# 特征模式：量化数据已预先算成统计指标
+REPORT_FEATURES_PROMPT_TEMPLATE = """\
+请根据我的日记数据，帮助我分析行为模式并提供改善建议。
+以下量化部分已经预先计算为统计特征（均值、周环比、趋势斜率、相关性、连续天数、完成率），\
+请直接基于这些指标分析，不要自行推算原始数据。
 
-请从以下维度进行分析，生成一份结构化的行为建议报告：
+## 统计特征
+{features}
 
-### 1. 核心数据总结
-- 心情趋势、睡眠质量趋势、专注力变化
+## 近7天每日明细
+{recent_summary}
 
-### 2. 行为模式洞察
-- 发现我的行为规律（好的和需要改进的）
-- 时间利用效率分析
+## 周记数据
+{weekly_data}
 
-### 3. 目标达成评估
-- 任务完成率分析
-- 与周/月目标的对比
+## 月记数据
+{monthly_data}
 
-### 4. 个性化建议
-- 基于数据的 3-5 条具体可行的改善建议
-- 值得保持的好习惯
+## 反思记录（近期）
+{reflections_summary}
+""" + REPORT_ANALYSIS_GUIDE
 
-### 5. 下一步行动
-- 最优先改善的 1-2 个方面
-- 具体的行动计划
+# 增量模式：上次报告摘要 + 之后变化的记录，提示词大小与记录总天数无关
+REPORT_DELTA_PROMPT_TEMPLATE = """\
+请根据我的日记数据，帮助我分析行为模式并提供改善建议。
+上次报告生成于 {previous_date}（覆盖 {previous_range}），以下只包含此后新增或修改的记录。\
+请结合上次报告的结论，重点分析这段时间的变化：哪些建议落实了，哪些问题仍然存在。
+
+## 上次报告摘要
+{previous_digest}
+
+## 统计特征（全期）
+{features}
+
+## 新增/修改的每日概览
+{changed_summary}
+
+## 新增/修改的任务
+{changed_tasks}
+
+## 新增/修改的时间日志
+{changed_time}
+
+## 新增/修改的周记数据
+{changed_weekly}
+
+## 新增/修改的月记数据
+{changed_monthly}
+
+## 新增/修改的反思
+{changed_reflections}
+""" + REPORT_ANALYSIS_GUIDE
+
+# 分层模式第一步：单月数据 → 月度要点（结果按该月数据哈希缓存）
+REPORT_MONTH_PROMPT_TEMPLATE = """\
+下面是我 {month} 的日记数据。请用不超过 300 字的中文要点总结这个月：\
+量化指标的整体水平与变化、任务完成情况、反思中反复出现的主题。只陈述事实，不要给建议。
+
+## 每日概览
+{summary}
+
+## 任务
+{tasks}
+
+## 反思
+{reflections}
 """
+
+# 分层模式第二步：各月要点 + 全期统计特征 → 最终报告
+REPORT_REDUCE_PROMPT_TEMPLATE = """\
+请根据我的日记数据，帮助我分析行为模式并提供改善建议。
+我的记录跨度较长，下面先给出全期统计特征，再按月份给出每个月的要点摘要，最后是近 7 天明细。\
+请关注跨月份的长期趋势和反复出现的模式。
+
+## 统计特征
+{features}
+
+## 各月要点
+{month_summaries}
+
+## 近7天每日明细
+{recent_summary}
+
+## 反思记录（近期）
+{reflections_summary}
+""" + REPORT_ANALYSIS_GUIDE
@@ -1,22 +1,112 @@
 # report_data_collector.py
 # 从 CSV 数据文件中收集并格式化数据，供 Gemini 分析使用
+# 所有数据源经 load_sources 统一读取：每个文件只读一次、显式指定文本列类型、并发读取
 
 import os
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from . import config as cfg
+from . import texts as t
+from . import report_config as rc
+from . import csv_io
+from .report_features import compute_features, format_features
 
 
-def _read_csv_safe(file_path):
+# ==========================================
+# 数据源：统一加载
+# ==========================================
+
+# 反思列（daily_summary 中的 Reflect_* 列）
+REFLECT_COLS = [
+    "Reflect_AI_Usage", "Reflect_AI_Learning", "Reflect_Reading", "Reflect_Meditation",
+    "Reflect_Good_Actions", "Reflect_Bad_Actions", "Reflect_Words_To_Self",
+    "Reflect_Thoughts", "Reflect_Sleep_Dreams", "Reflect_Deep_Reflections",
+]
+
+# 数据源：key → (config 中的目录属性名, 文件名模板, 文本列)
+# 文本列显式读为 str，跳过 pandas 的逐列类型推断；数值列仍按默认规则解析
+SOURCES = {
+    "summary": ("PATH_SUMMARY", "daily_summary_{year}.csv",
+                ["Date", "Sleep_Bedtime", "Sleep_Waketime", *REFLECT_COLS]),
+    "tasks": ("PATH_TASKS", "tasks_log_{year}.csv",
+              ["Date", t.COL_TASK_NAME, t.COL_TASK_ACTUAL, t.COL_TASK_STATUS, t.COL_TASK_REASON]),
+    "time": ("PATH_TIME", "time_log_{year}.csv",
+             ["Date", t.COL_TIME_SLOT, t.COL_TIME_PLAN, t.COL_TIME_ACTUAL, t.COL_TIME_STATUS, t.COL_TIME_NOTE]),
+    "weekly_summary": ("PATH_WEEKLY_SUMMARY", "weekly_summary_{year}.csv", ["Week"]),
+    "weekly_habits": ("PATH_WEEKLY_HABITS", "weekly_habits_{year}.csv", ["Week"]),
+    "weekly_tasks": ("PATH_WEEKLY_TASKS", "weekly_tasks_{year}.csv", ["Week"]),
+    "monthly_summary": ("PATH_MONTHLY_SUMMARY", "monthly_summary_{year}.csv", ["Month"]),
+    "monthly_tasks": ("PATH_MONTHLY_TASKS", "monthly_tasks_{year}.csv", ["Month"]),
+}
+
+# 每个数据源的记录键（同一键的行总是一起保存）
+SOURCE_KEYS = {
+    "summary": "Date", "tasks": "Date", "time": "Date",
+    "weekly_summary": "Week", "weekly_habits": "Week", "weekly_tasks": "Week",
+    "monthly_summary": "Month", "monthly_tasks": "Month",
+}
+
+WEEKLY_SECTIONS = [("周概览", "weekly_summary"), ("周习惯", "weekly_habits"), ("周任务", "weekly_tasks")]
+MONTHLY_SECTIONS = [("月概览", "monthly_summary"), ("月任务", "monthly_tasks")]
+
+# 并发读取的线程数（文件读取与解析大部分时间释放 GIL）
+LOAD_WORKERS = 4
+
+
+def source_path(key, year):
+    """数据源文件路径（每次调用时从 config 取目录，便于测试替换）"""
+    attr, pattern, _ = SOURCES[key]
+    return os.path.join(getattr(cfg, attr), pattern.format(year=year))
+
+
+def _read_csv_safe(file_path, dtype=None):
     """安全读取 CSV，文件不存在时返回 None"""
-    if os.path.exists(file_path):
+    if csv_io.exists(file_path):
         try:
-            return pd.read_csv(file_path, encoding='utf-8-sig')
+            return csv_io.read_csv(file_path, dtype=dtype)
         except Exception:
             return None
     return None
 
 
+def _read_source(key, year):
+    return _read_csv_safe(source_path(key, year), dtype=dict.fromkeys(SOURCES[key][2], str))
+
+
+@contextmanager
+def _timed(timings, name):
+    """把代码块耗时（秒）记入 timings[name]；timings 为 None 时不记录"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = round(time.perf_counter() - start, 4)
+
+
+def load_sources(year, keys=None, timings=None):
+    """
+    并发读取多个数据源，每个文件只读一次。
+    返回 {key: DataFrame 或 None}；timings 不为空时记录每个文件的读取耗时（load.<key>）。
+    """
+    keys = list(keys or SOURCES)
+
+    def read(key):
+        start = time.perf_counter()
+        df = _read_source(key, year)
+        return key, df, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=min(LOAD_WORKERS, len(keys))) as pool:
+        results = list(pool.map(cfg.bind(read), keys))
+    if timings is not None:
+        for key, _, elapsed in results:
+            timings[f"load.{key}"] = round(elapsed, 4)
+    return {key: df for key, df, _ in results}
+
+
 def _df_to_text(df, max_rows=None):
     """将 DataFrame 转为文本表格，便于 LLM 阅读"""
     if df is None or df.empty:
@@ -26,10 +116,21 @@ def _df_to_text(df, max_rows=None):
     return df.to_string(index=False)
 
 
-def collect_daily_summary(year):
+# ==========================================
+# 各部分格式化（未传入 df 时自行读取；传入 load_sources 的结果时复用，None 表示文件不存在）
+# ==========================================
+
+_UNLOADED = object()
+
+def collect_daily_summary(year, df=_UNLOADED):
     """收集每日概览数据（全量）"""
-    path = os.path.join(cfg.PATH_SUMMARY, f"daily_summary_{year}.csv")
-    df = _read_csv_safe(path)
+    if df is _UNLOADED:
+        df = _read_source("summary", year)
+    return _format_summary(df)
+
+
+def _format_summary(df):
+    """每日概览只保留关键量化列，转为文本"""
     if df is None:
         return "暂无数据"
     # 选择关键量化列，避免过长
@@ -41,69 +142,56 @@ def collect_daily_summary(year):
     return _df_to_text(df[key_cols]) if key_cols else _df_to_text(df)
 
 
-def collect_tasks(year):
+def collect_tasks(year, df=_UNLOADED):
     """收集任务数据（全量）"""
-    path = os.path.join(cfg.PATH_TASKS, f"tasks_log_{year}.csv")
-    df = _read_csv_safe(path)
+    if df is _UNLOADED:
+        df = _read_source("tasks", year)
     return _df_to_text(df)
 
 
-def collect_time_log(year, recent_days=7):
+def collect_time_log(year, recent_days=7, df=_UNLOADED):
     """收集时间日志（近 N 天，控制 token 量）"""
-    path = os.path.join(cfg.PATH_TIME, f"time_log_{year}.csv")
-    df = _read_csv_safe(path)
+    if df is _UNLOADED:
+        df = _read_source("time", year)
     if df is None or df.empty:
         return "暂无数据"
-    # 按日期过滤近 N 天
-    cutoff = (datetime.now().date() - timedelta(days=recent_days)).isoformat()
-    df["Date"] = df["Date"].astype(str)
-    df = df[df["Date"] >= cutoff]
+    df = _recent_rows(df, recent_days)
     return _df_to_text(df) if not df.empty else "近7天暂无数据"
 
 
-def collect_weekly_data(year):
-    """收集周记三表数据"""
-    parts = []
-    for name, folder in [
-        ("周概览", cfg.PATH_WEEKLY_SUMMARY),
-        ("周习惯", cfg.PATH_WEEKLY_HABITS),
-        ("周任务", cfg.PATH_WEEKLY_TASKS),
-    ]:
-        path = os.path.join(folder, f"{name.replace('周', 'weekly_')}_{year}.csv")
-        # 文件名映射
-        if "概览" in name:
-            path = os.path.join(folder, f"weekly_summary_{year}.csv")
-        elif "习惯" in name:
-            path = os.path.join(folder, f"weekly_habits_{year}.csv")
-        else:
-            path = os.path.join(folder, f"weekly_tasks_{year}.csv")
-        df = _read_csv_safe(path)
-        text = _df_to_text(df)
-        parts.append(f"### {name}\n{text}")
-    return "\n\n".join(parts)
+def _recent_rows(df, recent_days):
+    """按日期过滤近 N 天（以今天为基准）"""
+    cutoff = (datetime.now().date() - timedelta(days=recent_days)).isoformat()
+    return df[df["Date"].astype(str) >= cutoff]
 
 
-def collect_monthly_data(year):
-    """收集月记二表数据"""
+def _collect_sections(sections, year, frames):
     parts = []
-    for name, folder in [
-        ("月概览", cfg.PATH_MONTHLY_SUMMARY),
-        ("月任务", cfg.PATH_MONTHLY_TASKS),
-    ]:
-        if "概览" in name:
-            path = os.path.join(folder, f"monthly_summary_{year}.csv")
-        else:
-            path = os.path.join(folder, f"monthly_tasks_{year}.csv")
-        df = _read_csv_safe(path)
-        text = _df_to_text(df)
-        parts.append(f"### {name}\n{text}")
+    for name, key in sections:
+        df = frames[key] if frames is not None else _read_source(key, year)
+        parts.append(f"### {name}\n{_df_to_text(df)}")
     return "\n\n".join(parts)
 
 
-def collect_reflections(year):
+def collect_weekly_data(year, frames=None):
+    """收集周记三表数据；frames 为 load_sources 的结果时不再读文件"""
+    return _collect_sections(WEEKLY_SECTIONS, year, frames)
+
+
+def collect_monthly_data(year, frames=None):
+    """收集月记二表数据；frames 为 load_sources 的结果时不再读文件"""
+    return _collect_sections(MONTHLY_SECTIONS, year, frames)
+
+
+def collect_reflections(year, df=_UNLOADED):
     """从 daily_summary 的 Reflect_* 列提取反思内容，过滤空行"""
-    path = os.path.join(cfg.PATH_SUMMARY, f"daily_summary_{year}.csv")
-    df = _read_csv_safe(path)
+    if df is _UNLOADED:
+        df = _read_source("summary", year)
+    return _format_reflections(df)
+
+
+def _format_reflections(df):
+    """提取 Date + Reflect_* 列，过滤全空行后转为文本"""
     if df is None or df.empty:
         return "暂无数据"
     # 找到所有反思列
@@ -111,26 +199,256 @@ def collect_reflections(year):
     if not reflect_cols:
         return "暂无反思数据"
     keep_cols = ["Date"] + reflect_cols
-    df_reflect = df[keep_cols].copy()
-    # 过滤掉所有反思列都为空的行
-    mask = df_reflect[reflect_cols].apply(
-        lambda row: any(str(v).strip() not in ("", "nan") for v in row), axis=1
-    )
+    df_reflect = df[keep_cols]
+    # 过滤掉所有反思列都为空的行（逐列向量化，空白与字面量 "nan" 都视为空）
+    stripped = df_reflect[reflect_cols].fillna("").astype(str).apply(lambda col: col.str.strip())
+    mask = (~stripped.isin(["", "nan"])).any(axis=1)
     df_reflect = df_reflect[mask]
     return _df_to_text(df_reflect) if not df_reflect.empty else "暂无反思数据"
 
 
-def collect_all_data():
+# ==========================================
+# 预算模式：近期原样保留，早期按周/月聚合压缩
+# ==========================================
+
+# 聚合时取平均值的列 / 求和的列
+_MEAN_COLS = ["Mood", "Sleep_Score", "Sleep_Hours"]
+_SUM_COLS = ["Focus_Count", "Meditation_Minutes", "AI_Time", "Masturbation_Count"]
+
+# 压缩级别，逐级尝试：(名称, 早期数据聚合粒度, 近期天数倍率)
+COMPACTION_LEVELS = [
+    ("full", None, 1.0),
+    ("weekly", "W", 1.0),
+    ("monthly", "M", 1.0),
+    ("monthly_short", "M", 0.5),
+]
+
+_FREQ_NAMES = {"W": "周", "M": "月"}
+
+
+def _split_recent(df, recent_days):
+    """
+    按 Date 切分为 (早期 df, 早期日期 Series, 近期 df)。
+    近期以数据中的最后一天为基准向前数 recent_days 天。
+    """
+    dates = pd.to_datetime(df["Date"], errors="coerce")
+    cutoff = dates.max() - pd.Timedelta(days=recent_days - 1)
+    recent_mask = dates >= cutoff
+    return df[~recent_mask], dates[~recent_mask], df[recent_mask]
+
+
+def _latest_days(df, days):
+    """数据中最后 days 天的行（无 Date 列时原样返回）"""
+    if df is None or df.empty or "Date" not in df.columns:
+        return df
+    return _split_recent(df, days)[2]
+
+
+def _period_labels(dates, freq):
+    """日期 → 周标签 '2026-W09' 或月标签 '2026-03'"""
+    if freq == "W":
+        iso = dates.dt.isocalendar()
+        labels = iso["year"].astype(str) + "-W" + iso["week"].astype(str).str.zfill(2)
+    else:
+        labels = dates.dt.strftime("%Y-%m")
+    return labels.rename("Period")
+
+
+def _aggregate_summary(df, dates, freq):
+    """早期每日概览聚合为每周/每月一行：评分取平均，次数取总和"""
+    out = pd.DataFrame({"Period": _period_labels(dates, freq), "Days": 1})
+    agg = {"Days": "sum"}
+    for col in _MEAN_COLS + _SUM_COLS:
+        if col in df.columns:
+            out[col] = pd.to_numeric(df[col], errors="coerce")
+            agg[col] = "mean" if col in _MEAN_COLS else "sum"
+    return out.groupby("Period", sort=True).agg(agg).reset_index().round(1)
+
+
+def _aggregate_tasks(df, dates, freq):
+    """早期任务聚合为每周/每月的状态计数与完成率（忽略"此日未作安排"占位行）"""
+    valid = df[t.COL_TASK_NAME].astype(str) != "此日未作安排"
+    status = (df.loc[valid, t.COL_TASK_STATUS].fillna("").astype(str).str.strip()
+              .replace({"": "未标记", "None": "未标记", "nan": "未标记"}))
+    counts = pd.crosstab(_period_labels(dates[valid], freq), status)
+    if counts.empty:
+        return counts
+    counts.columns.name = None
+    counts["任务数"] = counts.sum(axis=1)
+    done = counts["✅"] if "✅" in counts.columns else 0
+    counts["完成率"] = (done / counts["任务数"] * 100).round().astype(int).astype(str) + "%"
+    return counts.reset_index()
+
+
+def _compact(df, recent_days, freq, format_recent, summarize_older):
+    """通用压缩框架：早期部分交给 summarize_older，近期部分原样格式化"""
+    if df is None or df.empty or "Date" not in df.columns:
+        return format_recent(df)
+    if freq is None:
+        return format_recent(df)
+    older, older_dates, recent = _split_recent(df, recent_days)
+    parts = []
+    if not older.empty:
+        parts.append(f"#### 早期数据（按{_FREQ_NAMES[freq]}汇总）\n"
+                     + summarize_older(older, older_dates, freq))
+    parts.append(f"#### 近 {recent_days} 天明细\n" + format_recent(recent))
+    return "\n\n".join(parts)
+
+
+def _compact_summary(df, recent_days, freq):
+    return _compact(df, recent_days, freq, _format_summary,
+                    lambda d, dates, f: _df_to_text(_aggregate_summary(d, dates, f)))
+
+
+def _compact_tasks(df, recent_days, freq):
+    if df is not None and t.COL_TASK_STATUS not in df.columns:
+        freq = None  # 缺少状态列时无法聚合，原样输出
+    return _compact(df, recent_days, freq, _df_to_text,
+                    lambda d, dates, f: _df_to_text(_aggregate_tasks(d, dates, f)))
+
+
+def _compact_reflections(df, recent_days, freq):
+    """早期反思：周粒度时每条截断为 40 字，月粒度时整体省略只注明天数"""
+    def summarize_older(older, dates, f):
+        if f == "W":
+            reflect_cols = [c for c in older.columns if c.startswith("Reflect_")]
+            clipped = older.copy()
+            for col in reflect_cols:
+                clipped[col] = clipped[col].fillna("").astype(str).str.slice(0, 40)
+            return _format_reflections(clipped)
+        return f"（更早的 {len(older)} 天反思已省略）"
+    return _compact(df, recent_days, freq, _format_reflections, summarize_older)
+
+
+def _truncate_to_budget(data, char_budget):
+    """最后手段：各部分按长度等比例截断"""
+    total = sum(len(v) for v in data.values())
+    ratio = char_budget / total
+    note = "\n…（已截断）"
+    result = {}
+    for key, text in data.items():
+        keep = max(0, int(len(text) * ratio) - len(note))
+        result[key] = text[:keep] + note
+    return result
+
+
+def _section_chars(data):
+    return {key: len(text) for key, text in data.items()}
+
+
+def collect_budgeted_data(char_budget, recent_days=None, frames=None):
+    """
+    预算模式的数据收集：逐级压缩，直到数据部分总字符数不超过 char_budget。
+    返回 (data, stats)：
+    - data: 与 collect_all_data 相同的 dict
+    - stats: {"level", "budget", "total", "sections": {key: 字符数}, "timings": {阶段: 秒}}
+    frames: 已由调用方 load_sources 读好的数据，为空时在这里读取
+    """
+    year = datetime.now().year
+    recent_days = recent_days or rc.REPORT_RECENT_DAYS
+    timings = {}
+    if frames is None:
+        frames = load_sources(year, timings=timings)
+    summary_df, tasks_df = frames["summary"], frames["tasks"]
+
+    # 这三部分本身已经很小（近 7 天 / 每周一行 / 每月一行），不参与压缩
+    with _timed(timings, "time_data"):
+        time_data = collect_time_log(year, recent_days=7, df=frames["time"])
+    with _timed(timings, "weekly_data"):
+        weekly_data = collect_weekly_data(year, frames)
+    with _timed(timings, "monthly_data"):
+        monthly_data = collect_monthly_data(year, frames)
+    fixed = {"time_data": time_data, "weekly_data": weekly_data, "monthly_data": monthly_data}
+
+    with _timed(timings, "compaction"):
+        for level, freq, ratio in COMPACTION_LEVELS:
+            days = max(1, int(recent_days * ratio))
+            data = {
+                "daily_summary": _compact_summary(summary_df, days, freq),
+                "tasks_data": _compact_tasks(tasks_df, days, freq),
+                "reflections_summary": _compact_reflections(summary_df, days, freq),
+                **fixed,
+            }
+            if sum(len(v) for v in data.values()) <= char_budget:
+                break
+        else:
+            level = "truncated"
+            data = _truncate_to_budget(data, char_budget)
+
+    sections = _section_chars(data)
+    stats = {"level": level, "budget": char_budget,
+             "total": sum(sections.values()), "sections": sections, "timings": timings}
+    return data, stats
+
+
+# ==========================================
+# 特征模式：量化数据预先计算为统计特征
+# ==========================================
+
+def collect_feature_data(stats=None, frames=None):
+    """
+    特征模式的数据收集，key 对应 REPORT_FEATURES_PROMPT_TEMPLATE 的占位符。
+    量化表格不再原样发送，只发送统计特征 + 近 7 天明细 + 近期反思。
+    """
+    year = datetime.now().year
+    timings = {}
+    if frames is None:
+        frames = load_sources(year, timings=timings)
+    summary_df, tasks_df, time_df = frames["summary"], frames["tasks"], frames["time"]
+    if time_df is not None and "Date" in time_df.columns:
+        time_df = _recent_rows(time_df, rc.REPORT_RECENT_DAYS)
+
+    data = {}
+    with _timed(timings, "features"):
+        data["features"] = format_features(compute_features(summary_df, tasks_df, time_df))
+    with _timed(timings, "recent_summary"):
+        data["recent_summary"] = _format_summary(_latest_days(summary_df, 7))
+    with _timed(timings, "weekly_data"):
+        data["weekly_data"] = collect_weekly_data(year, frames)
+    with _timed(timings, "monthly_data"):
+        data["monthly_data"] = collect_monthly_data(year, frames)
+    with _timed(timings, "reflections_summary"):
+        data["reflections_summary"] = _compact_reflections(summary_df, rc.REPORT_RECENT_DAYS, "M")
+    if stats is not None:
+        sections = _section_chars(data)
+        stats.update({"level": "features", "budget": None,
+                      "total": sum(sections.values()), "sections": sections, "timings": timings})
+    return data
+
+
+def collect_all_data(char_budget=None, stats=None, frames=None):
     """
     主入口：收集所有数据，返回 dict，key 对应提示词模板占位符。
     自动检测当前年份。
+    - char_budget: 数据部分的字符预算，为空时原样发送全年数据
+    - stats: 可选的 dict，会被填入压缩级别与各部分字符数
+    - frames: 已由调用方 load_sources 读好的数据，为空时在这里读取
     """
+    if char_budget:
+        data, budget_stats = collect_budgeted_data(char_budget, frames=frames)
+        if stats is not None:
+            stats.update(budget_stats)
+        return data
+
     year = datetime.now().year
-    return {
-        "daily_summary": collect_daily_summary(year),
-        "tasks_data": collect_tasks(year),
-        "time_data": collect_time_log(year, recent_days=7),
-        "weekly_data": collect_weekly_data(year),
-        "monthly_data": collect_monthly_data(year),
-        "reflections_summary": collect_reflections(year),
-    }
+    timings = {}
+    if frames is None:
+        frames = load_sources(year, timings=timings)
+    # daily_summary 只读一次，概览与反思共用
+    collectors = [
+        ("daily_summary", lambda: collect_daily_summary(year, df=frames["summary"])),
+        ("tasks_data", lambda: collect_tasks(year, df=frames["tasks"])),
+        ("time_data", lambda: collect_time_log(year, recent_days=7, df=frames["time"])),
+        ("weekly_data", lambda: collect_weekly_data(year, frames)),
+        ("monthly_data", lambda: collect_monthly_data(year, frames)),
+        ("reflections_summary", lambda: collect_reflections(year, df=frames["summary"])),
+    ]
+    data = {}
+    for key, collect in collectors:
+        with _timed(timings, key):
+            data[key] = collect()
+    if stats is not None:
+        sections = _section_chars(data)
+        stats.update({"level": "full", "budget": None,
+                      "total": sum(sections.values()), "sections": sections, "timings": timings})
+    return data
@@ -0,0 +1,131 @@
+# report_delta.py
+# 增量报告：数据水位（每条记录键的内容摘要）与变化记录提取
+# 水位随报告一起归档；下一次只发送摘要不同或新增的记录，外加上次报告的精简摘要
+
+import hashlib
+import pandas as pd
+from datetime import datetime
+from . import report_config as rc
+from .report_data_collector import (
+    SOURCE_KEYS, load_sources, _df_to_text, _format_summary, _format_reflections,
+    WEEKLY_SECTIONS, MONTHLY_SECTIONS, _timed, _section_chars,
+)
+from .report_features import compute_features, format_features
+
+
+# ==========================================
+# 1. 数据水位
+# ==========================================
+
+def row_digests(df, key):
+    """
+    按记录键分组，每组所有行的内容摘要 → {键: 16 位十六进制}。
+    行哈希用 pandas 向量化计算，组内按行顺序拼接后再做一次 blake2b。
+    """
+    if df is None or df.empty or key not in df.columns:
+        return {}
+    keys = df[key].astype(str)
+    hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+    return {
+        k: hashlib.blake2b(h.to_numpy().tobytes(), digest_size=8).hexdigest()
+        for k, h in hashes.groupby(keys.to_numpy(), sort=True)
+    }
+
+
+def compute_watermark(frames, year):
+    """load_sources 的结果 → 水位 dict（可 JSON 序列化）"""
+    digests = {name: row_digests(frames.get(name), key) for name, key in SOURCE_KEYS.items()}
+    dates = sorted(digests["summary"]) or sorted(digests["tasks"])
+    return {
+        "year": year,
+        "start": dates[0] if dates else None,
+        "end": dates[-1] if dates else None,
+        "digests": digests,
+    }
+
+
+def changed_rows(df, key, previous_digests):
+    """摘要与上次水位不同（或上次没有）的记录键对应的全部行"""
+    if df is None or df.empty or key not in df.columns:
+        return df
+    current = row_digests(df, key)
+    changed = {k for k, d in current.items() if previous_digests.get(k) != d}
+    return df[df[key].astype(str).isin(changed)]
+
+
+# ==========================================
+# 2. 上次报告摘要
+# ==========================================
+
+def digest_report(markdown, max_chars=None):
+    """
+    上次报告 → 精简摘要：保留各级标题及每个标题下的前两行内容，超出上限截断。
+    不调用 LLM，结果稳定，便于命中缓存。
+    """
+    max_chars = rc.REPORT_DELTA_DIGEST_CHARS if max_chars is None else max_chars
+    lines, kept_under_heading = [], 0
+    for line in markdown.splitlines():
+        line = line.rstrip()
+        if not line.strip() or line.strip() == "---":
+            continue
+        if line.lstrip().startswith("#"):
+            lines.append(line)
+            kept_under_heading = 0
+        elif kept_under_heading < 2:
+            lines.append(line)
+            kept_under_heading += 1
+    digest = "\n".join(lines)
+    if len(digest) > max_chars:
+        digest = digest[:max_chars] + "\n…（已截断）"
+    return digest or "（上次报告为空）"
+
+
+# ==========================================
+# 3. 增量数据收集
+# ==========================================
+
+def _changed_text(frames, name, previous, formatter=_df_to_text):
+    df = changed_rows(frames.get(name), SOURCE_KEYS[name], previous.get(name, {}))
+    if df is None or df.empty:
+        return "无变化"
+    return formatter(df)
+
+
+def _changed_sections(frames, sections, previous):
+    return "\n\n".join(f"### {title}\n{_changed_text(frames, name, previous)}" for title, name in sections)
+
+
+def collect_delta_data(previous, frames=None, stats=None):
+    """
+    previous: 上次归档的报告（需含 watermark）。
+    返回 REPORT_DELTA_PROMPT_TEMPLATE 所需的 dict。
+    上次水位属于另一年份时，今年的记录全部视为新增。
+    """
+    year = datetime.now().year
+    timings = {}
+    if frames is None:
+        frames = load_sources(year, timings=timings)
+    watermark = previous["watermark"]
+    prev = watermark["digests"] if watermark.get("year") == year else {}
+
+    data = {
+        "previous_date": datetime.fromtimestamp(previous["created_at"]).strftime("%Y-%m-%d %H:%M"),
+        "previous_range": f"{watermark.get('start') or '-'} ~ {watermark.get('end') or '-'}",
+    }
+    with _timed(timings, "previous_digest"):
+        data["previous_digest"] = digest_report(previous.get("report", ""))
+    with _timed(timings, "features"):
+        data["features"] = format_features(compute_features(frames["summary"], frames["tasks"], None))
+    with _timed(timings, "changes"):
+        data["changed_summary"] = _changed_text(frames, "summary", prev, _format_summary)
+        data["changed_tasks"] = _changed_text(frames, "tasks", prev)
+        data["changed_time"] = _changed_text(frames, "time", prev)
+        data["changed_weekly"] = _changed_sections(frames, WEEKLY_SECTIONS, prev)
+        data["changed_monthly"] = _changed_sections(frames, MONTHLY_SECTIONS, prev)
+        data["changed_reflections"] = _changed_text(frames, "summary", prev, _format_reflections)
+
+    if stats is not None:
+        sections = _section_chars(data)
+        stats.update({"level": "delta", "budget": None, "previous_report": previous["id"],
+                      "total": sum(sections.values()), "sections": sections, "timings": timings})
+    return data
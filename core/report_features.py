@@ -0,0 +1,279 @@
+# report_features.py
+# 报告的统计特征提取：在调用 LLM 之前把原始表格算成趋势/环比/相关性/连续天数等指标
+# 全部基于 pandas 向量化计算，提示词体积与记录天数基本无关
+
+import pandas as pd
+from . import texts as t
+
+# 参与趋势与环比计算的指标
+METRIC_COLS = ["Mood", "Sleep_Score", "Sleep_Hours", "Focus_Count",
+               "Meditation_Minutes", "AI_Time", "Masturbation_Count"]
+
+# 相关性分析的指标对
+CORRELATION_PAIRS = [
+    ("Sleep_Hours", "Mood"),
+    ("Sleep_Score", "Mood"),
+    ("Sleep_Hours", "Focus_Count"),
+    ("Focus_Count", "Mood"),
+]
+
+# 连续天数统计：(名称, 列名, 判断条件)
+STREAK_RULES = [
+    ("不打飞机", "Masturbation_Count", lambda s: s == 0),
+    ("专注≥4个番茄钟", "Focus_Count", lambda s: s >= 4),
+    ("有静坐", "Meditation_Minutes", lambda s: s > 0),
+    ("睡眠≥7小时", "Sleep_Hours", lambda s: s >= 7),
+]
+
+TREND_WINDOW_DAYS = 30
+STATUS_VALUES = ["✅", "❌", "⚠️"]
+
+
+# ==========================================
+# 1. 每日概览特征
+# ==========================================
+
+def _prepare_daily(summary_df):
+    """Date 转为日期并排序，指标列转为数值，按日期去重（保留最后一条）"""
+    df = summary_df.copy()
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df = df.dropna(subset=["Date"]).sort_values("Date").drop_duplicates("Date", keep="last")
+    for col in METRIC_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df.set_index("Date")
+
+
+def _slope_per_week(series):
+    """最小二乘斜率（每天的变化量 × 7），样本不足 3 个时返回 None"""
+    y = series.dropna()
+    if len(y) < 3:
+        return None
+    x = (y.index - y.index[0]).days.to_numpy(dtype=float)
+    x_centered = x - x.mean()
+    denom = (x_centered ** 2).sum()
+    if denom == 0:
+        return None
+    return float((x_centered * (y.to_numpy() - y.mean())).sum() / denom * 7)
+
+
+def _streaks(flags, end_date):
+    """
+    flags: 以日期为索引的布尔 Series。缺失的日期视为中断。
+    返回 (当前连续天数, 最长连续天数)
+    """
+    if flags.empty:
+        return 0, 0
+    full_range = pd.date_range(flags.index.min(), end_date, freq="D")
+    flags = flags.reindex(full_range, fill_value=False).astype(bool)
+    # 每遇到一个 False 开启新分组，组内累加即为连续天数
+    run_lengths = flags.astype(int).groupby((~flags).cumsum()).cumsum()
+    return int(run_lengths.iloc[-1]), int(run_lengths.max())
+
+
+def compute_summary_features(summary_df):
+    """每日概览 → 指标均值、周环比、近 30 天趋势、相关性、连续天数"""
+    if summary_df is None or summary_df.empty or "Date" not in summary_df.columns:
+        return None
+    df = _prepare_daily(summary_df)
+    if df.empty:
+        return None
+
+    end = df.index.max()
+    last_7 = df[df.index > end - pd.Timedelta(days=7)]
+    prev_7 = df[(df.index <= end - pd.Timedelta(days=7)) & (df.index > end - pd.Timedelta(days=14))]
+    trend_window = df[df.index > end - pd.Timedelta(days=TREND_WINDOW_DAYS)]
+
+    metrics = {}
+    for col in [c for c in METRIC_COLS if c in df.columns]:
+        recent, previous = last_7[col].mean(), prev_7[col].mean()
+        metrics[col] = {
+            "mean": _round(df[col].mean()),
+            "last_7": _round(recent),
+            "prev_7": _round(previous),
+            "wow_delta": _round(recent - previous),
+            "trend_per_week": _round(_slope_per_week(trend_window[col])),
+        }
+
+    correlations = {}
+    for a, b in CORRELATION_PAIRS:
+        if a in df.columns and b in df.columns:
+            pair = df[[a, b]].dropna()
+            if len(pair) >= 5 and pair[a].std() > 0 and pair[b].std() > 0:
+                correlations[f"{a}~{b}"] = {"r": _round(pair[a].corr(pair[b]), 2), "n": len(pair)}
+
+    streaks = {}
+    for name, col, rule in STREAK_RULES:
+        if col in df.columns:
+            current, longest = _streaks(rule(df[col].dropna()), end)
+            streaks[name] = {"current": current, "longest": longest}
+
+    return {
+        "days": len(df),
+        "start": df.index.min().strftime("%Y-%m-%d"),
+        "end": end.strftime("%Y-%m-%d"),
+        "metrics": metrics,
+        "correlations": correlations,
+        "streaks": streaks,
+    }
+
+
+# ==========================================
+# 2. 任务特征
+# ==========================================
+
+def _status_counts(statuses):
+    """状态列 → 各状态数量与完成率"""
+    counts = statuses.value_counts()
+    total = int(len(statuses))
+    result = {s: int(counts.get(s, 0)) for s in STATUS_VALUES}
+    result["未标记"] = total - sum(result.values())
+    result["total"] = total
+    result["completion_rate"] = _round(result["✅"] / total * 100, 0) if total else None
+    return result
+
+
+def compute_task_features(tasks_df, recent_days=TREND_WINDOW_DAYS):
+    """任务日志 → 全期 / 近 30 天的状态分布与完成率，以及原因分析中的坏习惯关键词次数"""
+    if tasks_df is None or tasks_df.empty or t.COL_TASK_STATUS not in tasks_df.columns:
+        return None
+    df = tasks_df[tasks_df[t.COL_TASK_NAME].astype(str) != "此日未作安排"].copy()
+    if df.empty:
+        return None
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    statuses = df[t.COL_TASK_STATUS].fillna("").astype(str).str.strip()
+    recent_mask = df["Date"] > df["Date"].max() - pd.Timedelta(days=recent_days)
+
+    bad_habits = {}
+    if t.COL_TASK_REASON in df.columns:
+        reasons = df[t.COL_TASK_REASON].fillna("").astype(str)
+        for habit in t.BAD_HABITS:
+            hits = int(reasons.str.contains(habit, regex=False).sum())
+            if hits:
+                bad_habits[habit] = hits
+
+    return {
+        "all": _status_counts(statuses),
+        "recent": _status_counts(statuses[recent_mask]),
+        "recent_days": recent_days,
+        "bad_habits": bad_habits,
+    }
+
+
+# ==========================================
+# 3. 时间日志特征
+# ==========================================
+
+def compute_time_features(time_df):
+    """
+    时间日志 → 执行度：
+    - 有计划的时间段中标记 ✅ 的比例
+    - 有计划且实际内容与计划一致的比例
+    - 每天的 ✅ 比例
+    """
+    if time_df is None or time_df.empty or t.COL_TIME_PLAN not in time_df.columns:
+        return None
+    df = time_df.copy()
+    plan = df[t.COL_TIME_PLAN].fillna("").astype(str).str.strip()
+    actual = df.get(t.COL_TIME_ACTUAL, pd.Series("", index=df.index)).fillna("").astype(str).str.strip()
+    status = df.get(t.COL_TIME_STATUS, pd.Series("", index=df.index)).fillna("").astype(str).str.strip()
+    planned = plan != ""
+    if not planned.any():
+        return None
+
+    done = (status == "✅") & planned
+    matched = (actual == plan) & planned
+    per_day = done.groupby(df["Date"].astype(str)).sum() / planned.groupby(df["Date"].astype(str)).sum()
+    return {
+        "planned_slots": int(planned.sum()),
+        "done_rate": _round(done.sum() / planned.sum() * 100, 0),
+        "match_rate": _round(matched.sum() / planned.sum() * 100, 0),
+        "failed_slots": int(((status == "❌") & planned).sum()),
+        "per_day": {d: _round(v * 100, 0) for d, v in per_day.dropna().items()},
+    }
+
+
+# ==========================================
+# 4. 汇总与格式化
+# ==========================================
+
+def compute_features(summary_df, tasks_df, time_df):
+    """一次性计算全部特征，返回可 JSON 序列化的 dict"""
+    return {
+        "summary": compute_summary_features(summary_df),
+        "tasks": compute_task_features(tasks_df),
+        "time": compute_time_features(time_df),
+    }
+
+
+def _round(value, digits=2):
+    if value is None or pd.isna(value):
+        return None
+    return round(float(value), digits)
+
+
+def _fmt(value, signed=False):
+    if value is None:
+        return "-"
+    if signed:
+        return f"{value:+g}"
+    return f"{value:g}"
+
+
+def _md_table(headers, rows):
+    lines = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+    lines += ["| " + " | ".join(str(c) for c in row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def format_features(features):
+    """特征 dict → 供 LLM 阅读的 Markdown 文本"""
+    parts = []
+
+    summary = features.get("summary")
+    if summary:
+        parts.append(f"### 量化指标（共 {summary['days']} 天记录，{summary['start']} ~ {summary['end']}）")
+        rows = [[col, _fmt(m["mean"]), _fmt(m["last_7"]), _fmt(m["prev_7"]),
+                 _fmt(m["wow_delta"], signed=True), _fmt(m["trend_per_week"], signed=True)]
+                for col, m in summary["metrics"].items()]
+        parts.append(_md_table(["指标", "全期平均", "近7天", "前7天", "周环比", f"近{TREND_WINDOW_DAYS}天趋势(每周)"], rows))
+        if summary["correlations"]:
+            parts.append("### 相关性（皮尔逊系数）")
+            parts.append("\n".join(f"- {pair.replace('~', ' ↔ ')}：{c['r']}（n={c['n']}）"
+                                   for pair, c in summary["correlations"].items()))
+        if summary["streaks"]:
+            parts.append("### 连续天数")
+            parts.append("\n".join(f"- {name}：当前连续 {s['current']} 天，最长 {s['longest']} 天"
+                                   for name, s in summary["streaks"].items()))
+    else:
+        parts.append("### 量化指标\n暂无数据")
+
+    tasks = features.get("tasks")
+    if tasks:
+        parts.append("### 任务完成情况")
+        header = ["范围", "任务数", *STATUS_VALUES, "未标记", "完成率"]
+        rows = []
+        for label, c in [("全期", tasks["all"]), (f"近{tasks['recent_days']}天", tasks["recent"])]:
+            rate = f"{c['completion_rate']:g}%" if c["completion_rate"] is not None else "-"
+            rows.append([label, c["total"], *(c[s] for s in STATUS_VALUES), c["未标记"], rate])
+        parts.append(_md_table(header, rows))
+        if tasks["bad_habits"]:
+            parts.append("- 原因分析中出现的坏习惯关键词：" +
+                         "，".join(f"{k}×{v}" for k, v in tasks["bad_habits"].items()))
+    else:
+        parts.append("### 任务完成情况\n暂无数据")
+
+    time_f = features.get("time")
+    if time_f:
+        parts.append("### 时间日志执行度")
+        parts.append(
+            f"- 有计划的时间段 {time_f['planned_slots']} 个，标记完成 {_fmt(time_f['done_rate'])}%，"
+            f"实际与计划一致 {_fmt(time_f['match_rate'])}%，未完成 {time_f['failed_slots']} 个"
+        )
+        if time_f["per_day"]:
+            parts.append(_md_table(["日期", "完成率"],
+                                   [[d, f"{_fmt(v)}%"] for d, v in time_f["per_day"].items()]))
+    else:
+        parts.append("### 时间日志执行度\n暂无数据")
+
+    return "\n\n".join(parts)
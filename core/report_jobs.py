@@ -0,0 +1,196 @@
+# report_jobs.py
+# 后台报告任务：收集 → 生成 → 发送在工作线程中执行，状态持久化到磁盘
+# 页面只负责轮询状态文件，报告生成期间可以继续写日记，刷新页面后仍能看到结果
+
+import json
+import os
+import threading
+import time
+import uuid
+from . import config as cfg
+
+# 任务状态流转：queued → collecting → generating → sending → done / failed
+ACTIVE_STATES = ("queued", "collecting", "generating", "sending")
+FINAL_STATES = ("done", "failed")
+
+STATE_LABELS = {
+    "queued": "⏳ 排队中",
+    "collecting": "📂 正在收集日记数据",
+    "generating": "🤖 正在让 AI 分析行为数据",
+    "sending": "📧 正在发送邮件",
+    "done": "✅ 报告已发送",
+    "failed": "❌ 报告生成失败",
+}
+
+# 流式生成时，已收到的报告内容每隔这么久写一次状态文件，供页面渐进渲染
+PARTIAL_FLUSH_SECONDS = 0.5
+
+# ==========================================
+# 1. 状态文件读写
+# ==========================================
+
+def _job_path(job_id):
+    return os.path.join(cfg.PATH_REPORT_JOBS, f"job_{job_id}.json")
+
+
+def _write_job(job):
+    """先写临时文件再替换，轮询方不会读到半截 JSON"""
+    cfg.write_json_atomic(_job_path(job["id"]), job)
+
+
+def _update_job(job, state=None, **fields):
+    """更新状态并追加到 history（记录每个阶段的开始时间）"""
+    now = time.time()
+    if state is not None:
+        job["state"] = state
+        job["history"].append({"state": state, "at": now})
+    job.update(fields)
+    job["updated_at"] = now
+    _write_job(job)
+
+
+def get_job(job_id):
+    """读取任务状态；任务不存在时返回 None"""
+    path = _job_path(job_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        job = json.load(f)
+    return _check_orphaned(job)
+
+
+def get_latest_job():
+    """返回最近创建的任务（按创建时间），没有任务时返回 None"""
+    folder = cfg.PATH_REPORT_JOBS
+    if not os.path.isdir(folder):
+        return None
+    names = [n for n in os.listdir(folder) if n.startswith("job_") and n.endswith(".json")]
+    if not names:
+        return None
+    # 文件名中的 job_id 以创建时间戳开头，字典序即时间序
+    latest = max(names)
+    return get_job(latest[len("job_"):-len(".json")])
+
+
+def _check_orphaned(job):
+    """
+    进程重启后，原来的工作线程已不存在，活动状态的任务永远不会结束。
+    发现任务属于其他进程、仍处于活动状态且那个进程已经退出时，标记为失败；
+    其他仍在运行的进程（另一个页面实例、定时报告）发起的任务照常轮询
+    """
+    pid = job.get("pid")
+    if job["state"] in ACTIVE_STATES and pid != os.getpid() and not _pid_alive(pid):
+        _update_job(job, state="failed", error="应用已重启，任务被中断，请重新发送")
+    return job
+
+
+def _pid_alive(pid):
+    """进程是否仍在运行；无法确定（无权访问）时按存活处理，避免误判"""
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    if os.name == "nt":
+        return _pid_alive_windows(pid)
+    try:
+        os.kill(pid, 0)  # 信号 0 只做存在性与权限检查，不会真的发信号
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # 进程存在，只是属于其他用户
+    except OSError:
+        return False
+    return True
+
+
+def _pid_alive_windows(pid):
+    """Windows 下 os.kill 会直接结束目标进程，改用 OpenProcess + GetExitCodeProcess 查询"""
+    import ctypes
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+    if not handle:
+        return kernel32.GetLastError() == 5  # ERROR_ACCESS_DENIED：进程存在但无权查询
+    try:
+        code = ctypes.c_ulong()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True
+        return code.value == 259  # STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+# ==========================================
+# 2. 任务执行
+# ==========================================
+
+def create_job(force=False, mode=None):
+    """创建一个 queued 状态的任务并落盘"""
+    now = time.time()
+    job = {
+        "id": (f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}"
+               f"{int(now * 1000) % 1000:03d}-{uuid.uuid4().hex[:6]}"),
+        "state": "queued",
+        "history": [{"state": "queued", "at": now}],
+        "params": {"force": force, "mode": mode},
+        "pid": os.getpid(),
+        "created_at": now,
+        "updated_at": now,
+        "report": None,
+        "recipient": None,
+        "stats": {},
+        "error": None,
+    }
+    _write_job(job)
+    return job
+
+
+def run_report_job(job):
+    """
+    在当前线程中执行任务的全部阶段（工作线程入口，也便于测试直接调用）。
+    生成阶段使用流式接口：已收到的内容会周期性写入 job["report"]，
+    stats 中记录首块文本到达时间 first_chunk_s 与总耗时 generate_s。
+    """
+    from .report_service import generate_report_stream, send_email
+    from . import report_config as rc
+
+    stats = {}
+    try:
+        parts = []
+        started = last_flush = time.time()
+        for chunk in generate_report_stream(
+            stats=stats,
+            mode=job["params"]["mode"],
+            force=job["params"]["force"],
+            on_stage=lambda stage: _update_job(job, state=stage),
+        ):
+            if not parts:
+                stats["first_chunk_s"] = round(time.time() - started, 2)
+            parts.append(chunk)
+            if time.time() - last_flush >= PARTIAL_FLUSH_SECONDS:
+                _update_job(job, report="".join(parts))
+                last_flush = time.time()
+        report = "".join(parts)
+        stats["generate_s"] = round(time.time() - started, 2)
+        _update_job(job, state="sending", report=report, stats=stats)
+        send_email(report)
+        _update_job(job, state="done", recipient=rc.EMAIL_RECIPIENT)
+    except ValueError as e:
+        _update_job(job, state="failed", error=f"配置错误：{e}", stats=stats)
+    except Exception as e:
+        _update_job(job, state="failed", error=str(e), stats=stats)
+    return job
+
+
+def start_report_job(force=False, mode=None):
+    """
+    启动后台任务并立即返回任务 dict。
+    已有任务在运行时不重复启动，直接返回正在运行的任务。
+    """
+    with cfg.profile_lock("report_jobs.start"):
+        latest = get_latest_job()
+        if latest is not None and latest["state"] in ACTIVE_STATES:
+            return latest
+        job = create_job(force=force, mode=mode)
+    # 工作线程沿用发起任务的会话所选的日记
+    worker = threading.Thread(target=cfg.bind(run_report_job), args=(job,),
+                              name=f"report-job-{job['id']}", daemon=True)
+    worker.start()
+    return job
@@ -0,0 +1,173 @@
+# report_mapreduce.py
+# 分层报告：map 阶段按月份并发生成月度要点，reduce 阶段把各月要点汇总为最终报告的提示词
+# 月度要点以 (月份, 该月数据哈希) 为 key 永久缓存，只有数据变化的月份会重新请求
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pandas as pd
+from . import config as cfg
+from . import csv_io
+from . import report_config as rc
+from .report_data_collector import (
+    load_sources, _df_to_text, _format_summary, _format_reflections,
+    _latest_days, _compact_reflections, _timed, _section_chars,
+)
+from .report_delta import row_digests
+from .report_features import compute_features, format_features
+
+
+# ==========================================
+# 1. 多年数据与按月切分
+# ==========================================
+
+def available_years():
+    """每日概览 / 任务目录中存在数据文件的年份（升序）"""
+    years = set()
+    for folder in (cfg.PATH_SUMMARY, cfg.PATH_TASKS):
+        if os.path.isdir(folder):
+            for name in os.listdir(folder):
+                match = csv_io.YEAR_FILE.search(name)
+                if match:
+                    years.add(int(match.group(1)))
+    return sorted(years)
+
+
+def load_history(frames=None, timings=None):
+    """
+    全部年份的每日概览与任务拼接为两张表。
+    frames: 当年已读好的数据源，传入时当年不再重复读取。
+    """
+    current = datetime.now().year
+    parts = {"summary": [], "tasks": []}
+    for year in available_years():
+        year_frames = frames if (frames is not None and year == current) else \
+            load_sources(year, keys=["summary", "tasks"], timings=timings)
+        for key in parts:
+            if year_frames.get(key) is not None:
+                parts[key].append(year_frames[key])
+    return {key: pd.concat(dfs, ignore_index=True) if dfs else None for key, dfs in parts.items()}
+
+
+def split_by_month(df):
+    """按 Date 的 'YYYY-MM' 前缀分组 → {月份: 子表}"""
+    if df is None or df.empty or "Date" not in df.columns:
+        return {}
+    months = df["Date"].astype(str).str.slice(0, 7)
+    return {month: group for month, group in df.groupby(months, sort=True)}
+
+
+def month_hash(summary_df, tasks_df):
+    """一个月数据的内容哈希（两张表的逐日摘要合并）"""
+    h = hashlib.sha256()
+    for df in (summary_df, tasks_df):
+        h.update(json.dumps(row_digests(df, "Date"), sort_keys=True).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+def build_month_prompt(month, summary_df, tasks_df):
+    return rc.REPORT_MONTH_PROMPT_TEMPLATE.format(
+        month=month,
+        summary=_format_summary(summary_df),
+        tasks=_df_to_text(tasks_df),
+        reflections=_format_reflections(summary_df),
+    )
+
+
+# ==========================================
+# 2. 月度要点缓存
+# ==========================================
+
+def _summary_path(month, data_hash):
+    return os.path.join(cfg.PATH_MONTH_SUMMARIES, f"{month}_{data_hash}.json")
+
+
+def get_month_summary(month, data_hash):
+    path = _summary_path(month, data_hash)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["summary"]
+
+
+def put_month_summary(month, data_hash, summary, model):
+    """写入新要点，并删除该月份旧哈希的要点文件"""
+    path = _summary_path(month, data_hash)
+    cfg.write_json_atomic(path, {"month": month, "hash": data_hash, "model": model,
+                                 "created_at": time.time(), "summary": summary})
+    for name in os.listdir(cfg.PATH_MONTH_SUMMARIES):
+        if name.startswith(f"{month}_") and name.endswith(".json") and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(cfg.PATH_MONTH_SUMMARIES, name))
+            except FileNotFoundError:  # 并发写同一月份时已被另一方删除
+                pass
+
+
+# ==========================================
+# 3. map / reduce
+# ==========================================
+
+def summarize_months(history, backend, max_workers=None, force=False):
+    """
+    map 阶段：返回 ({月份: 要点}, {"months", "cached", "generated"})。
+    缓存未命中的月份在线程池中并发请求，并发数不超过 max_workers。
+    """
+    max_workers = rc.REPORT_MAP_CONCURRENCY if max_workers is None else max_workers
+    summary_months = split_by_month(history["summary"])
+    task_months = split_by_month(history["tasks"])
+    months = sorted(set(summary_months) | set(task_months))
+
+    results, todo = {}, []
+    for month in months:
+        s_df, t_df = summary_months.get(month), task_months.get(month)
+        data_hash = month_hash(s_df, t_df)
+        cached = None if force else get_month_summary(month, data_hash)
+        if cached:
+            results[month] = cached
+        else:
+            todo.append((month, data_hash, build_month_prompt(month, s_df, t_df)))
+
+    def summarize(item):
+        month, data_hash, prompt = item
+        try:
+            summary = backend.generate(rc.REPORT_SYSTEM_PROMPT, prompt)
+        except Exception as e:
+            raise RuntimeError(f"{month} 月度要点生成失败: {e}")
+        if not summary:
+            raise RuntimeError(f"{month} 月度要点为空")
+        put_month_summary(month, data_hash, summary, backend.model)
+        return month, summary
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo)))) as pool:
+            results.update(pool.map(cfg.bind(summarize), todo))
+
+    counts = {"months": len(months), "cached": len(months) - len(todo), "generated": len(todo)}
+    return {m: results[m] for m in months}, counts
+
+
+def collect_mapreduce_data(backend, frames=None, stats=None, force=False):
+    """reduce 阶段的提示词数据，key 对应 REPORT_REDUCE_PROMPT_TEMPLATE 的占位符"""
+    timings = {}
+    with _timed(timings, "load_history"):
+        history = load_history(frames=frames, timings=timings)
+    with _timed(timings, "map"):
+        summaries, counts = summarize_months(history, backend, force=force)
+
+    summary_df = history["summary"]
+    data = {}
+    with _timed(timings, "features"):
+        data["features"] = format_features(compute_features(summary_df, history["tasks"], None))
+    data["month_summaries"] = "\n\n".join(f"### {m}\n{s}" for m, s in summaries.items()) or "暂无数据"
+    data["recent_summary"] = _format_summary(_latest_days(summary_df, 7))
+    data["reflections_summary"] = _compact_reflections(summary_df, rc.REPORT_RECENT_DAYS, "M")
+
+    if stats is not None:
+        sections = _section_chars(data)
+        stats.update({"level": "mapreduce", "budget": None, "map": counts,
+                      "total": sum(sections.values()), "sections": sections, "timings": timings})
+    return data
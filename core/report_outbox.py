@@ -0,0 +1,266 @@
+# report_outbox.py
+# 报告邮件发件箱：渲染好的邮件先落盘，再由 flush 统一投递
+# 投递复用同一个已登录的 SMTP 连接，连接类故障按指数退避重试；失败的邮件留在发件箱，报告不会丢失
+#
+# 多个投递方同时运行时，每封邮件先原子改名认领再发送，不会重复发送；反复失败的邮件移入死信
+#
+# 用法：python -m core.report_outbox                  # 手动投递发件箱中积压的邮件
+#       python -m core.report_outbox --requeue-dead   # 把死信放回发件箱后再投递
+
+import json
+import os
+import time
+import uuid
+from contextlib import ExitStack
+from . import config as cfg
+from . import report_config as rc
+from .llm_backends import backoff_delay
+
+AUTH_ERROR_MESSAGE = (
+    "邮箱认证失败。请检查 JOURNAL_SMTP_USER 和 JOURNAL_SMTP_PASSWORD 是否正确。"
+    "注意：163 邮箱需要使用授权码而非登录密码。"
+)
+
+# 发件箱中的文件：{id}.json 待投递，{id}.sending 投递中（已被某个 flush 认领），{id}.dead 死信
+CLAIM_SUFFIX = ".sending"
+DEAD_SUFFIX = ".dead"
+
+
+# ==========================================
+# 1. 发件箱读写
+# ==========================================
+
+def parse_recipients(value):
+    """逗号/分号分隔的收件人字符串 → 去空白、去重后的列表"""
+    seen = []
+    for addr in value.replace(";", ",").split(","):
+        addr = addr.strip()
+        if addr and addr not in seen:
+            seen.append(addr)
+    return seen
+
+
+def _entry_path(message_id, suffix=".json"):
+    return os.path.join(cfg.PATH_OUTBOX, f"{message_id}{suffix}")
+
+
+def _write_entry(entry, suffix=".json"):
+    """先写临时文件再替换，进程中途退出也不会留下半截邮件"""
+    cfg.write_json_atomic(_entry_path(entry["id"], suffix), entry)
+
+
+def enqueue(raw_message, from_addr, recipients):
+    """把渲染好的邮件（msg.as_string()）放入发件箱，返回邮件 id"""
+    now = time.time()
+    entry = {
+        "id": (f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}"
+               f"{int(now * 1000) % 1000:03d}-{uuid.uuid4().hex[:6]}"),
+        "from": from_addr,
+        "to": list(recipients),
+        "raw": raw_message,
+        "created_at": now,
+        "attempts": 0,
+        "last_error": None,
+    }
+    _write_entry(entry)
+    return entry["id"]
+
+
+def _load(suffix):
+    """发件箱中某一状态的全部邮件，按入队时间排序；列目录后被其他投递认领 / 删除的文件跳过"""
+    folder = cfg.PATH_OUTBOX
+    if not os.path.isdir(folder):
+        return []
+    entries = []
+    for name in os.listdir(folder):
+        if name.endswith(suffix):
+            try:
+                with open(os.path.join(folder, name), "r", encoding="utf-8") as f:
+                    entries.append(json.load(f))
+            except FileNotFoundError:
+                continue
+    # 同一毫秒内入队的邮件 id 无法区分先后，以 created_at 为准
+    entries.sort(key=lambda e: (e["created_at"], e["id"]))
+    return entries
+
+
+def pending():
+    """发件箱中待投递的邮件（不含正在投递的和死信）"""
+    return _load(".json")
+
+
+def dead_letters():
+    """死信：永久性错误或累计失败 OUTBOX_MAX_ATTEMPTS 次的邮件，不再自动重试"""
+    return _load(DEAD_SUFFIX)
+
+
+def requeue_dead():
+    """把全部死信放回发件箱（失败次数清零），返回邮件 id 列表"""
+    ids = []
+    for entry in dead_letters():
+        entry["attempts"] = 0
+        _write_entry(entry, DEAD_SUFFIX)
+        try:
+            os.replace(_entry_path(entry["id"], DEAD_SUFFIX), _entry_path(entry["id"]))
+        except FileNotFoundError:  # 已被另一个进程放回
+            continue
+        ids.append(entry["id"])
+    return ids
+
+
+# --- 认领：投递前把 {id}.json 改名为 {id}.sending ---
+# 改名是原子操作，多个 flush（多线程 / 多进程）同时投递时每封邮件只会被其中一个认领并发送；
+# 认领失败说明已被别人认领或已送达，直接跳过。
+# 改名保留文件原来的修改时间，而 _recover_stale 以修改时间判断认领是否过期：
+# 改名前先把修改时间更新为认领时刻，否则积压已久的邮件一被认领就会被另一个 flush 当作过期收回、重复发送
+
+def _claim(message_id):
+    """认领一封邮件并返回其内容；已被认领 / 已送达时返回 None"""
+    path = _entry_path(message_id)
+    claimed = _entry_path(message_id, CLAIM_SUFFIX)
+    try:
+        os.utime(path)
+        os.rename(path, claimed)
+        with open(claimed, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _release(entry):
+    """放回发件箱，不计失败次数（认证失败等与这封邮件无关的错误）"""
+    os.replace(_entry_path(entry["id"], CLAIM_SUFFIX), _entry_path(entry["id"]))
+
+
+def _delivered(entry):
+    try:
+        os.remove(_entry_path(entry["id"], CLAIM_SUFFIX))
+    except FileNotFoundError:
+        pass
+
+
+def _mark_failed(entry, error, permanent=False):
+    """
+    记录失败并释放认领：先改写认领文件，再原子改名回待投递（或死信），
+    其他 flush 不会看到更新到一半的邮件。返回是否移入了死信。
+    """
+    entry["attempts"] += 1
+    entry["last_error"] = error
+    dead = permanent or entry["attempts"] >= rc.OUTBOX_MAX_ATTEMPTS
+    _write_entry(entry, CLAIM_SUFFIX)
+    os.replace(_entry_path(entry["id"], CLAIM_SUFFIX), _entry_path(entry["id"], DEAD_SUFFIX if dead else ".json"))
+    return dead
+
+
+def _recover_stale(now=None):
+    """认领超过 OUTBOX_CLAIM_TIMEOUT 秒仍未结束（投递进程已退出）的邮件放回发件箱；认领时刻即认领文件的修改时间"""
+    folder = cfg.PATH_OUTBOX
+    if not os.path.isdir(folder):
+        return
+    now = time.time() if now is None else now
+    for name in os.listdir(folder):
+        if not name.endswith(CLAIM_SUFFIX):
+            continue
+        claimed = os.path.join(folder, name)
+        try:
+            if now - os.path.getmtime(claimed) > rc.OUTBOX_CLAIM_TIMEOUT:
+                os.rename(claimed, _entry_path(name[:-len(CLAIM_SUFFIX)]))
+        except FileNotFoundError:
+            continue
+
+
+# ==========================================
+# 2. 投递
+# ==========================================
+
+def _connect(stack):
+    """建立 SSL 连接并登录，连接注册到 stack，stack.close() 时退出"""
+    import smtplib
+    server = stack.enter_context(smtplib.SMTP_SSL(rc.SMTP_SERVER, rc.SMTP_PORT, timeout=rc.SMTP_TIMEOUT))
+    server.login(rc.SMTP_USER, rc.SMTP_PASSWORD)
+    return server
+
+
+def _is_permanent(error):
+    """收件人被拒 / 5xx 响应属于这封邮件本身的问题，重连也不会成功"""
+    import smtplib
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def flush(retries=None, sleep=None):
+    """
+    投递发件箱中的全部邮件：一个连接、一次登录，逐封认领后 sendmail（每封可有多个收件人）。
+    - 连接断开、超时、4xx 等临时故障：关闭连接，退避后重连，最多重试 retries 次
+    - 收件人被拒、5xx：这一封移入死信，其余邮件继续投递
+    - 认证失败：立即抛出 RuntimeError（重试无意义），当前邮件放回发件箱
+    - 多个 flush 同时运行：每封邮件只由认领到它的一方发送，另一方跳过
+    返回 {"sent": [...], "failed": {id: 错误信息}, "dead": [...]}；
+    failed 中除 dead 之外的邮件仍留在发件箱，累计失败 OUTBOX_MAX_ATTEMPTS 次后移入死信。
+    """
+    import smtplib
+    retries = rc.SMTP_RETRIES if retries is None else retries
+    sleep = sleep or time.sleep
+    _recover_stale()
+    queue = [entry["id"] for entry in pending()]
+    result = {"sent": [], "failed": {}, "dead": []}
+
+    def fail(entry, error, permanent=False):
+        result["failed"][entry["id"]] = error
+        if _mark_failed(entry, error, permanent):
+            result["dead"].append(entry["id"])
+
+    failures = 0
+    server = None
+    entry = None
+    with ExitStack() as stack:
+        while queue:
+            entry = entry or _claim(queue[0])
+            if entry is None:  # 已被其他 flush 认领或送达
+                queue.pop(0)
+                continue
+            try:
+                if server is None:
+                    server = _connect(stack)
+                server.sendmail(entry["from"], entry["to"], entry["raw"])
+            except smtplib.SMTPAuthenticationError:
+                _release(entry)
+                raise RuntimeError(AUTH_ERROR_MESSAGE)
+            except (smtplib.SMTPException, OSError) as e:
+                if _is_permanent(e):
+                    fail(entry, str(e), permanent=True)
+                    entry = None
+                    queue.pop(0)
+                    continue
+                # 临时故障：丢弃当前连接，退避后重连（认领保持不变）
+                stack.close()
+                server = None
+                if failures >= retries:
+                    fail(entry, str(e))
+                    for message_id in queue[1:]:
+                        rest = _claim(message_id)
+                        if rest is not None:
+                            fail(rest, str(e))
+                    break
+                sleep(backoff_delay(failures, base=rc.SMTP_BACKOFF_BASE, cap=rc.SMTP_BACKOFF_MAX))
+                failures += 1
+                continue
+            _delivered(entry)
+            result["sent"].append(entry["id"])
+            entry = None
+            queue.pop(0)
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+    if "--requeue-dead" in sys.argv[1:]:
+        print(f"已把 {len(requeue_dead())} 封死信放回发件箱")
+    outcome = flush()
+    print(f"已发送 {len(outcome['sent'])} 封，失败 {len(outcome['failed'])} 封")
+    for message_id, error in outcome["failed"].items():
+        print(f"  {message_id}: {error}")
+    dead = dead_letters()
+    if dead:
+        print(f"死信 {len(dead)} 封（不再自动重试，修正问题后用 --requeue-dead 放回）")
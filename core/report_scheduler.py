@@ -0,0 +1,263 @@
+# report_scheduler.py
+# 无界面的定时报告守护进程：按类 cron 的计划执行 收集 → 生成 → 发送
+# 不依赖 streamlit；数据没有变化时跳过，本次运行结果追加到运行日志
+#
+# 用法：
+#   python -m core.report_scheduler                  # 常驻运行，按 REPORT_SCHEDULES 触发
+#   python -m core.report_scheduler --run weekly     # 立即执行一次（仍会做数据哈希检查）
+#   python -m core.report_scheduler --run weekly --force
+#   python -m core.report_scheduler --profile 李四  # 多日记时为指定日记调度（每份日记一个进程）
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from . import config as cfg
+from . import report_config as rc
+
+
+# ==========================================
+# 1. cron 表达式
+# ==========================================
+
+# 字段顺序：分 时 日 月 周（周日为 0，也接受 7）
+_CRON_FIELDS = [("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7)]
+
+
+def _parse_field(text, low, high):
+    """单个字段 → 允许取值的集合。支持 *、数字、a-b、a,b 以及 /step"""
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+        else:
+            start = end = int(part)
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"cron 字段超出范围: {text}（允许 {low}-{high}）")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """五段式 cron 表达式，例如 "0 21 * * 0" 表示每周日 21:00"""
+
+    def __init__(self, expr):
+        parts = expr.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron 表达式需要 5 个字段（分 时 日 月 周）: {expr!r}")
+        self.expr = expr
+        fields = {name: _parse_field(p, low, high)
+                  for p, (name, low, high) in zip(parts, _CRON_FIELDS)}
+        if 7 in fields["weekday"]:
+            fields["weekday"] = (fields["weekday"] - {7}) | {0}
+        self.fields = fields
+        # 与标准 cron 一致：日和周都有限定时，满足其一即可
+        self._day_any = parts[2] == "*"
+        self._weekday_any = parts[4] == "*"
+
+    def matches(self, dt):
+        f = self.fields
+        if dt.minute not in f["minute"] or dt.hour not in f["hour"] or dt.month not in f["month"]:
+            return False
+        day_ok = dt.day in f["day"]
+        weekday_ok = (dt.isoweekday() % 7) in f["weekday"]
+        if self._day_any or self._weekday_any:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, dt):
+        """dt 之后（不含 dt 所在分钟）第一次触发的时间；逐分钟查找，最多一年"""
+        candidate = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(366 * 24 * 60):
+            if self.matches(candidate):
+                return candidate
+            candidate += timedelta(minutes=1)
+        return None
+
+
+# ==========================================
+# 2. 数据哈希与状态
+# ==========================================
+
+def data_hash(year=None):
+    """当年全部数据源文件内容的 SHA-256；任何一条记录变化都会得到新的哈希"""
+    from .report_data_collector import SOURCES, source_path
+    year = year or datetime.now().year
+    h = hashlib.sha256()
+    for key in SOURCES:
+        path = source_path(key, year)
+        h.update(key.encode("utf-8") + b"\0")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 16), b""):
+                    h.update(block)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _state_path():
+    return os.path.join(cfg.PATH_REPORT_SCHEDULER, "state.json")
+
+
+def _log_path():
+    return os.path.join(cfg.PATH_REPORT_SCHEDULER, "runs.jsonl")
+
+
+def load_state():
+    """{计划名: {"last_fired": "YYYY-mm-dd HH:MM", "last_hash": ...}}"""
+    path = _state_path()
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_state(state):
+    cfg.write_json_atomic(_state_path(), state, indent=2)
+
+
+def append_run_log(record):
+    path = _log_path()
+    cfg.ensure_dirs([path])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def read_run_log():
+    path = _log_path()
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ==========================================
+# 3. 调度器
+# ==========================================
+
+def default_runner(name, force):
+    """
+    收集 → 生成 → 发送，返回写入运行日志的附加字段。
+    数据模式按计划名取 REPORT_SCHEDULE_MODES（周报 delta、月报 mapreduce），提示词不同，各计划的报告互不复用缓存
+    """
+    from .report_service import generate_report, send_email
+    mode = rc.REPORT_SCHEDULE_MODES.get(name, rc.REPORT_MODE)
+    stats = {}
+    report = generate_report(stats=stats, mode=mode, force=force)
+    send_email(report)
+    return {"mode": mode, "chars": len(report), "cache": stats.get("cache"), "level": stats.get("level")}
+
+
+class ReportScheduler:
+    """
+    - schedules: {计划名: cron 表达式}，默认取 REPORT_SCHEDULES
+    - clock / sleep: 可注入假时钟，测试时不必真的等待
+    - runner(name, force) -> dict: 实际执行报告的函数，默认 default_runner
+    - hasher() -> str: 数据哈希函数，默认 data_hash
+    """
+
+    def __init__(self, schedules=None, clock=datetime.now, sleep=time.sleep, runner=None, hasher=None):
+        schedules = rc.REPORT_SCHEDULES if schedules is None else schedules
+        self.schedules = {name: CronSchedule(expr) for name, expr in schedules.items()}
+        self.clock = clock
+        self.sleep = sleep
+        self.runner = runner or default_runner
+        self.hasher = hasher or data_hash
+
+    def run(self, name, now=None, force=False):
+        """
+        执行一次计划 name。数据哈希与上次成功运行相同时跳过（force=True 时不跳过）。
+        返回写入运行日志的记录。
+        """
+        now = now or self.clock()
+        state = load_state()
+        entry = state.setdefault(name, {})
+        current_hash = self.hasher()
+        record = {"schedule": name, "at": now.isoformat(timespec="seconds"), "data_hash": current_hash}
+        started = time.perf_counter()
+
+        if not force and entry.get("last_hash") == current_hash:
+            record["status"] = "skipped"
+            record["reason"] = "数据自上次报告以来没有变化"
+        else:
+            try:
+                record.update(self.runner(name, force) or {})
+                record["status"] = "ok"
+                entry["last_hash"] = current_hash
+            except Exception as e:
+                record["status"] = "failed"
+                record["error"] = str(e)
+        record["duration_s"] = round(time.perf_counter() - started, 3)
+
+        entry["last_fired"] = now.strftime("%Y-%m-%d %H:%M")
+        entry["last_status"] = record["status"]
+        _save_state(state)
+        append_run_log(record)
+        return record
+
+    def tick(self, now=None):
+        """检查当前这一分钟需要触发的计划并执行；同一分钟内不会重复触发"""
+        now = now or self.clock()
+        minute = now.strftime("%Y-%m-%d %H:%M")
+        records = []
+        for name, schedule in self.schedules.items():
+            if schedule.matches(now) and load_state().get(name, {}).get("last_fired") != minute:
+                records.append(self.run(name, now=now))
+        return records
+
+    def next_wakeup(self, now):
+        """所有计划中最近的一次触发时间"""
+        times = [s.next_after(now) for s in self.schedules.values()]
+        times = [t for t in times if t is not None]
+        return min(times) if times else None
+
+    def run_forever(self, max_ticks=None):
+        """常驻循环：睡到下一次触发时间再 tick。max_ticks 用于测试"""
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            now = self.clock()
+            self.tick(now)
+            ticks += 1
+            wakeup = self.next_wakeup(now)
+            if wakeup is None:
+                return
+            self.sleep(max(0.0, (wakeup - self.clock()).total_seconds()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="定时生成并发送行为建议报告")
+    parser.add_argument("--run", metavar="NAME", help="立即执行一次指定计划后退出")
+    parser.add_argument("--force", action="store_true", help="与 --run 一起使用：数据未变化也重新生成")
+    parser.add_argument("--profile", help=f"为哪份日记调度（JOURNAL_PROFILES 中的名称，默认 {next(iter(cfg.PROFILES))}）")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        try:
+            cfg.use_profile(args.profile)
+        except ValueError as e:
+            parser.error(str(e))
+
+    scheduler = ReportScheduler()
+    if args.run:
+        if args.run not in scheduler.schedules:
+            parser.error(f"未知的计划: {args.run}（可选 {', '.join(scheduler.schedules)}）")
+        print(json.dumps(scheduler.run(args.run, force=args.force), ensure_ascii=False))
+        return
+    for name, schedule in scheduler.schedules.items():
+        print(f"[{name}] {schedule.expr}，下次触发：{schedule.next_after(datetime.now())}")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,92 +1,208 @@
 # report_service.py
-# 行为建议报告的业务编排：Gemini API 调用 + 邮件发送
+# 行为建议报告的业务编排：LLM 调用（见 llm_backends.py）+ 邮件发送
 
-import os
-import re
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from datetime import datetime
 from . import report_config as rc
-from .report_data_collector import collect_all_data
+from .report_data_collector import collect_all_data, collect_feature_data, load_sources
+from .report_delta import collect_delta_data, compute_watermark
+from .report_mapreduce import collect_mapreduce_data
+from .report_archive import latest_report, save_report
+from .report_cache import prompt_hash, get_cached_report, put_cached_report
+from .llm_backends import get_backend
+from .md_render import render_document
+from . import memprof
+from . import report_outbox as outbox
+from .report_outbox import parse_recipients
 
 
-# ==================== Gemini API 调用 ====================
+# ==================== 提示词组装 ====================
 
-def generate_report():
+def build_user_prompt(mode=None, stats=None, frames=None, backend=None, force=False):
     """
-    收集日记数据 → 调用 Gemini API → 返回报告 Markdown 文本。
+    按数据模式收集数据并填充提示词模板。
+    - mode: "features"（统计特征）、"raw"（原始表格）、"delta"（增量）或 "mapreduce"（分层），
+      默认取 REPORT_MODE
+    - stats: 可选 dict，会被填入数据模式/压缩级别与各部分字符数
+    - frames: 已读好的数据源（load_sources 的结果），为空时由收集函数自行读取
+    - backend / force: 仅 mapreduce 模式使用，月度要点通过 backend 生成，force 时忽略月度缓存
+    """
+    mode = mode or rc.REPORT_MODE
+    if mode == "mapreduce":
+        data = collect_mapreduce_data(backend or get_backend(), frames=frames, stats=stats, force=force)
+        return rc.REPORT_REDUCE_PROMPT_TEMPLATE.format(**data)
+    if mode == "delta":
+        previous = latest_report(require_watermark=True)
+        if previous is not None:
+            data = collect_delta_data(previous, frames=frames, stats=stats)
+            return rc.REPORT_DELTA_PROMPT_TEMPLATE.format(**data)
+        # 还没有可作为基准的报告：本次按 features 模式生成全量报告
+        mode = "features"
+        if stats is not None:
+            stats["delta_fallback"] = True
+    if mode == "features":
+        data = collect_feature_data(stats=stats, frames=frames)
+        return rc.REPORT_FEATURES_PROMPT_TEMPLATE.format(**data)
+    if mode == "raw":
+        data = collect_all_data(char_budget=rc.REPORT_CHAR_BUDGET, stats=stats, frames=frames)
+        return rc.REPORT_USER_PROMPT_TEMPLATE.format(**data)
+    raise ValueError(f"未知的报告数据模式: {mode}（可选 features / raw / delta / mapreduce）")
+
+
+# ==================== LLM 调用 ====================
+
+def _prepare_prompt(backend, stats, mode, force, on_stage):
+    """
+    读取数据 → 组装提示词 → 查缓存。
+    返回 (user_prompt, cache_key, cached_report, watermark)，未命中时 cached_report 为 None；
+    watermark 是本次提示词所用数据的水位，随报告一起归档，供下一次增量报告使用。
+    """
+    if on_stage:
+        on_stage("collecting")
+    year = datetime.now().year
+    load_timings = {}
+    frames = load_sources(year, timings=load_timings)
+    user_prompt = build_user_prompt(mode=mode, stats=stats, frames=frames, backend=backend, force=force)
+    watermark = compute_watermark(frames, year)
+    if stats is not None:
+        stats.setdefault("timings", {}).update(load_timings)
+
+    # 数据 + 模板 + 模型都没变时直接复用缓存的报告（模型名区分不同后端）
+    cache_key = prompt_hash(backend.model, rc.REPORT_SYSTEM_PROMPT, user_prompt)
+    cached = None if force else get_cached_report(cache_key)
+    if stats is not None:
+        stats["cache"] = "hit" if cached else "miss"
+        stats["backend"] = backend.name
+    if not cached and on_stage:
+        on_stage("generating")
+    return user_prompt, cache_key, cached, watermark
+
+
+def _archive(backend, report, cache_key, watermark, mode, stats):
+    """新生成的报告连同数据水位归档（命中缓存的报告已经归档过，不重复保存）"""
+    save_report(report, meta={
+        "mode": mode or rc.REPORT_MODE,
+        "level": stats.get("level"),
+        "backend": backend.name,
+        "model": backend.model,
+        "prompt_hash": cache_key,
+        "watermark": watermark,
+    })
+
+
+def _backend_label(backend):
+    return "Gemini API" if backend.name == "gemini" else f"LLM 后端（{backend.name}）"
+
+
+def _llm_error(backend, e):
+    """把后端异常统一转换为 RuntimeError（配置错误 ValueError 原样抛出）"""
+    if isinstance(e, ValueError):
+        return e
+    if isinstance(e, ImportError):
+        return RuntimeError("未安装 google-genai 库。请运行: pip install google-genai")
+    return RuntimeError(f"{_backend_label(backend)} 调用失败: {e}")
+
+
+def generate_report(stats=None, mode=None, force=False, on_stage=None, backend=None):
+    """
+    收集日记数据 → 调用 LLM 后端 → 返回报告 Markdown 文本。
+    - stats: 可选 dict，会被填入数据模式/压缩级别与各部分字符数，以及 cache（hit/miss）、backend
+    - mode: 数据模式，见 build_user_prompt
+    - force: True 时忽略缓存，强制重新生成
+    - on_stage: 可选回调，进入 "collecting" / "generating" 阶段时调用
+    - backend: LLMBackend 实例，默认按 REPORT_LLM_BACKEND 创建
     异常：
-    - ValueError: API Key 未配置
-    - RuntimeError: API 调用失败
+    - ValueError: API Key 等配置缺失
+    - RuntimeError: API 调用失败（已按配置重试）
     """
-    api_key = os.environ.get("GEMINI_API_KEY", "")
-    if not api_key:
-        raise ValueError(
-            "未配置 GEMINI_API_KEY 环境变量。"
-            "请在系统环境变量中设置你的 Gemini API Key。"
-        )
+    backend = backend or get_backend()
+    stats = {} if stats is None else stats
+    with memprof.track("report_service.prepare_prompt"):
+        user_prompt, cache_key, cached, watermark = _prepare_prompt(backend, stats, mode, force, on_stage)
+    if cached:
+        return cached
 
-    # 收集数据
-    data = collect_all_data()
+    try:
+        report = backend.generate(rc.REPORT_SYSTEM_PROMPT, user_prompt)
+    except Exception as e:
+        raise _llm_error(backend, e)
+    if stats is not None:
+        stats["attempts"] = backend.attempts
+
+    if not report:
+        raise RuntimeError(f"{_backend_label(backend)} 返回了空响应，请稍后重试。")
+
+    put_cached_report(cache_key, report, meta={"model": backend.model})
+    _archive(backend, report, cache_key, watermark, mode, stats)
+    return report
 
-    # 组装提示词
-    user_prompt = rc.REPORT_USER_PROMPT_TEMPLATE.format(**data)
 
-    # 调用 Gemini API（使用 google-genai 新版 SDK）
+def generate_report_stream(stats=None, mode=None, force=False, on_stage=None, backend=None):
+    """
+    流式版本的 generate_report：生成器，模型每返回一块文本就 yield 一块。
+    参数与异常同 generate_report；命中缓存时一次性 yield 完整报告。
+    全部接收完毕后才写入缓存，中途失败不会缓存残缺的报告。
+    """
+    backend = backend or get_backend()
+    stats = {} if stats is None else stats
+    with memprof.track("report_service.prepare_prompt"):
+        user_prompt, cache_key, cached, watermark = _prepare_prompt(backend, stats, mode, force, on_stage)
+    if cached:
+        yield cached
+        return
+
+    chunks = []
     try:
-        from google import genai
-        client = genai.Client(api_key=api_key)
-        response = client.models.generate_content(
-            model=rc.GEMINI_MODEL,
-            contents=user_prompt,
-            config=genai.types.GenerateContentConfig(
-                system_instruction=rc.REPORT_SYSTEM_PROMPT,
-            ),
-        )
-    except ImportError:
-        raise RuntimeError(
-            "未安装 google-genai 库。请运行: pip install google-genai"
-        )
+        for chunk in backend.stream(rc.REPORT_SYSTEM_PROMPT, user_prompt):
+            chunks.append(chunk)
+            yield chunk
     except Exception as e:
-        raise RuntimeError(f"Gemini API 调用失败: {e}")
+        raise _llm_error(backend, e)
+    if stats is not None:
+        stats["attempts"] = backend.attempts
 
-    # 提取响应文本
-    if not response.text:
-        raise RuntimeError("Gemini API 返回了空响应，请稍后重试。")
-
-    return response.text
+    report = "".join(chunks)
+    if not report:
+        raise RuntimeError(f"{_backend_label(backend)} 返回了空响应，请稍后重试。")
+    put_cached_report(cache_key, report, meta={"model": backend.model})
+    _archive(backend, report, cache_key, watermark, mode, stats)
 
 
 # ==================== 邮件发送 ====================
 
 def _markdown_to_simple_html(md_text):
-    """将 Markdown 文本简单转换为 HTML，用于邮件显示"""
-    html = md_text
-    # 标题转换（### → h3, ## → h2, # → h1）
-    html = re.sub(r'^### (.+)$', r'<h3>\1</h3>', html, flags=re.MULTILINE)
-    html = re.sub(r'^## (.+)$', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-    html = re.sub(r'^# (.+)$', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-    # 加粗
-    html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html)
-    # 无序列表
-    html = re.sub(r'^- (.+)$', r'<li>\1</li>', html, flags=re.MULTILINE)
-    # 分隔线
-    html = re.sub(r'^---+$', r'<hr>', html, flags=re.MULTILINE)
-    # 换行
-    html = html.replace('\n', '<br>\n')
-    # 包裹 HTML
-    return (
-        '<html><head><meta charset="utf-8"></head>'
-        f'<body style="font-family: sans-serif; line-height: 1.6;">{html}</body></html>'
-    )
+    """将 Markdown 报告转换为 HTML，用于邮件显示（与归档的静态 HTML 同一渲染器）"""
+    return render_document(md_text, title="量化日记 - AI 行为建议报告")
+
+
+def build_message(report_content, recipients):
+    """渲染邮件（纯文本 + HTML 双版本），返回 MIMEMultipart"""
+    # email 只在真正发送时导入，不拖慢页面启动
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = "量化日记 - AI 行为建议报告"
+    msg["From"] = rc.SMTP_USER
+    msg["To"] = ", ".join(recipients)
+
+    # 纯文本版本（兜底）
+    part_text = MIMEText(report_content, "plain", "utf-8")
+    msg.attach(part_text)
+
+    # HTML 版本（优先展示）
+    html_content = _markdown_to_simple_html(report_content)
+    part_html = MIMEText(html_content, "html", "utf-8")
+    msg.attach(part_html)
+    return msg
 
 
 def send_email(report_content):
     """
-    将报告内容通过邮件发送。
+    将报告内容通过邮件发送（JOURNAL_EMAIL_TO 可用逗号分隔多个收件人）。
+    邮件先放入发件箱再投递，投递失败时邮件留在发件箱，下次发送时一并重试。
     异常：
     - ValueError: 邮箱配置缺失
-    - RuntimeError: 发送失败
+    - RuntimeError: 发送失败（认证失败，或重试后仍无法投递）
     """
     if not rc.SMTP_USER:
         raise ValueError(
@@ -96,38 +212,23 @@ def send_email(report_content):
         raise ValueError(
             "未配置邮箱授权码。请设置环境变量 JOURNAL_SMTP_PASSWORD。"
         )
-    if not rc.EMAIL_RECIPIENT:
+    recipients = parse_recipients(rc.EMAIL_RECIPIENT)
+    if not recipients:
         raise ValueError(
             "未配置收件邮箱。请设置环境变量 JOURNAL_EMAIL_TO。"
         )
 
-    # 构建邮件（纯文本 + HTML 双版本）
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = "量化日记 - AI 行为建议报告"
-    msg["From"] = rc.SMTP_USER
-    msg["To"] = rc.EMAIL_RECIPIENT
-
-    # 纯文本版本（兜底）
-    part_text = MIMEText(report_content, "plain", "utf-8")
-    msg.attach(part_text)
-
-    # HTML 版本（优先展示）
-    html_content = _markdown_to_simple_html(report_content)
-    part_html = MIMEText(html_content, "html", "utf-8")
-    msg.attach(part_html)
-
-    # 发送
-    try:
-        with smtplib.SMTP_SSL(rc.SMTP_SERVER, rc.SMTP_PORT) as server:
-            server.login(rc.SMTP_USER, rc.SMTP_PASSWORD)
-            server.sendmail(rc.SMTP_USER, rc.EMAIL_RECIPIENT, msg.as_string())
-    except smtplib.SMTPAuthenticationError:
+    msg = build_message(report_content, recipients)
+    message_id = outbox.enqueue(msg.as_string(), rc.SMTP_USER, recipients)
+    result = outbox.flush()
+    if message_id in result["dead"]:
         raise RuntimeError(
-            "邮箱认证失败。请检查 JOURNAL_SMTP_USER 和 JOURNAL_SMTP_PASSWORD 是否正确。"
-            "注意：163 邮箱需要使用授权码而非登录密码。"
+            f"邮件无法投递: {result['failed'][message_id]}（已移入发件箱死信，不再自动重试）"
+        )
+    if message_id in result["failed"]:
+        raise RuntimeError(
+            f"邮件发送失败: {result['failed'][message_id]}（报告已保存在发件箱，下次发送时会自动重试）"
         )
-    except Exception as e:
-        raise RuntimeError(f"邮件发送失败: {e}")
 
 
 # ==================== 主入口 ====================
@@ -0,0 +1,348 @@
+# synthetic_data.py
+# 合成多年日记数据（压测 / 性能评估用）：每日概览、任务、48 格时间轴、周记三表、月记两表
+# 每一天 / 每一周 / 每个月的随机数都由 (seed, 日期或周月键) 单独播种：
+# 同一 seed 下某一天的数据与生成范围无关，参数相同则输出逐字节一致
+#
+# 用法（在项目根目录执行）：
+#   python -m core.synthetic_data --base-dir /tmp/journal_5y --years 5
+#   python -m core.synthetic_data --base-dir /tmp/journal_20y --years 20 --end-year 2026 --seed 7
+#   python -m core.synthetic_data --base-dir /tmp/journal_sparse --density 0.5 --tasks-per-day 2 --text-scale 0.5
+
+import argparse
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+import pandas as pd
+from . import config as cfg
+from . import texts as t
+from . import weekly_texts as wt
+from . import monthly_texts as mt
+from .data_manager import get_default_time_schedule
+
+# 日记编号锚点（与 diary.py 的 get_diary_metadata 一致：2026-02-18 为 No.1100）
+DIARY_NO_ANCHOR = date(2026, 2, 18)
+DIARY_NO_BASE = 1100
+
+# ==========================================
+# 1. 文本素材
+# ==========================================
+
+_SUBJECTS = ["今天", "上午", "下午", "晚上", "早上跑步时", "读书的时候", "和朋友聊天后", "整理代码时", "午休醒来后"]
+_EVENTS = [
+    "把拖了很久的事情做完了", "读完了一章《思考，快与慢》", "复盘了这周的计划", "和家人通了电话",
+    "尝试用 AI 重构了一段脚本", "去公园走了一圈", "在番茄钟里保持了专注", "被短视频分散了注意力",
+    "熬夜改了一个问题", "记录了几个新的想法", "静坐了二十分钟", "学习了一个新的 Prompt 技巧",
+]
+_FEELINGS = [
+    "感觉很踏实", "有点疲惫但值得", "心里比较平静", "有些焦虑", "收获很大",
+    "意识到节奏还需要调整", "觉得时间过得很快", "对明天更有信心了",
+]
+_DREAMS = ["一觉到天亮，没有做梦", "凌晨醒了一次", "梦见回到了学校", "入睡有点慢", "做了一个记不清的梦"]
+_TASKS = [
+    "读书 30 页", "晨跑 5km", "整理周报", "写项目文档", "学习英语", "修复日记系统的 bug",
+    "看一期油管访谈", "健身房力量训练", "整理房间", "复盘本周计划", "写一篇博客", "冥想 20 分钟",
+]
+_REASONS = ["时间安排不合理", "临时有别的事", "拖延了", "状态不好", "任务估计过大"]
+_TIME_ACTIVITIES = ["工作", "学习", "阅读", "刷视频", "运动", "休息", "通勤", "开会", "写代码"]
+
+
+def _sentences(rng, count):
+    return "".join(
+        f"{rng.choice(_SUBJECTS)}{rng.choice(_EVENTS)}，{rng.choice(_FEELINGS)}。" for _ in range(count)
+    )
+
+
+def _text(rng, text_scale, low=1, high=3):
+    """长度随 text_scale 缩放的一段中文反思；text_scale=0 时为空"""
+    count = round(rng.randint(low, high) * text_scale)
+    return _sentences(rng, count) if count > 0 else ""
+
+
+def _rng(seed, key):
+    return random.Random(f"{seed}:{key}")
+
+
+# ==========================================
+# 2. 每日数据
+# ==========================================
+
+def _day_summary(rng, day, text_scale):
+    sleep_hours = round(min(9.5, max(4.5, rng.gauss(7.0, 0.8))), 2)
+    wake = timedelta(hours=6, minutes=rng.randint(-30, 60))
+    bed = (wake - timedelta(hours=sleep_hours)) % timedelta(days=1)
+    mood = min(5, max(1, round(3 + (sleep_hours - 7) * 0.6 + rng.gauss(0, 0.8))))
+    summary = {
+        "Diary_No": DIARY_NO_BASE + (day - DIARY_NO_ANCHOR).days,
+        "Weekday": day.weekday() + 1,
+        "Mood": mood,
+        "Sleep_Score": min(5, max(1, round(sleep_hours - 3.5 + rng.gauss(0, 0.6)))),
+        "Sleep_Bedtime": f"{bed.seconds // 3600:02d}:{bed.seconds // 60 % 60:02d}",
+        "Sleep_Waketime": f"{wake.seconds // 3600:02d}:{wake.seconds // 60 % 60:02d}",
+        "Sleep_Hours": sleep_hours,
+        "Focus_Count": max(0, round(rng.gauss(6, 3))),
+        "Meditation_Minutes": rng.choice([0, 0, 10, 15, 20, 30]),
+        "AI_Time": round(rng.uniform(0, 4), 1),
+        "Masturbation_Count": 1 if rng.random() < 0.15 else 0,
+        "Reflect_Sleep_Dreams": rng.choice(_DREAMS) if text_scale > 0 else "",
+    }
+    for key in t.REFLECTIONS_MAP:
+        summary[f"Reflect_{key}"] = _text(rng, text_scale, 0, 3)
+    summary["Date"] = day.isoformat()
+    return summary
+
+
+def _day_tasks(rng, date_str, tasks_per_day):
+    count = max(1, round(rng.gauss(tasks_per_day, 1))) if tasks_per_day > 0 else 0
+    if count == 0:
+        return [[date_str, "此日未作安排", "", "", ""]]
+    rows = []
+    for name in rng.sample(_TASKS, min(count, len(_TASKS))):
+        status = rng.choices(["✅", "❌", "⚠️"], weights=[6, 2, 2])[0]
+        actual = name if status == "✅" else ("完成一半" if status == "⚠️" else "")
+        reason = "" if status == "✅" else rng.choice(_REASONS)
+        rows.append([date_str, name, actual, status, reason])
+    return rows
+
+
+def _day_time(rng, template_rows, date_str):
+    rows = []
+    for slot, plan, actual, status, _ in template_rows:
+        if not actual:
+            actual = plan if plan and rng.random() < 0.6 else rng.choice(_TIME_ACTIVITIES)
+            status = "✅" if actual == plan else rng.choice(["❌", "⚠️", "None"])
+        rows.append([date_str, slot, plan, actual, status, ""])
+    return rows
+
+
+# ==========================================
+# 3. 周 / 月数据
+# ==========================================
+
+def _aggregate(days):
+    """一组每日概览 → 周记 / 月记概览中的聚合字段"""
+    moods = [d["Mood"] for d in days]
+    best = max(days, key=lambda d: d["Mood"])
+    worst = min(days, key=lambda d: d["Mood"])
+    weekday = lambda d: wt.WEEKDAY_ZH[date.fromisoformat(d["Date"]).weekday()]
+    return {
+        "Avg_Mood": round(sum(moods) / len(moods), 1),
+        "Avg_Sleep_Hours": round(sum(d["Sleep_Hours"] for d in days) / len(days), 1),
+        "Avg_Sleep_Score": round(sum(d["Sleep_Score"] for d in days) / len(days), 1),
+        "Total_Focus": sum(d["Focus_Count"] for d in days),
+        "Total_Masturbation": sum(d["Masturbation_Count"] for d in days),
+        "Best_Mood_Day": f"{weekday(best)}（{best['Mood']}分）",
+        "Worst_Mood_Day": f"{weekday(worst)}（{worst['Mood']}分）",
+    }
+
+
+def _stamp(day):
+    return f"{day.isoformat()} 21:00"
+
+
+def _period_tasks(rng, key_col, key, categories, cols, per_category, text_scale):
+    """周 / 月任务表；cols 为 (分类, 计划, 实际, 状态, 原因) 列名"""
+    category_col, plan_col, actual_col, status_col, reason_col = cols
+    rows = []
+    for category in categories:
+        for _ in range(per_category):
+            status = rng.choices(["✅", "❌", "⚠️"], weights=[5, 2, 3])[0]
+            plan = rng.choice(_TASKS)
+            rows.append({
+                key_col: key, category_col: category, plan_col: plan,
+                actual_col: plan if status == "✅" else "",
+                status_col: status,
+                reason_col: "" if status == "✅" else (rng.choice(_REASONS) if text_scale > 0 else ""),
+            })
+    return rows
+
+
+def _week_rows(seed, week_key, iso_year, iso_week, monday, days, text_scale):
+    rng = _rng(seed, week_key)
+    sunday = monday + timedelta(days=6)
+    agg = _aggregate(days)
+    summary = {"Weekly_Score": min(5, max(1, round(agg["Avg_Mood"] + rng.gauss(0, 0.5))))}
+    summary.update(agg)
+    summary.update({"Create_Time": _stamp(sunday), "Complete_Time": _stamp(sunday)})
+    summary.update({key: _text(rng, text_scale, 1, 4) for key in wt.WEEKLY_REFLECTIONS})
+    summary.update({"Week": week_key, "Year": iso_year, "Week_Number": iso_week,
+                    "Date_Start": monday.isoformat(), "Date_End": sunday.isoformat()})
+
+    recorded = {date.fromisoformat(d["Date"]).weekday() for d in days}
+    habits = []
+    for habit in wt.DEFAULT_HABITS:
+        row = {"Week": week_key, wt.COL_HABIT_NAME: habit}
+        for i, day_col in enumerate(wt.DAY_COLUMNS):
+            row[day_col] = ("✅" if rng.random() < 0.65 else "❌") if i in recorded else ""
+        habits.append(row)
+    cols = (wt.COL_WT_CATEGORY, wt.COL_WT_PLAN, wt.COL_WT_ACTUAL, wt.COL_WT_STATUS, wt.COL_WT_REASON)
+    tasks = _period_tasks(rng, "Week", week_key, wt.TASK_CATEGORIES, cols, 2, text_scale)
+    return summary, habits, tasks
+
+
+def _month_rows(seed, month_key, year, month, days, text_scale):
+    rng = _rng(seed, month_key)
+    first = date(year, month, 1)
+    last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    agg = _aggregate(days)
+    summary = {"Monthly_Score": min(5, max(1, round(agg["Avg_Mood"] + rng.gauss(0, 0.5))))}
+    summary.update(agg)
+    summary["No_Masturbation_Days"] = sum(1 for d in days if d["Masturbation_Count"] == 0)
+    summary.update({"Create_Time": _stamp(last), "Complete_Time": _stamp(last)})
+    summary.update({key: _text(rng, text_scale, 2, 6) for key in mt.MONTHLY_REFLECTIONS})
+    summary.update({"Month": month_key, "Year": year, "Month_Number": month,
+                    "Date_Start": first.isoformat(), "Date_End": last.isoformat()})
+    cols = (mt.COL_MT_CATEGORY, mt.COL_MT_PLAN, mt.COL_MT_ACTUAL, mt.COL_MT_STATUS, mt.COL_MT_REASON)
+    tasks = _period_tasks(rng, "Month", month_key, mt.TASK_CATEGORIES, cols, 3, text_scale)
+    return summary, tasks
+
+
+# ==========================================
+# 4. 生成与写入
+# ==========================================
+
+def _target(attr, base_dir):
+    """cfg 中的数据目录；指定 base_dir 时换到该目录下的同一相对位置"""
+    path = getattr(cfg, attr)
+    if base_dir is None:
+        return path
+    return os.path.join(base_dir, os.path.relpath(path, cfg.BASE_DIR))
+
+
+def _date_range(years, end_year, until):
+    end_year = date.today().year if end_year is None else end_year
+    start = date(end_year - years + 1, 1, 1)
+    end = date(end_year, 12, 31)
+    if until is None:
+        until = date.today()
+    return start, min(end, until)
+
+
+def generate(base_dir=None, years=5, end_year=None, until=None, seed=0,
+             density=0.9, tasks_per_day=4, text_scale=1.0, overwrite=False):
+    """
+    生成 years 年的日记数据并写入 CSV，返回各表行数与写入的文件列表。
+    - base_dir: 目标根目录（默认使用 cfg 中的路径，即 JOURNAL_BASE_DIR）
+    - end_year / until: 最后一年（默认今年）/ 截止日期（默认今天，不生成未来的日记）
+    - density: 有日记的天数占比（0~1）
+    - tasks_per_day: 每天任务数的均值
+    - text_scale: 反思文本长度倍数（0 表示不写反思）
+    异常：ValueError —— 参数越界，或目标文件已存在且未指定 overwrite
+    """
+    if years < 1:
+        raise ValueError("years 至少为 1")
+    if not 0 < density <= 1:
+        raise ValueError("density 必须在 (0, 1] 之间")
+    if tasks_per_day < 0 or text_scale < 0:
+        raise ValueError("tasks_per_day / text_scale 不能为负数")
+
+    start, end = _date_range(years, end_year, until)
+    template_rows = get_default_time_schedule("").drop(columns=["Date"]).values.tolist()
+
+    summary = defaultdict(list)
+    tasks = defaultdict(list)
+    time_log = defaultdict(list)
+    weeks = defaultdict(list)
+    months = defaultdict(list)
+    day = start
+    while day <= end:
+        rng = _rng(seed, day.isoformat())
+        if rng.random() < density:
+            date_str = day.isoformat()
+            row = _day_summary(rng, day, text_scale)
+            summary[day.year].append(row)
+            tasks[day.year].extend(_day_tasks(rng, date_str, tasks_per_day))
+            time_log[day.year].extend(_day_time(rng, template_rows, date_str))
+            iso_year, iso_week, _ = day.isocalendar()
+            weeks[(iso_year, iso_week)].append(row)
+            months[(day.year, day.month)].append(row)
+        day += timedelta(days=1)
+
+    weekly = defaultdict(lambda: {"summary": [], "habits": [], "tasks": []})
+    for (iso_year, iso_week), days in sorted(weeks.items()):
+        monday = date.fromisocalendar(iso_year, iso_week, 1)
+        s, h, tk = _week_rows(seed, f"{iso_year}-W{iso_week:02d}", iso_year, iso_week, monday, days, text_scale)
+        weekly[iso_year]["summary"].append(s)
+        weekly[iso_year]["habits"].extend(h)
+        weekly[iso_year]["tasks"].extend(tk)
+
+    monthly = defaultdict(lambda: {"summary": [], "tasks": []})
+    for (year, month), days in sorted(months.items()):
+        s, tk = _month_rows(seed, f"{year}-{month:02d}", year, month, days, text_scale)
+        monthly[year]["summary"].append(s)
+        monthly[year]["tasks"].extend(tk)
+
+    task_cols = ["Date", t.COL_TASK_NAME, t.COL_TASK_ACTUAL, t.COL_TASK_STATUS, t.COL_TASK_REASON]
+    time_cols = ["Date", t.COL_TIME_SLOT, t.COL_TIME_PLAN, t.COL_TIME_ACTUAL, t.COL_TIME_STATUS, t.COL_TIME_NOTE]
+    outputs = []  # [(路径, DataFrame)]
+    for year in sorted(summary):
+        outputs += [
+            (os.path.join(_target("PATH_SUMMARY", base_dir), f"daily_summary_{year}.csv"),
+             pd.DataFrame(summary[year])),
+            (os.path.join(_target("PATH_TASKS", base_dir), f"tasks_log_{year}.csv"),
+             pd.DataFrame(tasks[year], columns=task_cols)),
+            (os.path.join(_target("PATH_TIME", base_dir), f"time_log_{year}.csv"),
+             pd.DataFrame(time_log[year], columns=time_cols)),
+        ]
+    for year in sorted(weekly):
+        for name, attr in (("summary", "PATH_WEEKLY_SUMMARY"), ("habits", "PATH_WEEKLY_HABITS"),
+                           ("tasks", "PATH_WEEKLY_TASKS")):
+            outputs.append((os.path.join(_target(attr, base_dir), f"weekly_{name}_{year}.csv"),
+                            pd.DataFrame(weekly[year][name])))
+    for year in sorted(monthly):
+        for name, attr in (("summary", "PATH_MONTHLY_SUMMARY"), ("tasks", "PATH_MONTHLY_TASKS")):
+            outputs.append((os.path.join(_target(attr, base_dir), f"monthly_{name}_{year}.csv"),
+                            pd.DataFrame(monthly[year][name])))
+
+    existing = [path for path, _ in outputs if os.path.exists(path)]
+    if existing and not overwrite:
+        raise ValueError(f"目标文件已存在（{len(existing)} 个，如 {existing[0]}），请换一个目录或指定 overwrite")
+
+    for path, df in outputs:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+
+    return {
+        "range": [start.isoformat(), end.isoformat()],
+        "days": sum(len(rows) for rows in summary.values()),
+        "tasks_rows": sum(len(rows) for rows in tasks.values()),
+        "time_rows": sum(len(rows) for rows in time_log.values()),
+        "weeks": len(weeks),
+        "months": len(months),
+        "files": [path for path, _ in outputs],
+    }
+
+
+# ==========================================
+# 5. 命令行
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成合成的多年日记数据（压测用）")
+    parser.add_argument("--base-dir", required=True, help="目标数据根目录（相当于 JOURNAL_BASE_DIR）")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--end-year", type=int, help="最后一年（默认今年）")
+    parser.add_argument("--until", type=date.fromisoformat, help="截止日期 YYYY-MM-DD（默认今天）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--density", type=float, default=0.9, help="有日记的天数占比")
+    parser.add_argument("--tasks-per-day", type=float, default=4)
+    parser.add_argument("--text-scale", type=float, default=1.0, help="反思文本长度倍数")
+    parser.add_argument("--overwrite", action="store_true", help="覆盖已存在的数据文件")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    result = generate(base_dir=args.base_dir, years=args.years, end_year=args.end_year,
+                      until=args.until, seed=args.seed, density=args.density,
+                      tasks_per_day=args.tasks_per_day, text_scale=args.text_scale,
+                      overwrite=args.overwrite)
+    result["elapsed_s"] = round(time.perf_counter() - start, 2)
+    result["bytes"] = sum(os.path.getsize(path) for path in result["files"])
+    result["files"] = len(result["files"])
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@
 # ==================== 基础配置 ====================
 APP_TITLE = "我的量化日记系统"
 SIDEBAR_TITLE = "📅 时间胶囊"
+PROFILE_SELECT_LABEL = "📒 当前日记"
 
 # ==================== 元数据区域 ====================
 METADATA = "日记元数据部分"
@@ -6,6 +6,9 @@ import os
 from datetime import datetime, timedelta
 from . import config as cfg
 from . import weekly_texts as wt
+from . import csv_io
+from . import memprof
+from . import perf
 
 
 # ==========================================
@@ -96,6 +99,8 @@ def get_default_weekly_tasks(week_key):
 # 4. 日数据聚合
 # ==========================================
 
+@memprof.tracked
+@perf.timed
 def aggregate_daily_data(monday):
     """
     从 daily_summary CSV 聚合该周 7 天的统计数据。
@@ -115,10 +120,10 @@ def aggregate_daily_data(monday):
         "Worst_Mood_Day": "",
     }
 
-    if not os.path.exists(summary_path):
+    if not csv_io.exists(summary_path):
         return result
 
-    df = pd.read_csv(summary_path, encoding='utf-8-sig')
+    df = csv_io.read_csv(summary_path)
     if "Date" not in df.columns:
         return result
 
@@ -170,6 +175,8 @@ def aggregate_daily_data(monday):
 # 5. 数据加载
 # ==========================================
 
+@memprof.tracked
+@perf.timed
 def load_weekly_data(week_key, year):
     """
     加载指定周的全部数据：概览 + 习惯 + 任务。
@@ -179,8 +186,8 @@ def load_weekly_data(week_key, year):
 
     # --- 1. 加载周概览 ---
     summary_data = {}
-    if os.path.exists(paths["summary"]):
-        df = pd.read_csv(paths["summary"], encoding='utf-8-sig')
+    if csv_io.exists(paths["summary"]):
+        df = csv_io.read_csv(paths["summary"])
         df["Week"] = df["Week"].astype(str)
         row = df[df["Week"] == week_key]
         if not row.empty:
@@ -188,8 +195,8 @@ def load_weekly_data(week_key, year):
                            for k, v in row.iloc[0].to_dict().items()}
 
     # --- 2. 加载习惯 ---
-    if os.path.exists(paths["habits"]):
-        df_habits = pd.read_csv(paths["habits"], encoding='utf-8-sig')
+    if csv_io.exists(paths["habits"]):
+        df_habits = csv_io.read_csv(paths["habits"])
         df_habits["Week"] = df_habits["Week"].astype(str)
         # 字符串列清洗
         str_cols = [wt.COL_HABIT_NAME] + wt.DAY_COLUMNS
@@ -204,8 +211,8 @@ def load_weekly_data(week_key, year):
         habits_df = get_default_habits(week_key)
 
     # --- 3. 加载任务 ---
-    if os.path.exists(paths["tasks"]):
-        df_tasks = pd.read_csv(paths["tasks"], encoding='utf-8-sig')
+    if csv_io.exists(paths["tasks"]):
+        df_tasks = csv_io.read_csv(paths["tasks"])
         df_tasks["Week"] = df_tasks["Week"].astype(str)
         str_cols = [wt.COL_WT_CATEGORY, wt.COL_WT_PLAN, wt.COL_WT_ACTUAL,
                     wt.COL_WT_STATUS, wt.COL_WT_REASON]
@@ -226,12 +233,15 @@ def load_weekly_data(week_key, year):
 # 6. 数据保存 (Upsert)
 # ==========================================
 
+@memprof.tracked
+@perf.timed
 def save_weekly_data(week_key, year, iso_week, monday, sunday,
                      summary_dict, habits_df, tasks_df):
     """
     保存周记数据到 CSV (Upsert 模式) 并生成 Markdown。
     """
     paths = get_weekly_file_paths(year)
+    cfg.ensure_dirs(paths.values())  # 首次写入时才创建数据目录
 
     # --- 1. 保存周概览 ---
     summary_dict["Week"] = week_key
@@ -241,14 +251,7 @@ def save_weekly_data(week_key, year, iso_week, monday, sunday,
     summary_dict["Date_End"] = sunday.strftime("%Y-%m-%d")
     new_row = pd.DataFrame([summary_dict])
 
-    if os.path.exists(paths["summary"]):
-        df_old = pd.read_csv(paths["summary"], encoding='utf-8-sig')
-        df_old["Week"] = df_old["Week"].astype(str)
-        df_old = df_old[df_old["Week"] != week_key]
-        df_final = pd.concat([df_old, new_row], ignore_index=True)
-    else:
-        df_final = new_row
-    df_final.to_csv(paths["summary"], index=False, encoding='utf-8-sig')
+    csv_io.replace_rows(paths["summary"], "Week", week_key, new_row)
 
     # --- 2. 保存习惯 ---
     habits_df = habits_df.fillna("")
@@ -256,14 +259,7 @@ def save_weekly_data(week_key, year, iso_week, monday, sunday,
     habits_df = habits_df[habits_df[wt.COL_HABIT_NAME].astype(str).str.strip() != ""]
     habits_df["Week"] = week_key
 
-    if os.path.exists(paths["habits"]):
-        df_old = pd.read_csv(paths["habits"], encoding='utf-8-sig')
-        df_old["Week"] = df_old["Week"].astype(str)
-        df_old = df_old[df_old["Week"] != week_key]
-        df_final = pd.concat([df_old, habits_df], ignore_index=True)
-    else:
-        df_final = habits_df
-    df_final.to_csv(paths["habits"], index=False, encoding='utf-8-sig')
+    csv_io.replace_rows(paths["habits"], "Week", week_key, habits_df)
 
     # --- 3. 保存任务 ---
     tasks_df = tasks_df.fillna("")
@@ -271,14 +267,7 @@ def save_weekly_data(week_key, year, iso_week, monday, sunday,
     tasks_df = tasks_df[tasks_df[wt.COL_WT_PLAN].astype(str).str.strip() != ""]
     tasks_df["Week"] = week_key
 
-    if os.path.exists(paths["tasks"]):
-        df_old = pd.read_csv(paths["tasks"], encoding='utf-8-sig')
-        df_old["Week"] = df_old["Week"].astype(str)
-        df_old = df_old[df_old["Week"] != week_key]
-        df_final = pd.concat([df_old, tasks_df], ignore_index=True)
-    else:
-        df_final = tasks_df
-    df_final.to_csv(paths["tasks"], index=False, encoding='utf-8-sig')
+    csv_io.replace_rows(paths["tasks"], "Week", week_key, tasks_df)
 
     # --- 4. 生成 Markdown ---
     generate_weekly_markdown(week_key, year, iso_week, monday, sunday,
@@ -289,6 +278,7 @@ def save_weekly_data(week_key, year, iso_week, monday, sunday,
 # 7. Markdown 生成
 # ==========================================
 
+@perf.timed
 def generate_weekly_markdown(week_key, year, iso_week, monday, sunday,
                               summary_dict, habits_df, tasks_df):
     """将数据填充到周记 Markdown 模板并写入文件"""
@@ -350,5 +340,4 @@ def generate_weekly_markdown(week_key, year, iso_week, monday, sunday,
     )
 
     md_path = get_weekly_md_path(monday)
-    with open(md_path, "w", encoding="utf-8-sig") as f:
-        f.write(content)
+    csv_io.write_markdown(md_path, content)
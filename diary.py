@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import calendar as cal_module
+import time
 from datetime import datetime, timedelta
 from core import texts as t
 from core import weekly_texts as wt
@@ -8,14 +9,22 @@ from core import monthly_texts as mt
 from core.data_manager import load_data_for_date, save_all_data
 from core.weekly_data_manager import get_week_info, load_weekly_data
 from core.monthly_data_manager import get_month_info, load_monthly_data
-from core.report_service import generate_report, send_email
-from core import report_config as rc
+from core.draft_store import DraftRecorder, load_draft, clear_draft
+from core.report_jobs import start_report_job, get_latest_job, ACTIVE_STATES, STATE_LABELS
+from core import report_outbox as outbox
+from core import perf
+from core import profiles
 
 # ==========================================
 # 0. 基础页面配置
 # ==========================================
 st.set_page_config(page_title=t.APP_TITLE, page_icon="📝", layout="wide")
 
+# 性能剖析（JOURNAL_PERF=1 时启用）：本次重跑的记录从这里开始，会话内跨页面共享历史
+if 'perf_history' not in st.session_state:
+    st.session_state.perf_history = perf.History()
+perf.begin_run(t.APP_TITLE, st.session_state.perf_history)
+
 # 加载自定义 CSS 样式
 def load_css(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -23,6 +32,9 @@ def load_css(file_path):
 
 load_css('assets/styles.css')
 
+# 多日记：本会话所选日记决定数据目录（JOURNAL_PROFILES 只配置了一份时不显示选择框）
+profiles.render_selector(st.sidebar, st.session_state)
+
 # ==========================================
 # 1. 核心逻辑函数：负责日记编号与星期计算
 # ==========================================
@@ -46,6 +58,7 @@ def get_diary_metadata(target_date):
 # ==========================================
 # 2. 侧边栏导航：选择日期
 # ==========================================
+perf.mark("侧边栏月历")
 st.sidebar.title(t.SIDEBAR_TITLE)
 today = datetime.now().date()
 
@@ -83,6 +96,15 @@ def _clear_widget_cache():
     for k in keys_to_remove:
         del st.session_state[k]
 
+@profiles.session_callback(st.session_state)
+def _discard_draft():
+    """放弃当前日期的草稿，恢复为已保存的内容"""
+    recorder = st.session_state.pop("draft_recorder", None)
+    if recorder is not None:
+        recorder.discard()
+    clear_draft(st.session_state.selected_date)
+    _clear_widget_cache()
+
 def _go_today():
     _clear_widget_cache()
     st.session_state.selected_date = today
@@ -162,24 +184,78 @@ st.sidebar.button(
 )
 
 # ── 行为建议报告按钮 ──
+perf.mark("报告任务 / 发件箱")
 st.sidebar.divider()
+force_regenerate = st.sidebar.checkbox(
+    "🔄 强制重新生成（忽略缓存）", key="report_force",
+    help="数据没有变化时默认直接复用上次的报告，不再调用 Gemini"
+)
 if st.sidebar.button("📊 发送行为建议报告", key="send_report", use_container_width=True):
-    with st.sidebar:
-        status = st.status("正在生成报告...", expanded=True)
-        try:
-            status.write("📂 正在收集日记数据...")
-            status.write("🤖 正在让 AI 分析行为数据...")
-            report_text = generate_report()
-            status.write("📧 正在发送邮件...")
-            send_email(report_text)
-            status.update(label="报告已成功发送!", state="complete")
-            st.sidebar.success(f"✅ 报告已发送至 {rc.EMAIL_RECIPIENT}")
-        except ValueError as e:
-            status.update(label="配置错误", state="error")
-            st.sidebar.error(f"⚠️ 配置错误：{e}")
-        except RuntimeError as e:
-            status.update(label="发送失败", state="error")
-            st.sidebar.error(f"❌ {e}")
+    # 收集 → 生成 → 发送都在后台线程执行，页面不再被 LLM / SMTP 往返阻塞
+    start_report_job(force=force_regenerate)
+
+_latest_job = get_latest_job()
+_job_running = _latest_job is not None and _latest_job["state"] in ACTIVE_STATES
+
+@st.fragment(run_every=1 if _job_running else None)
+@profiles.session_callback(st.session_state)
+def _report_job_panel():
+    """
+    轮询后台任务状态文件；任务结束后整页 rerun 一次以停止轮询。
+    生成阶段报告以流式写入状态文件，每次轮询渲染已收到的部分。
+    """
+    job = get_latest_job()
+    if job is None:
+        return
+    if job["state"] in ACTIVE_STATES:
+        elapsed = int(time.time() - job["created_at"])
+        st.info(f"{STATE_LABELS[job['state']]}...（已用时 {elapsed} 秒，可以继续写日记）")
+        if job.get("report"):
+            with st.container(height=400):
+                st.markdown(job["report"] + " ▌")
+        return
+    if _job_running:
+        st.rerun()  # 刚刚结束：整页刷新，关闭轮询
+    finished = datetime.fromtimestamp(job["updated_at"]).strftime("%m-%d %H:%M")
+    if job["state"] == "done":
+        st.success(f"✅ {finished} 报告已发送至 {job['recipient']}")
+        job_stats = job.get("stats") or {}
+        if job_stats.get("cache") == "hit":
+            st.caption("⚡ 数据未变化，已复用缓存的报告")
+        elif job_stats:
+            st.caption(f"📏 数据部分 {job_stats.get('total', 0)} 字符（模式：{job_stats.get('level', '-')}）")
+            if "first_chunk_s" in job_stats:
+                st.caption(f"⏱️ 首段内容 {job_stats['first_chunk_s']} 秒，生成共 {job_stats['generate_s']} 秒")
+    else:
+        st.error(f"{STATE_LABELS['failed']}（{finished}）：{job['error']}")
+    if job.get("report"):
+        with st.expander("查看报告内容"):
+            st.markdown(job["report"])
+
+with st.sidebar:
+    _report_job_panel()
+
+
+@profiles.session_callback(st.session_state)
+def _flush_outbox():
+    try:
+        result = outbox.flush()
+    except RuntimeError as e:
+        st.session_state.outbox_error = str(e)
+        return
+    st.session_state.outbox_error = next(iter(result["failed"].values()), None)
+
+# 发件箱：投递失败的报告邮件留在本地，可以手动重新投递
+_outbox_pending = outbox.pending()
+if _outbox_pending and not _job_running:
+    st.sidebar.warning(f"📮 发件箱中有 {len(_outbox_pending)} 封报告邮件未送达")
+    st.sidebar.button("重新投递", key="flush_outbox", on_click=_flush_outbox, use_container_width=True)
+    if st.session_state.get("outbox_error"):
+        st.sidebar.caption(f"上次投递失败：{st.session_state.outbox_error}")
+_outbox_dead = outbox.dead_letters()
+if _outbox_dead:
+    st.sidebar.caption(f"📭 {len(_outbox_dead)} 封报告邮件多次投递失败，已停止重试"
+                       f"（修正后运行 python -m core.report_outbox --requeue-dead）")
 
 # 最终日期（后续所有代码直接使用 current_date，无需任何改动）
 current_date = st.session_state.selected_date
@@ -187,12 +263,31 @@ current_date = st.session_state.selected_date
 # ==========================================
 # 3. 数据加载：从 CSV 读取历史数据
 # ==========================================
+perf.mark("数据加载")
 summary_data, tasks_df, time_df = load_data_for_date(current_date)
 
+# 草稿恢复：草稿比 CSV 新（正式保存后草稿会被删除），直接覆盖到默认值上
+DRAFT_TASKS_KEY = "__tasks__"
+DRAFT_TIME_KEY = "__time__"
+draft_values, draft_ts = load_draft(current_date)
+if draft_values:
+    draft_tasks = draft_values.pop(DRAFT_TASKS_KEY, None)
+    draft_time = draft_values.pop(DRAFT_TIME_KEY, None)
+    summary_data.update(draft_values)
+    if draft_tasks:
+        tasks_df = pd.DataFrame(draft_tasks)
+    if draft_time:
+        time_df = pd.DataFrame(draft_time)
+
+def _df_to_records(df):
+    """DataFrame 转为可 JSON 序列化的行列表（NaN → None）"""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
 
 # ==========================================
 # 4. 页面渲染：元数据展示 (编号/日期/星期/阿克苏所在地)
 # ==========================================
+perf.mark("元数据")
 current_no, weekday_digit, weekday_name = get_diary_metadata(current_date)
 
 st.markdown(f'<div class="part-title">{t.METADATA}</div>', unsafe_allow_html=True)
@@ -213,9 +308,18 @@ col_row2_1, col_row2_empty = st.columns([1, 3])
 with col_row2_1:
     st.markdown(f'<div class="normal-text"><b>{t.LOCATION}</b></div>', unsafe_allow_html=True)
 
+# 草稿提示：告知用户当前显示的是未保存的草稿
+if draft_ts:
+    draft_c1, draft_c2 = st.columns([4, 1])
+    with draft_c1:
+        st.info(f"📝 已恢复 {datetime.fromtimestamp(draft_ts).strftime('%m-%d %H:%M')} 的未保存草稿，点击下方保存按钮后才会写入日记")
+    with draft_c2:
+        st.button("🗑️ 放弃草稿", on_click=_discard_draft, key="discard_draft", use_container_width=True)
+
 # ==========================================
 # 5. 量化数据输入区域 (心情/睡眠/专注力)
 # ==========================================
+perf.mark("量化数据输入")
 st.markdown(f'<div class="part-title">{t.LIFE_DATA}</div>', unsafe_allow_html=True)
 col1, col2 = st.columns(2)
 
@@ -243,7 +347,7 @@ with col1:
     
     st.markdown(f'<div class="question-text">{t.AI_TIME}</div>', unsafe_allow_html=True)
     try:
-        default_ai_time = int(float(summary_data.get("AI_time", 0)))
+        default_ai_time = int(float(summary_data.get("AI_Time", 0)))
     except (ValueError, TypeError):
         default_ai_time = 0
     ai_time = st.number_input("AI时间小时", min_value=0, value=default_ai_time, label_visibility="collapsed", key=f"ai_time_{current_date}")
@@ -293,6 +397,7 @@ with col2:
 # ==========================================
 # 5.5 周目标 & 月目标展示区
 # ==========================================
+perf.mark("周目标 / 月目标")
 
 def _render_goals(tasks_df, category_col, plan_col, status_col):
     """将任务 DataFrame 按分类分组，渲染为 Markdown 字符串"""
@@ -350,6 +455,7 @@ with goal_right:
 # ==========================================
 # 6. 核心看板：任务与时间 (这里定义了出错的变量)
 # ==========================================
+perf.mark("任务与时间编辑器")
 st.markdown(f'<div class="part-title">{t.TODAY_PLANS_IMPLEMENTATION}</div>', unsafe_allow_html=True)
 
 tab_task, tab_time = st.tabs(["📋 任务清单", "⏱️ 30分钟时间流"])
@@ -397,6 +503,7 @@ with tab_time:
 # ==========================================
 # 7. 反思部分
 # ==========================================
+perf.mark("反思")
 st.markdown(f'<div class="part-title">{t.TITLE_TODAY_REFLECTIONS}</div>', unsafe_allow_html=True)
 reflection_inputs = {}
 for key, meta in t.REFLECTIONS_MAP.items():
@@ -410,9 +517,36 @@ for key, meta in t.REFLECTIONS_MAP.items():
         key=f"reflect_{key}_{current_date}"
     )
 
+# ==========================================
+# 7.5 草稿暂存：每次 rerun 记录控件取值，防抖后追加写入草稿文件
+# ==========================================
+perf.mark("草稿暂存")
+draft_snapshot = {
+    "Mood": mood_score,
+    "Sleep_Score": sleep_score,
+    "Sleep_Bedtime": bedtime,
+    "Sleep_Waketime": waketime,
+    "Focus_Count": focus_count,
+    "Meditation_Minutes": meditation_minutes,
+    "AI_Time": ai_time,
+    "Masturbation_Count": masturbation_count,
+    "Reflect_Sleep_Dreams": sleep_dreams,
+    **reflection_inputs,
+    DRAFT_TASKS_KEY: _df_to_records(edited_tasks),
+    DRAFT_TIME_KEY: _df_to_records(edited_time),
+}
+draft_recorder = st.session_state.get("draft_recorder")
+if draft_recorder is None or draft_recorder.date_obj != current_date:
+    if draft_recorder is not None:
+        draft_recorder.flush()  # 切换日期前把上一天的修改落盘
+    draft_recorder = DraftRecorder(current_date)
+    st.session_state.draft_recorder = draft_recorder
+draft_recorder.record(draft_snapshot)
+
 # ==========================================
 # 8. 保存逻辑 (现在变量都有定义了)
 # ==========================================
+perf.mark("保存")
 st.divider()
 if st.button("💾 保存并生成日记 (Save & Generate)", type="primary", use_container_width=True):
         
@@ -450,7 +584,14 @@ if st.button("💾 保存并生成日记 (Save & Generate)", type="primary", use
     try:
         # 使用定义的 edited_tasks 和 edited_time 进行保存
         save_all_data(current_date, final_summary, edited_tasks, edited_time)
+        draft_recorder.discard()  # 正式保存成功，草稿作废
         st.success(f"✅ 成功！{current_no} 日记已保存。")
         st.toast("保存成功！")
     except Exception as e:
-        st.error(f"保存失败: {e}")
\ No newline at end of file
+        st.error(f"保存失败: {e}")
+
+# ==========================================
+# 9. 性能剖析面板（未启用时不显示）
+# ==========================================
+perf.end_run(st.session_state.perf_history)
+perf.render_panel(st.sidebar, st.session_state.perf_history)
@@ -0,0 +1,8 @@
+# journal.py
+# 日记命令行入口（python journal.py --help）；实现见 core/cli.py
+
+import sys
+from core.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
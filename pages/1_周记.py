@@ -5,12 +5,19 @@ from core import weekly_texts as wt
 from core.weekly_data_manager import (
     get_week_info, load_weekly_data, save_weekly_data, aggregate_daily_data,
 )
+from core import perf
+from core import profiles
 
 # ==========================================
 # 0. 页面配置
 # ==========================================
 st.set_page_config(page_title=wt.PAGE_TITLE, page_icon=wt.PAGE_ICON, layout="wide")
 
+# 性能剖析（JOURNAL_PERF=1 时启用）：本次重跑的记录从这里开始，会话内跨页面共享历史
+if 'perf_history' not in st.session_state:
+    st.session_state.perf_history = perf.History()
+perf.begin_run(wt.PAGE_TITLE, st.session_state.perf_history)
+
 # 加载自定义 CSS
 def load_css(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -18,6 +25,9 @@ def load_css(file_path):
 
 load_css('assets/styles.css')
 
+# 多日记：本会话所选日记决定数据目录（JOURNAL_PROFILES 只配置了一份时不显示选择框）
+profiles.render_selector(st.sidebar, st.session_state)
+
 # ==========================================
 # 1. Session State 初始化
 # ==========================================
@@ -29,6 +39,7 @@ if 'weekly_ref_date' not in st.session_state:
 # ==========================================
 # 2. 侧边栏导航
 # ==========================================
+perf.mark("侧边栏导航")
 st.sidebar.title(wt.SIDEBAR_TITLE)
 
 # 周切换回调
@@ -76,6 +87,7 @@ for i in range(7):
 # ==========================================
 # 3. 数据加载
 # ==========================================
+perf.mark("数据加载")
 summary_data, habits_df, tasks_df = load_weekly_data(week_key, iso_year)
 
 # 聚合缓存初始化
@@ -99,6 +111,7 @@ def _get_agg(field):
 # ==========================================
 # 4. 主内容区
 # ==========================================
+perf.mark("主内容区")
 # 标题
 st.markdown(
     f'<div class="part-title">周记 · {iso_year}年第{iso_week}周</div>',
@@ -122,8 +135,10 @@ with meta_c3:
 # ==========================================
 # 5. 数据统计区
 # ==========================================
+perf.mark("数据统计")
 st.markdown('<div class="part-title">本周数据统计</div>', unsafe_allow_html=True)
 
+@profiles.session_callback(st.session_state)
 def _refresh_stats():
     """刷新统计按钮的回调"""
     agg = aggregate_daily_data(monday)
@@ -164,6 +179,7 @@ with mood_c2:
 # ==========================================
 # 6. 习惯追踪 + 周任务（Tab 切换）
 # ==========================================
+perf.mark("习惯追踪 / 周任务")
 tab_habits, tab_tasks = st.tabs(["🎯 习惯追踪", "📋 周任务"])
 
 with tab_habits:
@@ -218,6 +234,7 @@ with tab_tasks:
 # ==========================================
 # 7. 自评分
 # ==========================================
+perf.mark("自评分")
 st.markdown('<div class="part-title">本周表现自我评分</div>', unsafe_allow_html=True)
 try:
     default_score = int(float(summary_data.get("Weekly_Score", 3)))
@@ -233,6 +250,7 @@ weekly_score = st.radio(
 # ==========================================
 # 8. 反思区域
 # ==========================================
+perf.mark("反思")
 st.markdown('<div class="part-title">本周反思总结</div>', unsafe_allow_html=True)
 reflection_inputs = {}
 for key, meta in wt.WEEKLY_REFLECTIONS.items():
@@ -248,6 +266,7 @@ for key, meta in wt.WEEKLY_REFLECTIONS.items():
 # ==========================================
 # 9. 保存逻辑
 # ==========================================
+perf.mark("保存")
 st.divider()
 if st.button("💾 保存并生成周记 (Save & Generate)", type="primary", use_container_width=True):
 
@@ -278,3 +297,9 @@ if st.button("💾 保存并生成周记 (Save & Generate)", type="primary", use
         st.toast("保存成功！")
     except Exception as e:
         st.error(f"保存失败: {e}")
+
+# ==========================================
+# 10. 性能剖析面板（未启用时不显示）
+# ==========================================
+perf.end_run(st.session_state.perf_history)
+perf.render_panel(st.sidebar, st.session_state.perf_history)
@@ -6,12 +6,19 @@ from core import monthly_texts as mt
 from core.monthly_data_manager import (
     get_month_info, load_monthly_data, save_monthly_data, aggregate_monthly_data,
 )
+from core import perf
+from core import profiles
 
 # ==========================================
 # 0. 页面配置
 # ==========================================
 st.set_page_config(page_title=mt.PAGE_TITLE, page_icon=mt.PAGE_ICON, layout="wide")
 
+# 性能剖析（JOURNAL_PERF=1 时启用）：本次重跑的记录从这里开始，会话内跨页面共享历史
+if 'perf_history' not in st.session_state:
+    st.session_state.perf_history = perf.History()
+perf.begin_run(mt.PAGE_TITLE, st.session_state.perf_history)
+
 # 加载自定义 CSS
 def load_css(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -19,6 +26,9 @@ def load_css(file_path):
 
 load_css('assets/styles.css')
 
+# 多日记：本会话所选日记决定数据目录（JOURNAL_PROFILES 只配置了一份时不显示选择框）
+profiles.render_selector(st.sidebar, st.session_state)
+
 # ==========================================
 # 1. Session State 初始化
 # ==========================================
@@ -30,6 +40,7 @@ if 'monthly_ref_date' not in st.session_state:
 # ==========================================
 # 2. 侧边栏导航
 # ==========================================
+perf.mark("侧边栏导航")
 st.sidebar.title(mt.SIDEBAR_TITLE)
 
 # 月切换回调
@@ -75,6 +86,7 @@ st.sidebar.markdown(
 # ==========================================
 # 3. 数据加载
 # ==========================================
+perf.mark("数据加载")
 summary_data, tasks_df = load_monthly_data(month_key, cur_year)
 
 # 聚合缓存初始化
@@ -98,6 +110,7 @@ def _get_agg(field):
 # ==========================================
 # 4. 主内容区
 # ==========================================
+perf.mark("主内容区")
 st.markdown(
     f'<div class="part-title">月记 · {cur_year}年{cur_month}月</div>',
     unsafe_allow_html=True
@@ -120,8 +133,10 @@ with meta_c3:
 # ==========================================
 # 5. 数据统计区
 # ==========================================
+perf.mark("数据统计")
 st.markdown('<div class="part-title">本月数据统计</div>', unsafe_allow_html=True)
 
+@profiles.session_callback(st.session_state)
 def _refresh_stats():
     """刷新统计按钮的回调"""
     agg = aggregate_monthly_data(cur_year, cur_month)
@@ -166,6 +181,7 @@ with mood_c3:
 # ==========================================
 # 6. 月任务表
 # ==========================================
+perf.mark("月任务表")
 st.markdown('<div class="part-title">本月重点事项</div>', unsafe_allow_html=True)
 st.caption("按分类管理本月重点事项")
 
@@ -194,6 +210,7 @@ edited_tasks = st.data_editor(
 # ==========================================
 # 7. 自评分
 # ==========================================
+perf.mark("自评分")
 st.markdown('<div class="part-title">本月表现自我评分</div>', unsafe_allow_html=True)
 try:
     default_score = int(float(summary_data.get("Monthly_Score", 3)))
@@ -209,6 +226,7 @@ monthly_score = st.radio(
 # ==========================================
 # 8. 反思区域
 # ==========================================
+perf.mark("反思")
 st.markdown('<div class="part-title">本月反思总结</div>', unsafe_allow_html=True)
 reflection_inputs = {}
 for key, meta in mt.MONTHLY_REFLECTIONS.items():
@@ -224,6 +242,7 @@ for key, meta in mt.MONTHLY_REFLECTIONS.items():
 # ==========================================
 # 9. 保存逻辑
 # ==========================================
+perf.mark("保存")
 st.divider()
 if st.button("💾 保存并生成月记 (Save & Generate)", type="primary", use_container_width=True):
 
@@ -255,3 +274,9 @@ if st.button("💾 保存并生成月记 (Save & Generate)", type="primary", use
         st.toast("保存成功！")
     except Exception as e:
         st.error(f"保存失败: {e}")
+
+# ==========================================
+# 10. 性能剖析面板（未启用时不显示）
+# ==========================================
+perf.end_run(st.session_state.perf_history)
+perf.render_panel(st.sidebar, st.session_state.perf_history)
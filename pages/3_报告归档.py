@@ -0,0 +1,143 @@
+import math
+import streamlit as st
+from datetime import datetime
+from core import archive_texts as at
+from core.md_render import render_document
+from core.report_archive import list_reports, load_report, rebuild_index
+from core import perf
+from core import profiles
+
+# ==========================================
+# 0. 页面配置
+# ==========================================
+st.set_page_config(page_title=at.PAGE_TITLE, page_icon=at.PAGE_ICON, layout="wide")
+
+# 性能剖析（JOURNAL_PERF=1 时启用）：本次重跑的记录从这里开始，会话内跨页面共享历史
+if 'perf_history' not in st.session_state:
+    st.session_state.perf_history = perf.History()
+perf.begin_run(at.PAGE_TITLE, st.session_state.perf_history)
+
+# 加载自定义 CSS
+def load_css(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+
+load_css('assets/styles.css')
+
+# 多日记：本会话所选日记决定数据目录（JOURNAL_PROFILES 只配置了一份时不显示选择框）
+profiles.render_selector(st.sidebar, st.session_state)
+
+# ==========================================
+# 1. Session State 初始化
+# ==========================================
+if 'archive_page' not in st.session_state:
+    st.session_state.archive_page = 1
+if 'archive_selected' not in st.session_state:
+    st.session_state.archive_selected = None
+
+# ==========================================
+# 2. 侧边栏：检索与分页
+# ==========================================
+perf.mark("检索与分页")
+st.sidebar.title(at.SIDEBAR_TITLE)
+
+def _reset_page():
+    st.session_state.archive_page = 1
+
+def _prev_page():
+    st.session_state.archive_page = max(1, st.session_state.archive_page - 1)
+
+def _next_page():
+    st.session_state.archive_page += 1
+
+def _select(report_id):
+    st.session_state.archive_selected = report_id
+
+query = st.sidebar.text_input(at.SEARCH_LABEL, placeholder=at.SEARCH_PLACEHOLDER,
+                              key="archive_query", on_change=_reset_page)
+per_page = st.sidebar.selectbox(at.PER_PAGE_LABEL, at.PER_PAGE_OPTIONS, index=1,
+                                key="archive_per_page", on_change=_reset_page)
+
+entries, total = list_reports(query=query, page=st.session_state.archive_page, per_page=per_page)
+pages = max(1, math.ceil(total / per_page))
+if st.session_state.archive_page > pages:
+    st.session_state.archive_page = pages
+    entries, total = list_reports(query=query, page=pages, per_page=per_page)
+
+nav_c1, nav_c2, nav_c3 = st.sidebar.columns([1, 3, 1])
+with nav_c1:
+    st.button("◀", on_click=_prev_page, key="archive_prev",
+              disabled=st.session_state.archive_page <= 1)
+with nav_c2:
+    st.markdown(
+        f"<div style='text-align:center; font-weight:bold; padding:4px 0; font-size:14px;'>"
+        f"第 {st.session_state.archive_page} / {pages} 页（共 {total} 份）</div>",
+        unsafe_allow_html=True
+    )
+with nav_c3:
+    st.button("▶", on_click=_next_page, key="archive_next",
+              disabled=st.session_state.archive_page >= pages)
+
+st.sidebar.markdown("---")
+if st.sidebar.button(at.REBUILD_BUTTON, key="archive_rebuild", use_container_width=True):
+    rebuild_index()
+    st.rerun()
+
+# ==========================================
+# 3. 报告列表
+# ==========================================
+perf.mark("报告列表")
+def _fmt_time(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M") if ts else "-"
+
+def _describe(item):
+    mode = at.MODE_LABELS.get(item.get("mode"), item.get("mode") or "-")
+    data_range = f"{item.get('start') or '-'} ~ {item.get('end') or '-'}"
+    return f"{mode} · {item.get('model') or '-'} · 数据 {data_range} · {item.get('chars', 0)} 字"
+
+st.markdown(f'<div class="part-title">{at.PAGE_TITLE}</div>', unsafe_allow_html=True)
+
+if not entries:
+    st.info(at.NO_MATCH if query else at.EMPTY_ARCHIVE)
+    st.stop()
+
+ids = [item["id"] for item in entries]
+if st.session_state.archive_selected not in ids:
+    st.session_state.archive_selected = ids[0]
+
+list_col, view_col = st.columns([1, 2])
+with list_col:
+    for item in entries:
+        selected = item["id"] == st.session_state.archive_selected
+        st.button(
+            f"{'👉 ' if selected else ''}{_fmt_time(item.get('created_at'))}  {item.get('title') or item['id']}",
+            key=f"archive_item_{item['id']}", on_click=_select, args=(item["id"],),
+            use_container_width=True, type="primary" if selected else "secondary",
+        )
+        st.caption(_describe(item))
+
+# ==========================================
+# 4. 报告正文
+# ==========================================
+perf.mark("报告正文")
+with view_col:
+    report = load_report(st.session_state.archive_selected)
+    if report is None:
+        st.warning(at.MISSING_REPORT)
+    else:
+        item = entries[ids.index(report["id"])]
+        st.caption(f"{_fmt_time(item.get('created_at'))} · {_describe(item)}")
+        st.download_button(
+            at.DOWNLOAD_HTML, key="archive_download",
+            data=render_document(report.get("report", ""), title=item.get("title") or report["id"]),
+            file_name=f"report_{report['id']}.html", mime="text/html",
+        )
+        with st.expander("元数据"):
+            st.json({k: v for k, v in report.items() if k not in ("report", "watermark")})
+        st.markdown(report.get("report", ""))
+
+# ==========================================
+# 5. 性能剖析面板（未启用时不显示）
+# ==========================================
+perf.end_run(st.session_state.perf_history)
+perf.render_panel(st.sidebar, st.session_state.perf_history)
@@ -0,0 +1,10 @@
+"""测试公共夹具"""
+import pytest
+from unittest.mock import patch
+
+
+@pytest.fixture(autouse=True)
+def _isolated_report_archive(tmp_path):
+    """每次生成报告都会归档，统一写到临时目录，避免污染真实数据目录"""
+    with patch("core.config.PATH_REPORT_ARCHIVE", str(tmp_path / "report_archive")):
+        yield tmp_path / "report_archive"
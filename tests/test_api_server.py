@@ -0,0 +1,110 @@
+"""本地 HTTP JSON API（core.api_server）的单元测试"""
+import json
+import pytest
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+
+@pytest.fixture
+def api(tmp_path):
+    from core.api_server import start_api_server
+    with patch("core.config.BASE_DIR", str(tmp_path)):
+        server = start_api_server(token="", max_body=64 * 1024)
+        yield server
+        server.shutdown()
+        server.server_close()
+
+
+def call(server, method, path, body=None, headers=None):
+    """返回 (状态码, 响应文本)"""
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    request = urllib.request.Request(server.url + path, data=data, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as resp:
+            return resp.status, resp.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode("utf-8")
+
+
+class TestReadWrite:
+    def test_put_then_get(self, api):
+        status, text = call(api, "PUT", "/api/summary/2026-10-17", {"Focus_Count": 6})
+        assert status == 200 and json.loads(text)["files"] == 1
+        status, text = call(api, "GET", "/api/summary/2026-10-17")
+        assert json.loads(text)["rows"] == [{"Date": "2026-10-17", "Focus_Count": "6"}]
+
+    def test_bulk_post_and_streamed_range(self, api):
+        records = [{"Date": f"2026-{m:02d}-{d:02d}", "Mood": d % 5} for m in (1, 2, 3) for d in range(1, 29)]
+        status, text = call(api, "POST", "/api/summary", records)
+        assert json.loads(text) == {"files": 1, "keys": 84, "rows": 84}
+        status, text = call(api, "GET", "/api/summary?from=2026-02-01&to=2026-02-28")
+        rows = [json.loads(line) for line in text.splitlines()]
+        assert status == 200 and len(rows) == 28
+        assert rows[0]["Date"] == "2026-02-01" and rows[-1]["Date"] == "2026-02-28"
+
+    def test_put_multi_row_table(self, api):
+        call(api, "PUT", "/api/monthly_tasks/2026-10", [{"Plan": "a"}, {"Plan": "b"}])
+        status, text = call(api, "GET", "/api/monthly_tasks/2026-10")
+        assert [r["Plan"] for r in json.loads(text)["rows"]] == ["a", "b"]
+
+
+class TestErrors:
+    @pytest.mark.parametrize("method, path, body, code", [
+        ("GET", "/api/nope", None, 404),
+        ("GET", "/api/summary/2026-10-17", None, 404),
+        ("GET", "/api/summary?from=2026-13", None, 400),
+        ("PUT", "/api/summary/17-10-2026", {"Mood": 1}, 400),
+        ("PUT", "/api/summary/2026-02-30", {"Mood": 1}, 400),
+        ("GET", "/api/weekly_summary?to=2026-W60", None, 400),
+        ("POST", "/api/summary", {"Date": "2026-10-17"}, 400),
+    ])
+    def test_status_codes(self, api, method, path, body, code):
+        assert call(api, method, path, body)[0] == code
+
+    def test_body_too_large(self, api):
+        records = [{"Date": "2026-10-17", "Note": "x" * 1024}] * 100
+        assert call(api, "POST", "/api/summary", records)[0] == 413
+
+    def test_error_mid_stream_truncates_response(self, api):
+        """响应头发出后出错：不把错误 JSON 混进数据流，而是不完整地断开"""
+        import http.client
+        import pandas as pd
+
+        def broken(*args, **kwargs):
+            yield pd.DataFrame([{"Date": "2026-01-01"}])
+            raise ValueError("损坏的年度文件")
+
+        with patch("core.journal_store.iter_chunks", broken):
+            host, port = api.server_address[:2]
+            conn = http.client.HTTPConnection(host, port, timeout=5)
+            conn.request("GET", "/api/summary")
+            resp = conn.getresponse()
+            assert resp.status == 200
+            with pytest.raises(http.client.IncompleteRead) as excinfo:
+                resp.read()
+            conn.close()
+        assert excinfo.value.partial == b'{"Date": "2026-01-01"}\n'
+
+    def test_token_required(self, api):
+        api.token = "secret"
+        assert call(api, "GET", "/api/tables")[0] == 401
+        assert call(api, "GET", "/health")[0] == 200
+        status, _ = call(api, "GET", "/api/tables", headers={"Authorization": "Bearer secret"})
+        assert status == 200
+
+
+class TestProfiles:
+    def test_profile_header_selects_journal(self, tmp_path):
+        from core.api_server import start_api_server
+        profiles = {"甲": str(tmp_path / "a"), "乙": str(tmp_path / "b")}
+        with patch("core.config.PROFILES", profiles):
+            server = start_api_server(token="")
+            try:
+                call(server, "PUT", "/api/summary/2026-10-17", {"Mood": 2},
+                     headers={"X-Journal-Profile": "乙".encode("utf-8").decode("latin-1")})
+                assert call(server, "GET", "/api/summary/2026-10-17")[0] == 404
+                assert (tmp_path / "b" / "data" / "summary" / "daily_summary_2026.csv").exists()
+            finally:
+                server.shutdown()
+                server.server_close()
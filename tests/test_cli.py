@@ -0,0 +1,151 @@
+"""命令行（core.cli）的单元测试"""
+import json
+import os
+import subprocess
+import sys
+import pytest
+from datetime import date
+from unittest.mock import patch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TODAY = date(2026, 10, 19)  # 周一
+
+
+@pytest.fixture
+def journal(tmp_path):
+    with patch("core.config.BASE_DIR", str(tmp_path)):
+        yield tmp_path
+
+
+def run(capsys, *argv):
+    """执行命令，返回 (退出码, 标准输出, 标准错误)"""
+    from core.cli import main
+    try:
+        code = main(list(argv))
+    except SystemExit as e:
+        code = e.code
+    out, err = capsys.readouterr()
+    return code, out, err
+
+
+class TestKeys:
+    def test_period_key(self):
+        from core.cli import period_key
+        assert period_key("day", None, TODAY) == "2026-10-19"
+        assert period_key("day", "yesterday", TODAY) == "2026-10-18"
+        assert period_key("week", None, TODAY) == "2026-W43"
+        assert period_key("week", "last", TODAY) == "2026-W42"
+        assert period_key("month", "last", TODAY) == "2026-09"
+        assert period_key("month", "2025-12", TODAY) == "2025-12"
+
+    def test_summary_table_by_key_format(self):
+        from core.cli import summary_table
+        assert summary_table("2026-10-17") == "summary"
+        assert summary_table("2026-W42") == "weekly_summary"
+        assert summary_table("2026-10") == "monthly_summary"
+        with pytest.raises(ValueError):
+            summary_table("17/10/2026")
+
+
+class TestSet:
+    def test_fields_of_one_day_saved_once(self, journal, capsys):
+        from core import csv_io
+        with patch("core.csv_io.write_csv", side_effect=csv_io.write_csv) as writes:
+            code, out, _ = run(capsys, "set", "2026-10-17", "Focus_Count", "6", "Mood", "4")
+        assert code == 0 and writes.call_count == 1
+        from core.data_manager import load_data_for_date
+        summary, _, _ = load_data_for_date(date(2026, 10, 17))
+        assert summary["Focus_Count"] == 6 and summary["Mood"] == 4
+
+    def test_stdin_batch_one_save_per_file(self, journal):
+        from core.cli import apply_updates, parse_updates
+        lines = ["# 注释", "2026-10-16 Mood 3", "2026-10-15 Mood 5", "2025-12-31 Mood 1",
+                 "2026-W42 Weekly_Note 好的 一周", ""]
+        with patch("core.csv_io.write_csv") as writes:
+            result = apply_updates(parse_updates(["-"], lines))
+        assert result["summary"]["files"] == 2 and result["weekly_summary"]["keys"] == 1
+        assert writes.call_count == 3
+        assert writes.call_args_list[-1].args[0]["Weekly_Note"].tolist() == ["好的 一周"]
+
+    def test_unknown_field_rejected(self, journal, capsys):
+        run(capsys, "set", "2026-10-17", "Mood", "4")
+        code, _, err = run(capsys, "set", "2026-10-17", "Moood", "4")
+        assert code == 2 and "Moood" in err
+        assert run(capsys, "set", "2026-10-17", "Moood", "4", "--new-field")[0] == 0
+
+    @pytest.mark.parametrize("argv", [["2026-10-17", "Mood"], ["2026-10-17", "Date", "2026-10-18"]])
+    def test_bad_arguments(self, journal, capsys, argv):
+        assert run(capsys, "set", *argv)[0] == 2
+
+
+class TestQueries:
+    @pytest.fixture
+    def filled(self, journal):
+        from core.cli import apply_updates
+        apply_updates([(f"2026-10-{d:02d}", "Mood", str(d % 5 + 1)) for d in range(1, 20)]
+                      + [("2026-10-17", "Sleep_Bedtime", "23:30")], allow_new_fields=True)
+        from core.journal_store import upsert
+        upsert("weekly_tasks", [{"Week": "2026-W42", "Plan": "读完一本书", "Status": "完成"}])
+        return journal
+
+    def test_show_week(self, filled, capsys):
+        code, out, _ = run(capsys, "show", "week", "2026-W42")
+        assert code == 0 and "## 周任务" in out and "读完一本书" in out
+
+    def test_stats_skips_text_columns(self, filled):
+        from core.cli import stats
+        rows = stats("summary", "2026-10-13", "2026-10-19")
+        assert [r["field"] for r in rows] == ["Mood"]
+        assert rows[0]["count"] == 7 and rows[0]["min"] == 1 and rows[0]["max"] == 5
+
+    def test_stats_json(self, filled, capsys):
+        code, out, _ = run(capsys, "stats", "--from", "2026-10-01", "--to", "2026-10-05", "--json")
+        assert json.loads(out) == [{"field": "Mood", "count": 5, "mean": 3.0, "min": 1, "max": 5, "sum": 15}]
+
+    @pytest.mark.parametrize("table, column, key", [("weekly_summary", "Week", "2026-W42"),
+                                                    ("monthly_summary", "Month", "2026-10")])
+    def test_stats_default_range_on_weekly_and_monthly(self, journal, capsys, table, column, key):
+        """默认的日期区间换算成周 / 月键"""
+        from core.journal_store import upsert
+        upsert(table, [{column: key, "Avg_Mood": "4"}])
+        with patch("core.cli.date") as fake_date:
+            fake_date.today.return_value = TODAY
+            fake_date.fromisoformat = date.fromisoformat
+            code, out, err = run(capsys, "stats", "--table", table, "--json")
+        assert code == 0, err
+        assert json.loads(out)[0]["field"] == "Avg_Mood"
+
+    def test_export_jsonl(self, filled, capsys):
+        code, out, _ = run(capsys, "export", "summary", "--from", "2026-10-18")
+        assert [json.loads(line)["Date"] for line in out.splitlines()] == ["2026-10-18", "2026-10-19"]
+
+
+class TestBrokenPipe:
+    def test_export_into_closed_pipe_exits_quietly(self, filled_journal):
+        """journal export ... | head：下游关闭管道后安静退出，不抛 BrokenPipeError"""
+        from core.cli import main
+        read_end, write_end = os.pipe()
+        os.close(read_end)  # 下游已退出
+        stream = open(write_end, "w", encoding="utf-8")
+        try:
+            with patch("sys.stdout", stream):
+                assert main(["export", "summary"]) == 1
+            stream.write("x" * 100000)  # 标准输出已指向 devnull，解释器退出时的刷新不会再报错
+            stream.flush()
+        finally:
+            stream.close()
+
+    @pytest.fixture
+    def filled_journal(self, journal):
+        from core.journal_store import upsert
+        upsert("summary", [{"Date": f"2026-10-{d:02d}", "Note": "x" * 100} for d in range(1, 29)])
+        return journal
+
+
+class TestStartup:
+    def test_does_not_import_streamlit(self, tmp_path):
+        code = ("import sys\nfrom core.cli import main\n"
+                "main(['set', '2026-10-17', 'Mood', '4'])\nmain(['show', 'day', '2026-10-17'])\n"
+                "assert 'streamlit' not in sys.modules\n")
+        env = dict(os.environ, JOURNAL_BASE_DIR=str(tmp_path))
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True, capture_output=True)
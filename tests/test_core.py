@@ -428,3 +428,26 @@ class TestNaNHandling:
         with open(paths["time"], "r", encoding="utf-8-sig") as f:
             time_content = f.read()
         assert "nan" not in time_content.lower(), f"time CSV 中出现 nan 文本: {time_content}"
+
+
+# ==========================================
+# 6. 数据目录按需创建
+# ==========================================
+class TestLazyDirectories:
+    """config 导入时不建目录，首次保存时才创建"""
+
+    def test_import_creates_no_dirs(self, tmp_path):
+        import importlib
+        import core.config as cfg
+        base = tmp_path / "journal"
+        with patch.dict(os.environ, {"JOURNAL_BASE_DIR": str(base)}):
+            importlib.reload(cfg)
+            assert not base.exists()
+        importlib.reload(cfg)
+
+    def test_ensure_dirs_creates_parent(self, tmp_path):
+        from core.config import ensure_dirs
+        target = tmp_path / "data" / "summary" / "daily_summary_2026.csv"
+        ensure_dirs([str(target)])
+        assert target.parent.is_dir()
+        assert not target.exists()
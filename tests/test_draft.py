@@ -0,0 +1,148 @@
+"""日记草稿暂存的单元测试"""
+import json
+import time
+import pytest
+from datetime import date
+from unittest.mock import patch
+
+
+@pytest.fixture
+def drafts_dir(tmp_path):
+    """把草稿目录重定向到临时目录"""
+    with patch("core.config.PATH_DRAFTS", str(tmp_path / "drafts")):
+        yield tmp_path / "drafts"
+
+
+# ==========================================
+# 1. 草稿文件读写
+# ==========================================
+class TestDraftFile:
+    """append_draft / load_draft / clear_draft"""
+
+    def test_no_draft_returns_empty(self, drafts_dir):
+        from core.draft_store import load_draft
+        values, ts = load_draft(date(2026, 3, 15))
+        assert values == {}
+        assert ts is None
+
+    def test_replay_keeps_latest_value(self, drafts_dir):
+        """多行记录按顺序回放，后写的覆盖先写的"""
+        from core.draft_store import append_draft, load_draft
+        d = date(2026, 3, 15)
+        append_draft(d, {"Mood": 3, "Reflect_Deep_Reflections": "第一版"})
+        append_draft(d, {"Reflect_Deep_Reflections": "第二版"})
+        values, ts = load_draft(d)
+        assert values == {"Mood": 3, "Reflect_Deep_Reflections": "第二版"}
+        assert ts is not None
+
+    def test_append_only(self, drafts_dir):
+        """每次追加一行，不重写已有内容"""
+        from core.draft_store import append_draft, get_draft_path
+        d = date(2026, 3, 15)
+        append_draft(d, {"Mood": 3})
+        append_draft(d, {"Mood": 4})
+        with open(get_draft_path(d), encoding="utf-8") as f:
+            lines = f.readlines()
+        assert len(lines) == 2
+        assert json.loads(lines[0])["values"] == {"Mood": 3}
+
+    def test_truncated_line_skipped(self, drafts_dir):
+        """崩溃时写了一半的行应被跳过，不影响前面的内容"""
+        from core.draft_store import append_draft, load_draft, get_draft_path
+        d = date(2026, 3, 15)
+        append_draft(d, {"Reflect_Thoughts": "完整的一行"})
+        with open(get_draft_path(d), "a", encoding="utf-8") as f:
+            f.write('{"ts": 1, "values": {"Reflect_Th')
+        values, _ = load_draft(d)
+        assert values == {"Reflect_Thoughts": "完整的一行"}
+
+    def test_clear_draft(self, drafts_dir):
+        from core.draft_store import append_draft, clear_draft, load_draft
+        d = date(2026, 3, 15)
+        append_draft(d, {"Mood": 3})
+        clear_draft(d)
+        assert load_draft(d) == ({}, None)
+
+    def test_drafts_are_per_day(self, drafts_dir):
+        from core.draft_store import append_draft, load_draft
+        append_draft(date(2026, 3, 15), {"Mood": 2})
+        values, _ = load_draft(date(2026, 3, 16))
+        assert values == {}
+
+
+# ==========================================
+# 2. 防抖记录器
+# ==========================================
+class TestDraftRecorder:
+    """DraftRecorder 只记录变化字段，并合并连续修改"""
+
+    def test_first_record_is_baseline(self, drafts_dir):
+        """第一次 record 只建立基线，不写文件"""
+        from core.draft_store import DraftRecorder, get_draft_path
+        import os
+        d = date(2026, 3, 15)
+        rec = DraftRecorder(d, debounce=0)
+        assert rec.record({"Mood": 4, "Reflect_Thoughts": ""}) == 0
+        assert not os.path.exists(get_draft_path(d))
+
+    def test_only_changed_fields_written(self, drafts_dir):
+        from core.draft_store import DraftRecorder, get_draft_path
+        d = date(2026, 3, 15)
+        rec = DraftRecorder(d, debounce=0)
+        rec.record({"Mood": 4, "Reflect_Thoughts": ""})
+        assert rec.record({"Mood": 4, "Reflect_Thoughts": "新的想法"}) == 1
+        with open(get_draft_path(d), encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        assert lines[-1]["values"] == {"Reflect_Thoughts": "新的想法"}
+
+    def test_unchanged_values_not_written(self, drafts_dir):
+        from core.draft_store import DraftRecorder, get_draft_path
+        import os
+        d = date(2026, 3, 15)
+        rec = DraftRecorder(d, debounce=0)
+        rec.record({"Mood": 4})
+        assert rec.record({"Mood": 4}) == 0
+        assert not os.path.exists(get_draft_path(d))
+
+    def test_debounce_coalesces_edits(self, drafts_dir):
+        """静默期内的多次修改合并为一行"""
+        from core.draft_store import DraftRecorder, get_draft_path
+        d = date(2026, 3, 15)
+        rec = DraftRecorder(d, debounce=60)
+        rec.record({"Mood": 4, "Reflect_Thoughts": ""})
+        rec.record({"Mood": 3, "Reflect_Thoughts": ""})
+        rec.record({"Mood": 3, "Reflect_Thoughts": "想法"})
+        rec.flush()
+        with open(get_draft_path(d), encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        assert len(lines) == 1
+        assert lines[0]["values"] == {"Mood": 3, "Reflect_Thoughts": "想法"}
+
+    def test_timer_flushes_after_quiet_period(self, drafts_dir):
+        from core.draft_store import DraftRecorder, load_draft
+        d = date(2026, 3, 15)
+        rec = DraftRecorder(d, debounce=0.05)
+        rec.record({"Mood": 4})
+        rec.record({"Mood": 5})
+        time.sleep(0.3)
+        values, _ = load_draft(d)
+        assert values == {"Mood": 5}
+
+    def test_discard_removes_draft(self, drafts_dir):
+        from core.draft_store import DraftRecorder, load_draft
+        d = date(2026, 3, 15)
+        rec = DraftRecorder(d, debounce=60)
+        rec.record({"Mood": 4})
+        rec.record({"Mood": 5})
+        rec.discard()
+        assert load_draft(d) == ({}, None)
+
+    def test_table_records_serializable(self, drafts_dir):
+        """任务/时间表以行列表形式记录"""
+        from core.draft_store import DraftRecorder, load_draft
+        d = date(2026, 3, 15)
+        rec = DraftRecorder(d, debounce=0)
+        rec.record({"__tasks__": []})
+        rec.record({"__tasks__": [{"计划事项": "写代码", "状态": None}]})
+        values, _ = load_draft(d)
+        assert values["__tasks__"] == [{"计划事项": "写代码", "状态": None}]
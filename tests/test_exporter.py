@@ -0,0 +1,108 @@
+"""流式区间导出（core.exporter）的单元测试"""
+import csv
+import io
+import json
+import pytest
+from datetime import date
+from unittest.mock import patch
+
+
+@pytest.fixture(scope="module")
+def journal_10y(tmp_path_factory):
+    """10 年的合成日记（2017-01-01 ~ 2026-09-30）"""
+    from core.synthetic_data import generate
+    base_dir = str(tmp_path_factory.mktemp("journal_10y"))
+    generate(base_dir=base_dir, years=10, end_year=2026, until=date(2026, 9, 30), seed=0, text_scale=0)
+    return base_dir
+
+
+@pytest.fixture
+def journal(journal_10y):
+    with patch("core.config.BASE_DIR", journal_10y):
+        yield journal_10y
+
+
+class TestBounds:
+    def test_dates_map_to_week_and_month_keys(self):
+        from core.exporter import key_bound
+        assert key_bound("weekly_habits", "2026-01-01") == "2026-W01"
+        assert key_bound("weekly_tasks", "2027-01-01") == "2026-W53"
+        assert key_bound("monthly_summary", "2026-03-15") == "2026-03"
+        assert key_bound("weekly_summary", "2026-W10") == "2026-W10"
+        assert key_bound("time", None) is None
+        with pytest.raises(ValueError):
+            key_bound("monthly_tasks", "2026-W10")
+
+
+class TestExport:
+    def test_jsonl_range_across_years(self, journal):
+        from core.exporter import export
+        out = io.StringIO()
+        count = export("summary", out, "2024-12-30", "2025-01-02")
+        dates = [json.loads(line)["Date"] for line in out.getvalue().splitlines()]
+        assert count == len(dates) and dates == sorted(dates)
+        assert dates[0] >= "2024-12-30" and dates[-1] <= "2025-01-02" and len(dates) >= 2
+
+    def test_csv_header_is_union_of_years(self, journal, tmp_path):
+        """某一年多出一列时，CSV 表头仍一致，其他年份该列留空"""
+        from core.exporter import export
+        from core.journal_store import upsert
+        with patch("core.config.BASE_DIR", str(tmp_path)):
+            upsert("monthly_summary", [{"Month": "2025-12", "A": 1}])
+            upsert("monthly_summary", [{"Month": "2026-01", "A": 2, "B": "新列"}])
+            path = tmp_path / "out.csv"
+            assert export("monthly_summary", str(path), fmt="csv") == 2
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert rows == [{"Month": "2025-12", "A": "1", "B": ""}, {"Month": "2026-01", "A": "2", "B": "新列"}]
+
+    def test_weekly_table_with_date_range(self, journal):
+        from core.exporter import export
+        out = io.StringIO()
+        export("weekly_summary", out, "2026-03-01", "2026-03-31", fmt="csv")
+        weeks = [row["Week"] for row in csv.DictReader(io.StringIO(out.getvalue()))]
+        assert weeks == ["2026-W09", "2026-W10", "2026-W11", "2026-W12", "2026-W13", "2026-W14"]
+
+    def test_empty_range_writes_header(self, journal):
+        from core.exporter import export
+        out = io.StringIO()
+        assert export("tasks", out, "2026-12-01", fmt="csv") == 0
+        assert out.getvalue().startswith("Date,")
+
+    def test_parquet_without_pyarrow(self, journal, tmp_path):
+        from core.exporter import export, parquet_available
+        if parquet_available():
+            pytest.skip("已安装 pyarrow")
+        with pytest.raises(RuntimeError, match="pyarrow"):
+            export("time", str(tmp_path / "t.parquet"), fmt="parquet")
+        assert not (tmp_path / "t.parquet").exists()
+
+    def test_parquet_round_trip(self, journal, tmp_path):
+        pytest.importorskip("pyarrow")
+        import pandas as pd
+        from core.exporter import export
+        path = str(tmp_path / "t.parquet")
+        count = export("time", path, "2026-01-01", "2026-01-31", fmt="parquet", chunksize=100)
+        df = pd.read_parquet(path)
+        assert len(df) == count > 0 and df["Date"].between("2026-01-01", "2026-01-31").all()
+
+
+class TestConstantMemory:
+    def test_peak_independent_of_range(self, journal):
+        """导出 10 年与导出 1 年的峰值内存相近（只与块大小有关）"""
+        from core.exporter import export
+        from core.memprof import measure
+
+        class Sink:
+            def write(self, text):
+                return len(text)
+
+        peaks = {}
+        with patch("core.config.MEMPROF_FRAMES", 1):  # 只看峰值，不需要调用栈
+            for label, start in (("1y", "2026-01-01"), ("10y", None)):
+                export("summary", Sink(), start, chunksize=100)  # 预热
+                with measure(label, snapshots=False) as m:
+                    count = export("summary", Sink(), start, chunksize=100)
+                peaks[label] = (m.peak, count)
+        assert peaks["10y"][1] > 10 * peaks["1y"][1]
+        assert peaks["10y"][0] < peaks["1y"][0] * 1.5 + 1024 * 1024
@@ -0,0 +1,99 @@
+"""冻结往年数据（core.freeze）与透明读取的单元测试"""
+import os
+import pytest
+from datetime import date
+from unittest.mock import patch
+
+TODAY = date(2026, 10, 19)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """2024-01 ~ 2026-09 的合成日记"""
+    from core.synthetic_data import generate
+    generate(base_dir=str(tmp_path), years=3, end_year=2026, until=date(2026, 9, 30), seed=0, text_scale=0.2)
+    with patch("core.config.BASE_DIR", str(tmp_path)):
+        yield tmp_path
+
+
+class TestFreeze:
+    def test_closed_years(self, journal):
+        from core.freeze import closed_years
+        assert closed_years("summary", TODAY) == [2024, 2025]
+        # 2027-01-01 仍属于 2026 ISO 年的第 53 周：日表的 2026 年已结束，周表还没有
+        assert closed_years("summary", date(2027, 1, 1)) == [2024, 2025, 2026]
+        assert closed_years("weekly_summary", date(2027, 1, 1)) == [2024, 2025]
+
+    def test_freeze_is_transparent_to_readers(self, journal):
+        from core.data_manager import load_data_for_date
+        from core.freeze import freeze_closed
+        from core.journal_store import iter_rows
+        from core.report_mapreduce import available_years
+        from core.weekly_data_manager import get_week_info, load_weekly_data
+        day = date(2025, 6, 1)
+        week_key, iso_year, *_ = get_week_info(day)
+        before = (load_data_for_date(day), load_weekly_data(week_key, iso_year),
+                  list(iter_rows("time", "2025-05-30", "2025-06-02")))
+        results = freeze_closed(today=TODAY)
+        assert {(r["table"], r["year"]) for r in results} >= {("summary", 2025), ("time", 2024)}
+        assert all(r["bytes_after"] < r["bytes_before"] for r in results)
+        assert not os.path.exists(journal / "data" / "summary" / "daily_summary_2025.csv")
+
+        summary, tasks, time_df = load_data_for_date(day)
+        assert summary == before[0][0] and tasks.equals(before[0][1]) and time_df.equals(before[0][2])
+        weekly = load_weekly_data(week_key, iso_year)
+        assert weekly[0] == before[1][0] and weekly[1].equals(before[1][1])
+        assert list(iter_rows("time", "2025-05-30", "2025-06-02")) == before[2]
+        assert available_years() == [2024, 2025, 2026]
+
+    def test_range_read_uses_index(self, journal):
+        """冻结文件只解析区间内的行；区间内没有数据的冻结年份整个不打开"""
+        from core import csv_io
+        from core.freeze import freeze
+        from core.journal_store import iter_rows
+        freeze("time", 2025)
+        with patch("core.csv_io.iter_csv", side_effect=csv_io.iter_csv) as opened:
+            rows = list(iter_rows("time", "2025-03-01", "2025-03-01"))
+        assert rows and {r["Date"] for r in rows} == {"2025-03-01"}
+        assert opened.call_args.kwargs["nrows"] == len(rows)
+
+    def test_multiline_text_survives_index_window(self, tmp_path):
+        from core.freeze import freeze
+        from core.journal_store import get_rows, iter_rows, upsert
+        with patch("core.config.BASE_DIR", str(tmp_path)):
+            upsert("summary", [{"Date": f"2025-01-{d:02d}", "Note": f"第{d}行\n下一行,逗号\"引号\""} for d in (3, 1, 2)])
+            freeze("summary", 2025)
+            assert get_rows("summary", "2025-01-02") == [{"Date": "2025-01-02", "Note": "第2行\n下一行,逗号\"引号\""}]
+            with patch("core.csv_io.iter_csv") as opened:
+                assert list(iter_rows("summary", "2025-02-01", "2025-02-28")) == []
+            opened.assert_not_called()
+
+
+class TestReadOnly:
+    def test_writes_refused_until_thawed(self, journal):
+        from core.data_manager import load_data_for_date, save_all_data
+        from core.freeze import freeze_closed, thaw_year
+        day = date(2025, 6, 1)
+        freeze_closed(today=TODAY)
+        summary, tasks, time_df = load_data_for_date(day)
+        with pytest.raises(RuntimeError, match="冻结"):
+            save_all_data(day, dict(summary, Mood=1), tasks, time_df)
+        assert {r["table"] for r in thaw_year(2025)} >= {"summary", "tasks", "time"}
+        save_all_data(day, dict(summary, Mood=1), tasks, time_df)
+        assert load_data_for_date(day)[0]["Mood"] == 1
+
+    def test_api_returns_conflict(self, journal):
+        import urllib.error
+        import urllib.request
+        from core.api_server import start_api_server
+        from core.freeze import freeze
+        freeze("summary", 2025)
+        server = start_api_server(token="")
+        try:
+            request = urllib.request.Request(server.url + "/api/summary/2025-06-01", data=b'{"Mood": 1}', method="PUT")
+            with pytest.raises(urllib.error.HTTPError) as e:
+                urllib.request.urlopen(request, timeout=5)
+            assert e.value.code == 409
+        finally:
+            server.shutdown()
+            server.server_close()
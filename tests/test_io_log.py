@@ -0,0 +1,120 @@
+"""文件 I/O 操作日志（core.io_log）的单元测试"""
+import json
+import pandas as pd
+import pytest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+
+@pytest.fixture
+def io_log_dir(tmp_path):
+    """开启 I/O 日志，日志目录与数据目录都指向临时目录"""
+    with patch("core.config.IO_LOG_ENABLED", True), \
+         patch("core.config.PATH_IO_LOG", str(tmp_path / "io_log")), \
+         patch("core.config.BASE_DIR", str(tmp_path)):
+        yield tmp_path
+
+
+def _save_and_load(tmp_path):
+    from core import texts as t
+    from core.data_manager import load_data_for_date, save_all_data
+    paths = {
+        "tasks": str(tmp_path / "tasks.csv"),
+        "time": str(tmp_path / "time.csv"),
+        "summary": str(tmp_path / "summary.csv"),
+        "markdown": str(tmp_path / "diary.md"),
+    }
+    tasks = pd.DataFrame([{t.COL_TASK_NAME: "读书", t.COL_TASK_ACTUAL: "",
+                           t.COL_TASK_STATUS: "✅", t.COL_TASK_REASON: ""}])
+    time_df = pd.DataFrame([{t.COL_TIME_SLOT: "08:00-08:30", t.COL_TIME_PLAN: "工作",
+                             t.COL_TIME_ACTUAL: "", t.COL_TIME_STATUS: "", t.COL_TIME_NOTE: ""}])
+    with patch("core.data_manager.get_file_paths", return_value=paths):
+        save_all_data(date(2026, 3, 15), {"Mood": 4}, tasks, time_df)
+        load_data_for_date(date(2026, 3, 15))
+
+
+class TestEvents:
+    """csv_io 的每次读写都落一条结构化事件"""
+
+    def test_disabled_writes_nothing(self, tmp_path):
+        with patch("core.config.PATH_IO_LOG", str(tmp_path / "io_log")):
+            _save_and_load(tmp_path)
+        assert not (tmp_path / "io_log").exists()
+
+    def test_save_and_load_events(self, io_log_dir):
+        from core.io_log import read_events
+        _save_and_load(io_log_dir)
+        events = read_events()
+        ops = [(e["op"], e["path"], e["caller"]) for e in events]
+        assert ops == [
+            ("write_csv", "summary.csv", "data_manager.save_all_data"),
+            ("write_csv", "tasks.csv", "data_manager.save_all_data"),
+            ("write_csv", "time.csv", "data_manager.save_all_data"),
+            ("write_markdown", "diary.md", "data_manager.generate_markdown"),
+            ("read_csv", "summary.csv", "data_manager.load_data_for_date"),
+            ("read_csv", "tasks.csv", "data_manager.load_data_for_date"),
+            ("read_csv", "time.csv", "data_manager.load_data_for_date"),
+        ]
+        tasks_read = events[5]
+        assert tasks_read["rows"] == 1
+        assert tasks_read["bytes"] == (io_log_dir / "tasks.csv").stat().st_size
+        assert tasks_read["ms"] >= 0
+
+    def test_private_helper_attributed_to_public_caller(self, io_log_dir):
+        """report_data_collector 的 _read_csv_safe 记到调用它的公开函数上"""
+        from core import report_data_collector as rdc
+        from core.io_log import read_events
+        path = io_log_dir / "summary.csv"
+        pd.DataFrame({"Date": ["2026-03-15"], "Mood": [4]}).to_csv(path, index=False, encoding="utf-8-sig")
+        with patch("core.report_data_collector.source_path", return_value=str(path)):
+            rdc.collect_daily_summary(2026)
+        assert read_events()[-1]["caller"] == "report_data_collector.collect_daily_summary"
+
+
+class TestRotation:
+    def test_rotates_and_keeps_backups(self, io_log_dir):
+        from core import io_log
+        with patch("core.config.IO_LOG_MAX_BYTES", 300), patch("core.config.IO_LOG_BACKUPS", 2):
+            for i in range(30):
+                io_log.log_event("read_csv", str(io_log_dir / f"f{i}.csv"), i, 0.001)
+            files = io_log.log_files()
+            assert [f.rsplit("io_log.jsonl", 1)[1] for f in files] == [".2", ".1", ""]
+            events = io_log.read_events()
+        # 旧事件被滚掉，留下的按时间顺序且以最后一条结尾
+        assert 0 < len(events) < 30
+        assert events[-1]["rows"] == 29
+        assert [e["rows"] for e in events] == sorted(e["rows"] for e in events)
+
+
+class TestAnalyzer:
+    """热点汇总与命令行"""
+
+    def _write(self, folder, events):
+        folder.mkdir(parents=True, exist_ok=True)
+        with open(folder / "io_log.jsonl", "w", encoding="utf-8") as f:
+            for e in events:
+                f.write(json.dumps(e, ensure_ascii=False) + "\n")
+            f.write('{"ts": "坏行\n')
+
+    def _event(self, path, ms, ts=None, op="read_csv", caller="weekly_data_manager.load_weekly_data"):
+        return {"ts": (ts or datetime.now()).isoformat(), "op": op, "path": path,
+                "rows": 10, "bytes": 100, "ms": ms, "caller": caller}
+
+    def test_aggregate_sorted_by_total(self):
+        from core.io_log import aggregate
+        events = [self._event("a.csv", 1), self._event("b.csv", 5), self._event("a.csv", 2)]
+        table = aggregate(events, ("path", "op"))
+        assert [r["path"] for r in table] == ["b.csv", "a.csv"]
+        assert table[1] == {"path": "a.csv", "op": "read_csv", "count": 2, "rows": 20, "bytes": 200,
+                            "total_ms": 3.0, "avg_ms": 1.5, "max_ms": 2}
+
+    def test_main_days_filter(self, io_log_dir, capsys):
+        from core import io_log
+        old = datetime.now() - timedelta(days=10)
+        self._write(io_log_dir / "io_log", [self._event("old.csv", 9, ts=old), self._event("new.csv", 1)])
+        tables = io_log.main(["--days", "7"])
+        assert [r["path"] for r in tables["按文件"]] == ["new.csv"]
+        out = capsys.readouterr().out
+        assert "共 1 条事件" in out and "## 按调用方" in out
+        io_log.main(["--json", "--top", "1"])
+        assert json.loads(capsys.readouterr().out)["events"] == 2
@@ -0,0 +1,139 @@
+"""按表读写年度 CSV（core.journal_store）的单元测试"""
+import pytest
+from datetime import date
+from unittest.mock import patch
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """空的临时日记目录（所有 PATH_* 随 BASE_DIR 移动）"""
+    with patch("core.config.BASE_DIR", str(tmp_path)):
+        yield tmp_path
+
+
+def _counting(name):
+    """统计 csv_io 某个函数的调用次数（仍然真的执行）"""
+    from core import csv_io
+    return patch(f"core.csv_io.{name}", side_effect=getattr(csv_io, name))
+
+
+class TestKeys:
+    @pytest.mark.parametrize("table, key", [
+        ("summary", "2026-1-5"), ("tasks", "20260105"), ("weekly_summary", "2026-05"), ("monthly_tasks", "2026-W01"),
+        ("summary", "2026-02-30"), ("weekly_summary", "2026-W60"), ("weekly_tasks", "2025-W53"),
+        ("weekly_summary", "2026-W00"), ("monthly_summary", "2026-13"), ("monthly_tasks", "2026-00"),
+    ])
+    def test_invalid_key(self, table, key):
+        from core.journal_store import check_key
+        with pytest.raises(ValueError):
+            check_key(table, key)
+
+    @pytest.mark.parametrize("table, key", [
+        ("summary", "2024-02-29"), ("weekly_summary", "2026-W53"), ("monthly_summary", "2026-12"),
+    ])
+    def test_valid_edge_keys(self, table, key):
+        from core.journal_store import check_key
+        assert check_key(table, f" {key} ") == key
+
+    def test_unknown_table(self):
+        from core.journal_store import key_column
+        with pytest.raises(KeyError):
+            key_column("nope")
+
+
+class TestUpsert:
+    """upsert：概览表按字段合并，多行表整组替换，每个年度文件只读写一次"""
+
+    def test_summary_merges_fields(self, journal):
+        from core.journal_store import get_rows, upsert
+        upsert("summary", [{"Date": "2026-10-17", "Mood": 3, "Focus_Count": 2}])
+        result = upsert("summary", [{"Date": "2026-10-17", "Focus_Count": 6}, {"Date": "2026-10-18", "Mood": 5}])
+        assert result == {"files": 1, "keys": 2, "rows": 2}
+        assert get_rows("summary", "2026-10-17") == [{"Date": "2026-10-17", "Mood": "3", "Focus_Count": "6"}]
+        assert get_rows("summary", "2026-10-18")[0]["Focus_Count"] == ""
+
+    def test_multi_row_table_replaces_group(self, journal):
+        from core.journal_store import get_rows, upsert
+        upsert("weekly_tasks", [{"Week": "2026-W42", "Plan": "a"}, {"Week": "2026-W42", "Plan": "b"},
+                                {"Week": "2026-W43", "Plan": "c"}])
+        upsert("weekly_tasks", [{"Week": "2026-W42", "Plan": "x"}])
+        assert [r["Plan"] for r in get_rows("weekly_tasks", "2026-W42")] == ["x"]
+        assert [r["Plan"] for r in get_rows("weekly_tasks", "2026-W43")] == ["c"]
+
+    def test_one_read_and_write_per_year_file(self, journal):
+        from core.journal_store import upsert
+        upsert("summary", [{"Date": "2025-12-31", "Mood": 1}, {"Date": "2026-01-01", "Mood": 1}])
+        records = [{"Date": f"2026-01-{d:02d}", "Mood": 4} for d in range(1, 29)]
+        records += [{"Date": "2025-12-30", "Mood": 2}]
+        with _counting("read_csv") as reads, patch("core.csv_io.write_csv") as writes:
+            result = upsert("summary", records)
+        assert result["files"] == 2
+        assert reads.call_count == 2 and writes.call_count == 2
+
+    def test_invalid_record_writes_nothing(self, journal):
+        from core.journal_store import available_years, upsert
+        with pytest.raises(ValueError):
+            upsert("summary", [{"Date": "2026-10-17", "Mood": 1}, {"Mood": 2}])
+        assert available_years("summary") == []
+
+    def test_compatible_with_data_manager(self, journal):
+        """API 写入的日记能被页面的加载函数读出，原有列不丢"""
+        from core.data_manager import load_data_for_date, save_all_data
+        from core.journal_store import upsert
+        day = date(2026, 10, 17)
+        _, tasks, time_df = load_data_for_date(day)
+        save_all_data(day, {"Mood": 3, "Focus_Count": 2}, tasks, time_df)
+        upsert("summary", [{"Date": "2026-10-17", "Focus_Count": 6}])
+        summary, _, _ = load_data_for_date(day)
+        assert summary["Focus_Count"] == 6 and summary["Mood"] == 3
+
+    def test_page_save_and_upsert_share_file_lock(self, journal):
+        """页面保存与 upsert 同时改写同一个年度文件：持有同一把锁，谁的行都不丢"""
+        import threading
+        from core.data_manager import load_data_for_date, save_all_data
+        from core.journal_store import get_rows, upsert
+        _, tasks, time_df = load_data_for_date(date(2026, 3, 1))
+        errors = []
+
+        def pages():
+            try:
+                for d in range(1, 16):
+                    save_all_data(date(2026, 3, d), {"Mood": 1}, tasks.copy(), time_df.copy())
+            except Exception as e:
+                errors.append(e)
+
+        def api():
+            try:
+                for d in range(1, 16):
+                    upsert("summary", [{"Date": f"2026-04-{d:02d}", "Mood": 2}])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=pages), threading.Thread(target=api)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert all(get_rows("summary", f"2026-03-{d:02d}") for d in range(1, 16))
+        assert all(get_rows("summary", f"2026-04-{d:02d}") for d in range(1, 16))
+
+
+class TestRangeRead:
+    """iter_rows：只打开区间涉及的年度文件，分块读取"""
+
+    def test_range_spans_years(self, journal):
+        from core.journal_store import iter_rows, upsert
+        for year in (2024, 2025, 2026):
+            upsert("summary", [{"Date": f"{year}-0{m}-01", "Mood": m} for m in range(1, 7)])
+        keys = [r["Date"] for r in iter_rows("summary", "2024-05-01", "2025-02-01", chunksize=2)]
+        assert keys == ["2024-05-01", "2024-06-01", "2025-01-01", "2025-02-01"]
+        assert len(list(iter_rows("summary"))) == 18
+
+    def test_only_years_in_range_are_opened(self, journal):
+        from core.journal_store import iter_rows, upsert
+        for year in (2024, 2025, 2026):
+            upsert("monthly_summary", [{"Month": f"{year}-01"}])
+        with _counting("iter_csv") as opened:
+            assert [r["Month"] for r in iter_rows("monthly_summary", "2025-01", "2025-12")] == ["2025-01"]
+        assert opened.call_count == 1
@@ -0,0 +1,141 @@
+"""LLM 后端与本地替身服务的单元测试"""
+import pytest
+from unittest.mock import patch
+
+
+@pytest.fixture
+def stub():
+    """快速的本地替身服务（无延迟）"""
+    from core.llm_stub_server import start_stub_server
+    server = start_stub_server(latency=0, chunk_delay=0, chunks=5)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestRetries:
+    """call_with_retries / backoff_delay：指数退避 + 抖动"""
+
+    def test_backoff_is_bounded(self):
+        from core.llm_backends import backoff_delay
+        assert backoff_delay(0, base=1, cap=30, rng=lambda: 1.0) == 1
+        assert backoff_delay(3, base=1, cap=30, rng=lambda: 1.0) == 8
+        assert backoff_delay(10, base=1, cap=30, rng=lambda: 1.0) == 30
+        assert backoff_delay(3, base=1, cap=30, rng=lambda: 0.0) == 0
+
+    def test_retries_until_success(self):
+        from core.llm_backends import call_with_retries
+        calls, sleeps = [], []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ConnectionError("boom")
+            return "ok"
+
+        assert call_with_retries(flaky, retries=2, sleep=sleeps.append) == "ok"
+        assert len(calls) == 3
+        assert len(sleeps) == 2
+
+    def test_gives_up_after_retries(self):
+        from core.llm_backends import call_with_retries
+        calls = []
+
+        def always_fail():
+            calls.append(1)
+            raise TimeoutError("slow")
+
+        with pytest.raises(TimeoutError):
+            call_with_retries(always_fail, retries=2, sleep=lambda s: None)
+        assert len(calls) == 3
+
+    def test_config_errors_not_retried(self):
+        from core.llm_backends import call_with_retries, NonRetryableError
+        for exc in (ValueError("no key"), NonRetryableError("HTTP 400")):
+            calls = []
+
+            def bad():
+                calls.append(1)
+                raise exc
+
+            with pytest.raises(type(exc)):
+                call_with_retries(bad, retries=3, sleep=lambda s: None)
+            assert len(calls) == 1
+
+
+class TestHTTPBackend:
+    """HTTPBackend 对接本地替身服务"""
+
+    def test_generate(self, stub):
+        from core.llm_backends import HTTPBackend
+        text = HTTPBackend(url=stub.url, retries=0).generate("系统", "用户提示词")
+        assert text.startswith("# 行为建议报告")
+        assert "5 个字符" in text
+
+    def test_stream_matches_generate(self, stub):
+        from core.llm_backends import HTTPBackend
+        backend = HTTPBackend(url=stub.url, retries=0)
+        chunks = list(backend.stream("系统", "提示词"))
+        assert len(chunks) > 1
+        assert "".join(chunks) == backend.generate("系统", "提示词")
+
+    def test_overload_is_retried(self, stub):
+        """503 会重试；重试耗尽后抛出"""
+        from core.llm_backends import HTTPBackend
+        stub.fail_rate = 1.0
+        backend = HTTPBackend(url=stub.url, retries=2, sleep=lambda s: None)
+        with pytest.raises(RuntimeError, match="503"):
+            backend.generate("系统", "提示词")
+        assert backend.attempts == 3
+        assert stub.request_count == 3
+
+    def test_client_error_not_retried(self, stub):
+        from core.llm_backends import HTTPBackend, NonRetryableError
+        backend = HTTPBackend(url=stub.url + "/wrong", retries=2, sleep=lambda s: None)
+        with pytest.raises(NonRetryableError, match="404"):
+            backend.generate("系统", "提示词")
+        assert backend.attempts == 1
+
+    def test_timeout(self, stub):
+        from core.llm_backends import HTTPBackend
+        stub.latency = 0.5
+        backend = HTTPBackend(url=stub.url, timeout=0.1, retries=0)
+        with pytest.raises(Exception):
+            backend.generate("系统", "提示词")
+
+    def test_unknown_backend(self):
+        from core.llm_backends import get_backend
+        with pytest.raises(ValueError, match="未知的 LLM 后端"):
+            get_backend("nope")
+
+
+class TestPipelineWithStub:
+    """generate_report / generate_report_stream 走替身后端，不需要网络与 API Key"""
+
+    @pytest.fixture(autouse=True)
+    def _isolated_cache(self, tmp_path):
+        with patch("core.config.PATH_REPORT_CACHE", str(tmp_path / "report_cache")):
+            yield
+
+    @patch("core.report_service.build_user_prompt", return_value="提示词")
+    def test_generate_and_stream(self, mock_prompt, stub):
+        from core.llm_backends import HTTPBackend
+        from core.report_service import generate_report, generate_report_stream
+        backend = HTTPBackend(url=stub.url, retries=0)
+        stats = {}
+        streamed = "".join(generate_report_stream(stats=stats, backend=backend))
+        assert stats["backend"] == "http"
+        assert stats["cache"] == "miss"
+        # 第二次命中缓存，不再请求替身
+        assert generate_report(stats=stats, backend=backend) == streamed
+        assert stats["cache"] == "hit"
+        assert stub.request_count == 1
+
+    @patch("core.report_service.build_user_prompt", return_value="提示词")
+    def test_failure_becomes_runtime_error(self, mock_prompt, stub):
+        from core.llm_backends import HTTPBackend
+        from core.report_service import generate_report
+        stub.fail_rate = 1.0
+        backend = HTTPBackend(url=stub.url, retries=1, sleep=lambda s: None)
+        with pytest.raises(RuntimeError, match="LLM 后端（http） 调用失败: HTTP 503"):
+            generate_report(backend=backend)
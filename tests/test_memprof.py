@@ -0,0 +1,158 @@
+"""内存诊断模式（core.memprof）的单元测试"""
+import os
+import pytest
+from contextlib import ExitStack
+from datetime import date
+from unittest.mock import patch
+
+# 20 年合成数据上读取一天（只涉及当年的三个 CSV）的峰值内存上限
+SINGLE_DAY_PEAK_BOUND = 8 * 1024 * 1024
+
+
+def _patch_data_dirs(stack, base_dir):
+    stack.enter_context(patch("core.config.BASE_DIR", base_dir))
+    for attr, sub in (("PATH_SUMMARY", "summary"), ("PATH_TASKS", "tasks"), ("PATH_TIME", "time")):
+        stack.enter_context(patch(f"core.config.{attr}", os.path.join(base_dir, "data", sub)))
+
+
+@pytest.fixture(scope="module")
+def journal_20y(tmp_path_factory):
+    """20 年的合成日记（2007-01-01 ~ 2026-09-30）"""
+    from core.synthetic_data import generate
+    base_dir = str(tmp_path_factory.mktemp("journal_20y"))
+    generate(base_dir=base_dir, years=20, end_year=2026, until=date(2026, 9, 30), seed=0)
+    return base_dir
+
+
+@pytest.fixture
+def memprof_dir(tmp_path):
+    with patch("core.config.MEMPROF_ENABLED", True), \
+         patch("core.config.PATH_MEMPROF", str(tmp_path / "memprof")):
+        yield tmp_path / "memprof"
+
+
+class TestMeasure:
+    """measure：峰值 / 净增与按 core 模块归因"""
+
+    def test_peak_covers_temporary_allocation(self):
+        from core.memprof import measure
+        with measure("tmp", snapshots=False) as m:
+            block = bytearray(4 * 1024 * 1024)
+            del block
+        assert m.peak >= 4 * 1024 * 1024
+        assert m.net < 1024 * 1024
+
+    def test_retained_memory_attributed_to_core(self, journal_20y):
+        from core.data_manager import load_data_for_date
+        from core.memprof import measure
+        with ExitStack() as stack:
+            _patch_data_dirs(stack, journal_20y)
+            with measure("load_data_for_date") as m:
+                frames = load_data_for_date(date(2026, 6, 1))
+        assert frames[1] is not None
+        modules = [module for module, size, _ in m.by_module if size > 0]
+        assert modules and modules[0].startswith("core.")
+        assert len(m.top) <= 15
+
+    def test_single_day_peak_bounded_on_20_years(self, journal_20y):
+        from core.data_manager import load_data_for_date
+        from core.memprof import measure
+        with ExitStack() as stack:
+            _patch_data_dirs(stack, journal_20y)
+            load_data_for_date(date(2026, 6, 1))  # 预热（首次导入、缓存）
+            with measure("load_day", snapshots=False) as m:
+                load_data_for_date(date(2026, 6, 1))
+        assert 0 < m.peak < SINGLE_DAY_PEAK_BOUND
+
+
+class TestConcurrency:
+    """tracemalloc 是进程级的：同一时间只允许一个线程测量"""
+
+    def _hold_measurement(self, func):
+        """后台线程测量期间在主线程执行 func，返回 (func 的结果, 后台的测量结果)"""
+        import threading
+        from core.memprof import measure
+        entered, release, result = threading.Event(), threading.Event(), {}
+
+        def worker():
+            with measure("outer", snapshots=False) as m:
+                entered.set()
+                block = bytearray(2 * 1024 * 1024)
+                release.wait(5)
+                del block
+            result["m"] = m
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        entered.wait(5)
+        try:
+            value = func()
+        finally:
+            release.set()
+            thread.join()
+        return value, result["m"]
+
+    def test_second_measure_raises(self):
+        import tracemalloc
+        from core.memprof import measure
+
+        def second():
+            with pytest.raises(RuntimeError, match="另一个线程"):
+                with measure("inner", snapshots=False):
+                    pass
+            return tracemalloc.is_tracing()
+
+        still_tracing, m = self._hold_measurement(second)
+        assert still_tracing  # 第二个测量没有停掉第一个的 tracemalloc
+        assert m.peak >= 2 * 1024 * 1024
+        assert not tracemalloc.is_tracing()
+
+    def test_track_skips_while_busy(self, memprof_dir):
+        from core.memprof import track
+
+        def tracked_call():
+            with track("busy") as m:
+                pass
+            return m
+
+        skipped, _ = self._hold_measurement(tracked_call)
+        assert skipped is None
+        assert not memprof_dir.exists()
+
+
+class TestDiagnosticsMode:
+    """track / tracked：只在 JOURNAL_MEMPROF=1 时测量并写报告"""
+
+    def test_disabled_is_noop(self, tmp_path):
+        from core.memprof import track
+        with patch("core.config.PATH_MEMPROF", str(tmp_path / "memprof")):
+            with track("noop") as m:
+                pass
+        assert m is None
+        assert not (tmp_path / "memprof").exists()
+
+    def test_tracked_writes_one_report_for_nested_calls(self, memprof_dir):
+        from core.memprof import tracked
+
+        @tracked
+        def inner():
+            return [0] * 10000
+
+        @tracked
+        def outer():
+            return inner()
+
+        assert len(outer()) == 10000
+        reports = list(memprof_dir.iterdir())
+        assert len(reports) == 1
+        assert reports[0].name.endswith("_test_memprof.outer.txt")
+        text = reports[0].read_text(encoding="utf-8")
+        assert "峰值" in text and "## 按 core 模块" in text
+
+    def test_data_manager_load_is_tracked(self, memprof_dir, journal_20y):
+        from core.data_manager import load_data_for_date
+        with ExitStack() as stack:
+            _patch_data_dirs(stack, journal_20y)
+            load_data_for_date(date(2026, 6, 1))
+        names = [p.name for p in memprof_dir.iterdir()]
+        assert len(names) == 1 and names[0].endswith("_data_manager.load_data_for_date.txt")
@@ -0,0 +1,127 @@
+"""页面性能剖析（core.perf）的单元测试"""
+import pandas as pd
+import pytest
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+
+@pytest.fixture
+def profiling():
+    """开启剖析；测试结束时清掉可能残留的当前重跑"""
+    from core import perf
+    with patch("core.config.PERF_ENABLED", True):
+        yield perf
+    perf._current.set(None)
+
+
+def _paths(tmp_path):
+    return {
+        "tasks": str(tmp_path / "tasks.csv"),
+        "time": str(tmp_path / "time.csv"),
+        "summary": str(tmp_path / "summary.csv"),
+        "markdown": str(tmp_path / "diary.md"),
+    }
+
+
+class TestDisabled:
+    """未启用时不记录任何东西，被装饰的函数行为不变"""
+
+    def test_begin_run_noop(self):
+        from core import perf
+        history = perf.History()
+        assert perf.begin_run("日记", history) is None
+        perf.mark("区块")
+        assert perf.end_run(history) is None
+        assert len(history) == 0
+
+    def test_timed_passthrough(self):
+        from core import perf
+
+        @perf.timed
+        def add(a, b=1):
+            return a + b
+
+        assert add(1, b=2) == 3
+        assert add.__name__ == "add"
+
+    def test_render_panel_hidden(self):
+        from core import perf
+        container = MagicMock()
+        perf.render_panel(container, perf.History())
+        container.expander.assert_not_called()
+
+
+class TestRun:
+    """区块分界、函数嵌套、读写字节数"""
+
+    def test_sections_and_nested_functions(self, profiling, tmp_path):
+        from core import texts as t
+        from core.data_manager import load_data_for_date, save_all_data
+        perf = profiling
+        history = perf.History()
+        tasks = pd.DataFrame([{t.COL_TASK_NAME: "读书", t.COL_TASK_ACTUAL: "",
+                               t.COL_TASK_STATUS: "✅", t.COL_TASK_REASON: ""}])
+        time_df = pd.DataFrame([{t.COL_TIME_SLOT: "08:00-08:30", t.COL_TIME_PLAN: "工作",
+                                 t.COL_TIME_ACTUAL: "", t.COL_TIME_STATUS: "", t.COL_TIME_NOTE: ""}])
+
+        with patch("core.data_manager.get_file_paths", return_value=_paths(tmp_path)):
+            perf.begin_run("日记", history)
+            perf.mark("保存")
+            save_all_data(date(2026, 3, 15), {"Mood": 4}, tasks, time_df)
+            perf.mark("数据加载")
+            load_data_for_date(date(2026, 3, 15))
+            run = perf.end_run(history)
+
+        names = [(e["name"], e["kind"], e["depth"]) for e in run.events]
+        assert names == [
+            ("保存", perf.KIND_SECTION, 0),
+            ("save_all_data", perf.KIND_FUNCTION, 1),
+            ("generate_markdown", perf.KIND_FUNCTION, 2),
+            ("数据加载", perf.KIND_SECTION, 0),
+            ("load_data_for_date", perf.KIND_FUNCTION, 1),
+        ]
+        save_section, _, markdown, load_section, _ = run.events
+        csv_bytes = sum((tmp_path / n).stat().st_size for n in ("tasks.csv", "time.csv", "summary.csv"))
+        md_bytes = (tmp_path / "diary.md").stat().st_size
+        # 外层分段包含内层的 I/O
+        assert markdown["written"] == md_bytes
+        assert save_section["written"] == csv_bytes + md_bytes
+        assert load_section["read"] == csv_bytes
+        assert run.read == csv_bytes and run.written == csv_bytes + md_bytes
+        assert all(e["seconds"] is not None for e in run.events)
+        assert perf._current.get() is None
+
+    def test_interrupted_run_closed_on_next_begin(self, profiling):
+        """st.stop / st.rerun 跳过了 end_run：下一次 begin_run 补记上一次"""
+        perf = profiling
+        history = perf.History()
+        perf.begin_run("报告归档", history)
+        perf.mark("报告列表")
+        perf.begin_run("报告归档", history)
+        perf.end_run(history)
+        assert len(history) == 2
+        assert history.runs[0].events[0]["seconds"] is not None
+
+    def test_history_keeps_last_n(self, profiling):
+        perf = profiling
+        history = perf.History(size=3)
+        for i in range(5):
+            perf.begin_run(f"页面{i}", history)
+            perf.end_run(history)
+        assert [r.page for r in history.runs] == ["页面2", "页面3", "页面4"]
+        assert [row["页面"] for row in perf.history_rows(history)] == ["页面4", "页面3", "页面2"]
+
+    def test_render_panel(self, profiling):
+        perf = profiling
+        history = perf.History()
+        perf.begin_run("日记", history)
+        with perf.section("读取"):
+            pass
+        perf.end_run(history)
+        container = MagicMock()
+        perf.render_panel(container, history)
+        container.expander.assert_called_once()
+        panel = container.expander.return_value
+        assert panel.dataframe.call_count == 2
+        breakdown = panel.dataframe.call_args_list[0].args[0]
+        assert list(breakdown["分段"]) == ["读取"]
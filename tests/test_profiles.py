@@ -0,0 +1,223 @@
+"""多日记（profile）的单元测试：按上下文解析数据目录、线程传递、会话切换"""
+import os
+import threading
+import pytest
+from contextlib import contextmanager
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+
+@pytest.fixture
+def two_journals(tmp_path):
+    """两份日记：甲（默认）与 乙"""
+    profiles = {"甲": str(tmp_path / "a"), "乙": str(tmp_path / "b")}
+    with patch("core.config.PROFILES", profiles):
+        yield profiles
+
+
+@contextmanager
+def using(name):
+    from core import config as cfg
+    token = cfg.use_profile(name)
+    try:
+        yield
+    finally:
+        cfg.reset_profile(token)
+
+
+class TestParseProfiles:
+    def test_parse_keeps_order(self):
+        from core.config import parse_profiles
+        assert list(parse_profiles(" 乙=/j/b ; 甲=/j/a;")) == ["乙", "甲"]
+        assert parse_profiles("") == {}
+
+    @pytest.mark.parametrize("spec", ["甲", "=/j/a", "甲=", "甲=/j/a;甲=/j/b"])
+    def test_invalid_spec(self, spec):
+        from core.config import parse_profiles
+        with pytest.raises(ValueError):
+            parse_profiles(spec)
+
+
+class TestResolution:
+    """cfg.BASE_DIR / cfg.PATH_* 随当前上下文的日记变化"""
+
+    def test_paths_follow_profile(self, two_journals):
+        from core import config as cfg
+        assert cfg.current_profile() == "甲"
+        assert cfg.PATH_SUMMARY == os.path.join(two_journals["甲"], "data", "summary")
+        with using("乙"):
+            assert cfg.BASE_DIR == two_journals["乙"]
+            assert cfg.PATH_DRAFTS == os.path.join(two_journals["乙"], "data", "drafts")
+        assert cfg.BASE_DIR == two_journals["甲"]
+
+    def test_unknown_profile(self, two_journals):
+        from core import config as cfg
+        with pytest.raises(ValueError, match="未知的日记"):
+            cfg.use_profile("丙")
+
+    def test_patch_still_wins(self, two_journals, tmp_path):
+        from core import config as cfg
+        with patch("core.config.PATH_TASKS", str(tmp_path / "patched")):
+            with using("乙"):
+                assert cfg.PATH_TASKS == str(tmp_path / "patched")
+        assert cfg.PATH_TASKS == os.path.join(two_journals["甲"], "data", "tasks")
+
+    def test_no_cross_contamination(self, two_journals):
+        """甲保存的日记在乙中看不到"""
+        from core.data_manager import load_data_for_date, save_all_data
+        from core import texts as t
+        day = date(2026, 3, 15)
+        _, tasks, time_df = load_data_for_date(day)
+        tasks.loc[0, t.COL_TASK_NAME] = "甲的任务"
+        save_all_data(day, {"Mood": 5}, tasks, time_df)
+        with using("乙"):
+            summary, tasks_b, _ = load_data_for_date(day)
+        assert summary.get("Mood") != 5
+        assert "甲的任务" not in tasks_b[t.COL_TASK_NAME].tolist()
+        assert load_data_for_date(day)[0]["Mood"] == 5
+        assert not os.path.exists(os.path.join(two_journals["乙"], "data"))
+
+
+class TestThreads:
+    """后台线程与线程池不继承 contextvars，需经 cfg.bind 传递日记"""
+
+    def _in_thread(self, func):
+        result = {}
+        worker = threading.Thread(target=lambda: result.update(value=func()))
+        worker.start()
+        worker.join()
+        return result["value"]
+
+    def test_bind_carries_profile(self, two_journals):
+        from core import config as cfg
+        with using("乙"):
+            bound = cfg.bind(lambda: cfg.BASE_DIR)
+            unbound = lambda: cfg.BASE_DIR  # noqa: E731
+        assert self._in_thread(bound) == two_journals["乙"]
+        assert self._in_thread(unbound) == two_journals["甲"]
+
+    def test_load_sources_pool_uses_profile(self, two_journals):
+        from core import config as cfg
+        from core.report_data_collector import load_sources
+        seen = []
+        with patch("core.report_data_collector._read_csv_safe", side_effect=lambda path, dtype=None: seen.append(path)):
+            with using("乙"):
+                load_sources(2026)
+        assert seen and all(p.startswith(two_journals["乙"]) for p in seen)
+
+    def test_draft_timer_writes_to_own_profile(self, two_journals):
+        from core.draft_store import DraftRecorder, load_draft
+        day = date(2026, 3, 15)
+        with using("乙"):
+            recorder = DraftRecorder(day, debounce=0.01)
+            recorder.record({"Mood": 3})
+            recorder.record({"Mood": 4})
+        recorder._timer.join()
+        assert load_draft(day) == ({}, None)
+        with using("乙"):
+            assert load_draft(day)[0] == {"Mood": 4}
+
+    def test_profile_lock(self, two_journals):
+        from core import config as cfg
+        lock_a = cfg.profile_lock("x")
+        with using("乙"):
+            lock_b = cfg.profile_lock("x")
+        assert lock_a is not lock_b
+        assert cfg.profile_lock("x") is lock_a
+
+
+class TestSessionSwitch:
+    """profiles：会话激活、切换时清空旧日记的会话状态"""
+
+    def test_activate_defaults_to_first(self, two_journals):
+        from core import config as cfg
+        from core.profiles import SESSION_KEY, activate
+        state = {}
+        try:
+            assert activate(state) == "甲"
+            assert state[SESSION_KEY] == "甲"
+            state[SESSION_KEY] = "乙"
+            activate(state)
+            assert cfg.current_profile() == "乙"
+        finally:
+            cfg._active_profile.set(None)
+
+    def test_switch_flushes_drafts_and_clears_state(self, two_journals):
+        from core.draft_store import DraftRecorder, load_draft
+        from core.profiles import SESSION_KEY, switch_profile
+        day = date(2026, 3, 15)
+        recorder = DraftRecorder(day, debounce=60)
+        recorder.record({"Mood": 3})
+        recorder.record({"Mood": 5})
+        state = {SESSION_KEY: "甲", "selected_date": day, "draft_recorder": recorder, "perf_history": "h"}
+        switch_profile(state, "乙")
+        assert state == {SESSION_KEY: "乙", "perf_history": "h"}
+        assert load_draft(day)[0] == {"Mood": 5}  # 草稿写回了甲
+
+    def test_callbacks_run_in_session_profile(self, two_journals):
+        """
+        回调在 render_selector 之前执行、上下文里没有日记：
+        session_callback 让它在会话所选的日记下运行，DraftRecorder.discard 清的是自己日记的草稿
+        """
+        import contextvars
+        from core import config as cfg
+        from core.draft_store import DraftRecorder, append_draft, load_draft
+        from core.profiles import SESSION_KEY, session_callback
+        day = date(2026, 3, 15)
+        with using("乙"):
+            recorder = DraftRecorder(day, debounce=0)
+            recorder.record({"Mood": 3})
+        append_draft(day, {"Mood": 1})  # 甲的草稿不应被乙的回调删掉
+        state = {SESSION_KEY: "乙", "draft_recorder": recorder}
+        seen = []
+
+        @session_callback(state)
+        def discard_callback():
+            seen.append(cfg.BASE_DIR)
+            state.pop("draft_recorder").discard()
+
+        contextvars.Context().run(discard_callback)  # 全新上下文：与 Streamlit 回调一样没有设置日记
+        assert seen == [two_journals["乙"]]
+        assert load_draft(day)[0] == {"Mood": 1}
+        with using("乙"):
+            assert load_draft(day) == ({}, None)
+        assert cfg.current_profile() == "甲"  # 回调结束后恢复原来的日记
+
+    def test_discard_outside_profile_context(self, two_journals):
+        """在别的日记上下文里调用 discard，删除的仍是创建记录器时那份日记的草稿"""
+        from core.draft_store import DraftRecorder, append_draft, load_draft
+        day = date(2026, 3, 15)
+        with using("乙"):
+            recorder = DraftRecorder(day, debounce=0)
+            recorder.record({"Mood": 3})
+        append_draft(day, {"Mood": 1})
+        recorder.discard()
+        assert load_draft(day)[0] == {"Mood": 1}
+        with using("乙"):
+            assert load_draft(day) == ({}, None)
+
+    def test_selector_hidden_for_single_journal(self, tmp_path):
+        from core import config as cfg
+        from core.profiles import render_selector
+        container = MagicMock()
+        with patch("core.config.PROFILES", {"default": str(tmp_path)}):
+            try:
+                assert render_selector(container, {}) == "default"
+            finally:
+                cfg._active_profile.set(None)
+        container.selectbox.assert_not_called()
+
+    def test_selector_switches(self, two_journals):
+        from core import config as cfg
+        from core.profiles import SESSION_KEY, WIDGET_KEY, render_selector
+        container = MagicMock()
+        state = {"selected_date": date(2026, 3, 15)}
+        try:
+            render_selector(container, state)
+            kwargs = container.selectbox.call_args.kwargs
+            assert container.selectbox.call_args.args[1] == ["甲", "乙"]
+            state[WIDGET_KEY] = "乙"
+            kwargs["on_change"]()
+            assert state[SESSION_KEY] == "乙" and "selected_date" not in state
+        finally:
+            cfg._active_profile.set(None)
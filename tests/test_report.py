@@ -19,6 +19,13 @@ class TestReportConfig:
         assert GEMINI_MODEL
         assert isinstance(GEMINI_MODEL, str)
 
+    def test_features_template_placeholders(self):
+        """特征模式模板应包含全部数据占位符"""
+        from core.report_config import REPORT_FEATURES_PROMPT_TEMPLATE
+        for key in ["features", "recent_summary", "weekly_data",
+                    "monthly_data", "reflections_summary"]:
+            assert f"{{{key}}}" in REPORT_FEATURES_PROMPT_TEMPLATE
+
     def test_prompt_template_has_all_placeholders(self):
         """提示词模板应包含所有 6 个数据占位符"""
         from core.report_config import REPORT_USER_PROMPT_TEMPLATE
@@ -128,6 +135,241 @@ class TestDataCollector:
             assert key in result, f"缺少 key: {key}"
 
 
+class TestSharedLoader:
+    """load_sources：每个文件只读一次、文本列读为 str、记录分段耗时"""
+
+    def _write(self, tmp_path):
+        year = datetime.now().year
+        (tmp_path / "summary").mkdir()
+        pd.DataFrame({
+            "Date": ["2026-02-27", "2026-02-28"],
+            "Mood": [4, 5],
+            "Reflect_Reading": ["   ", "123"],
+            "Reflect_Thoughts": ["nan", None],
+        }).to_csv(tmp_path / "summary" / f"daily_summary_{year}.csv", index=False, encoding="utf-8-sig")
+
+    def test_each_file_read_once(self, tmp_path):
+        import core.report_data_collector as rdc
+        self._write(tmp_path)
+        with patch("core.config.PATH_SUMMARY", str(tmp_path / "summary")), \
+             patch("core.report_data_collector._read_csv_safe", wraps=rdc._read_csv_safe) as spy:
+            stats = {}
+            data = rdc.collect_all_data(stats=stats)
+        paths = [c.args[0] for c in spy.call_args_list]
+        assert len(paths) == len(rdc.SOURCES)
+        assert len(set(paths)) == len(paths)
+        assert "2026-02-28" in data["reflections_summary"]
+        assert {"load.summary", "daily_summary", "reflections_summary"} <= set(stats["timings"])
+
+    def test_text_columns_read_as_str(self, tmp_path):
+        from core.report_data_collector import load_sources
+        self._write(tmp_path)
+        with patch("core.config.PATH_SUMMARY", str(tmp_path / "summary")):
+            frames = load_sources(datetime.now().year, keys=["summary", "tasks"])
+        assert frames["tasks"] is None
+        assert frames["summary"]["Reflect_Reading"].tolist()[1] == "123"
+        assert pd.api.types.is_numeric_dtype(frames["summary"]["Mood"])
+
+    def test_reflection_filter_treats_blank_and_nan_as_empty(self):
+        from core.report_data_collector import _format_reflections
+        df = pd.DataFrame({
+            "Date": ["2026-02-26", "2026-02-27", "2026-02-28"],
+            "Reflect_Reading": ["  ", float("nan"), "读书"],
+            "Reflect_Thoughts": ["nan", "", None],
+        })
+        result = _format_reflections(df)
+        assert "2026-02-26" not in result
+        assert "2026-02-27" not in result
+        assert "2026-02-28" in result
+
+
+# ==========================================
+# 2.5 预算模式数据收集测试
+# ==========================================
+
+class TestBudgetedCollector:
+    """collect_budgeted_data：近期原样保留，早期逐级压缩"""
+
+    def _write_year(self, tmp_path, days=200):
+        """写入 days 天的概览与任务数据，返回 patch 用的路径"""
+        year = datetime.now().year
+        dates = pd.date_range(f"{year}-01-01", periods=days).strftime("%Y-%m-%d")
+        summary = pd.DataFrame({
+            "Date": dates,
+            "Mood": [(i % 5) + 1 for i in range(days)],
+            "Sleep_Hours": [7.0] * days,
+            "Focus_Count": [4] * days,
+            "Reflect_Thoughts": [f"第{i}天的一段很长的反思内容" * 3 for i in range(days)],
+        })
+        tasks = pd.DataFrame({
+            "Date": list(dates) * 2,
+            "计划事项": ["写代码"] * days + ["跑步"] * days,
+            "实际完成": [""] * (2 * days),
+            "状态": ["✅"] * days + ["❌"] * days,
+            "原因分析": [""] * (2 * days),
+        })
+        (tmp_path / "summary").mkdir()
+        (tmp_path / "tasks").mkdir()
+        summary.to_csv(tmp_path / "summary" / f"daily_summary_{year}.csv", index=False, encoding="utf-8-sig")
+        tasks.to_csv(tmp_path / "tasks" / f"tasks_log_{year}.csv", index=False, encoding="utf-8-sig")
+        return dates
+
+    def _collect(self, tmp_path, budget, recent_days=14):
+        from core.report_data_collector import collect_budgeted_data
+        with patch("core.config.PATH_SUMMARY", str(tmp_path / "summary")), \
+             patch("core.config.PATH_TASKS", str(tmp_path / "tasks")), \
+             patch("core.config.PATH_TIME", str(tmp_path / "time")):
+            return collect_budgeted_data(budget, recent_days=recent_days)
+
+    def test_large_budget_keeps_full(self, tmp_path):
+        self._write_year(tmp_path, days=10)
+        data, stats = self._collect(tmp_path, 10_000_000)
+        assert stats["level"] == "full"
+
+    def test_compacts_older_periods(self, tmp_path):
+        """预算不足时早期数据被聚合，近期数据仍逐日保留"""
+        dates = self._write_year(tmp_path)
+        data, stats = self._collect(tmp_path, 12_000)
+        assert stats["level"] in ("weekly", "monthly", "monthly_short")
+        assert stats["total"] <= 12_000
+        assert "早期数据" in data["daily_summary"]
+        # 最后一天原样保留，第一天被聚合掉
+        assert dates[-1] in data["daily_summary"]
+        assert dates[0] not in data["daily_summary"]
+
+    def test_task_completion_rate_in_aggregate(self, tmp_path):
+        self._write_year(tmp_path)
+        data, _ = self._collect(tmp_path, 12_000)
+        assert "完成率" in data["tasks_data"]
+        assert "50%" in data["tasks_data"]
+
+    def test_stats_report_section_chars(self, tmp_path):
+        self._write_year(tmp_path)
+        data, stats = self._collect(tmp_path, 12_000)
+        assert set(stats["sections"]) == set(data)
+        for key, text in data.items():
+            assert stats["sections"][key] == len(text)
+        assert stats["total"] == sum(stats["sections"].values())
+
+    def test_tiny_budget_truncates(self, tmp_path):
+        self._write_year(tmp_path)
+        _, stats = self._collect(tmp_path, 500)
+        assert stats["level"] == "truncated"
+        assert stats["total"] <= 500 + 6 * len("\n…（已截断）")
+
+    def test_collect_all_data_fills_stats(self, tmp_path):
+        from core.report_data_collector import collect_all_data
+        self._write_year(tmp_path, days=30)
+        stats = {}
+        with patch("core.config.PATH_SUMMARY", str(tmp_path / "summary")), \
+             patch("core.config.PATH_TASKS", str(tmp_path / "tasks")):
+            data = collect_all_data(char_budget=5_000_000, stats=stats)
+        assert stats["level"] == "full"
+        assert stats["total"] == sum(len(v) for v in data.values())
+
+
+# ==========================================
+# 2.6 统计特征提取测试
+# ==========================================
+
+class TestReportFeatures:
+    """report_features：趋势、环比、相关性、连续天数、完成率、执行度"""
+
+    def _summary(self, days=28):
+        dates = pd.date_range("2026-03-01", periods=days).strftime("%Y-%m-%d")
+        return pd.DataFrame({
+            "Date": dates,
+            # 心情每天 +0.1，睡眠与心情完全正相关
+            "Mood": [1 + i * 0.1 for i in range(days)],
+            "Sleep_Hours": [5 + i * 0.05 for i in range(days)],
+            "Focus_Count": [4] * days,
+            "Masturbation_Count": [1] * (days - 5) + [0] * 5,
+        })
+
+    def test_trend_slope_per_week(self):
+        from core.report_features import compute_summary_features
+        f = compute_summary_features(self._summary())
+        assert f["metrics"]["Mood"]["trend_per_week"] == pytest.approx(0.7)
+
+    def test_week_over_week_delta(self):
+        from core.report_features import compute_summary_features
+        f = compute_summary_features(self._summary())
+        assert f["metrics"]["Mood"]["wow_delta"] == pytest.approx(0.7)
+
+    def test_correlation(self):
+        from core.report_features import compute_summary_features
+        f = compute_summary_features(self._summary())
+        assert f["correlations"]["Sleep_Hours~Mood"]["r"] == pytest.approx(1.0)
+
+    def test_streaks(self):
+        from core.report_features import compute_summary_features
+        f = compute_summary_features(self._summary())
+        assert f["streaks"]["不打飞机"] == {"current": 5, "longest": 5}
+        assert f["streaks"]["专注≥4个番茄钟"]["current"] == 28
+
+    def test_missing_day_breaks_streak(self):
+        from core.report_features import compute_summary_features
+        df = self._summary().drop(index=20)
+        f = compute_summary_features(df)
+        assert f["streaks"]["专注≥4个番茄钟"]["current"] == 7
+
+    def test_task_completion_rate(self):
+        from core.report_features import compute_task_features
+        tasks = pd.DataFrame({
+            "Date": ["2026-03-01"] * 4 + ["2026-03-02"],
+            "计划事项": ["A", "B", "C", "D", "此日未作安排"],
+            "状态": ["✅", "✅", "❌", "", ""],
+            "原因分析": ["", "", "刷视频", "", ""],
+        })
+        f = compute_task_features(tasks)
+        assert f["all"]["total"] == 4
+        assert f["all"]["completion_rate"] == 50
+        assert f["all"]["未标记"] == 1
+        assert f["bad_habits"] == {"刷视频": 1}
+
+    def test_time_adherence(self):
+        from core.report_features import compute_time_features
+        time_df = pd.DataFrame({
+            "Date": ["2026-03-01"] * 4,
+            "计划": ["工作", "工作", "看书", ""],
+            "实际": ["工作", "游戏", "看书", ""],
+            "状态": ["✅", "❌", "✅", ""],
+        })
+        f = compute_time_features(time_df)
+        assert f["planned_slots"] == 3
+        assert f["done_rate"] == 67
+        assert f["failed_slots"] == 1
+
+    def test_format_features_handles_empty(self):
+        from core.report_features import compute_features, format_features
+        text = format_features(compute_features(None, None, None))
+        assert text.count("暂无数据") == 3
+
+    def test_features_prompt_much_smaller_than_raw(self, tmp_path):
+        """一整年数据下，特征模式的提示词应远小于原始表格"""
+        from core.report_service import build_user_prompt
+        year = datetime.now().year
+        days = 300
+        dates = pd.date_range(f"{year}-01-01", periods=days).strftime("%Y-%m-%d")
+        summary = pd.DataFrame({"Date": dates, "Mood": [3] * days, "Sleep_Hours": [7] * days,
+                                "Reflect_Thoughts": ["思考"] * days})
+        (tmp_path / "summary").mkdir()
+        summary.to_csv(tmp_path / "summary" / f"daily_summary_{year}.csv", index=False, encoding="utf-8-sig")
+        with patch("core.config.PATH_SUMMARY", str(tmp_path / "summary")), \
+             patch("core.report_config.REPORT_CHAR_BUDGET", 0):
+            stats = {}
+            features_prompt = build_user_prompt(mode="features", stats=stats)
+            raw_prompt = build_user_prompt(mode="raw")
+        assert stats["level"] == "features"
+        assert "统计特征" in features_prompt
+        assert len(features_prompt) * 3 < len(raw_prompt)
+
+    def test_unknown_mode_raises(self):
+        from core.report_service import build_user_prompt
+        with pytest.raises(ValueError, match="未知的报告数据模式"):
+            build_user_prompt(mode="xml")
+
+
 # ==========================================
 # 3. Gemini API 测试
 # ==========================================
@@ -135,6 +377,12 @@ class TestDataCollector:
 class TestGeminiAPI:
     """Gemini API 调用测试（全部 mock）"""
 
+    @pytest.fixture(autouse=True)
+    def _isolated_cache(self, tmp_path):
+        """报告缓存写到临时目录，避免用例之间互相命中"""
+        with patch("core.config.PATH_REPORT_CACHE", str(tmp_path / "report_cache")):
+            yield
+
     @patch("core.report_service.collect_all_data")
     def test_generate_report_no_api_key(self, mock_collect):
         """未配置 API Key 应抛出 ValueError"""
@@ -177,7 +425,7 @@ class TestGeminiAPI:
             import importlib
             import core.report_service as rs
             importlib.reload(rs)
-            result = rs.generate_report()
+            result = rs.generate_report(mode="raw")
             assert "行为分析报告" in result
         finally:
             # 恢复原始状态
@@ -223,7 +471,7 @@ class TestGeminiAPI:
             import core.report_service as rs
             importlib.reload(rs)
             with pytest.raises(RuntimeError, match="空响应"):
-                rs.generate_report()
+                rs.generate_report(mode="raw")
         finally:
             if saved_google is not None:
                 sys.modules["google"] = saved_google
@@ -236,6 +484,159 @@ class TestGeminiAPI:
             importlib.reload(rs)
 
 
+# ==========================================
+# 3.5 报告缓存测试
+# ==========================================
+
+class TestReportCache:
+    """report_cache：哈希、TTL、淘汰，以及 generate_report 的命中逻辑"""
+
+    @pytest.fixture(autouse=True)
+    def cache_dir(self, tmp_path):
+        with patch("core.config.PATH_REPORT_CACHE", str(tmp_path / "report_cache")):
+            yield tmp_path / "report_cache"
+
+    def test_hash_changes_with_any_part(self):
+        from core.report_cache import prompt_hash
+        base = prompt_hash("m", "sys", "user")
+        assert base == prompt_hash("m", "sys", "user")
+        assert base != prompt_hash("m2", "sys", "user")
+        assert base != prompt_hash("m", "sys2", "user")
+        assert base != prompt_hash("m", "sys", "user2")
+
+    def test_put_then_get(self):
+        from core.report_cache import put_cached_report, get_cached_report
+        put_cached_report("k1", "报告内容")
+        assert get_cached_report("k1") == "报告内容"
+        assert get_cached_report("missing") is None
+
+    def test_ttl_expiry(self, cache_dir):
+        from core.report_cache import put_cached_report, get_cached_report
+        put_cached_report("k1", "旧报告", now=1000)
+        assert get_cached_report("k1", ttl_seconds=60, now=1030) == "旧报告"
+        assert get_cached_report("k1", ttl_seconds=60, now=1100) is None
+        assert not (cache_dir / "k1.json").exists()
+
+    def test_evicts_least_recently_used(self, cache_dir):
+        from core.report_cache import put_cached_report, get_cached_report
+        with patch("core.report_config.REPORT_CACHE_MAX_ENTRIES", 2):
+            put_cached_report("a", "A", now=1000)
+            put_cached_report("b", "B", now=1001)
+            get_cached_report("a", ttl_seconds=1e9, now=1002)  # a 最近被使用
+            put_cached_report("c", "C", now=1003)
+        assert sorted(p.stem for p in cache_dir.glob("*.json")) == ["a", "c"]
+
+    def test_size_bound(self, cache_dir):
+        from core.report_cache import put_cached_report
+        with patch("core.report_config.REPORT_CACHE_MAX_BYTES", 1500):
+            for i in range(5):
+                put_cached_report(f"k{i}", "x" * 600, now=1000 + i)
+        total = sum(p.stat().st_size for p in cache_dir.glob("*.json"))
+        assert total <= 1500
+
+    def test_concurrent_writers_and_evict(self, cache_dir):
+        """多线程同时写同一 key 并触发淘汰：不报错、不留临时文件、读到的总是完整报告"""
+        import threading
+        from core.report_cache import put_cached_report, get_cached_report
+        errors = []
+
+        def writer(n):
+            try:
+                for i in range(30):
+                    put_cached_report("same", f"报告{n}-{i}" * 50)
+                    put_cached_report(f"k{n}-{i}", "x")
+            except Exception as e:
+                errors.append(e)
+
+        with patch("core.report_config.REPORT_CACHE_MAX_ENTRIES", 3):
+            threads = [threading.Thread(target=writer, args=(n,)) for n in range(6)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert errors == []
+        assert not list(cache_dir.glob("*.tmp"))
+        report = get_cached_report("same", ttl_seconds=1e9)
+        assert report is None or report.startswith("报告")
+
+    def test_atomic_write_leaves_no_temp_on_failure(self, tmp_path):
+        """序列化失败时不留下临时文件，原文件保持不变"""
+        import json
+        from core import config as cfg
+        path = str(tmp_path / "state.json")
+        cfg.write_json_atomic(path, {"a": 1})
+        with pytest.raises(TypeError):
+            cfg.write_json_atomic(path, {"a": object()})
+        assert os.listdir(tmp_path) == ["state.json"]
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f) == {"a": 1}
+
+    @patch("core.report_service.build_user_prompt", return_value="同样的提示词")
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"})
+    def test_generate_report_uses_cache(self, mock_prompt):
+        """同样的提示词第二次不再调用 API；force=True 时重新调用"""
+        import sys
+        mock_response = MagicMock()
+        mock_response.text = "# 报告"
+        mock_genai = MagicMock()
+        mock_genai.Client.return_value.models.generate_content.return_value = mock_response
+        mock_google = MagicMock()
+        mock_google.genai = mock_genai
+        with patch.dict(sys.modules, {"google": mock_google, "google.genai": mock_genai}):
+            from core.report_service import generate_report
+            stats = {}
+            assert generate_report(stats=stats) == "# 报告"
+            assert stats["cache"] == "miss"
+            assert generate_report(stats=stats) == "# 报告"
+            assert stats["cache"] == "hit"
+            generate_report(stats=stats, force=True)
+            assert stats["cache"] == "miss"
+        assert mock_genai.Client.return_value.models.generate_content.call_count == 2
+
+
+# ==========================================
+# 3.6 流式生成测试
+# ==========================================
+
+class TestReportStream:
+    """generate_report_stream：逐块 yield，完整后才写缓存"""
+
+    @pytest.fixture(autouse=True)
+    def _isolated_cache(self, tmp_path):
+        with patch("core.config.PATH_REPORT_CACHE", str(tmp_path / "report_cache")):
+            yield
+
+    def _mock_genai(self, chunks):
+        mock_genai = MagicMock()
+        stream = [MagicMock(text=c) for c in chunks]
+        mock_genai.Client.return_value.models.generate_content_stream.return_value = iter(stream)
+        mock_google = MagicMock()
+        mock_google.genai = mock_genai
+        return {"google": mock_google, "google.genai": mock_genai}
+
+    @patch("core.report_service.build_user_prompt", return_value="提示词")
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"})
+    def test_yields_chunks_then_caches(self, mock_prompt):
+        import sys
+        from core.report_service import generate_report_stream, generate_report
+        with patch.dict(sys.modules, self._mock_genai(["# 报告", "", "正文"])):
+            chunks = list(generate_report_stream())
+        assert chunks == ["# 报告", "正文"]
+        # 第二次走缓存，非流式接口也能命中
+        stats = {}
+        assert generate_report(stats=stats) == "# 报告正文"
+        assert stats["cache"] == "hit"
+
+    @patch("core.report_service.build_user_prompt", return_value="提示词")
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"})
+    def test_empty_stream_raises(self, mock_prompt):
+        import sys
+        from core.report_service import generate_report_stream
+        with patch.dict(sys.modules, self._mock_genai([""])):
+            with pytest.raises(RuntimeError, match="空响应"):
+                list(generate_report_stream())
+
+
 # ==========================================
 # 4. 邮件发送测试
 # ==========================================
@@ -243,6 +644,12 @@ class TestGeminiAPI:
 class TestEmailSending:
     """邮件发送测试（全部 mock）"""
 
+    @pytest.fixture(autouse=True)
+    def _isolated_outbox(self, tmp_path):
+        """发件箱写到临时目录"""
+        with patch("core.config.PATH_OUTBOX", str(tmp_path / "outbox")):
+            yield
+
     def test_send_email_no_smtp_user(self):
         """未配置发件邮箱应抛出 ValueError"""
         from core.report_service import send_email
@@ -267,7 +674,7 @@ class TestEmailSending:
             with pytest.raises(ValueError, match="收件邮箱"):
                 send_email("test report")
 
-    @patch("core.report_service.smtplib.SMTP_SSL")
+    @patch("smtplib.SMTP_SSL")
     def test_send_email_success(self, mock_smtp_cls):
         """配置完整时应成功发送"""
         from core.report_service import send_email
@@ -283,7 +690,7 @@ class TestEmailSending:
         mock_server.login.assert_called_once_with("test@163.com", "abc123")
         mock_server.sendmail.assert_called_once()
 
-    @patch("core.report_service.smtplib.SMTP_SSL")
+    @patch("smtplib.SMTP_SSL")
     def test_send_email_auth_failure(self, mock_smtp_cls):
         """认证失败应抛出 RuntimeError"""
         import smtplib
@@ -331,3 +738,47 @@ class TestMarkdownToHtml:
         from core.report_service import _markdown_to_simple_html
         result = _markdown_to_simple_html("测试")
         assert 'charset="utf-8"' in result
+
+    def test_list_wrapped_without_br(self):
+        """列表项包在 ul/ol 中，条目之间不插入 <br>"""
+        from core.md_render import render_markdown
+        assert render_markdown("- 第一项\n- 第二项") == "<ul><li>第一项</li><li>第二项</li></ul>"
+        assert render_markdown("1. 甲\n\n2. 乙") == "<ol><li>甲</li><li>乙</li></ol>"
+
+    def test_nested_list(self):
+        """缩进的列表项嵌套在上一级条目内"""
+        from core.md_render import render_markdown
+        result = render_markdown("- 睡眠\n  - 平均 7 小时\n- 心情")
+        assert result == "<ul><li>睡眠<ul><li>平均 7 小时</li></ul></li><li>心情</li></ul>"
+
+    def test_table_conversion(self):
+        """管道表格转换为 table，支持对齐"""
+        from core.md_render import render_markdown
+        result = render_markdown("| 指标 | 数值 |\n|---|--:|\n| 睡眠 | **7.5** |")
+        assert "<thead><tr><th>指标</th><th align=\"right\">数值</th></tr></thead>" in result
+        assert "<td align=\"right\"><strong>7.5</strong></td>" in result
+
+    def test_code_and_escaping(self):
+        """行内代码与代码块内容原样转义，正文中的尖括号被转义"""
+        from core.md_render import render_markdown
+        assert render_markdown("a<b 用 `x<y`") == "<p>a&lt;b 用 <code>x&lt;y</code></p>"
+        result = render_markdown("```python\nif a < b:\n    **不加粗**\n```")
+        assert result == '<pre><code class="language-python">if a &lt; b:\n    **不加粗**</code></pre>'
+
+    def test_links_only_safe_schemes(self):
+        """http / https / mailto 与相对链接保留；javascript: 等协议只输出文字，引号不能跳出属性"""
+        from core.md_render import render_markdown
+        assert render_markdown("[官网](https://example.com/a?b=1&c=2)") == \
+            '<p><a href="https://example.com/a?b=1&amp;c=2">官网</a></p>'
+        assert '<a href="mailto:me@example.com">' in render_markdown("[写信](mailto:me@example.com)")
+        assert '<a href="./report.html">' in render_markdown("[归档](./report.html)")
+        for href in ("javascript:alert", "JavaScript:alert", "data:text/html,x", "vbscript:x", "\x01javascript:x"):
+            assert render_markdown(f"[点我]({href})") == "<p>点我</p>"
+        result = render_markdown('[x](/a"onmouseover="alert(1))')
+        assert '<a href="/a&quot;onmouseover=&quot;alert(1">' in result
+
+    def test_paragraph_lines_and_hr(self):
+        """段落内换行保留为 <br>，--- 转换为分隔线"""
+        from core.md_render import render_markdown
+        result = render_markdown("第一行\n第二行\n\n---\n### 建议")
+        assert result == "<p>第一行<br>\n第二行</p>\n<hr>\n<h3>建议</h3>"
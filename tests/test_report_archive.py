@@ -0,0 +1,66 @@
+"""报告归档索引与检索的单元测试"""
+import json
+import os
+from core import config as cfg
+
+
+def _save(report, mode="features", start="2026-01-01", end="2026-01-31", now=None):
+    from core.report_archive import save_report
+    return save_report(report, meta={
+        "mode": mode, "level": mode, "backend": "fake", "model": "fake-model",
+        "prompt_hash": "abc", "watermark": {"year": 2026, "start": start, "end": end, "digests": {}},
+    }, now=now)
+
+
+class TestArchiveIndex:
+    """save_report 维护 index.json；list_reports 分页与检索"""
+
+    def test_index_entry_has_metadata_without_body(self):
+        from core.report_archive import list_reports
+        report_id = _save("# 一月报告\n\n早睡早起")
+        entries, total = list_reports()
+        assert total == 1
+        item = entries[0]
+        assert item["id"] == report_id
+        assert item["title"] == "一月报告"
+        assert (item["start"], item["end"], item["prompt_hash"]) == ("2026-01-01", "2026-01-31", "abc")
+        assert item["chars"] == len("# 一月报告\n\n早睡早起")
+        with open(os.path.join(cfg.PATH_REPORT_ARCHIVE, "index.json"), encoding="utf-8") as f:
+            raw = json.load(f)
+        assert "report" not in raw[0] and "watermark" not in raw[0]
+
+    def test_pagination_newest_first(self):
+        from core.report_archive import list_reports
+        ids = [_save(f"# 报告 {i}", now=1_700_000_000 + i) for i in range(5)]
+        page1, total = list_reports(page=1, per_page=2)
+        page3, _ = list_reports(page=3, per_page=2)
+        assert total == 5
+        assert [e["id"] for e in page1] == ids[::-1][:2]
+        assert [e["id"] for e in page3] == [ids[0]]
+
+    def test_search_fields_and_body(self):
+        from core.report_archive import list_reports
+        _save("# 二月报告\n\n多喝水", mode="delta", start="2026-02-01")
+        _save("# 三月报告\n\n坚持跑步", mode="mapreduce", start="2026-03-01")
+        assert [e["title"] for e in list_reports(query="DELTA")[0]] == ["二月报告"]
+        assert [e["title"] for e in list_reports(query="2026-03")[0]] == ["三月报告"]
+        assert [e["title"] for e in list_reports(query="跑步")[0]] == ["三月报告"]
+        assert list_reports(query="不存在的词") == ([], 0)
+
+    def test_corrupt_index_is_rebuilt(self):
+        from core.report_archive import list_reports
+        _save("# 报告 A")
+        _save("# 报告 B")
+        with open(os.path.join(cfg.PATH_REPORT_ARCHIVE, "index.json"), "w", encoding="utf-8") as f:
+            f.write("{损坏")
+        entries, total = list_reports()
+        assert total == 2
+        assert {e["title"] for e in entries} == {"报告 A", "报告 B"}
+
+    def test_static_html_written(self):
+        from core.report_archive import html_path
+        report_id = _save("# 四月报告\n\n- 早睡\n- 多运动")
+        with open(html_path(report_id), encoding="utf-8") as f:
+            html = f.read()
+        assert "<title>四月报告</title>" in html
+        assert "<ul><li>早睡</li><li>多运动</li></ul>" in html
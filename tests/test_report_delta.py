@@ -0,0 +1,120 @@
+"""增量报告（数据水位 + 变化记录）的单元测试"""
+import pandas as pd
+import pytest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+
+class FakeBackend:
+    """最小的后端替身：记录收到的提示词，返回固定报告"""
+
+    name = "fake"
+    model = "fake-model"
+    attempts = 0
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, system_prompt, user_prompt):
+        self.prompts.append(user_prompt)
+        return f"# 报告 {len(self.prompts)}\n\n### 1. 核心数据总结\n- 睡眠稳定\n- 心情上升\n- 第三行不进摘要"
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """summary / tasks 写到临时目录，缓存也隔离"""
+    with patch("core.config.PATH_SUMMARY", str(tmp_path / "summary")), \
+         patch("core.config.PATH_TASKS", str(tmp_path / "tasks")), \
+         patch("core.config.PATH_REPORT_CACHE", str(tmp_path / "cache")):
+        (tmp_path / "summary").mkdir()
+        (tmp_path / "tasks").mkdir()
+        yield tmp_path
+
+
+def _write_days(folder, days, mood_overrides=None):
+    """写入截至今天的 days 天每日概览 + 任务"""
+    year = datetime.now().year
+    end = date.today()
+    dates = [(end - timedelta(days=i)).isoformat() for i in range(days)][::-1]
+    dates = [d for d in dates if d.startswith(str(year))]
+    mood = [(mood_overrides or {}).get(d, 3) for d in dates]
+    pd.DataFrame({"Date": dates, "Mood": mood, "Sleep_Hours": 7.0,
+                  "Reflect_Thoughts": [f"{d} 的想法" for d in dates]}).to_csv(
+        folder / "summary" / f"daily_summary_{year}.csv", index=False, encoding="utf-8-sig")
+    pd.DataFrame({"Date": dates, "计划事项": "读书", "状态": "✅"}).to_csv(
+        folder / "tasks" / f"tasks_log_{year}.csv", index=False, encoding="utf-8-sig")
+    return dates
+
+
+class TestWatermark:
+    """row_digests / changed_rows / digest_report"""
+
+    def test_digest_changes_only_for_modified_key(self):
+        from core.report_delta import row_digests
+        df = pd.DataFrame({"Date": ["d1", "d1", "d2"], "A": [1, 2, 3]})
+        before = row_digests(df, "Date")
+        df.loc[2, "A"] = 4
+        after = row_digests(df, "Date")
+        assert before["d1"] == after["d1"]
+        assert before["d2"] != after["d2"]
+
+    def test_changed_rows(self):
+        from core.report_delta import row_digests, changed_rows
+        old = pd.DataFrame({"Date": ["d1", "d2"], "A": [1, 2]})
+        previous = row_digests(old, "Date")
+        new = pd.DataFrame({"Date": ["d1", "d2", "d3"], "A": [1, 5, 6]})
+        assert changed_rows(new, "Date", previous)["Date"].tolist() == ["d2", "d3"]
+
+    def test_report_digest_keeps_headings(self):
+        from core.report_delta import digest_report
+        md = "# 标题\n\n正文一\n正文二\n正文三\n\n---\n### 建议\n- 早睡"
+        digest = digest_report(md)
+        assert digest == "# 标题\n正文一\n正文二\n### 建议\n- 早睡"
+        assert digest_report("## 小节\n" * 100, max_chars=50).endswith("（已截断）")
+
+
+class TestDeltaReports:
+    """mode="delta"：首次退回 features，之后只发送变化的记录"""
+
+    def test_first_report_falls_back_and_archives_watermark(self, data_dir):
+        from core.report_service import generate_report
+        from core.report_archive import latest_report
+        _write_days(data_dir, 10)
+        stats = {}
+        generate_report(stats=stats, mode="delta", backend=FakeBackend())
+        assert stats["delta_fallback"] is True
+        entry = latest_report(require_watermark=True)
+        assert entry["mode"] == "delta"
+        assert len(entry["watermark"]["digests"]["summary"]) == len(entry["watermark"]["digests"]["tasks"])
+
+    def test_second_report_sends_only_changes(self, data_dir):
+        from core.report_service import generate_report
+        backend = FakeBackend()
+        dates = _write_days(data_dir, 10)
+        if len(dates) < 3:
+            pytest.skip("年初数据不足")
+        generate_report(mode="delta", backend=backend)
+        _write_days(data_dir, 10, mood_overrides={dates[1]: 5})
+        stats = {}
+        generate_report(stats=stats, mode="delta", backend=backend)
+        prompt = backend.prompts[-1]
+        assert stats["level"] == "delta"
+        assert "上次报告摘要" in prompt and "# 报告 1" in prompt
+        assert "第三行不进摘要" not in prompt
+        assert f"{dates[1]} 的想法" in prompt
+        assert f"{dates[2]} 的想法" not in prompt
+
+    def test_prompt_size_independent_of_history(self, data_dir):
+        """同样只改一天，10 天和 200 天历史的增量提示词大小基本一致"""
+        from core.report_service import generate_report
+        from core.report_archive import latest_report
+        sizes = []
+        for days in (10, 200):
+            backend = FakeBackend()
+            dates = _write_days(data_dir, days)
+            generate_report(mode="delta", backend=backend, force=True)
+            _write_days(data_dir, days, mood_overrides={dates[-1]: 5})
+            generate_report(mode="delta", backend=backend, force=True)
+            sizes.append(len(backend.prompts[-1]))
+            assert latest_report()["level"] == "delta"
+        assert abs(sizes[1] - sizes[0]) < 300
@@ -0,0 +1,141 @@
+"""后台报告任务的单元测试"""
+import subprocess
+import sys
+import time
+import pytest
+from unittest.mock import patch
+
+
+@pytest.fixture(autouse=True)
+def jobs_dir(tmp_path):
+    """任务状态文件写到临时目录"""
+    with patch("core.config.PATH_REPORT_JOBS", str(tmp_path / "report_jobs")):
+        yield tmp_path / "report_jobs"
+
+
+def _fake_generate(stats=None, mode=None, force=False, on_stage=None):
+    """模拟流式生成：分两块返回"""
+    on_stage("collecting")
+    on_stage("generating")
+    stats["level"] = "features"
+    yield "# 测试"
+    yield "报告"
+
+
+class TestReportJobs:
+    """report_jobs：状态流转、持久化、失败处理"""
+
+    def test_create_job_is_queued(self):
+        from core.report_jobs import create_job, get_job
+        job = create_job(force=True, mode="raw")
+        loaded = get_job(job["id"])
+        assert loaded["state"] == "queued"
+        assert loaded["params"] == {"force": True, "mode": "raw"}
+
+    @patch("core.report_service.send_email")
+    @patch("core.report_service.generate_report_stream", side_effect=_fake_generate)
+    def test_successful_run_walks_all_states(self, mock_gen, mock_send):
+        from core.report_jobs import create_job, run_report_job, get_job
+        job = create_job()
+        with patch("core.report_config.EMAIL_RECIPIENT", "me@example.com"):
+            run_report_job(job)
+        loaded = get_job(job["id"])
+        assert [h["state"] for h in loaded["history"]] == [
+            "queued", "collecting", "generating", "sending", "done"]
+        assert loaded["report"] == "# 测试报告"
+        assert loaded["recipient"] == "me@example.com"
+        assert loaded["stats"]["level"] == "features"
+        assert "first_chunk_s" in loaded["stats"]
+        mock_send.assert_called_once_with("# 测试报告")
+
+    @patch("core.report_service.generate_report_stream", side_effect=ValueError("未配置 GEMINI_API_KEY"))
+    def test_config_error_marks_failed(self, mock_gen):
+        from core.report_jobs import create_job, run_report_job, get_job
+        job = create_job()
+        run_report_job(job)
+        loaded = get_job(job["id"])
+        assert loaded["state"] == "failed"
+        assert "配置错误" in loaded["error"]
+
+    @patch("core.report_service.send_email", side_effect=RuntimeError("邮件发送失败"))
+    @patch("core.report_service.generate_report_stream", side_effect=_fake_generate)
+    def test_send_failure_keeps_report(self, mock_gen, mock_send):
+        """发送失败时报告文本仍保存在任务中，刷新页面后可以查看"""
+        from core.report_jobs import create_job, run_report_job, get_job
+        job = create_job()
+        run_report_job(job)
+        loaded = get_job(job["id"])
+        assert loaded["state"] == "failed"
+        assert loaded["report"] == "# 测试报告"
+
+    @patch("core.report_service.send_email")
+    @patch("core.report_service.generate_report_stream", side_effect=_fake_generate)
+    def test_start_runs_in_background(self, mock_gen, mock_send):
+        from core.report_jobs import start_report_job, get_latest_job
+        job = start_report_job()
+        deadline = time.time() + 5
+        while get_latest_job()["state"] != "done" and time.time() < deadline:
+            time.sleep(0.01)
+        latest = get_latest_job()
+        assert latest["id"] == job["id"]
+        assert latest["state"] == "done"
+
+    def test_no_duplicate_while_active(self):
+        """已有任务在运行时，再次点击不重复启动"""
+        from core.report_jobs import create_job, start_report_job
+        running = create_job()
+        with patch("core.report_jobs.threading.Thread") as mock_thread:
+            again = start_report_job()
+        assert again["id"] == running["id"]
+        mock_thread.assert_not_called()
+
+    def test_orphaned_job_marked_failed(self):
+        """已退出的进程留下的活动任务（应用重启）应被标记为失败"""
+        from core.report_jobs import create_job, get_job, _write_job
+        finished = subprocess.Popen([sys.executable, "-c", "pass"])
+        finished.wait()
+        job = create_job()
+        job["pid"] = finished.pid
+        _write_job(job)
+        assert get_job(job["id"])["state"] == "failed"
+
+    def test_job_of_live_process_stays_active(self):
+        """其他仍在运行的进程发起的任务不应被误判为中断"""
+        from core.report_jobs import create_job, get_job, _write_job
+        other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        try:
+            job = create_job()
+            job["pid"] = other.pid
+            _write_job(job)
+            assert get_job(job["id"])["state"] == "queued"
+        finally:
+            other.kill()
+            other.wait()
+        assert get_job(job["id"])["state"] == "failed"
+
+    def test_latest_job(self):
+        from core.report_jobs import create_job, get_latest_job
+        assert get_latest_job() is None
+        create_job()
+        time.sleep(0.002)
+        second = create_job()
+        assert get_latest_job()["id"] == second["id"]
+
+    def test_partial_report_persisted_while_streaming(self):
+        """生成过程中已收到的内容会写入状态文件"""
+        from core.report_jobs import create_job, run_report_job, get_job
+        job = create_job()
+        seen = []
+
+        def slow_stream(stats=None, mode=None, force=False, on_stage=None):
+            on_stage("generating")
+            yield "第一段"
+            seen.append(get_job(job["id"])["report"])
+            yield "第二段"
+
+        with patch("core.report_service.generate_report_stream", side_effect=slow_stream), \
+             patch("core.report_service.send_email"), \
+             patch("core.report_jobs.PARTIAL_FLUSH_SECONDS", 0):
+            run_report_job(job)
+        assert seen == ["第一段"]
+        assert get_job(job["id"])["report"] == "第一段第二段"
@@ -0,0 +1,106 @@
+"""分层（map-reduce）报告的单元测试"""
+import threading
+import time
+import pandas as pd
+import pytest
+from datetime import date
+from unittest.mock import patch
+
+
+class CountingBackend:
+    """记录并发度与请求内容的后端替身"""
+
+    name = "fake"
+    model = "fake-model"
+    attempts = 0
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.prompts = []
+
+    def generate(self, system_prompt, user_prompt):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.prompts.append(user_prompt)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        if "按月份给出每个月的要点摘要" in user_prompt:
+            return "# 最终报告"
+        month = user_prompt.split("下面是我 ", 1)[1][:7]
+        return f"{month} 要点"
+
+
+@pytest.fixture
+def history_dir(tmp_path):
+    with patch("core.config.PATH_SUMMARY", str(tmp_path / "summary")), \
+         patch("core.config.PATH_TASKS", str(tmp_path / "tasks")), \
+         patch("core.config.PATH_MONTH_SUMMARIES", str(tmp_path / "month_summaries")), \
+         patch("core.config.PATH_REPORT_CACHE", str(tmp_path / "cache")):
+        (tmp_path / "summary").mkdir()
+        (tmp_path / "tasks").mkdir()
+        yield tmp_path
+
+
+def _write_year(folder, year, months, mood=3):
+    dates = [d for m in months for d in pd.date_range(date(year, m, 1), periods=5).strftime("%Y-%m-%d")]
+    pd.DataFrame({"Date": dates, "Mood": mood, "Reflect_Thoughts": "想法"}).to_csv(
+        folder / "summary" / f"daily_summary_{year}.csv", index=False, encoding="utf-8-sig")
+    pd.DataFrame({"Date": dates, "计划事项": "读书", "状态": "✅"}).to_csv(
+        folder / "tasks" / f"tasks_log_{year}.csv", index=False, encoding="utf-8-sig")
+
+
+class TestMapReduce:
+    """summarize_months：并发上限、按月缓存、只重算变化的月份"""
+
+    def test_months_across_years_with_bounded_concurrency(self, history_dir):
+        from core.report_mapreduce import load_history, summarize_months
+        _write_year(history_dir, 2024, [1, 2, 3])
+        _write_year(history_dir, 2025, [1, 2, 3])
+        backend = CountingBackend()
+        summaries, counts = summarize_months(load_history(), backend, max_workers=2)
+        assert list(summaries) == ["2024-01", "2024-02", "2024-03", "2025-01", "2025-02", "2025-03"]
+        assert summaries["2025-02"] == "2025-02 要点"
+        assert counts == {"months": 6, "cached": 0, "generated": 6}
+        assert backend.max_active == 2
+
+    def test_only_changed_months_resummarized(self, history_dir):
+        from core.report_mapreduce import load_history, summarize_months
+        _write_year(history_dir, 2024, [1, 2, 3])
+        summarize_months(load_history(), CountingBackend())
+        _, counts = summarize_months(load_history(), CountingBackend())
+        assert counts["generated"] == 0
+
+        df = pd.read_csv(history_dir / "summary" / "daily_summary_2024.csv", encoding="utf-8-sig")
+        df.loc[df["Date"] == "2024-02-03", "Mood"] = 5
+        df.to_csv(history_dir / "summary" / "daily_summary_2024.csv", index=False, encoding="utf-8-sig")
+        backend = CountingBackend()
+        _, counts = summarize_months(load_history(), backend)
+        assert counts == {"months": 3, "cached": 2, "generated": 1}
+        assert "2024-02" in backend.prompts[0]
+        # 旧哈希的要点文件被替换，每个月只保留一份
+        assert len(list((history_dir / "month_summaries").glob("2024-02_*.json"))) == 1
+
+    def test_failed_month_raises(self, history_dir):
+        from core.report_mapreduce import load_history, summarize_months
+        _write_year(history_dir, 2024, [1])
+        backend = CountingBackend()
+        backend.generate = lambda system, user: (_ for _ in ()).throw(ConnectionError("断网"))
+        with pytest.raises(RuntimeError, match="2024-01 月度要点生成失败"):
+            summarize_months(load_history(), backend)
+
+    def test_generate_report_mapreduce(self, history_dir):
+        from core.report_service import generate_report
+        _write_year(history_dir, 2024, [1, 2])
+        backend = CountingBackend(delay=0)
+        stats = {}
+        assert generate_report(stats=stats, mode="mapreduce", backend=backend) == "# 最终报告"
+        assert stats["level"] == "mapreduce"
+        assert stats["map"] == {"months": 2, "cached": 0, "generated": 2}
+        reduce_prompt = backend.prompts[-1]
+        assert "### 2024-01\n2024-01 要点" in reduce_prompt
+        assert "### 2024-02\n2024-02 要点" in reduce_prompt
@@ -0,0 +1,214 @@
+"""报告发件箱的单元测试（标准库实现的 SMTP 替身，不连网络）"""
+import smtplib
+import pytest
+from unittest.mock import patch
+
+
+class FakeSMTP:
+    """
+    smtplib.SMTP_SSL 的替身：记录连接、登录与投递。
+    script 中按顺序放置每次 sendmail 的结果：None 表示成功，异常实例表示抛出。
+    """
+
+    connections = 0
+    logins = 0
+    delivered = []
+    script = []
+
+    def __init__(self, host, port, timeout=None):
+        FakeSMTP.connections += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def login(self, user, password):
+        if password == "wrong":
+            raise smtplib.SMTPAuthenticationError(535, b"auth failed")
+        FakeSMTP.logins += 1
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        outcome = FakeSMTP.script.pop(0) if FakeSMTP.script else None
+        if outcome is not None:
+            raise outcome
+        FakeSMTP.delivered.append((from_addr, list(to_addrs), msg))
+
+    @classmethod
+    def reset(cls, script=()):
+        cls.connections = 0
+        cls.logins = 0
+        cls.delivered = []
+        cls.script = list(script)
+
+
+@pytest.fixture(autouse=True)
+def outbox_env(tmp_path):
+    """发件箱写到临时目录，SMTP 换成替身"""
+    FakeSMTP.reset()
+    with patch("core.config.PATH_OUTBOX", str(tmp_path / "outbox")), \
+         patch("smtplib.SMTP_SSL", FakeSMTP), \
+         patch("core.report_config.SMTP_USER", "me@163.com"), \
+         patch("core.report_config.SMTP_PASSWORD", "abc123"), \
+         patch("core.report_config.EMAIL_RECIPIENT", "a@example.com, b@example.com"):
+        yield tmp_path / "outbox"
+
+
+class TestOutbox:
+    """enqueue / flush：连接复用、重试、失败保留"""
+
+    def test_parse_recipients(self):
+        from core.report_outbox import parse_recipients
+        assert parse_recipients(" a@x.com, b@x.com;a@x.com ,") == ["a@x.com", "b@x.com"]
+        assert parse_recipients("") == []
+
+    def test_one_connection_for_many_messages(self):
+        from core.report_outbox import enqueue, flush, pending
+        for i in range(3):
+            enqueue(f"msg {i}", "me@163.com", ["a@example.com", "b@example.com"])
+        result = flush(sleep=lambda s: None)
+        assert len(result["sent"]) == 3
+        assert FakeSMTP.connections == 1
+        assert FakeSMTP.logins == 1
+        assert [d[2] for d in FakeSMTP.delivered] == ["msg 0", "msg 1", "msg 2"]
+        assert FakeSMTP.delivered[0][1] == ["a@example.com", "b@example.com"]
+        assert pending() == []
+
+    def test_reconnects_after_transient_error(self):
+        from core.report_outbox import enqueue, flush
+        enqueue("first", "me@163.com", ["a@example.com"])
+        enqueue("second", "me@163.com", ["a@example.com"])
+        FakeSMTP.reset(script=[None, smtplib.SMTPServerDisconnected("lost")])
+        sleeps = []
+        result = flush(retries=2, sleep=sleeps.append)
+        assert len(result["sent"]) == 2
+        assert FakeSMTP.connections == 2
+        assert len(sleeps) == 1
+
+    def test_messages_kept_when_retries_exhausted(self):
+        from core.report_outbox import enqueue, flush, pending
+        enqueue("report", "me@163.com", ["a@example.com"])
+        FakeSMTP.reset(script=[OSError("network down")] * 3)
+        result = flush(retries=2, sleep=lambda s: None)
+        assert result["sent"] == []
+        kept = pending()
+        assert len(kept) == 1
+        assert kept[0]["raw"] == "report"
+        assert kept[0]["attempts"] == 1
+        assert "network down" in kept[0]["last_error"]
+        # 网络恢复后再次 flush 即可送达
+        assert len(flush(sleep=lambda s: None)["sent"]) == 1
+        assert pending() == []
+
+    def test_refused_recipient_skips_only_that_message(self):
+        """永久性错误：这一封直接移入死信，其余照常投递"""
+        from core.report_outbox import dead_letters, enqueue, flush, pending
+        bad = enqueue("bad", "me@163.com", ["nobody@example.com"])
+        enqueue("good", "me@163.com", ["a@example.com"])
+        FakeSMTP.reset(script=[smtplib.SMTPRecipientsRefused({"nobody@example.com": (550, b"no")})])
+        result = flush(sleep=lambda s: None)
+        assert list(result["failed"]) == [bad]
+        assert len(result["sent"]) == 1
+        assert FakeSMTP.connections == 1
+        assert result["dead"] == [bad]
+        assert pending() == []
+        assert [e["id"] for e in dead_letters()] == [bad]
+
+    def test_dead_letter_after_max_attempts(self):
+        """临时故障累计 OUTBOX_MAX_ATTEMPTS 次后移入死信，requeue_dead 可放回"""
+        from core.report_outbox import dead_letters, enqueue, flush, pending, requeue_dead
+        message_id = enqueue("report", "me@163.com", ["a@example.com"])
+        with patch("core.report_config.OUTBOX_MAX_ATTEMPTS", 2):
+            FakeSMTP.reset(script=[OSError("network down")] * 10)
+            assert flush(retries=0, sleep=lambda s: None)["dead"] == []
+            assert flush(retries=0, sleep=lambda s: None)["dead"] == [message_id]
+        assert pending() == []
+        assert dead_letters()[0]["attempts"] == 2
+        FakeSMTP.reset()
+        assert flush(sleep=lambda s: None)["sent"] == []  # 死信不再自动重试
+        assert requeue_dead() == [message_id]
+        assert flush(sleep=lambda s: None)["sent"] == [message_id]
+        assert dead_letters() == []
+
+    def test_concurrent_flushes_send_each_message_once(self):
+        """多个 flush 同时运行：每封只发送一次，不因文件已被删除而报错"""
+        import threading
+        from core.report_outbox import enqueue, flush, pending
+        ids = {enqueue(f"msg {i}", "me@163.com", ["a@example.com"]) for i in range(20)}
+        results, errors = [], []
+
+        def worker():
+            try:
+                results.append(flush(sleep=lambda s: None))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        sent = [message_id for r in results for message_id in r["sent"]]
+        assert sorted(sent) == sorted(ids)
+        assert len(FakeSMTP.delivered) == 20
+        assert pending() == []
+
+    def test_claimed_and_vanished_files_are_skipped(self, outbox_env):
+        """pending 期间文件被其他投递认领 / 删除时视为已送达；过期的认领放回发件箱"""
+        import os
+        from core.report_outbox import _claim, enqueue, flush, pending
+        first = enqueue("first", "me@163.com", ["a@example.com"])
+        second = enqueue("second", "me@163.com", ["a@example.com"])
+        assert _claim(first)["raw"] == "first"  # 模拟另一个进程正在投递 first
+        assert [e["id"] for e in pending()] == [second]
+        assert flush(sleep=lambda s: None)["sent"] == [second]
+        # 认领方已退出：超过 OUTBOX_CLAIM_TIMEOUT 后下一次 flush 接手
+        claimed = outbox_env / f"{first}.sending"
+        os.utime(claimed, (0, 0))
+        assert flush(sleep=lambda s: None)["sent"] == [first]
+        assert not claimed.exists()
+
+    def test_claiming_old_entry_is_not_stale(self, outbox_env):
+        """积压超过 OUTBOX_CLAIM_TIMEOUT 的邮件被认领后，其他 flush 不能把它当作过期认领收回"""
+        import os
+        from core.report_outbox import _claim, _recover_stale, enqueue, pending
+        message_id = enqueue("old", "me@163.com", ["a@example.com"])
+        os.utime(outbox_env / f"{message_id}.json", (0, 0))  # 早先投递失败后一直留在发件箱
+        assert _claim(message_id)["raw"] == "old"
+        _recover_stale()
+        assert (outbox_env / f"{message_id}.sending").exists()
+        assert pending() == []
+        assert _claim(message_id) is None
+
+    def test_auth_error_raises(self):
+        from core.report_outbox import enqueue, flush, pending
+        enqueue("report", "me@163.com", ["a@example.com"])
+        with patch("core.report_config.SMTP_PASSWORD", "wrong"):
+            with pytest.raises(RuntimeError, match="认证失败"):
+                flush(sleep=lambda s: None)
+        assert len(pending()) == 1
+        assert pending()[0]["attempts"] == 0  # 认证失败不计入这封邮件的失败次数
+
+
+class TestSendEmailViaOutbox:
+    """send_email：入队 + 投递，失败时报告留在发件箱"""
+
+    def test_send_to_multiple_recipients(self):
+        from core.report_service import send_email
+        send_email("# 报告")
+        assert len(FakeSMTP.delivered) == 1
+        from_addr, to_addrs, raw = FakeSMTP.delivered[0]
+        assert to_addrs == ["a@example.com", "b@example.com"]
+        assert "To: a@example.com, b@example.com" in raw
+
+    def test_failure_keeps_report_in_outbox(self):
+        from core.report_service import send_email
+        from core.report_outbox import pending
+        FakeSMTP.reset(script=[OSError("timeout")] * 10)
+        with patch("core.report_config.SMTP_RETRIES", 1), \
+             patch("core.report_outbox.time.sleep"):
+            with pytest.raises(RuntimeError, match="发件箱"):
+                send_email("# 报告")
+        assert len(pending()) == 1
@@ -0,0 +1,158 @@
+"""定时报告调度器的单元测试（假时钟，不真正等待）"""
+import subprocess
+import sys
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+
+@pytest.fixture(autouse=True)
+def scheduler_dir(tmp_path):
+    """状态与运行日志写到临时目录"""
+    with patch("core.config.PATH_REPORT_SCHEDULER", str(tmp_path / "report_scheduler")):
+        yield tmp_path / "report_scheduler"
+
+
+class FakeClock:
+    """可调用的假时钟；sleep 直接把时间往后拨"""
+
+    def __init__(self, start):
+        self.now = start
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += timedelta(seconds=seconds)
+
+
+class TestCronSchedule:
+    """CronSchedule：字段解析、匹配与下次触发时间"""
+
+    def test_weekly_sunday_evening(self):
+        from core.report_scheduler import CronSchedule
+        s = CronSchedule("0 21 * * 0")
+        assert s.matches(datetime(2026, 3, 1, 21, 0))      # 周日
+        assert not s.matches(datetime(2026, 3, 2, 21, 0))  # 周一
+        assert not s.matches(datetime(2026, 3, 1, 21, 1))
+        assert s.next_after(datetime(2026, 3, 2, 8, 0)) == datetime(2026, 3, 8, 21, 0)
+
+    def test_monthly_first_day(self):
+        from core.report_scheduler import CronSchedule
+        s = CronSchedule("0 9 1 * *")
+        assert s.next_after(datetime(2026, 3, 15, 0, 0)) == datetime(2026, 4, 1, 9, 0)
+
+    def test_ranges_lists_steps_and_sunday_7(self):
+        from core.report_scheduler import CronSchedule
+        s = CronSchedule("*/15 8-10 * * 1,7")
+        assert s.matches(datetime(2026, 3, 1, 8, 45))       # 周日（7）
+        assert s.matches(datetime(2026, 3, 2, 10, 0))       # 周一
+        assert not s.matches(datetime(2026, 3, 3, 9, 0))    # 周二
+        assert not s.matches(datetime(2026, 3, 2, 9, 10))
+
+    def test_invalid_expression(self):
+        from core.report_scheduler import CronSchedule
+        with pytest.raises(ValueError):
+            CronSchedule("0 25 * * *")
+        with pytest.raises(ValueError):
+            CronSchedule("0 21 * *")
+
+
+class TestReportScheduler:
+    """ReportScheduler：按计划触发、数据未变化时跳过、运行日志"""
+
+    def _scheduler(self, clock, hashes, runs, fail=False):
+        from core.report_scheduler import ReportScheduler
+
+        def runner(name, force):
+            if fail:
+                raise RuntimeError("邮件发送失败")
+            runs.append((name, clock.now, force))
+            return {"chars": 100}
+
+        return ReportScheduler({"weekly": "0 21 * * 0"}, clock=clock, sleep=clock.sleep,
+                               runner=runner, hasher=lambda: hashes[-1])
+
+    def test_fires_on_schedule_and_skips_unchanged(self):
+        from core.report_scheduler import read_run_log
+        clock = FakeClock(datetime(2026, 3, 1, 20, 0))  # 周日 20:00
+        runs, hashes = [], ["h1"]
+        scheduler = self._scheduler(clock, hashes, runs)
+        scheduler.run_forever(max_ticks=3)  # 20:00 → 21:00 → 下周日 21:00
+        assert [r[1] for r in runs] == [datetime(2026, 3, 1, 21, 0)]
+        log = read_run_log()
+        assert [r["status"] for r in log] == ["ok", "skipped"]
+        assert log[1]["at"] == "2026-03-08T21:00:00"
+
+    def test_changed_data_runs_again(self):
+        clock = FakeClock(datetime(2026, 3, 1, 21, 0))
+        runs, hashes = [], ["h1"]
+        scheduler = self._scheduler(clock, hashes, runs)
+        scheduler.tick()
+        hashes.append("h2")
+        clock.now = datetime(2026, 3, 8, 21, 0)
+        scheduler.tick()
+        assert len(runs) == 2
+
+    def test_same_minute_not_fired_twice(self):
+        clock = FakeClock(datetime(2026, 3, 1, 21, 0, 5))
+        runs, hashes = [], ["h1"]
+        scheduler = self._scheduler(clock, hashes, runs)
+        scheduler.tick()
+        hashes.append("h2")
+        clock.now = datetime(2026, 3, 1, 21, 0, 40)
+        assert scheduler.tick() == []
+        assert len(runs) == 1
+
+    def test_failure_logged_and_retried_next_time(self):
+        """失败的运行不记录哈希，下次触发时即使数据没变也会重试"""
+        from core.report_scheduler import read_run_log
+        clock = FakeClock(datetime(2026, 3, 1, 21, 0))
+        runs, hashes = [], ["h1"]
+        self._scheduler(clock, hashes, runs, fail=True).tick()
+        clock.now = datetime(2026, 3, 8, 21, 0)
+        self._scheduler(clock, hashes, runs).tick()
+        assert [r["status"] for r in read_run_log()] == ["failed", "ok"]
+        assert "邮件发送失败" in read_run_log()[0]["error"]
+
+    def test_force_ignores_hash(self):
+        clock = FakeClock(datetime(2026, 3, 3, 12, 0))
+        runs, hashes = [], ["h1"]
+        scheduler = self._scheduler(clock, hashes, runs)
+        scheduler.run("weekly")
+        assert scheduler.run("weekly")["status"] == "skipped"
+        assert scheduler.run("weekly", force=True)["status"] == "ok"
+        assert runs[-1][2] is True
+
+    def test_default_runner_mode_per_schedule(self):
+        """周报、月报按各自的数据模式生成；未配置的计划使用 REPORT_MODE"""
+        from core.report_scheduler import default_runner
+        with patch("core.report_service.generate_report", return_value="报告") as generate, \
+             patch("core.report_service.send_email") as send, \
+             patch("core.report_config.REPORT_MODE", "features"):
+            assert default_runner("weekly", False)["mode"] == "delta"
+            assert default_runner("monthly", True)["mode"] == "mapreduce"
+            assert default_runner("adhoc", False)["mode"] == "features"
+        assert [c.kwargs["mode"] for c in generate.call_args_list] == ["delta", "mapreduce", "features"]
+        assert [c.kwargs["force"] for c in generate.call_args_list] == [False, True, False]
+        assert send.call_count == 3
+
+    def test_data_hash_tracks_file_content(self, tmp_path):
+        from core.report_scheduler import data_hash
+        year = datetime.now().year
+        folder = tmp_path / "summary"
+        folder.mkdir()
+        with patch("core.config.PATH_SUMMARY", str(folder)):
+            empty = data_hash(year)
+            (folder / f"daily_summary_{year}.csv").write_text("Date,Mood\n2026-03-01,4\n", encoding="utf-8")
+            first = data_hash(year)
+            assert first != empty
+            assert data_hash(year) == first
+
+    def test_no_streamlit_import(self):
+        """守护进程不应导入 streamlit"""
+        code = "import sys, core.report_scheduler, core.report_service; print('streamlit' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert out.stdout.strip() == "False"
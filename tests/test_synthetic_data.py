@@ -0,0 +1,85 @@
+"""合成日记数据生成器的单元测试"""
+import pandas as pd
+import pytest
+from contextlib import ExitStack
+from datetime import date
+from unittest.mock import patch
+
+DATA_PATHS = {
+    "PATH_SUMMARY": "summary", "PATH_TASKS": "tasks", "PATH_TIME": "time",
+    "PATH_WEEKLY_SUMMARY": "weekly_summary", "PATH_WEEKLY_HABITS": "weekly_habits",
+    "PATH_WEEKLY_TASKS": "weekly_tasks", "PATH_MONTHLY_SUMMARY": "monthly_summary",
+    "PATH_MONTHLY_TASKS": "monthly_tasks",
+}
+
+
+def _generate(base_dir, **kwargs):
+    from core.synthetic_data import generate
+    options = {"years": 2, "end_year": 2025, "until": date(2025, 12, 31), "seed": 1}
+    options.update(kwargs)
+    return generate(base_dir=str(base_dir), **options)
+
+
+class TestSyntheticData:
+    """generate：确定性、密度参数、与现有读取函数兼容"""
+
+    def test_same_seed_same_bytes(self, tmp_path):
+        first = _generate(tmp_path / "a")
+        second = _generate(tmp_path / "b")
+        assert first["days"] == second["days"]
+        for path_a in first["files"]:
+            path_b = path_a.replace(str(tmp_path / "a"), str(tmp_path / "b"))
+            with open(path_a, "rb") as fa, open(path_b, "rb") as fb:
+                assert fa.read() == fb.read()
+
+    def test_day_independent_of_range(self, tmp_path):
+        """同一 seed 下某一天的数据不随生成年数变化"""
+        _generate(tmp_path / "short", years=1)
+        _generate(tmp_path / "long", years=3)
+        short = pd.read_csv(tmp_path / "short" / "data" / "summary" / "daily_summary_2025.csv", encoding="utf-8-sig")
+        long = pd.read_csv(tmp_path / "long" / "data" / "summary" / "daily_summary_2025.csv", encoding="utf-8-sig")
+        pd.testing.assert_frame_equal(short, long)
+
+    def test_density_and_layout(self, tmp_path):
+        dense = _generate(tmp_path / "dense", density=1.0, tasks_per_day=6)
+        sparse = _generate(tmp_path / "sparse", density=0.3, tasks_per_day=1)
+        assert dense["days"] == 731  # 2024 为闰年
+        assert dense["time_rows"] == 731 * 48
+        assert sparse["days"] < dense["days"] / 2
+        assert sparse["tasks_rows"] < dense["tasks_rows"] / 4
+        assert dense["months"] == 24
+        time_df = pd.read_csv(tmp_path / "dense" / "data" / "time" / "time_log_2025.csv", encoding="utf-8-sig")
+        assert time_df.groupby("Date").size().eq(48).all()
+
+    def test_refuses_to_overwrite(self, tmp_path):
+        _generate(tmp_path)
+        with pytest.raises(ValueError, match="目标文件已存在"):
+            _generate(tmp_path)
+        _generate(tmp_path, overwrite=True)
+
+    def test_invalid_density(self, tmp_path):
+        with pytest.raises(ValueError, match="density"):
+            _generate(tmp_path, density=0)
+
+    def test_readable_by_data_managers(self, tmp_path):
+        from core.data_manager import load_data_for_date
+        from core.weekly_data_manager import load_weekly_data, aggregate_daily_data
+        from core.monthly_data_manager import load_monthly_data
+        _generate(tmp_path, density=1.0)
+        with ExitStack() as stack:
+            stack.enter_context(patch("core.config.BASE_DIR", str(tmp_path)))
+            for attr, folder in DATA_PATHS.items():
+                stack.enter_context(patch(f"core.config.{attr}", str(tmp_path / "data" / folder)))
+            summary, tasks, time_df = load_data_for_date(date(2025, 3, 5))
+            assert summary["Date"] == "2025-03-05"
+            assert summary["Reflect_Thoughts"] != ""
+            assert len(time_df) == 48 and not tasks.empty
+
+            week_summary, habits, week_tasks = load_weekly_data("2025-W10", 2025)
+            assert week_summary["Week"] == "2025-W10"
+            assert set(habits["Mon"]) <= {"✅", "❌"}
+            assert aggregate_daily_data(date(2025, 3, 3))["Avg_Mood"] == week_summary["Avg_Mood"]
+
+            month_summary, month_tasks = load_monthly_data("2025-03", 2025)
+            assert month_summary["Month_Number"] == 3
+            assert not month_tasks.empty